@@ -0,0 +1,64 @@
+"""Notify webhook secret cache invalidation on tenant secret rotation.
+
+Revision ID: 202610171000
+Revises: 202602071100
+Create Date: 2026-10-17 10:00:00
+
+Motivation:
+- API processes cache `security.resolve_tenant_webhook_secrets` results keyed by
+  api_key_hash to avoid a DB round trip on every webhook request.
+- Secret rotation (or API key rotation / tenant deletion) must evict stale entries
+  promptly instead of waiting for TTL expiry.
+
+Approach:
+- AFTER UPDATE/DELETE trigger on public.tenants emits
+  `pg_notify('tenant_webhook_secrets_changed', <old api_key_hash>)` when any
+  webhook secret or the api_key_hash changes.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "202610171000"
+down_revision: Union[str, None] = "202602071100"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION public.fn_notify_tenant_webhook_secrets_changed()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+          IF TG_OP = 'DELETE'
+             OR NEW.api_key_hash IS DISTINCT FROM OLD.api_key_hash
+             OR NEW.shopify_webhook_secret IS DISTINCT FROM OLD.shopify_webhook_secret
+             OR NEW.stripe_webhook_secret IS DISTINCT FROM OLD.stripe_webhook_secret
+             OR NEW.paypal_webhook_secret IS DISTINCT FROM OLD.paypal_webhook_secret
+             OR NEW.woocommerce_webhook_secret IS DISTINCT FROM OLD.woocommerce_webhook_secret
+          THEN
+            PERFORM pg_notify('tenant_webhook_secrets_changed', COALESCE(OLD.api_key_hash, ''));
+          END IF;
+          RETURN NULL;
+        END;
+        $$;
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER trg_tenants_webhook_secrets_changed
+        AFTER UPDATE OR DELETE ON public.tenants
+        FOR EACH ROW
+        EXECUTE FUNCTION public.fn_notify_tenant_webhook_secrets_changed()
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_tenants_webhook_secrets_changed ON public.tenants")
+    op.execute("DROP FUNCTION IF EXISTS public.fn_notify_tenant_webhook_secrets_changed()")
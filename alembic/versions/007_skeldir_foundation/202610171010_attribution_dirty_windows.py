@@ -0,0 +1,101 @@
+"""Coalesced attribution recompute scheduling: dirty windows + per-tenant flush schedule.
+
+Revision ID: 202610171010
+Revises: 202610171000
+Create Date: 2026-10-17 10:10:00
+
+Motivation:
+- Every ingested event previously enqueued its own full-day recompute + matview refresh chain.
+- Bursts of events for the same tenant/day now collapse into one dirty-window row and at most
+  one pending flush per tenant per debounce interval.
+
+Tables:
+- attribution_dirty_windows: (tenant_id, window_start, window_end) marked by ingestion,
+  claimed (deleted) by the flush task. mark_count records how many requests were coalesced.
+- attribution_recompute_schedule: one row per tenant with a flush enqueued. Ingestion upserts
+  it (row lock held until commit); the flush task deletes it before claiming dirty windows so
+  a concurrent mark either lands in this flush or schedules the next one.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "202610171010"
+down_revision: Union[str, None] = "202610171000"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+_TABLES = ("attribution_dirty_windows", "attribution_recompute_schedule")
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE attribution_dirty_windows (
+            tenant_id uuid NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+            window_start timestamptz NOT NULL,
+            window_end timestamptz NOT NULL,
+            mark_count integer NOT NULL DEFAULT 1,
+            first_marked_at timestamptz NOT NULL DEFAULT now(),
+            last_marked_at timestamptz NOT NULL DEFAULT now(),
+            PRIMARY KEY (tenant_id, window_start, window_end),
+            CONSTRAINT ck_attribution_dirty_windows_bounds_valid CHECK (window_end > window_start),
+            CONSTRAINT ck_attribution_dirty_windows_mark_count_positive CHECK (mark_count >= 1)
+        )
+        """
+    )
+    op.execute(
+        """
+        COMMENT ON TABLE attribution_dirty_windows IS
+            'Attribution windows awaiting recompute. Purpose: coalesce per-event recompute requests into one job per tenant per debounce interval. Data class: Non-PII. Ownership: Attribution service. RLS enabled for tenant isolation.'
+        """
+    )
+
+    op.execute(
+        """
+        CREATE TABLE attribution_recompute_schedule (
+            tenant_id uuid PRIMARY KEY REFERENCES tenants(id) ON DELETE CASCADE,
+            flush_due_at timestamptz NOT NULL,
+            created_at timestamptz NOT NULL DEFAULT now()
+        )
+        """
+    )
+    op.execute(
+        """
+        COMMENT ON TABLE attribution_recompute_schedule IS
+            'One row per tenant with a dirty-window flush enqueued. Purpose: debounce gate for coalesced attribution recompute. Data class: Non-PII. Ownership: Attribution service. RLS enabled for tenant isolation.'
+        """
+    )
+
+    for table in _TABLES:
+        op.execute(f"ALTER TABLE {table} ENABLE ROW LEVEL SECURITY")
+        op.execute(f"ALTER TABLE {table} FORCE ROW LEVEL SECURITY")
+        op.execute(
+            f"""
+            DROP POLICY IF EXISTS tenant_isolation_policy ON {table};
+            CREATE POLICY tenant_isolation_policy ON {table}
+                USING (tenant_id = current_setting('app.current_tenant_id', true)::UUID)
+                WITH CHECK (tenant_id = current_setting('app.current_tenant_id', true)::UUID);
+            """
+        )
+        op.execute(f"GRANT SELECT, INSERT, UPDATE, DELETE ON TABLE {table} TO app_rw")
+        op.execute(f"GRANT SELECT ON TABLE {table} TO app_ro")
+        op.execute(
+            f"""
+            DO $$
+            BEGIN
+              IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'app_user') THEN
+                GRANT SELECT, INSERT, UPDATE, DELETE ON TABLE {table} TO app_user;
+              END IF;
+            END
+            $$;
+            """
+        )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS attribution_recompute_schedule CASCADE")  # CI:DESTRUCTIVE_OK - See docs/database/RUNBOOK-MIGRATION-POLICY.md
+    op.execute("DROP TABLE IF EXISTS attribution_dirty_windows CASCADE")  # CI:DESTRUCTIVE_OK - See docs/database/RUNBOOK-MIGRATION-POLICY.md
@@ -0,0 +1,81 @@
+"""Incremental attribution recompute: per-window event watermark on attribution_recompute_jobs.
+
+Revision ID: 202610171020
+Revises: 202610171010
+Create Date: 2026-10-17 10:20:00
+
+Motivation:
+- recompute_window re-allocated every event in the window on every run, even when a
+  single event arrived since the previous run.
+- The job identity row (tenant_id, window_start, window_end, model_version) now records
+  the newest event (created_at, id) allocated by the last successful run. Subsequent runs
+  allocate only events created at or after that watermark (minus a safety lag).
+- A new window definition or model version is a new job identity row with no watermark,
+  so it always takes the full recompute path.
+
+Index:
+- idx_attribution_events_tenant_created_at supports the incremental scan so its cost is
+  proportional to the new events, not the window size.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "202610171020"
+down_revision: Union[str, None] = "202610171010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        ALTER TABLE attribution_recompute_jobs
+            ADD COLUMN watermark_created_at timestamptz,
+            ADD COLUMN watermark_event_id uuid,
+            ADD COLUMN last_run_mode text,
+            ADD CONSTRAINT ck_attribution_recompute_jobs_last_run_mode_valid
+                CHECK (last_run_mode IS NULL OR last_run_mode IN ('full', 'incremental'))
+        """
+    )
+    op.execute(
+        """
+        COMMENT ON COLUMN attribution_recompute_jobs.watermark_created_at IS
+            'created_at of the newest attribution event allocated by the last successful run. Purpose: Incremental recompute high watermark; NULL forces a full recompute. Data class: Non-PII.'
+        """
+    )
+    op.execute(
+        """
+        COMMENT ON COLUMN attribution_recompute_jobs.watermark_event_id IS
+            'Id of the attribution event at the watermark (ties broken by id). Purpose: Watermark provenance for debugging. Data class: Non-PII.'
+        """
+    )
+    op.execute(
+        """
+        COMMENT ON COLUMN attribution_recompute_jobs.last_run_mode IS
+            'Mode of the last successful run. Valid values: full, incremental. Purpose: Operational visibility. Data class: Non-PII.'
+        """
+    )
+
+    op.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_attribution_events_tenant_created_at
+            ON attribution_events (tenant_id, created_at)
+        """
+    )
+    op.execute(
+        """
+        COMMENT ON INDEX idx_attribution_events_tenant_created_at IS
+            'Supports incremental attribution recompute. Query pattern: WHERE tenant_id = X AND created_at >= watermark.'
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_attribution_events_tenant_created_at")
+    op.execute("ALTER TABLE attribution_recompute_jobs DROP CONSTRAINT IF EXISTS ck_attribution_recompute_jobs_last_run_mode_valid")  # CI:DESTRUCTIVE_OK - See docs/database/RUNBOOK-MIGRATION-POLICY.md
+    op.execute("ALTER TABLE attribution_recompute_jobs DROP COLUMN IF EXISTS last_run_mode")  # CI:DESTRUCTIVE_OK - See docs/database/RUNBOOK-MIGRATION-POLICY.md
+    op.execute("ALTER TABLE attribution_recompute_jobs DROP COLUMN IF EXISTS watermark_event_id")  # CI:DESTRUCTIVE_OK - See docs/database/RUNBOOK-MIGRATION-POLICY.md
+    op.execute("ALTER TABLE attribution_recompute_jobs DROP COLUMN IF EXISTS watermark_created_at")  # CI:DESTRUCTIVE_OK - See docs/database/RUNBOOK-MIGRATION-POLICY.md
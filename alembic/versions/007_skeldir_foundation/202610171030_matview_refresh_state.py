@@ -0,0 +1,95 @@
+"""Staleness-aware matview refresh: per-view last successful refresh time.
+
+Revision ID: 202610171030
+Revises: 202610171020
+Create Date: 2026-10-17 10:30:00
+
+Motivation:
+- pulse_matviews_global and the post-recompute refresh chain refreshed every registry
+  view for every tenant, ignoring max_staleness_seconds. Each REFRESH MATERIALIZED VIEW
+  is a full global aggregation, so N tenants meant N identical refreshes per pulse.
+- The refresh executor now records the last successful refresh per view and the scheduler
+  skips views that are still inside their staleness budget.
+
+Table:
+- matview_refresh_state: one row per registry view (global, not tenant-scoped; the
+  materialized views themselves are global). The executor locks the row for the duration
+  of a refresh, which serializes refreshes of the same view across tenants.
+  deferred_refresh_at gates the single deferred refresh enqueued when a realtime
+  trigger arrives while the view is still fresh.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "202610171030"
+down_revision: Union[str, None] = "202610171020"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+_REGISTRY_VIEWS = (
+    "mv_allocation_summary",
+    "mv_channel_performance",
+    "mv_daily_revenue_summary",
+    "mv_realtime_revenue",
+    "mv_reconciliation_status",
+)
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE matview_refresh_state (
+            view_name text PRIMARY KEY,
+            last_refreshed_at timestamptz,
+            last_duration_ms integer,
+            refresh_count bigint NOT NULL DEFAULT 0,
+            deferred_refresh_at timestamptz,
+            updated_at timestamptz NOT NULL DEFAULT now(),
+            CONSTRAINT ck_matview_refresh_state_duration_non_negative
+                CHECK (last_duration_ms IS NULL OR last_duration_ms >= 0)
+        )
+        """
+    )
+    op.execute(
+        """
+        COMMENT ON TABLE matview_refresh_state IS
+            'Last successful refresh per materialized view. Purpose: staleness-aware refresh scheduling and cross-tenant refresh serialization. Data class: Non-PII. Ownership: Matview executor. Global table (no tenant_id, no RLS).'
+        """
+    )
+    op.execute(
+        """
+        COMMENT ON COLUMN matview_refresh_state.last_refreshed_at IS
+            'Transaction start time of the last successful refresh. NULL means never refreshed (always due). Data class: Non-PII.'
+        """
+    )
+    op.execute(
+        """
+        COMMENT ON COLUMN matview_refresh_state.deferred_refresh_at IS
+            'Time a deferred refresh was enqueued for. A new deferral is only claimed once this has passed. Data class: Non-PII.'
+        """
+    )
+
+    views = ", ".join(f"('{view}')" for view in _REGISTRY_VIEWS)
+    op.execute(f"INSERT INTO matview_refresh_state (view_name) VALUES {views} ON CONFLICT DO NOTHING")
+
+    op.execute("GRANT SELECT, INSERT, UPDATE ON TABLE matview_refresh_state TO app_rw")
+    op.execute("GRANT SELECT ON TABLE matview_refresh_state TO app_ro")
+    op.execute(
+        """
+        DO $$
+        BEGIN
+          IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'app_user') THEN
+            GRANT SELECT, INSERT, UPDATE ON TABLE matview_refresh_state TO app_user;
+          END IF;
+        END
+        $$;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS matview_refresh_state")  # CI:DESTRUCTIVE_OK - See docs/database/RUNBOOK-MIGRATION-POLICY.md
@@ -0,0 +1,421 @@
+"""Per-tenant incremental summary tables as an alternative to global matviews.
+
+Revision ID: 202610171040
+Revises: 202610171030
+Create Date: 2026-10-17 10:40:00
+
+Motivation:
+- Every registry matview aggregates all tenants; REFRESH MATERIALIZED VIEW CONCURRENTLY
+  re-aggregates the whole base table no matter which tenant changed.
+- Summary tables hold the same aggregates keyed by tenant. Statement-level triggers on the
+  base tables record which (tenant, bucket) groups changed; the refresh recomputes only
+  those groups for one tenant, so cost scales with that tenant's changes.
+
+Tables:
+- summary_dirty_buckets: (tenant_id, summary_name, bucket) changed since the last refresh.
+  bucket is a UTC day (YYYY-MM-DD) for the daily summaries, the event_id (or 'null' for
+  orphaned allocations) for allocation totals, and '*' for the per-tenant realtime total.
+- summary_channel_performance      ~ mv_channel_performance (no 90-day cutoff; filter on read)
+- summary_daily_revenue            ~ mv_daily_revenue_summary
+- summary_allocation_totals        ~ mv_allocation_summary
+- summary_realtime_revenue         ~ mv_realtime_revenue (freshness derived on read)
+
+Triggers (transition tables, one per event type as Postgres requires):
+- attribution_allocations -> channel_performance (day), allocation_totals (event_id)
+- revenue_ledger          -> daily_revenue (day), realtime_revenue ('*')
+
+The triggers are created disabled: dirty tracking costs every allocation and ledger write,
+and only the summary_tables backend consumes it. security.set_summary_dirty_tracking(enabled)
+toggles them (the matview scheduler keeps it in line with MATVIEW_REFRESH_BACKEND), and
+security.seed_summary_dirty_buckets() marks all existing data dirty, one tenant at a time
+because every table involved is FORCE RLS, so the first refresh per tenant backfills its
+summaries.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "202610171040"
+down_revision: Union[str, None] = "202610171030"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+_TABLES = (
+    "summary_dirty_buckets",
+    "summary_channel_performance",
+    "summary_daily_revenue",
+    "summary_allocation_totals",
+    "summary_realtime_revenue",
+)
+
+_ALLOCATION_BUCKETS_SQL = """
+    SELECT tenant_id, 'channel_performance', to_char(created_at AT TIME ZONE 'UTC', 'YYYY-MM-DD') FROM {rows}
+    UNION
+    SELECT tenant_id, 'allocation_totals', COALESCE(event_id::text, 'null') FROM {rows}
+"""
+
+_LEDGER_BUCKETS_SQL = """
+    SELECT tenant_id, 'daily_revenue', to_char(verification_timestamp AT TIME ZONE 'UTC', 'YYYY-MM-DD') FROM {rows}
+    UNION
+    SELECT tenant_id, 'realtime_revenue', '*' FROM {rows}
+"""
+
+_TRIGGERS = (
+    # (base table, function, buckets SQL)
+    ("attribution_allocations", "mark_summary_dirty_allocations", _ALLOCATION_BUCKETS_SQL),
+    ("revenue_ledger", "mark_summary_dirty_revenue_ledger", _LEDGER_BUCKETS_SQL),
+)
+
+_TRIGGER_EVENTS = ("insert", "update", "delete")
+
+_NIL_TENANT_ID = "00000000-0000-0000-0000-000000000000"
+
+
+def _trigger_names() -> list[str]:
+    return [f"trg_{function}_{event}" for _table, function, _buckets_sql in _TRIGGERS for event in _TRIGGER_EVENTS]
+
+
+def _create_tables() -> None:
+    op.execute(
+        """
+        CREATE TABLE summary_dirty_buckets (
+            tenant_id uuid NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+            summary_name text NOT NULL,
+            bucket text NOT NULL,
+            marked_at timestamptz NOT NULL DEFAULT now(),
+            PRIMARY KEY (tenant_id, summary_name, bucket),
+            CONSTRAINT ck_summary_dirty_buckets_summary_name_valid CHECK (
+                summary_name IN ('channel_performance', 'daily_revenue', 'allocation_totals', 'realtime_revenue')
+            )
+        )
+        """
+    )
+    op.execute(
+        """
+        COMMENT ON TABLE summary_dirty_buckets IS
+            'Summary groups changed since their last incremental refresh. Written by statement-level triggers on attribution_allocations and revenue_ledger; claimed (deleted) by the summary refresh. Data class: Non-PII. Ownership: Matview executor. RLS enabled for tenant isolation.'
+        """
+    )
+
+    op.execute(
+        """
+        CREATE TABLE summary_channel_performance (
+            tenant_id uuid NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+            channel_code text NOT NULL,
+            allocation_date date NOT NULL,
+            total_conversions bigint NOT NULL,
+            total_revenue_cents bigint NOT NULL,
+            avg_confidence_score numeric,
+            total_allocations bigint NOT NULL,
+            refreshed_at timestamptz NOT NULL DEFAULT now(),
+            PRIMARY KEY (tenant_id, allocation_date, channel_code)
+        )
+        """
+    )
+    op.execute(
+        """
+        COMMENT ON TABLE summary_channel_performance IS
+            'Per-tenant incremental equivalent of mv_channel_performance (UTC day buckets, no rolling cutoff). Data class: Non-PII. Ownership: Matview executor. RLS enabled for tenant isolation.'
+        """
+    )
+
+    op.execute(
+        """
+        CREATE TABLE summary_daily_revenue (
+            tenant_id uuid NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+            revenue_date date NOT NULL,
+            state text NOT NULL,
+            currency text NOT NULL,
+            total_amount_cents bigint NOT NULL,
+            transaction_count bigint NOT NULL,
+            refreshed_at timestamptz NOT NULL DEFAULT now(),
+            PRIMARY KEY (tenant_id, revenue_date, state, currency)
+        )
+        """
+    )
+    op.execute(
+        """
+        COMMENT ON TABLE summary_daily_revenue IS
+            'Per-tenant incremental equivalent of mv_daily_revenue_summary (UTC day buckets). Data class: Non-PII. Ownership: Matview executor. RLS enabled for tenant isolation.'
+        """
+    )
+
+    op.execute(
+        """
+        CREATE TABLE summary_allocation_totals (
+            tenant_id uuid NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+            event_id uuid,
+            model_version text NOT NULL,
+            total_allocated_cents bigint NOT NULL,
+            event_revenue_cents bigint,
+            is_balanced boolean,
+            drift_cents bigint,
+            refreshed_at timestamptz NOT NULL DEFAULT now(),
+            CONSTRAINT uq_summary_allocation_totals_key
+                UNIQUE NULLS NOT DISTINCT (tenant_id, event_id, model_version)
+        )
+        """
+    )
+    op.execute(
+        """
+        COMMENT ON TABLE summary_allocation_totals IS
+            'Per-tenant incremental equivalent of mv_allocation_summary. event_id NULL groups allocations whose event was deleted. Data class: Non-PII. Ownership: Matview executor. RLS enabled for tenant isolation.'
+        """
+    )
+
+    op.execute(
+        """
+        CREATE TABLE summary_realtime_revenue (
+            tenant_id uuid PRIMARY KEY REFERENCES tenants(id) ON DELETE CASCADE,
+            total_revenue numeric NOT NULL,
+            verified boolean,
+            last_updated_at timestamptz,
+            refreshed_at timestamptz NOT NULL DEFAULT now()
+        )
+        """
+    )
+    op.execute(
+        """
+        COMMENT ON TABLE summary_realtime_revenue IS
+            'Per-tenant incremental equivalent of mv_realtime_revenue; data_freshness_seconds is now() - last_updated_at at read time. Data class: Non-PII. Ownership: Matview executor. RLS enabled for tenant isolation.'
+        """
+    )
+
+    op.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_revenue_ledger_tenant_verification_timestamp
+            ON revenue_ledger (tenant_id, verification_timestamp)
+        """
+    )
+    op.execute(
+        """
+        COMMENT ON INDEX idx_revenue_ledger_tenant_verification_timestamp IS
+            'Supports incremental summary_daily_revenue refresh. Query pattern: WHERE tenant_id = X AND verification_timestamp within a UTC day.'
+        """
+    )
+
+
+def _enable_rls_and_grants() -> None:
+    for table in _TABLES:
+        op.execute(f"ALTER TABLE {table} ENABLE ROW LEVEL SECURITY")
+        op.execute(f"ALTER TABLE {table} FORCE ROW LEVEL SECURITY")
+        op.execute(
+            f"""
+            DROP POLICY IF EXISTS tenant_isolation_policy ON {table};
+            CREATE POLICY tenant_isolation_policy ON {table}
+                USING (tenant_id = current_setting('app.current_tenant_id', true)::UUID)
+                WITH CHECK (tenant_id = current_setting('app.current_tenant_id', true)::UUID);
+            """
+        )
+        op.execute(f"GRANT SELECT, INSERT, UPDATE, DELETE ON TABLE {table} TO app_rw")
+        op.execute(f"GRANT SELECT ON TABLE {table} TO app_ro")
+        op.execute(
+            f"""
+            DO $$
+            BEGIN
+              IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'app_user') THEN
+                GRANT SELECT, INSERT, UPDATE, DELETE ON TABLE {table} TO app_user;
+              END IF;
+            END
+            $$;
+            """
+        )
+
+
+def _create_triggers() -> None:
+    for table, function, buckets_sql in _TRIGGERS:
+        new_buckets = buckets_sql.format(rows="newrows")
+        old_buckets = buckets_sql.format(rows="oldrows")
+        op.execute(
+            f"""
+            CREATE OR REPLACE FUNCTION {function}()
+            RETURNS TRIGGER AS $$
+            BEGIN
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    INSERT INTO summary_dirty_buckets (tenant_id, summary_name, bucket)
+                    {new_buckets}
+                    ON CONFLICT DO NOTHING;
+                END IF;
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    INSERT INTO summary_dirty_buckets (tenant_id, summary_name, bucket)
+                    {old_buckets}
+                    ON CONFLICT DO NOTHING;
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+            """
+        )
+        op.execute(
+            f"""
+            COMMENT ON FUNCTION {function}() IS
+            'STATEMENT-level: records the summary buckets touched by a write to {table} in summary_dirty_buckets (one insert per statement via transition tables).';
+            """
+        )
+        op.execute(
+            f"""
+            CREATE TRIGGER trg_{function}_insert
+                AFTER INSERT ON {table}
+                REFERENCING NEW TABLE AS newrows
+                FOR EACH STATEMENT EXECUTE FUNCTION {function}();
+            """
+        )
+        op.execute(
+            f"""
+            CREATE TRIGGER trg_{function}_update
+                AFTER UPDATE ON {table}
+                REFERENCING NEW TABLE AS newrows OLD TABLE AS oldrows
+                FOR EACH STATEMENT EXECUTE FUNCTION {function}();
+            """
+        )
+        op.execute(
+            f"""
+            CREATE TRIGGER trg_{function}_delete
+                AFTER DELETE ON {table}
+                REFERENCING OLD TABLE AS oldrows
+                FOR EACH STATEMENT EXECUTE FUNCTION {function}();
+            """
+        )
+        # Tracking only pays off under the summary_tables backend; the matview scheduler
+        # enables it (and reseeds) when that backend is selected.
+        for event in _TRIGGER_EVENTS:
+            op.execute(f"ALTER TABLE {table} DISABLE TRIGGER trg_{function}_{event}")
+
+
+def _toggle_triggers_sql(action: str) -> str:
+    return "\n            ".join(
+        f"ALTER TABLE public.{table} {action} TRIGGER trg_{function}_{event};"
+        for table, function, _buckets_sql in _TRIGGERS
+        for event in _TRIGGER_EVENTS
+    )
+
+
+def _create_tracking_functions() -> None:
+    # The base tables and summary_dirty_buckets are FORCE RLS, so even the owner only sees
+    # the tenant named by app.current_tenant_id: seed one tenant at a time.
+    seed_inserts = "\n".join(
+        f"""
+            INSERT INTO summary_dirty_buckets (tenant_id, summary_name, bucket)
+            {buckets_sql.format(rows=table)}
+            ON CONFLICT DO NOTHING;
+            GET DIAGNOSTICS inserted = ROW_COUNT;
+            seeded := seeded + inserted;"""
+        for table, _function, buckets_sql in _TRIGGERS
+    )
+    op.execute("CREATE SCHEMA IF NOT EXISTS security")
+    op.execute(
+        f"""
+        CREATE OR REPLACE FUNCTION security.seed_summary_dirty_buckets()
+        RETURNS bigint
+        LANGUAGE plpgsql
+        SECURITY DEFINER
+        SET search_path = pg_catalog, public
+        AS $$
+        DECLARE
+          tenant uuid;
+          previous_tenant text := current_setting('app.current_tenant_id', true);
+          inserted bigint;
+          seeded bigint := 0;
+        BEGIN
+          FOR tenant IN SELECT id FROM tenants ORDER BY id LOOP
+            PERFORM set_config('app.current_tenant_id', tenant::text, true);
+            {seed_inserts}
+          END LOOP;
+          PERFORM set_config(
+            'app.current_tenant_id',
+            COALESCE(NULLIF(previous_tenant, ''), '{_NIL_TENANT_ID}'),
+            true
+          );
+          RETURN seeded;
+        END
+        $$;
+        """
+    )
+    op.execute(
+        """
+        COMMENT ON FUNCTION security.seed_summary_dirty_buckets() IS
+        'Marks every summary bucket of every tenant dirty so the next refresh recomputes it from the base tables. Run after dirty tracking is enabled.';
+        """
+    )
+    op.execute(
+        f"""
+        CREATE OR REPLACE FUNCTION security.set_summary_dirty_tracking(enabled boolean)
+        RETURNS boolean
+        LANGUAGE plpgsql
+        SECURITY DEFINER
+        SET search_path = pg_catalog, public
+        AS $$
+        DECLARE
+          tracking boolean;
+        BEGIN
+          SELECT bool_and(t.tgenabled <> 'D') INTO tracking
+          FROM pg_trigger t
+          WHERE t.tgname IN ({", ".join(f"'{name}'" for name in _trigger_names())});
+          IF tracking IS NOT DISTINCT FROM enabled THEN
+            RETURN false;
+          END IF;
+          IF enabled THEN
+            {_toggle_triggers_sql("ENABLE")}
+          ELSE
+            {_toggle_triggers_sql("DISABLE")}
+            -- Stale marks would only be re-claimed once tracking is back on, and enabling
+            -- reseeds every bucket anyway.
+            TRUNCATE summary_dirty_buckets;  -- # CI:DESTRUCTIVE_OK - dirty marks are reseeded on enable; See docs/database/RUNBOOK-MIGRATION-POLICY.md
+          END IF;
+          RETURN true;
+        END
+        $$;
+        """
+    )
+    op.execute(
+        """
+        COMMENT ON FUNCTION security.set_summary_dirty_tracking(boolean) IS
+        'Enables or disables the summary dirty-bucket triggers; returns whether the state changed. Writes made while tracking was off are not recorded, so call security.seed_summary_dirty_buckets() after enabling.';
+        """
+    )
+    op.execute("REVOKE ALL ON FUNCTION security.seed_summary_dirty_buckets() FROM PUBLIC")
+    op.execute("REVOKE ALL ON FUNCTION security.set_summary_dirty_tracking(boolean) FROM PUBLIC")
+    op.execute(
+        """
+        DO $$
+        BEGIN
+          IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'app_user') THEN
+            GRANT USAGE ON SCHEMA security TO app_user;
+            GRANT EXECUTE ON FUNCTION security.seed_summary_dirty_buckets() TO app_user;
+            GRANT EXECUTE ON FUNCTION security.set_summary_dirty_tracking(boolean) TO app_user;
+          END IF;
+
+          IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'app_rw') THEN
+            GRANT USAGE ON SCHEMA security TO app_rw;
+            GRANT EXECUTE ON FUNCTION security.seed_summary_dirty_buckets() TO app_rw;
+            GRANT EXECUTE ON FUNCTION security.set_summary_dirty_tracking(boolean) TO app_rw;
+          END IF;
+        END
+        $$;
+        """
+    )
+
+
+def upgrade() -> None:
+    _create_tables()
+    _enable_rls_and_grants()
+    _create_triggers()
+    _create_tracking_functions()
+
+
+def downgrade() -> None:
+    op.execute("DROP FUNCTION IF EXISTS security.set_summary_dirty_tracking(boolean)")
+    op.execute("DROP FUNCTION IF EXISTS security.seed_summary_dirty_buckets()")
+    for table, function, _buckets_sql in _TRIGGERS:
+        for event in _TRIGGER_EVENTS:
+            op.execute(f"DROP TRIGGER IF EXISTS trg_{function}_{event} ON {table}")
+        op.execute(f"DROP FUNCTION IF EXISTS {function}()")
+    op.execute("DROP INDEX IF EXISTS idx_revenue_ledger_tenant_verification_timestamp")
+    op.execute("DROP TABLE IF EXISTS summary_realtime_revenue CASCADE")  # CI:DESTRUCTIVE_OK - See docs/database/RUNBOOK-MIGRATION-POLICY.md
+    op.execute("DROP TABLE IF EXISTS summary_allocation_totals CASCADE")  # CI:DESTRUCTIVE_OK - See docs/database/RUNBOOK-MIGRATION-POLICY.md
+    op.execute("DROP TABLE IF EXISTS summary_daily_revenue CASCADE")  # CI:DESTRUCTIVE_OK - See docs/database/RUNBOOK-MIGRATION-POLICY.md
+    op.execute("DROP TABLE IF EXISTS summary_channel_performance CASCADE")  # CI:DESTRUCTIVE_OK - See docs/database/RUNBOOK-MIGRATION-POLICY.md
+    op.execute("DROP TABLE IF EXISTS summary_dirty_buckets CASCADE")  # CI:DESTRUCTIVE_OK - See docs/database/RUNBOOK-MIGRATION-POLICY.md
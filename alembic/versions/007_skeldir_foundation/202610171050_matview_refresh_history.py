@@ -0,0 +1,93 @@
+"""Matview refresh telemetry: per-attempt refresh history.
+
+Revision ID: 202610171050
+Revises: 202610171040
+Create Date: 2026-10-17 10:50:00
+
+Motivation:
+- refresh_single emitted only aggregate Prometheus counters; there was no per-view record of
+  refresh duration, rows changed or lock-skip frequency to tune refresh intervals against.
+- One row per refresh attempt. Rows inserted/deleted come from pg_stat_xact_all_tables
+  inside the refresh transaction (exact for REFRESH ... CONCURRENTLY, no extra scan).
+- The adaptive scheduler reads the most recent attempts per view
+  (idx_matview_refresh_history_view_started_at); pruning uses idx_matview_refresh_history_started_at.
+
+Global table (matviews are global): tenant_id records the tenant whose task triggered the
+attempt, for correlation only, and carries no foreign key or RLS policy.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "202610171050"
+down_revision: Union[str, None] = "202610171040"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE matview_refresh_history (
+            id bigserial PRIMARY KEY,
+            view_name text NOT NULL,
+            outcome text NOT NULL,
+            started_at timestamptz NOT NULL,
+            duration_ms integer NOT NULL,
+            rows_inserted bigint,
+            rows_deleted bigint,
+            tenant_id uuid,
+            correlation_id text,
+            error_type text,
+            CONSTRAINT ck_matview_refresh_history_outcome_valid
+                CHECK (outcome IN ('SUCCESS', 'SKIPPED_LOCK_HELD', 'SKIPPED_FRESH', 'FAILED')),
+            CONSTRAINT ck_matview_refresh_history_duration_non_negative CHECK (duration_ms >= 0)
+        )
+        """
+    )
+    op.execute(
+        """
+        COMMENT ON TABLE matview_refresh_history IS
+            'One row per materialized view refresh attempt. Purpose: refresh cost telemetry and adaptive refresh intervals. Data class: Non-PII. Ownership: Matview executor. Global table (no RLS); tenant_id is the triggering tenant for correlation only. Retention: MATVIEW_REFRESH_HISTORY_RETENTION_DAYS.'
+        """
+    )
+    op.execute(
+        """
+        COMMENT ON COLUMN matview_refresh_history.rows_inserted IS
+            'Rows inserted into the view by the refresh (pg_stat_xact_all_tables). NULL for failed/skipped attempts and refresh_fn views. Data class: Non-PII.'
+        """
+    )
+    op.execute(
+        """
+        CREATE INDEX idx_matview_refresh_history_view_started_at
+            ON matview_refresh_history (view_name, started_at DESC)
+        """
+    )
+    op.execute(
+        """
+        CREATE INDEX idx_matview_refresh_history_started_at
+            ON matview_refresh_history (started_at)
+        """
+    )
+
+    op.execute("GRANT SELECT, INSERT, DELETE ON TABLE matview_refresh_history TO app_rw")
+    op.execute("GRANT USAGE, SELECT ON SEQUENCE matview_refresh_history_id_seq TO app_rw")
+    op.execute("GRANT SELECT ON TABLE matview_refresh_history TO app_ro")
+    op.execute(
+        """
+        DO $$
+        BEGIN
+          IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'app_user') THEN
+            GRANT SELECT, INSERT, DELETE ON TABLE matview_refresh_history TO app_user;
+            GRANT USAGE, SELECT ON SEQUENCE matview_refresh_history_id_seq TO app_user;
+          END IF;
+        END
+        $$;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS matview_refresh_history")  # CI:DESTRUCTIVE_OK - See docs/database/RUNBOOK-MIGRATION-POLICY.md
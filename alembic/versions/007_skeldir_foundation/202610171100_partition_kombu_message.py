@@ -0,0 +1,250 @@
+"""Range-partition kombu_message by enqueue time with partition-drop retention.
+
+Revision ID: 202610171100
+Revises: 202610171050
+Create Date: 2026-10-17 11:00:00
+
+Motivation:
+- kombu_message is a high-churn queue table on the primary: every message is inserted,
+  updated on dequeue and deleted on ack, so a single heap accumulates bloat and vacuum pressure.
+- Dropping a drained daily partition is metadata-only, unlike DELETE + VACUUM on a hot table.
+
+Approach:
+- New immutable partition key enqueued_at (timestamptz, DEFAULT now()); Kombu's ORM insert does
+  not set it. "timestamp" cannot be the key: the transport rewrites it on every dequeue.
+- Daily partitions kombu_message_pYYYYMMDD (UTC days) plus kombu_message_default as a safety net.
+- Partition DDL needs table ownership, so the maintenance task calls SECURITY DEFINER functions:
+  security.kombu_message_create_partitions(days_ahead) and
+  security.kombu_message_drop_partitions(retention_days, visibility_timeout_s). A partition is
+  only dropped once its day is past retention and it is empty; one that is in use (the lock is
+  taken NOWAIT) is skipped until the next run, because a queued ACCESS EXCLUSIVE request would
+  stall every consumer behind it; kept partitions are never left locked. Any row left in it is an unacked
+  message (acks delete rows under CELERY_BROKER_DELETE_ON_ACK), including an invisible one whose
+  lease expired before the recovery sweep reset it, or that the sweep's task-name filter skips.
+  Without delete-on-ack, compact_broker_messages removes the acked leftovers that would
+  otherwise keep a partition. visibility_timeout_s is unused; it stays in the signature so that
+  callers and grants keep working.
+- Existing rows are copied into today's partition with their ids; message_id_sequence is
+  re-owned by the new table so dropping the legacy table keeps it. Run
+  app.tasks.maintenance.compact_broker_messages first to avoid copying acked leftovers.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "202610171100"
+down_revision: Union[str, None] = "202610171050"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INITIAL_DAYS_AHEAD = 3
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE public.kombu_message RENAME TO kombu_message_legacy")
+    op.execute("ALTER INDEX IF EXISTS public.kombu_message_pkey RENAME TO kombu_message_legacy_pkey")
+    op.execute("ALTER INDEX IF EXISTS public.ix_kombu_message_visible RENAME TO ix_kombu_message_legacy_visible")
+    op.execute(
+        "ALTER INDEX IF EXISTS public.ix_kombu_message_timestamp_id RENAME TO ix_kombu_message_legacy_timestamp_id"
+    )
+
+    op.execute(
+        """
+        CREATE TABLE public.kombu_message (
+            id integer NOT NULL DEFAULT nextval('public.message_id_sequence'),
+            visible boolean NOT NULL DEFAULT true,
+            "timestamp" timestamp without time zone,
+            payload text NOT NULL,
+            version smallint NOT NULL DEFAULT 1,
+            queue_id integer NOT NULL,
+            enqueued_at timestamptz NOT NULL DEFAULT now(),
+            CONSTRAINT kombu_message_pkey PRIMARY KEY (id, enqueued_at),
+            CONSTRAINT fk_kombu_message_queue FOREIGN KEY (queue_id) REFERENCES public.kombu_queue (id)
+        ) PARTITION BY RANGE (enqueued_at)
+        """
+    )
+    op.execute("CREATE INDEX ix_kombu_message_visible ON public.kombu_message (visible)")
+    op.execute('CREATE INDEX ix_kombu_message_timestamp_id ON public.kombu_message ("timestamp", id)')
+    # Dequeue: oldest visible message of one queue.
+    op.execute(
+        """
+        CREATE INDEX ix_kombu_message_queue_dequeue
+            ON public.kombu_message (queue_id, enqueued_at, id)
+            WHERE visible
+        """
+    )
+    op.execute("CREATE TABLE public.kombu_message_default PARTITION OF public.kombu_message DEFAULT")
+
+    op.execute("CREATE SCHEMA IF NOT EXISTS security")
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION security.kombu_message_create_partitions(days_ahead integer)
+        RETURNS integer
+        LANGUAGE plpgsql
+        SECURITY DEFINER
+        SET search_path = pg_catalog, public
+        AS $$
+        DECLARE
+          day date;
+          partition_name text;
+          created integer := 0;
+        BEGIN
+          FOR day IN
+            SELECT generate_series(
+              (now() AT TIME ZONE 'UTC')::date,
+              (now() AT TIME ZONE 'UTC')::date + days_ahead,
+              interval '1 day'
+            )::date
+          LOOP
+            partition_name := 'kombu_message_p' || to_char(day, 'YYYYMMDD');
+            IF to_regclass('public.' || partition_name) IS NULL THEN
+              EXECUTE format(
+                'CREATE TABLE public.%I PARTITION OF public.kombu_message FOR VALUES FROM (%L) TO (%L)',
+                partition_name,
+                day::timestamp AT TIME ZONE 'UTC',
+                (day + 1)::timestamp AT TIME ZONE 'UTC'
+              );
+              created := created + 1;
+            END IF;
+          END LOOP;
+          RETURN created;
+        END
+        $$;
+        """
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION security.kombu_message_drop_partitions(
+          retention_days integer,
+          visibility_timeout_s integer
+        )
+        RETURNS SETOF text
+        LANGUAGE plpgsql
+        SECURITY DEFINER
+        SET search_path = pg_catalog, public
+        AS $$
+        DECLARE
+          partition record;
+          non_empty boolean;
+        BEGIN
+          FOR partition IN
+            SELECT c.relname, to_date(substring(c.relname FROM '(\\d{8})$'), 'YYYYMMDD') AS day
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'public.kombu_message'::regclass
+              AND c.relname ~ '^kombu_message_p\\d{8}$'
+            ORDER BY c.relname
+          LOOP
+            CONTINUE WHEN partition.day + 1 > (now() AT TIME ZONE 'UTC')::date - retention_days;
+            -- Any remaining row is an unacked message (visible, in flight, or with an
+            -- expired lease awaiting recovery): keep the partition until it is empty.
+            -- Check before locking so kept partitions are never locked at all.
+            EXECUTE format('SELECT EXISTS (SELECT 1 FROM public.%I)', partition.relname) INTO non_empty;
+            CONTINUE WHEN non_empty;
+            -- Locks outlive the loop iteration (until commit) unless the block rolls back,
+            -- so a partition that is in use or refilled raises and releases its lock here;
+            -- the next run retries it.
+            BEGIN
+              EXECUTE format('LOCK TABLE public.%I IN ACCESS EXCLUSIVE MODE NOWAIT', partition.relname);
+              EXECUTE format('SELECT EXISTS (SELECT 1 FROM public.%I)', partition.relname) INTO non_empty;
+              IF non_empty THEN
+                RAISE EXCEPTION USING ERRCODE = 'object_in_use';
+              END IF;
+              EXECUTE format('DROP TABLE public.%I', partition.relname);  -- # CI:DESTRUCTIVE_OK - retention of drained partitions; See docs/database/RUNBOOK-MIGRATION-POLICY.md
+            EXCEPTION WHEN lock_not_available OR object_in_use THEN
+              CONTINUE;
+            END;
+            RETURN NEXT partition.relname;
+          END LOOP;
+        END
+        $$;
+        """
+    )
+    op.execute("REVOKE ALL ON FUNCTION security.kombu_message_create_partitions(integer) FROM PUBLIC")
+    op.execute("REVOKE ALL ON FUNCTION security.kombu_message_drop_partitions(integer, integer) FROM PUBLIC")
+    op.execute(f"SELECT security.kombu_message_create_partitions({INITIAL_DAYS_AHEAD})")
+
+    op.execute(
+        """
+        INSERT INTO public.kombu_message (id, visible, "timestamp", payload, version, queue_id, enqueued_at)
+        SELECT id, visible, "timestamp", payload, version, queue_id, now()
+        FROM public.kombu_message_legacy
+        """
+    )
+    op.execute("ALTER SEQUENCE public.message_id_sequence OWNED BY public.kombu_message.id")
+    op.execute("DROP TABLE public.kombu_message_legacy")  # CI:DESTRUCTIVE_OK - See docs/database/RUNBOOK-MIGRATION-POLICY.md
+
+    op.execute(
+        """
+        DO $$
+        BEGIN
+          IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'app_user') THEN
+            GRANT SELECT, INSERT, UPDATE, DELETE ON TABLE public.kombu_message TO app_user;
+            GRANT USAGE ON SCHEMA security TO app_user;
+            GRANT EXECUTE ON FUNCTION security.kombu_message_create_partitions(integer) TO app_user;
+            GRANT EXECUTE ON FUNCTION security.kombu_message_drop_partitions(integer, integer) TO app_user;
+          END IF;
+
+          IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'app_rw') THEN
+            GRANT SELECT, INSERT, UPDATE, DELETE ON TABLE public.kombu_message TO app_rw;
+            GRANT USAGE ON SCHEMA security TO app_rw;
+            GRANT EXECUTE ON FUNCTION security.kombu_message_create_partitions(integer) TO app_rw;
+            GRANT EXECUTE ON FUNCTION security.kombu_message_drop_partitions(integer, integer) TO app_rw;
+          END IF;
+
+          IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'app_ro') THEN
+            GRANT SELECT ON TABLE public.kombu_message TO app_ro;
+          END IF;
+        END
+        $$;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE public.kombu_message RENAME TO kombu_message_partitioned")
+    op.execute("ALTER INDEX IF EXISTS public.kombu_message_pkey RENAME TO kombu_message_partitioned_pkey")
+    op.execute("ALTER INDEX IF EXISTS public.ix_kombu_message_visible RENAME TO ix_kombu_message_partitioned_visible")
+    op.execute(
+        "ALTER INDEX IF EXISTS public.ix_kombu_message_timestamp_id "
+        "RENAME TO ix_kombu_message_partitioned_timestamp_id"
+    )
+    op.execute(
+        """
+        CREATE TABLE public.kombu_message (
+            id integer NOT NULL DEFAULT nextval('public.message_id_sequence') PRIMARY KEY,
+            visible boolean NOT NULL DEFAULT true,
+            "timestamp" timestamp without time zone,
+            payload text NOT NULL,
+            version smallint NOT NULL DEFAULT 1,
+            queue_id integer NOT NULL,
+            CONSTRAINT fk_kombu_message_queue FOREIGN KEY (queue_id) REFERENCES public.kombu_queue (id)
+        )
+        """
+    )
+    op.execute("CREATE INDEX ix_kombu_message_visible ON public.kombu_message (visible)")
+    op.execute('CREATE INDEX ix_kombu_message_timestamp_id ON public.kombu_message ("timestamp", id)')
+    op.execute(
+        """
+        INSERT INTO public.kombu_message (id, visible, "timestamp", payload, version, queue_id)
+        SELECT id, visible, "timestamp", payload, version, queue_id
+        FROM public.kombu_message_partitioned
+        """
+    )
+    op.execute("ALTER SEQUENCE public.message_id_sequence OWNED BY public.kombu_message.id")
+    op.execute("DROP TABLE public.kombu_message_partitioned")  # CI:DESTRUCTIVE_OK - See docs/database/RUNBOOK-MIGRATION-POLICY.md
+    op.execute("DROP FUNCTION IF EXISTS security.kombu_message_drop_partitions(integer, integer)")
+    op.execute("DROP FUNCTION IF EXISTS security.kombu_message_create_partitions(integer)")
+    op.execute(
+        """
+        DO $$
+        BEGIN
+          IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'app_user') THEN
+            GRANT SELECT, INSERT, UPDATE, DELETE ON TABLE public.kombu_message TO app_user;
+          END IF;
+        END
+        $$;
+        """
+    )
@@ -0,0 +1,69 @@
+"""Extract kombu_message routing metadata into indexed columns for visibility recovery.
+
+Revision ID: 202610171110
+Revises: 202610171100
+Create Date: 2026-10-17 11:10:00
+
+Motivation:
+- The worker visibility recovery sweep selected stuck messages with
+  visible = false AND "timestamp" < now() - timeout, optionally filtered by payload LIKE, and
+  flipped every match in one UPDATE: a scan over message bodies that holds row locks on the
+  whole backlog while workers dequeue.
+
+Approach:
+- task_name and task_id are copied from the Celery message headers at enqueue time by the
+  broker transport (app.celery_transport); lease_expires_at is set when a message is dequeued.
+  The queue is already the indexed queue_id column.
+- Partial index on (lease_expires_at, task_name) WHERE NOT visible: recovery walks only
+  invisible rows with expired leases, in bounded SKIP LOCKED batches.
+- Existing rows are backfilled from their payload; in-flight rows get a lease of
+  "timestamp" + DEFAULT_VISIBILITY_TIMEOUT_S (CELERY_BROKER_VISIBILITY_TIMEOUT_S default).
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "202610171110"
+down_revision: Union[str, None] = "202610171100"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DEFAULT_VISIBILITY_TIMEOUT_S = 3600
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        ALTER TABLE public.kombu_message
+            ADD COLUMN task_name text,
+            ADD COLUMN task_id text,
+            ADD COLUMN lease_expires_at timestamptz
+        """
+    )
+    op.execute(
+        f"""
+        UPDATE public.kombu_message
+        SET task_name = payload::jsonb -> 'headers' ->> 'task',
+            task_id = COALESCE(payload::jsonb -> 'headers' ->> 'id', payload::jsonb ->> 'id'),
+            lease_expires_at = CASE
+              WHEN NOT visible AND "timestamp" IS NOT NULL
+                THEN "timestamp"::timestamptz + make_interval(secs => {DEFAULT_VISIBILITY_TIMEOUT_S})
+            END
+        """
+    )
+    op.execute(
+        """
+        CREATE INDEX ix_kombu_message_lease_expiry
+            ON public.kombu_message (lease_expires_at, task_name)
+            WHERE NOT visible
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS public.ix_kombu_message_lease_expiry")
+    op.execute("ALTER TABLE public.kombu_message DROP COLUMN lease_expires_at")  # CI:DESTRUCTIVE_OK - See docs/database/RUNBOOK-MIGRATION-POLICY.md
+    op.execute("ALTER TABLE public.kombu_message DROP COLUMN task_id")  # CI:DESTRUCTIVE_OK - See docs/database/RUNBOOK-MIGRATION-POLICY.md
+    op.execute("ALTER TABLE public.kombu_message DROP COLUMN task_name")  # CI:DESTRUCTIVE_OK - See docs/database/RUNBOOK-MIGRATION-POLICY.md
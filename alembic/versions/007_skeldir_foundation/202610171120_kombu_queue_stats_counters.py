@@ -0,0 +1,167 @@
+"""Maintain per-queue broker counters in kombu_queue_stats.
+
+Revision ID: 202610171120
+Revises: 202610171110
+Create Date: 2026-10-17 11:20:00
+
+Motivation:
+- app.observability.broker_queue_stats derived queue depth from COUNT/SUM over a join of
+  kombu_queue and every kombu_message row on each cache expiry, so /metrics scrapes cost
+  O(backlog) exactly when the backlog is large.
+
+Approach:
+- kombu_queue_stats holds visible/invisible (in-flight) gauges and enqueued/acked totals per
+  (queue_id, shard). Statement-level triggers with transition tables on kombu_message apply
+  one aggregated delta per queue per statement; the shard is pg_backend_pid() % STATS_SHARDS
+  so concurrent producers and consumers do not serialize on one counter row.
+- acked_total counts deletes of invisible (delivered) rows, which is how the transport acks.
+- Readers sum shards: O(queues x STATS_SHARDS) rows.
+- Dropping a partition fires no DELETE triggers; security.kombu_message_drop_partitions only
+  drops empty partitions, so the counters need no adjustment.
+- The oldest redelivered-visible message ("timestamp" set, visible) keeps its existing
+  max-age semantics through a small partial index instead of an aggregate scan.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "202610171120"
+down_revision: Union[str, None] = "202610171110"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+STATS_SHARDS = 16
+
+_UPSERT_DELTAS = """
+    INSERT INTO public.kombu_queue_stats AS s
+        (queue_id, shard, visible_count, invisible_count, enqueued_total, acked_total)
+    SELECT queue_id, (pg_backend_pid() % {shards})::smallint, sum(dv), sum(di), sum(de), sum(da)
+    FROM ({deltas}) d
+    GROUP BY queue_id
+    ON CONFLICT (queue_id, shard) DO UPDATE SET
+        visible_count = s.visible_count + EXCLUDED.visible_count,
+        invisible_count = s.invisible_count + EXCLUDED.invisible_count,
+        enqueued_total = s.enqueued_total + EXCLUDED.enqueued_total,
+        acked_total = s.acked_total + EXCLUDED.acked_total
+"""
+
+_INSERT_DELTAS = "SELECT queue_id, visible::int AS dv, (NOT visible)::int AS di, 1 AS de, 0 AS da FROM new_rows"
+_DELETE_DELTAS = (
+    "SELECT queue_id, -visible::int AS dv, -(NOT visible)::int AS di, 0 AS de, (NOT visible)::int AS da "
+    "FROM old_rows"
+)
+_UPDATE_DELTAS = """
+    SELECT n.queue_id, n.visible::int - o.visible::int AS dv, o.visible::int - n.visible::int AS di,
+           0 AS de, 0 AS da
+    FROM new_rows n
+    JOIN old_rows o ON o.id = n.id AND o.enqueued_at = n.enqueued_at
+    WHERE n.visible IS DISTINCT FROM o.visible
+"""
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE public.kombu_queue_stats (
+            queue_id integer NOT NULL REFERENCES public.kombu_queue (id) ON DELETE CASCADE,
+            shard smallint NOT NULL,
+            visible_count bigint NOT NULL DEFAULT 0,
+            invisible_count bigint NOT NULL DEFAULT 0,
+            enqueued_total bigint NOT NULL DEFAULT 0,
+            acked_total bigint NOT NULL DEFAULT 0,
+            PRIMARY KEY (queue_id, shard)
+        )
+        """
+    )
+    op.execute(
+        f"""
+        CREATE OR REPLACE FUNCTION public.fn_kombu_message_queue_stats()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+          IF TG_OP = 'INSERT' THEN
+            {_UPSERT_DELTAS.format(shards=STATS_SHARDS, deltas=_INSERT_DELTAS)};
+          ELSIF TG_OP = 'DELETE' THEN
+            {_UPSERT_DELTAS.format(shards=STATS_SHARDS, deltas=_DELETE_DELTAS)};
+          ELSE
+            {_UPSERT_DELTAS.format(shards=STATS_SHARDS, deltas=_UPDATE_DELTAS)};
+          END IF;
+          RETURN NULL;
+        END
+        $$;
+        """
+    )
+
+    # Seed from the current backlog before the triggers start applying deltas.
+    op.execute("LOCK TABLE public.kombu_message IN SHARE ROW EXCLUSIVE MODE")
+    op.execute(
+        """
+        INSERT INTO public.kombu_queue_stats (queue_id, shard, visible_count, invisible_count)
+        SELECT queue_id, 0, count(*) FILTER (WHERE visible), count(*) FILTER (WHERE NOT visible)
+        FROM public.kombu_message
+        GROUP BY queue_id
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER trg_kombu_message_queue_stats_insert
+        AFTER INSERT ON public.kombu_message
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION public.fn_kombu_message_queue_stats()
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER trg_kombu_message_queue_stats_update
+        AFTER UPDATE ON public.kombu_message
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION public.fn_kombu_message_queue_stats()
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER trg_kombu_message_queue_stats_delete
+        AFTER DELETE ON public.kombu_message
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION public.fn_kombu_message_queue_stats()
+        """
+    )
+
+    op.execute(
+        """
+        CREATE INDEX ix_kombu_message_queue_redelivered
+            ON public.kombu_message (queue_id, "timestamp")
+            WHERE visible AND "timestamp" IS NOT NULL
+        """
+    )
+    op.execute(
+        """
+        DO $$
+        BEGIN
+          IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'app_user') THEN
+            GRANT SELECT, INSERT, UPDATE ON TABLE public.kombu_queue_stats TO app_user;
+          END IF;
+
+          IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'app_rw') THEN
+            GRANT SELECT, INSERT, UPDATE ON TABLE public.kombu_queue_stats TO app_rw;
+          END IF;
+
+          IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'app_ro') THEN
+            GRANT SELECT ON TABLE public.kombu_queue_stats TO app_ro;
+          END IF;
+        END
+        $$;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS public.ix_kombu_message_queue_redelivered")
+    op.execute("DROP TRIGGER IF EXISTS trg_kombu_message_queue_stats_delete ON public.kombu_message")
+    op.execute("DROP TRIGGER IF EXISTS trg_kombu_message_queue_stats_update ON public.kombu_message")
+    op.execute("DROP TRIGGER IF EXISTS trg_kombu_message_queue_stats_insert ON public.kombu_message")
+    op.execute("DROP FUNCTION IF EXISTS public.fn_kombu_message_queue_stats()")
+    op.execute("DROP TABLE IF EXISTS public.kombu_queue_stats")  # CI:DESTRUCTIVE_OK - See docs/database/RUNBOOK-MIGRATION-POLICY.md
@@ -0,0 +1,99 @@
+"""Resumable bulk DLQ replay: replay run checkpoints + replay selection index.
+
+Revision ID: 202610171130
+Revises: 202610171120
+Create Date: 2026-10-17 11:30:00
+
+Motivation:
+- DLQHandler.retry_dead_event replays one dead event per call with per-row backoff
+  bookkeeping, so draining an incident-sized DLQ is slow and has no progress record.
+
+Tables:
+- dead_event_replay_runs: one row per bulk replay (app.ingestion.dlq_replay). Stores the
+  selection filters, a keyset cursor (ingested_at, id) over dead_events and outcome counts.
+  Each replay batch advances the cursor in the same transaction as its ingestion and
+  dead_events updates, so a crashed replay resumes exactly after its last committed batch.
+
+Indexes:
+- idx_dead_events_replay: (tenant_id, ingested_at, id) over replayable rows, matching the
+  replay keyset scan.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "202610171130"
+down_revision: Union[str, None] = "202610171120"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE dead_event_replay_runs (
+            id uuid PRIMARY KEY,
+            tenant_id uuid NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+            error_type text,
+            ingested_from timestamptz,
+            ingested_to timestamptz,
+            force boolean NOT NULL DEFAULT false,
+            status text NOT NULL DEFAULT 'running',
+            cursor_ingested_at timestamptz,
+            cursor_id uuid,
+            selected_count bigint NOT NULL DEFAULT 0,
+            resolved_count bigint NOT NULL DEFAULT 0,
+            duplicate_count bigint NOT NULL DEFAULT 0,
+            failed_count bigint NOT NULL DEFAULT 0,
+            started_at timestamptz NOT NULL DEFAULT now(),
+            updated_at timestamptz NOT NULL DEFAULT now(),
+            completed_at timestamptz,
+            CONSTRAINT ck_dead_event_replay_runs_status_valid
+                CHECK (status IN ('running', 'completed', 'cancelled'))
+        )
+        """
+    )
+    op.execute(
+        """
+        COMMENT ON TABLE dead_event_replay_runs IS
+            'Bulk DLQ replay checkpoints. Purpose: resumable, observable replay of dead_events through batch ingestion. Data class: Non-PII. Ownership: Ingestion service. RLS enabled for tenant isolation.'
+        """
+    )
+    op.execute(
+        """
+        CREATE INDEX idx_dead_events_replay
+            ON dead_events (tenant_id, ingested_at, id)
+            WHERE remediation_status IN ('pending', 'abandoned')
+        """
+    )
+
+    op.execute("ALTER TABLE dead_event_replay_runs ENABLE ROW LEVEL SECURITY")
+    op.execute("ALTER TABLE dead_event_replay_runs FORCE ROW LEVEL SECURITY")
+    op.execute(
+        """
+        DROP POLICY IF EXISTS tenant_isolation_policy ON dead_event_replay_runs;
+        CREATE POLICY tenant_isolation_policy ON dead_event_replay_runs
+            USING (tenant_id = current_setting('app.current_tenant_id', true)::UUID)
+            WITH CHECK (tenant_id = current_setting('app.current_tenant_id', true)::UUID);
+        """
+    )
+    op.execute("GRANT SELECT, INSERT, UPDATE ON TABLE dead_event_replay_runs TO app_rw")
+    op.execute("GRANT SELECT ON TABLE dead_event_replay_runs TO app_ro")
+    op.execute(
+        """
+        DO $$
+        BEGIN
+          IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'app_user') THEN
+            GRANT SELECT, INSERT, UPDATE ON TABLE dead_event_replay_runs TO app_user;
+          END IF;
+        END
+        $$;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_dead_events_replay")
+    op.execute("DROP TABLE IF EXISTS dead_event_replay_runs CASCADE")  # CI:DESTRUCTIVE_OK - See docs/database/RUNBOOK-MIGRATION-POLICY.md
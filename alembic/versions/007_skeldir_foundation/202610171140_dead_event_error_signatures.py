@@ -0,0 +1,337 @@
+"""Dead event error signatures: per-tenant failure clusters and cluster replay.
+
+Revision ID: 202610171140
+Revises: 202610171130
+Create Date: 2026-10-17 11:40:00
+
+Motivation:
+- Triage groups dead events by error_type (a handful of coarse classes) or by raw
+  error_message, which differs per offending value ("missing field 'x' in event 123").
+  Finding the dominant failures meant scanning and grouping a tenant's whole DLQ.
+
+Columns:
+- dead_events.error_signature: exception type plus a hash of the message with parameters
+  (UUIDs, quoted values, hex and decimal numbers) stripped. Set at insert by
+  app.ingestion.dlq_handler.error_signature; a BEFORE INSERT trigger fills it from the
+  equivalent SQL function dead_event_error_signature() for writers that omit it, and
+  security.rebuild_dead_event_error_clusters() backfills existing rows.
+- dead_event_replay_runs.error_signature: optional replay filter (replay one cluster).
+
+Tables:
+- dead_event_error_clusters: per (tenant_id, error_signature) counts, maintained by
+  statement-level transition-table triggers on dead_events. event_count counts rows,
+  open_count rows not yet resolved; clusters whose rows are all deleted (retention) go away.
+  error_signature is assumed immutable after insert. Seeded (and repairable) with
+  security.rebuild_dead_event_error_clusters(), which works per tenant under FORCE RLS.
+
+Indexes:
+- idx_dead_events_tenant_signature: (tenant_id, error_signature, ingested_at, id) over
+  replayable rows, matching the replay keyset scan narrowed to one cluster.
+- idx_dead_event_error_clusters_tenant_open: top-clusters listing per tenant.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "202610171140"
+down_revision: Union[str, None] = "202610171130"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Must stay in step with app.ingestion.dlq_handler._SIGNATURE_PARAMETERS.
+_SIGNATURE_FUNCTION_SQL = r"""
+    CREATE OR REPLACE FUNCTION dead_event_error_signature(error_code text, error_message text)
+    RETURNS text AS $$
+        SELECT error_code || ':' || left(md5(btrim(
+            regexp_replace(
+                regexp_replace(
+                    regexp_replace(
+                        regexp_replace(
+                            regexp_replace(
+                                lower(error_message),
+                                '[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}', '<uuid>', 'g'
+                            ),
+                            $re$'[^']*'|"[^"]*"$re$, '<str>', 'g'
+                        ),
+                        '\y0x[0-9a-f]+\y', '<hex>', 'g'
+                    ),
+                    '[0-9]+(\.[0-9]+)?', '<num>', 'g'
+                ),
+                '\s+', ' ', 'g'
+            )
+        )), 16)
+    $$ LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE
+"""
+
+_OPEN = "CASE WHEN remediation_status <> 'resolved' THEN 1 ELSE 0 END"
+
+_CLUSTERS_FUNCTION_SQL = f"""
+    CREATE OR REPLACE FUNCTION fn_dead_event_error_clusters()
+    RETURNS TRIGGER AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO dead_event_error_clusters AS c (
+                tenant_id, error_signature, error_code, error_type, sample_message,
+                event_count, open_count, first_seen_at, last_seen_at
+            )
+            SELECT tenant_id, error_signature, min(error_code), min(error_type), min(error_message),
+                   count(*), sum({_OPEN}), min(ingested_at), max(ingested_at)
+            FROM newrows
+            WHERE error_signature IS NOT NULL
+            GROUP BY tenant_id, error_signature
+            ON CONFLICT (tenant_id, error_signature) DO UPDATE
+            SET event_count = c.event_count + EXCLUDED.event_count,
+                open_count = c.open_count + EXCLUDED.open_count,
+                first_seen_at = LEAST(c.first_seen_at, EXCLUDED.first_seen_at),
+                last_seen_at = GREATEST(c.last_seen_at, EXCLUDED.last_seen_at);
+        ELSIF TG_OP = 'UPDATE' THEN
+            UPDATE dead_event_error_clusters AS c
+            SET open_count = c.open_count + d.delta
+            FROM (
+                SELECT n.tenant_id, n.error_signature,
+                       sum((CASE WHEN n.remediation_status <> 'resolved' THEN 1 ELSE 0 END)
+                           - (CASE WHEN o.remediation_status <> 'resolved' THEN 1 ELSE 0 END)) AS delta
+                FROM newrows n
+                JOIN oldrows o ON o.id = n.id
+                WHERE n.error_signature IS NOT NULL
+                GROUP BY n.tenant_id, n.error_signature
+            ) AS d
+            WHERE c.tenant_id = d.tenant_id
+              AND c.error_signature = d.error_signature
+              AND d.delta <> 0;
+        ELSE
+            UPDATE dead_event_error_clusters AS c
+            SET event_count = c.event_count - d.removed,
+                open_count = c.open_count - d.removed_open
+            FROM (
+                SELECT tenant_id, error_signature, count(*) AS removed, sum({_OPEN}) AS removed_open
+                FROM oldrows
+                WHERE error_signature IS NOT NULL
+                GROUP BY tenant_id, error_signature
+            ) AS d
+            WHERE c.tenant_id = d.tenant_id AND c.error_signature = d.error_signature;
+            DELETE FROM dead_event_error_clusters AS c
+            USING (SELECT DISTINCT tenant_id, error_signature FROM oldrows) AS d
+            WHERE c.tenant_id = d.tenant_id
+              AND c.error_signature = d.error_signature
+              AND c.event_count <= 0;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+"""
+
+# dead_events and dead_event_error_clusters are FORCE RLS, so even the owner only sees the
+# tenant named by app.current_tenant_id: backfill one tenant at a time, then restore the
+# GUC (nil UUID when it was unset, so later casts in the same transaction stay valid).
+_REBUILD_FUNCTION_SQL = f"""
+    CREATE OR REPLACE FUNCTION security.rebuild_dead_event_error_clusters()
+    RETURNS bigint
+    LANGUAGE plpgsql
+    SECURITY DEFINER
+    SET search_path = pg_catalog, public
+    AS $$
+    DECLARE
+      tenant uuid;
+      previous_tenant text := current_setting('app.current_tenant_id', true);
+      inserted bigint;
+      rebuilt bigint := 0;
+    BEGIN
+      -- Keep the cluster triggers from interleaving with the rebuild.
+      LOCK TABLE dead_events IN SHARE ROW EXCLUSIVE MODE;
+      FOR tenant IN SELECT id FROM tenants ORDER BY id LOOP
+        PERFORM set_config('app.current_tenant_id', tenant::text, true);
+        UPDATE dead_events
+        SET error_signature = dead_event_error_signature(error_code, error_message)
+        WHERE error_signature IS NULL;
+        DELETE FROM dead_event_error_clusters WHERE tenant_id = tenant;
+        INSERT INTO dead_event_error_clusters (
+            tenant_id, error_signature, error_code, error_type, sample_message,
+            event_count, open_count, first_seen_at, last_seen_at
+        )
+        SELECT tenant_id, error_signature, min(error_code), min(error_type), min(error_message),
+               count(*), sum({_OPEN}), min(ingested_at), max(ingested_at)
+        FROM dead_events
+        WHERE error_signature IS NOT NULL
+        GROUP BY tenant_id, error_signature;
+        GET DIAGNOSTICS inserted = ROW_COUNT;
+        rebuilt := rebuilt + inserted;
+      END LOOP;
+      PERFORM set_config(
+        'app.current_tenant_id',
+        COALESCE(NULLIF(previous_tenant, ''), '00000000-0000-0000-0000-000000000000'),
+        true
+      );
+      RETURN rebuilt;
+    END
+    $$
+"""
+
+
+def upgrade() -> None:
+    op.execute(_SIGNATURE_FUNCTION_SQL)
+    op.execute(
+        """
+        COMMENT ON FUNCTION dead_event_error_signature(text, text) IS
+        'Dead event cluster key: error_code plus md5 prefix of the lowercased message with UUIDs, quoted values and numbers replaced by placeholders. Mirrors app.ingestion.dlq_handler.error_signature.';
+        """
+    )
+
+    op.execute("ALTER TABLE dead_events ADD COLUMN IF NOT EXISTS error_signature text")
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION fn_dead_events_fill_error_signature()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            IF NEW.error_signature IS NULL THEN
+                NEW.error_signature := dead_event_error_signature(NEW.error_code, NEW.error_message);
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER trg_dead_events_fill_error_signature
+            BEFORE INSERT ON dead_events
+            FOR EACH ROW EXECUTE FUNCTION fn_dead_events_fill_error_signature()
+        """
+    )
+    op.execute(
+        """
+        CREATE INDEX idx_dead_events_tenant_signature
+            ON dead_events (tenant_id, error_signature, ingested_at, id)
+            WHERE remediation_status IN ('pending', 'abandoned')
+        """
+    )
+
+    op.execute(
+        """
+        CREATE TABLE dead_event_error_clusters (
+            tenant_id uuid NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+            error_signature text NOT NULL,
+            error_code text NOT NULL,
+            error_type text NOT NULL,
+            sample_message text NOT NULL,
+            event_count bigint NOT NULL DEFAULT 0,
+            open_count bigint NOT NULL DEFAULT 0,
+            first_seen_at timestamptz NOT NULL,
+            last_seen_at timestamptz NOT NULL,
+            PRIMARY KEY (tenant_id, error_signature)
+        )
+        """
+    )
+    op.execute(
+        """
+        COMMENT ON TABLE dead_event_error_clusters IS
+            'Per-tenant dead event counts by error_signature, maintained by statement-level triggers on dead_events. Purpose: top failure clusters without scanning dead_events. Data class: Non-PII. Ownership: Ingestion service. RLS enabled for tenant isolation.'
+        """
+    )
+    op.execute(
+        """
+        CREATE INDEX idx_dead_event_error_clusters_tenant_open
+            ON dead_event_error_clusters (tenant_id, open_count DESC, event_count DESC)
+        """
+    )
+    op.execute("ALTER TABLE dead_event_error_clusters ENABLE ROW LEVEL SECURITY")
+    op.execute("ALTER TABLE dead_event_error_clusters FORCE ROW LEVEL SECURITY")
+    op.execute(
+        """
+        DROP POLICY IF EXISTS tenant_isolation_policy ON dead_event_error_clusters;
+        CREATE POLICY tenant_isolation_policy ON dead_event_error_clusters
+            USING (tenant_id = current_setting('app.current_tenant_id', true)::UUID)
+            WITH CHECK (tenant_id = current_setting('app.current_tenant_id', true)::UUID);
+        """
+    )
+    op.execute("GRANT SELECT, INSERT, UPDATE, DELETE ON TABLE dead_event_error_clusters TO app_rw")
+    op.execute("GRANT SELECT ON TABLE dead_event_error_clusters TO app_ro")
+    op.execute(
+        """
+        DO $$
+        BEGIN
+          IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'app_user') THEN
+            GRANT SELECT, INSERT, UPDATE, DELETE ON TABLE dead_event_error_clusters TO app_user;
+          END IF;
+        END
+        $$;
+        """
+    )
+
+    op.execute(_CLUSTERS_FUNCTION_SQL)
+    op.execute(
+        """
+        COMMENT ON FUNCTION fn_dead_event_error_clusters() IS
+        'STATEMENT-level: applies a write to dead_events to dead_event_error_clusters (one grouped upsert/update per statement via transition tables).';
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER trg_dead_event_error_clusters_insert
+            AFTER INSERT ON dead_events
+            REFERENCING NEW TABLE AS newrows
+            FOR EACH STATEMENT EXECUTE FUNCTION fn_dead_event_error_clusters();
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER trg_dead_event_error_clusters_update
+            AFTER UPDATE ON dead_events
+            REFERENCING NEW TABLE AS newrows OLD TABLE AS oldrows
+            FOR EACH STATEMENT EXECUTE FUNCTION fn_dead_event_error_clusters();
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER trg_dead_event_error_clusters_delete
+            AFTER DELETE ON dead_events
+            REFERENCING OLD TABLE AS oldrows
+            FOR EACH STATEMENT EXECUTE FUNCTION fn_dead_event_error_clusters();
+        """
+    )
+
+    op.execute(_REBUILD_FUNCTION_SQL)
+    op.execute(
+        """
+        COMMENT ON FUNCTION security.rebuild_dead_event_error_clusters() IS
+        'Backfills missing dead_events.error_signature values and rebuilds dead_event_error_clusters from dead_events, one tenant at a time (both tables are FORCE RLS). Blocks dead_events writes until commit.';
+        """
+    )
+    op.execute("REVOKE ALL ON FUNCTION security.rebuild_dead_event_error_clusters() FROM PUBLIC")
+    op.execute(
+        """
+        DO $$
+        BEGIN
+          IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'app_user') THEN
+            GRANT USAGE ON SCHEMA security TO app_user;
+            GRANT EXECUTE ON FUNCTION security.rebuild_dead_event_error_clusters() TO app_user;
+          END IF;
+
+          IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'app_rw') THEN
+            GRANT USAGE ON SCHEMA security TO app_rw;
+            GRANT EXECUTE ON FUNCTION security.rebuild_dead_event_error_clusters() TO app_rw;
+          END IF;
+        END
+        $$;
+        """
+    )
+    op.execute("SELECT security.rebuild_dead_event_error_clusters()")
+
+    op.execute("ALTER TABLE dead_event_replay_runs ADD COLUMN IF NOT EXISTS error_signature text")
+
+
+def downgrade() -> None:
+    op.execute("DROP FUNCTION IF EXISTS security.rebuild_dead_event_error_clusters()")
+    op.execute("ALTER TABLE dead_event_replay_runs DROP COLUMN IF EXISTS error_signature")  # CI:DESTRUCTIVE_OK - See docs/database/RUNBOOK-MIGRATION-POLICY.md
+    for event in ("insert", "update", "delete"):
+        op.execute(f"DROP TRIGGER IF EXISTS trg_dead_event_error_clusters_{event} ON dead_events")
+    op.execute("DROP FUNCTION IF EXISTS fn_dead_event_error_clusters()")
+    op.execute("DROP TABLE IF EXISTS dead_event_error_clusters CASCADE")  # CI:DESTRUCTIVE_OK - See docs/database/RUNBOOK-MIGRATION-POLICY.md
+    op.execute("DROP INDEX IF EXISTS idx_dead_events_tenant_signature")
+    op.execute("DROP TRIGGER IF EXISTS trg_dead_events_fill_error_signature ON dead_events")
+    op.execute("DROP FUNCTION IF EXISTS fn_dead_events_fill_error_signature()")
+    op.execute("ALTER TABLE dead_events DROP COLUMN IF EXISTS error_signature")  # CI:DESTRUCTIVE_OK - See docs/database/RUNBOOK-MIGRATION-POLICY.md
+    op.execute("DROP FUNCTION IF EXISTS dead_event_error_signature(text, text)")
@@ -0,0 +1,47 @@
+"""Covering index for dead event lookups by correlation id.
+
+Revision ID: 202610171150
+Revises: 202610171140
+Create Date: 2026-10-17 11:50:00
+
+Motivation:
+- Webhook responses used to re-read the dead event they had just routed, by correlation_id
+  (unindexed) with a fallback scan of the tenant's newest dead events. The ingestion
+  service now returns the dead event id directly; lookups by correlation id that remain
+  (operator triage, support tooling) should not scan the tenant's DLQ either.
+
+Indexes:
+- idx_dead_events_tenant_correlation: (tenant_id, correlation_id) INCLUDE (id, ingested_at,
+  remediation_status), answering "which dead event, when, in what state" from the index.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "202610171150"
+down_revision: Union[str, None] = "202610171140"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_dead_events_tenant_correlation
+            ON dead_events (tenant_id, correlation_id)
+            INCLUDE (id, ingested_at, remediation_status)
+            WHERE correlation_id IS NOT NULL
+        """
+    )
+    op.execute(
+        """
+        COMMENT ON INDEX idx_dead_events_tenant_correlation IS
+            'Covering index for dead event lookup by correlation id. Query pattern: WHERE tenant_id = X AND correlation_id = Y.'
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_dead_events_tenant_correlation")
@@ -10,7 +10,7 @@ Responsibilities:
 import logging
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
-from uuid import uuid4, uuid5, NAMESPACE_URL
+from uuid import UUID, uuid4, uuid5, NAMESPACE_URL
 
 from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
 from fastapi import Body
@@ -20,10 +20,10 @@ from typing import Optional
 
 from app.core.config import settings
 from app.core.tenant_context import get_tenant_with_webhook_secrets
-from app.db.session import get_session
-from app.ingestion.dlq_handler import DLQHandler
-from app.ingestion.event_service import ingest_with_transaction
-from app.models import DeadEvent
+from app.ingestion.dlq_handler import DLQFailure
+from app.ingestion.dlq_writer import get_dlq_writer
+from app.ingestion.event_service import ingest_batch_with_transaction, ingest_with_transaction
+from app.middleware.pii_stripping import ParsedBodyRoute
 from app.schemas.webhooks_shopify import ShopifyOrderCreateRequest
 from app.schemas.webhooks_stripe import StripePaymentIntentSucceededRequest
 from app.schemas.webhooks_paypal import PayPalSaleCompletedRequest
@@ -40,7 +40,8 @@ from app.webhooks.signatures import (
     verify_woocommerce_signature,
 )
 
-router = APIRouter()
+# Body params are validated from the PII middleware's parsed body (no second JSON decode).
+router = APIRouter(route_class=ParsedBodyRoute)
 logger = logging.getLogger(__name__)
 
 
@@ -58,6 +59,28 @@ class WebhookErrorResponse(BaseModel):
     vendor: Optional[str] = None
 
 
+class ShopifyOrderCreateBatchRequest(BaseModel):
+    orders: list[ShopifyOrderCreateRequest]
+
+
+class WebhookBatchItem(BaseModel):
+    index: int
+    status: str
+    event_id: Optional[str] = None
+    idempotency_key: Optional[str] = None
+    dead_event_id: Optional[str] = None
+    channel: Optional[str] = None
+    error: Optional[str] = None
+
+
+class WebhookBatchResponse(BaseModel):
+    status: str
+    inserted: int
+    duplicates: int
+    dlq_routed: int
+    items: list[WebhookBatchItem]
+
+
 async def tenant_secrets(request: Request):
     api_key = request.headers.get(settings.TENANT_API_KEY_HEADER)
     if not api_key:
@@ -103,37 +126,33 @@ def _compute_recompute_window(event_timestamp: str) -> tuple[str, str]:
     )
 
 
-def _schedule_downstream_tasks(
-    *, tenant_id, event_timestamp: str, correlation_id: str
+async def _schedule_downstream_tasks(
+    *, tenant_id, event_timestamps: list[str], correlation_id: str
 ) -> None:
-    try:
-        from celery import chain
+    """
+    Mark the UTC day windows of ingested events dirty for coalesced recompute.
 
-        from app.tasks.attribution import recompute_window
-        from app.tasks.matviews import matview_refresh_all_for_tenant
+    Recompute + matview refresh run from a single debounced flush per tenant
+    (app.tasks.attribution.flush_dirty_windows), not one chain per event.
+    Failures are logged and never fail ingestion.
+    """
+    try:
+        from app.services.attribution import mark_windows_dirty
 
-        window_start, window_end = _compute_recompute_window(event_timestamp)
-        chain(
-            recompute_window.s(
-                tenant_id=tenant_id,
-                window_start=window_start,
-                window_end=window_end,
-                correlation_id=correlation_id,
-                model_version="1.0.0",
-            ).set(correlation_id=correlation_id),
-            matview_refresh_all_for_tenant.si(
-                tenant_id=tenant_id,
-                correlation_id=correlation_id,
-                schedule_class="realtime",
-            ).set(correlation_id=correlation_id),
-        ).apply_async()
+        windows = [_compute_recompute_window(ts) for ts in event_timestamps]
+        flush_enqueued = await mark_windows_dirty(
+            tenant_id=tenant_id,
+            windows=windows,
+            correlation_id=correlation_id,
+        )
         logger.info(
             "ingestion_followup_tasks_enqueued",
             extra={
                 "tenant_id": str(tenant_id),
                 "correlation_id": correlation_id,
-                "window_start": window_start,
-                "window_end": window_end,
+                "window_count": len(set(windows)),
+                "event_count": len(windows),
+                "flush_enqueued": flush_enqueued,
             },
         )
     except Exception:
@@ -142,7 +161,7 @@ def _schedule_downstream_tasks(
             extra={
                 "tenant_id": str(tenant_id),
                 "correlation_id": correlation_id,
-                "event_timestamp": event_timestamp,
+                "event_count": len(event_timestamps),
             },
         )
 
@@ -154,24 +173,23 @@ async def _route_to_dlq_direct(
     payload: dict,
     error_message: str,
     error_type: str = "validation_error",
-):
-    async with get_session(tenant_id=tenant_id) as session:
-        handler = DLQHandler()
-        error: Exception
-        if error_type == "pii_violation":
-            # Trigger DLQHandler's PII classification (string match).
-            error = Exception(f"PII detected: {error_message}")
-        else:
-            error = ValueError(error_message)
-        dead = await handler.route_to_dlq(
-            session=session,
-            tenant_id=tenant_id,
+) -> UUID:
+    error: Exception
+    if error_type == "pii_violation":
+        # Trigger DLQHandler's PII classification (string match).
+        error = Exception(f"PII detected: {error_message}")
+    else:
+        error = ValueError(error_message)
+    # Concurrent rejections are group-committed in multi-row inserts.
+    return await get_dlq_writer().submit(
+        tenant_id,
+        DLQFailure(
             original_payload=payload,
             error=error,
             correlation_id=correlation_id,
             source=source,
-        )
-        return dead
+        ),
+    )
 
 
 async def _handle_ingestion(tenant_id, event_data: dict, idempotency_key: str, source: str):
@@ -187,9 +205,9 @@ async def _handle_ingestion(tenant_id, event_data: dict, idempotency_key: str, s
         correlation_id = get_request_correlation_id() or idempotency_key
         event_timestamp = event_data.get("event_timestamp")
         if event_timestamp:
-            _schedule_downstream_tasks(
+            await _schedule_downstream_tasks(
                 tenant_id=tenant_id,
-                event_timestamp=str(event_timestamp),
+                event_timestamps=[str(event_timestamp)],
                 correlation_id=str(correlation_id),
             )
         return {
@@ -199,27 +217,63 @@ async def _handle_ingestion(tenant_id, event_data: dict, idempotency_key: str, s
             "channel": result.get("channel"),
         }
 
-    # Validation errors routed to DLQ: locate the dead_event using correlation_id
-    correlation_id = _make_correlation_uuid(idempotency_key)
-    async with get_session(tenant_id=tenant_id) as session:
-        from sqlalchemy import select
-        res = await session.execute(
-            select(DeadEvent).where(DeadEvent.correlation_id == correlation_id)
-        )
-        dead_event = res.scalar_one_or_none()
-        if not dead_event:
-            res2 = await session.execute(
-                select(DeadEvent).order_by(DeadEvent.ingested_at.desc())
-            )
-            dead_event = res2.scalars().first()
-
+    # Validation errors routed to DLQ: the service returns the dead event id
     return {
         "status": "dlq_routed",
-        "dead_event_id": str(dead_event.id) if dead_event else None,
+        "dead_event_id": result.get("dlq_event_id"),
         "error": result.get("error"),
     }
 
 
+def _shopify_order_idempotency_key(order_id) -> str:
+    return str(uuid5(NAMESPACE_URL, f"shopify_order_create_{order_id}"))
+
+
+def _shopify_order_event_data(payload: ShopifyOrderCreateRequest, idempotency_key: str) -> dict:
+    return {
+        "event_type": "purchase",
+        "event_timestamp": (payload.created_at or datetime.now(timezone.utc)).isoformat(),
+        "revenue_amount": payload.total_price or "0",
+        "currency": payload.currency or "USD",
+        "session_id": str(uuid5(NAMESPACE_URL, f"shopify:{payload.id}")),
+        "vendor": "shopify",
+        "utm_source": "shopify",
+        "external_event_id": str(payload.id),
+        "correlation_id": str(_make_correlation_uuid(idempotency_key)),
+    }
+
+
+async def _handle_batch_ingestion(tenant_id, items: list[dict], source: str):
+    result = await ingest_batch_with_transaction(
+        tenant_id=tenant_id,
+        items=items,
+        source=source,
+    )
+
+    correlation_id = str(get_request_correlation_id() or uuid4())
+    event_timestamps = []
+    for outcome in result["items"]:
+        if outcome["status"] != "inserted":
+            continue
+        event_timestamp = items[outcome["index"]]["event_data"].get("event_timestamp")
+        if event_timestamp:
+            event_timestamps.append(str(event_timestamp))
+    if event_timestamps:
+        await _schedule_downstream_tasks(
+            tenant_id=tenant_id,
+            event_timestamps=event_timestamps,
+            correlation_id=correlation_id,
+        )
+
+    return {
+        "status": "success",
+        "inserted": result["inserted"],
+        "duplicates": result["duplicates"],
+        "dlq_routed": result["dlq_routed"],
+        "items": result["items"],
+    }
+
+
 @router.post(
     "/webhooks/shopify/order_create",
     response_model=WebhookResponse,
@@ -241,22 +295,63 @@ async def shopify_order_create(
     if not payload.id:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing order id")
 
-    idempotency_key = str(uuid5(NAMESPACE_URL, f"shopify_order_create_{payload.id}"))
+    idempotency_key = _shopify_order_idempotency_key(payload.id)
     set_business_correlation_id(idempotency_key)
-    event_data = {
-        "event_type": "purchase",
-        "event_timestamp": (payload.created_at or datetime.now(timezone.utc)).isoformat(),
-        "revenue_amount": payload.total_price or "0",
-        "currency": payload.currency or "USD",
-        "session_id": str(uuid5(NAMESPACE_URL, f"shopify:{payload.id}")),
-        "vendor": "shopify",
-        "utm_source": "shopify",
-        "external_event_id": str(payload.id),
-        "correlation_id": str(_make_correlation_uuid(idempotency_key)),
-    }
+    event_data = _shopify_order_event_data(payload, idempotency_key)
     return await _handle_ingestion(tenant_info["tenant_id"], event_data, idempotency_key, source="shopify")
 
 
+@router.post(
+    "/webhooks/shopify/order_create/batch",
+    response_model=WebhookBatchResponse,
+    responses={401: {"model": WebhookErrorResponse}},
+)
+async def shopify_order_create_batch(
+    request: Request,
+    payload: ShopifyOrderCreateBatchRequest = Body(...),
+    x_shopify_hmac_sha256: str = Header(None, alias="X-Shopify-Hmac-Sha256"),
+    tenant_info=Depends(tenant_secrets),
+):
+    """
+    Bulk Shopify order ingestion for a single tenant.
+
+    The HMAC covers the whole batch body. All orders are written in one
+    transaction via set-based inserts; each item reports inserted, duplicate,
+    or dlq_routed so callers can reconcile without re-posting the batch.
+    """
+    raw_body = getattr(request.state, "original_body", None) or await request.body()
+    if not verify_shopify_signature(raw_body, tenant_info["shopify_webhook_secret"], x_shopify_hmac_sha256):
+        return JSONResponse(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            content={"status": "invalid_signature", "vendor": "shopify"},
+        )
+
+    if not payload.orders:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty batch")
+    if len(payload.orders) > settings.INGESTION_BATCH_MAX_EVENTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch exceeds {settings.INGESTION_BATCH_MAX_EVENTS} events",
+        )
+
+    items = []
+    for order in payload.orders:
+        if not order.id:
+            # No idempotency key can be derived; the service routes it to DLQ.
+            items.append({"event_data": order.model_dump(mode="json"), "idempotency_key": None})
+            continue
+        idempotency_key = _shopify_order_idempotency_key(order.id)
+        event_data = _shopify_order_event_data(order, idempotency_key)
+        items.append(
+            {
+                "event_data": {**event_data, "idempotency_key": idempotency_key},
+                "idempotency_key": idempotency_key,
+            }
+        )
+
+    return await _handle_batch_ingestion(tenant_info["tenant_id"], items, source="shopify")
+
+
 @router.post(
     "/webhooks/stripe/payment_intent_succeeded",
     response_model=WebhookResponse,
@@ -358,7 +453,7 @@ async def stripe_payment_intent_succeeded_v2(
 
     pii_paths = _pii_redacted_paths(request)
     if pii_paths:
-        dead = await _route_to_dlq_direct(
+        dead_event_id = await _route_to_dlq_direct(
             tenant_id=tenant_info["tenant_id"],
             source="stripe",
             correlation_id=correlation_uuid,
@@ -375,7 +470,7 @@ async def stripe_payment_intent_succeeded_v2(
         )
         return {
             "status": "dlq_routed",
-            "dead_event_id": str(dead.id),
+            "dead_event_id": str(dead_event_id),
             "error": "pii_violation",
         }
 
@@ -390,7 +485,7 @@ async def stripe_payment_intent_succeeded_v2(
         if not pi_id or not isinstance(pi_id, str):
             raise ValueError("payment_intent id is required")
     except Exception as e:
-        dead = await _route_to_dlq_direct(
+        dead_event_id = await _route_to_dlq_direct(
             tenant_id=tenant_info["tenant_id"],
             source="stripe",
             correlation_id=correlation_uuid,
@@ -406,7 +501,7 @@ async def stripe_payment_intent_succeeded_v2(
         )
         return {
             "status": "dlq_routed",
-            "dead_event_id": str(dead.id),
+            "dead_event_id": str(dead_event_id),
             "error": "validation_error",
         }
 
@@ -440,17 +535,10 @@ async def stripe_payment_intent_succeeded_v2(
             "channel": result.get("channel"),
         }
 
-    # Validation errors routed to DLQ by service: locate via correlation_id for response
-    async with get_session(tenant_id=tenant_info["tenant_id"]) as session:
-        from sqlalchemy import select
-        res = await session.execute(
-            select(DeadEvent).where(DeadEvent.correlation_id == uuid5(NAMESPACE_URL, idempotency_key))
-        )
-        dead_event = res.scalar_one_or_none()
-
+    # Validation errors routed to DLQ by service: the service returns the dead event id
     return {
         "status": "dlq_routed",
-        "dead_event_id": str(dead_event.id) if dead_event else None,
+        "dead_event_id": result.get("dlq_event_id"),
         "error": result.get("error_type") or result.get("error"),
     }
 
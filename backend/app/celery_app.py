@@ -146,6 +146,16 @@ def _ensure_celery_configured():
         "pool_size": settings.CELERY_BROKER_ENGINE_POOL_SIZE,
         "max_overflow": settings.CELERY_BROKER_ENGINE_MAX_OVERFLOW,
     }
+    if broker_url.startswith("sqla+"):
+        from app.celery_transport import register_sqla_transport
+
+        # SKIP LOCKED dequeue, delete-on-ack, lease stamping and LISTEN/NOTIFY wakeups; the stock transport
+        # would pass these options to create_engine().
+        register_sqla_transport()
+        broker_transport_options["listen_notify"] = settings.CELERY_BROKER_LISTEN_NOTIFY
+        broker_transport_options["notify_fallback_interval"] = settings.CELERY_BROKER_NOTIFY_FALLBACK_POLL_S
+        broker_transport_options["delete_on_ack"] = settings.CELERY_BROKER_DELETE_ON_ACK
+        broker_transport_options["visibility_timeout"] = settings.CELERY_BROKER_VISIBILITY_TIMEOUT_S
 
     include_modules = [
         "app.tasks.housekeeping",
@@ -288,6 +298,12 @@ def _configure_worker_logging(**kwargs):
     logger.info("celery_worker_logging_configured")
 
 
+@signals.worker_shutdown.connect
+def _on_worker_shutdown(**kwargs):
+    """Flush task failures buffered in the main process (solo/threads pools)."""
+    _close_worker_dlq_writer()
+
+
 @signals.worker_process_shutdown.connect
 def _on_worker_process_shutdown(pid=None, **kwargs):
     """
@@ -297,6 +313,7 @@ def _on_worker_process_shutdown(pid=None, **kwargs):
     parent-owned periodic multiprocess shard sweeper.
     """
     resolved_pid = int(pid) if pid is not None else os.getpid()
+    _close_worker_dlq_writer()
     try:
         from prometheus_client import multiprocess
 
@@ -310,39 +327,57 @@ def _on_worker_process_shutdown(pid=None, **kwargs):
         pass
 
 
-def _recover_invisible_kombu_messages(*, engine, visibility_timeout_s: int, task_name_filter: str | None) -> int:
-    sql = """
-        UPDATE public.kombu_message
-        SET visible = true
-        WHERE visible = false
-          AND "timestamp" IS NOT NULL
-          AND "timestamp" < (now() - make_interval(secs => :visibility_timeout_s))
+_RECOVER_EXPIRED_LEASES_SQL = """
+    UPDATE public.kombu_message m
+    SET visible = true, lease_expires_at = NULL, version = m.version + 1
+    FROM (
+        SELECT id, enqueued_at
+        FROM public.kombu_message
+        WHERE NOT visible
+          AND lease_expires_at < now()
+          {filters}
+        ORDER BY lease_expires_at
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    ) expired
+    WHERE m.id = expired.id AND m.enqueued_at = expired.enqueued_at
+"""
+
+
+def _recover_invisible_kombu_messages(*, engine, task_name_filter: str | None, batch_size: int = 500) -> int:
+    """
+    Make messages whose lease expired visible again, in bounded batches.
+
+    Candidates come from the partial index on (lease_expires_at, task_name) WHERE NOT visible,
+    one short SKIP LOCKED transaction per batch, so the sweep never scans payloads or holds
+    locks on rows a worker is dequeuing. The lease (dequeue time + the broker visibility
+    timeout) is stamped by app.celery_transport at dequeue time.
     """
-    params: dict[str, object] = {"visibility_timeout_s": int(visibility_timeout_s)}
+    filters = ""
+    params: dict[str, object] = {"batch_size": int(batch_size)}
     if task_name_filter:
-        sql += "\n          AND payload LIKE :task_name_filter"
+        # Substring match on the indexed column, evaluated only for expired-lease candidates.
+        filters += "AND task_name LIKE :task_name_filter"
         params["task_name_filter"] = f"%{task_name_filter}%"
 
         # R4: Prevent infinite redelivery loops for crash probes once redelivery has been observed.
-        # The Kombu SQLAlchemy transport does not delete messages on ack; without this guard, the
-        # recovery sweep will keep re-queueing the same message forever.
         if "r4_failure_semantics.crash_after_write_pre_ack" in task_name_filter:
-            sql += """
-              AND NOT EXISTS (
-                SELECT 1
-                FROM public.r4_recovery_exclusions e
-                WHERE e.scenario = 'S2_CrashAfterWritePreAck'
-                  AND e.task_id = COALESCE(
-                    (public.kombu_message.payload::jsonb -> 'headers' ->> 'id'),
-                    (public.kombu_message.payload::jsonb -> 'headers' ->> 'task_id'),
-                    (public.kombu_message.payload::jsonb ->> 'id')
-                  )
-              )
-            """
-
-    with engine.begin() as conn:
-        res = conn.execute(text(sql), params)
-        return int(res.rowcount or 0)
+            filters += """
+          AND NOT EXISTS (
+            SELECT 1
+            FROM public.r4_recovery_exclusions e
+            WHERE e.scenario = 'S2_CrashAfterWritePreAck'
+              AND e.task_id = public.kombu_message.task_id
+          )"""
+
+    sql = text(_RECOVER_EXPIRED_LEASES_SQL.format(filters=filters))
+    recovered = 0
+    while True:
+        with engine.begin() as conn:
+            batch = int(conn.execute(sql, params).rowcount or 0)
+        recovered += batch
+        if batch < batch_size:
+            return recovered
 
 
 def _start_kombu_visibility_recovery_thread() -> None:
@@ -350,8 +385,8 @@ def _start_kombu_visibility_recovery_thread() -> None:
     Kombu SQLAlchemy transport marks reserved messages as visible=false, with no built-in redelivery.
 
     This worker-side recovery loop re-queues "stuck" invisible messages by restoring visible=true once
-    they are older than the configured visibility timeout. This restores at-least-once semantics
-    after worker loss, and is safe when paired with idempotent side effects + task time limits.
+    their lease (dequeue time + the configured visibility timeout) has expired. This restores
+    at-least-once semantics after worker loss, and is safe when paired with idempotent side effects + task time limits.
     """
     global _kombu_visibility_recovery_started
     if _kombu_visibility_recovery_started:
@@ -365,6 +400,7 @@ def _start_kombu_visibility_recovery_thread() -> None:
     visibility_timeout_s = int(settings.CELERY_BROKER_VISIBILITY_TIMEOUT_S)
     sweep_interval_s = float(settings.CELERY_BROKER_RECOVERY_SWEEP_INTERVAL_S)
     task_name_filter = settings.CELERY_BROKER_RECOVERY_TASK_NAME_FILTER
+    batch_size = int(settings.CELERY_BROKER_RECOVERY_BATCH_SIZE)
 
     recovery_engine = create_engine(
         dsn,
@@ -388,8 +424,8 @@ def _start_kombu_visibility_recovery_thread() -> None:
             try:
                 recovered = _recover_invisible_kombu_messages(
                     engine=recovery_engine,
-                    visibility_timeout_s=visibility_timeout_s,
                     task_name_filter=task_name_filter,
+                    batch_size=batch_size,
                 )
                 if recovered:
                     logger.warning(
@@ -622,6 +658,137 @@ def _on_task_retry(sender=None, request=None, reason=None, einfo=None, **kwargs)
     )
 
 
+def _worker_dlq_dsn() -> str:
+    """Sync psycopg2 DSN for the worker DLQ writer (G4 remediation)."""
+    # B0.5.3.3 Gate C: Lazy settings access in DLQ handler
+    settings = _get_settings()
+
+    # G4-AUTH: Build sync DSN with 127.0.0.1 normalization for CI determinism
+    # Step 1: Get raw DATABASE_URL from settings
+    raw_database_url = settings.DATABASE_URL.unicode_string()
+
+    # G4-AUTH DIAGNOSTIC: Log raw DATABASE_URL (password redacted) BEFORE make_url parsing
+    if os.getenv("CI") == "true":
+        # Redact password for logging
+        if "@" in raw_database_url:
+            parts = raw_database_url.split("@")
+            prefix = parts[0]
+            if ":" in prefix:
+                user_part = prefix.split("://")[1] if "://" in prefix else prefix
+                if ":" in user_part:
+                    user = user_part.split(":")[0]
+                    redacted_prefix = prefix.split(":")[0] + "://" + user + ":***"
+                else:
+                    redacted_prefix = prefix
+            else:
+                redacted_prefix = prefix
+            redacted_raw = redacted_prefix + "@" + "@".join(parts[1:])
+        else:
+            redacted_raw = raw_database_url
+        logger.info(
+            f"[G4-AUTH-RAW] settings.DATABASE_URL.unicode_string() = {redacted_raw}",
+            extra={"raw_dsn_redacted": redacted_raw}
+        )
+
+    # Step 2: Parse with make_url
+    url = make_url(raw_database_url)
+
+    # G4-AUTH DIAGNOSTIC: Check if password survived make_url parsing
+    if os.getenv("CI") == "true":
+        has_password = url.password is not None and url.password != ""
+        logger.info(
+            f"[G4-AUTH-PARSED] After make_url: host={url.host} user={url.username} password_present={has_password}",
+            extra={"parsed_host": url.host, "parsed_user": url.username, "password_present": has_password}
+        )
+
+    # Step 3: Normalize localhost to 127.0.0.1 for IPv4 enforcement
+    if url.host == "localhost" and os.getenv("CI") == "true":
+        url = url.set(host="127.0.0.1")
+    query = dict(url.query)
+    query.pop("channel_binding", None)
+    url = url.set(query=query)
+    if url.drivername.startswith("postgresql+"):
+        url = url.set(drivername="postgresql")
+
+    # G4-AUTH FIX: Manually construct DSN to preserve password
+    # str(url) may drop password after multiple .set() calls
+    dsn_parts = ["postgresql://"]
+    if url.username:
+        dsn_parts.append(url.username)
+        if url.password:
+            dsn_parts.append(":")
+            dsn_parts.append(url.password)
+        dsn_parts.append("@")
+    dsn_parts.append(url.host or "localhost")
+    if url.port:
+        dsn_parts.append(f":{url.port}")
+    if url.database:
+        dsn_parts.append(f"/{url.database}")
+    dsn = "".join(dsn_parts)
+
+    # G4-AUTH DIAGNOSTIC: Log final DSN (password redacted)
+    if os.getenv("CI") == "true":
+        # Redact password in final DSN
+        if "@" in dsn:
+            parts = dsn.split("@")
+            prefix = parts[0]
+            if ":" in prefix:
+                user_part = prefix.split("://")[1] if "://" in prefix else prefix
+                if ":" in user_part:
+                    user = user_part.split(":")[0]
+                    redacted_prefix = prefix.split(":")[0] + "://" + user + ":***"
+                else:
+                    redacted_prefix = prefix
+            else:
+                redacted_prefix = prefix
+            redacted_dsn = redacted_prefix + "@" + "@".join(parts[1:])
+        else:
+            redacted_dsn = dsn
+        logger.info(
+            f"[G4-AUTH-FINAL] Final DSN for psycopg2.connect() = {redacted_dsn}",
+            extra={"final_dsn_redacted": redacted_dsn}
+        )
+    return dsn
+
+
+_WORKER_DLQ_WRITER = None
+_WORKER_DLQ_WRITER_PID: Optional[int] = None
+_WORKER_DLQ_WRITER_LOCK = threading.Lock()
+
+
+def _get_worker_dlq_writer():
+    """Per-process buffered worker_failed_jobs writer (recreated after fork)."""
+    global _WORKER_DLQ_WRITER, _WORKER_DLQ_WRITER_PID
+    with _WORKER_DLQ_WRITER_LOCK:
+        if _WORKER_DLQ_WRITER is None or _WORKER_DLQ_WRITER_PID != os.getpid():
+            import psycopg2
+
+            from app.celery_dlq import WorkerDLQWriter
+
+            settings = _get_settings()
+            _WORKER_DLQ_WRITER = WorkerDLQWriter(
+                lambda: psycopg2.connect(_worker_dlq_dsn()),
+                buffer_size=settings.WORKER_DLQ_BUFFER_SIZE,
+                batch_size=settings.WORKER_DLQ_BATCH_SIZE,
+                flush_interval_s=settings.WORKER_DLQ_FLUSH_INTERVAL_S,
+            )
+            _WORKER_DLQ_WRITER_PID = os.getpid()
+        return _WORKER_DLQ_WRITER
+
+
+def _close_worker_dlq_writer() -> None:
+    """Flush buffered task failures on shutdown; only the owning process writes them."""
+    global _WORKER_DLQ_WRITER
+    with _WORKER_DLQ_WRITER_LOCK:
+        writer, _WORKER_DLQ_WRITER = _WORKER_DLQ_WRITER, None
+        owned = _WORKER_DLQ_WRITER_PID == os.getpid()
+    if writer is not None and owned:
+        try:
+            writer.close()
+        except Exception:
+            logger.exception("celery_dlq_shutdown_flush_failed")
+
+
 @signals.task_failure.connect
 def _on_task_failure(task_id=None, exception=None, args=None, kwargs=None, einfo=None, **extra):
     # Extract task from extra if available (signal signature variations)
@@ -650,102 +817,12 @@ def _on_task_failure(task_id=None, exception=None, args=None, kwargs=None, einfo
             retries=retry_count,
         )
 
-    # B0.5.2: Persist task failure to worker DLQ (G4 remediation: sync psycopg2 path)
+    # B0.5.2: Persist task failure to worker DLQ (buffered; one pooled connection per process)
     try:
-        import os
-        import psycopg2
-        import psycopg2.extras
+        from datetime import datetime, timezone
         from uuid import UUID, uuid5, NAMESPACE_URL
-        from sqlalchemy.engine.url import make_url
-
-        # B0.5.3.3 Gate C: Lazy settings access in DLQ handler
-        settings = _get_settings()
-
-        # G4-AUTH: Build sync DSN with 127.0.0.1 normalization for CI determinism
-        # Step 1: Get raw DATABASE_URL from settings
-        raw_database_url = settings.DATABASE_URL.unicode_string()
-
-        # G4-AUTH DIAGNOSTIC: Log raw DATABASE_URL (password redacted) BEFORE make_url parsing
-        if os.getenv("CI") == "true":
-            # Redact password for logging
-            if "@" in raw_database_url:
-                parts = raw_database_url.split("@")
-                prefix = parts[0]
-                if ":" in prefix:
-                    user_part = prefix.split("://")[1] if "://" in prefix else prefix
-                    if ":" in user_part:
-                        user = user_part.split(":")[0]
-                        redacted_prefix = prefix.split(":")[0] + "://" + user + ":***"
-                    else:
-                        redacted_prefix = prefix
-                else:
-                    redacted_prefix = prefix
-                redacted_raw = redacted_prefix + "@" + "@".join(parts[1:])
-            else:
-                redacted_raw = raw_database_url
-            logger.info(
-                f"[G4-AUTH-RAW] settings.DATABASE_URL.unicode_string() = {redacted_raw}",
-                extra={"raw_dsn_redacted": redacted_raw}
-            )
-
-        # Step 2: Parse with make_url
-        url = make_url(raw_database_url)
 
-        # G4-AUTH DIAGNOSTIC: Check if password survived make_url parsing
-        if os.getenv("CI") == "true":
-            has_password = url.password is not None and url.password != ""
-            logger.info(
-                f"[G4-AUTH-PARSED] After make_url: host={url.host} user={url.username} password_present={has_password}",
-                extra={"parsed_host": url.host, "parsed_user": url.username, "password_present": has_password}
-            )
-
-        # Step 3: Normalize localhost to 127.0.0.1 for IPv4 enforcement
-        if url.host == "localhost" and os.getenv("CI") == "true":
-            url = url.set(host="127.0.0.1")
-        query = dict(url.query)
-        query.pop("channel_binding", None)
-        url = url.set(query=query)
-        if url.drivername.startswith("postgresql+"):
-            url = url.set(drivername="postgresql")
-
-        # G4-AUTH FIX: Manually construct DSN to preserve password
-        # str(url) may drop password after multiple .set() calls
-        dsn_parts = ["postgresql://"]
-        if url.username:
-            dsn_parts.append(url.username)
-            if url.password:
-                dsn_parts.append(":")
-                dsn_parts.append(url.password)
-            dsn_parts.append("@")
-        dsn_parts.append(url.host or "localhost")
-        if url.port:
-            dsn_parts.append(f":{url.port}")
-        if url.database:
-            dsn_parts.append(f"/{url.database}")
-        dsn = "".join(dsn_parts)
-
-        # G4-AUTH DIAGNOSTIC: Log final DSN (password redacted)
-        if os.getenv("CI") == "true":
-            # Redact password in final DSN
-            if "@" in dsn:
-                parts = dsn.split("@")
-                prefix = parts[0]
-                if ":" in prefix:
-                    user_part = prefix.split("://")[1] if "://" in prefix else prefix
-                    if ":" in user_part:
-                        user = user_part.split(":")[0]
-                        redacted_prefix = prefix.split(":")[0] + "://" + user + ":***"
-                    else:
-                        redacted_prefix = prefix
-                else:
-                    redacted_prefix = prefix
-                redacted_dsn = redacted_prefix + "@" + "@".join(parts[1:])
-            else:
-                redacted_dsn = dsn
-            logger.info(
-                f"[G4-AUTH-FINAL] Final DSN for psycopg2.connect() = {redacted_dsn}",
-                extra={"final_dsn_redacted": redacted_dsn}
-            )
+        from app.celery_dlq import FailedJobRow
 
         # Extract metadata
         tenant_id = None
@@ -808,75 +885,36 @@ def _on_task_failure(task_id=None, exception=None, args=None, kwargs=None, einfo
                 return [_serialize_for_json(item) for item in obj]
             return obj
 
-        # G4-LOOP/G4-JSON: Sync persistence with proper JSONB encoding
-        # B0.5.3.1: Write to canonical worker_failed_jobs table
-        conn = psycopg2.connect(dsn)
-        try:
-            cur = conn.cursor()
-            # G4-JSON: Use psycopg2.extras.Json for JSONB columns to prevent encoding defects
-            # B0.5.3.1: Serialize UUIDs to strings before JSON encoding
-            serialized_args = _serialize_for_json(args if args else [])
-            serialized_kwargs = _serialize_for_json(kwargs if kwargs else {})
-
-            cur.execute("""
-                SELECT set_config('app.execution_context', 'worker', true);
-             """)
-            if tenant_id:
-                cur.execute(
-                    "SELECT set_config('app.current_tenant_id', %s, true);",
-                    (str(tenant_id),),
-                )
-            if correlation_id:
-                cur.execute(
-                    "SELECT set_config('app.correlation_id', %s, true);",
-                    (str(correlation_id),),
-                )
+        dlq_id = None
+        if task_id and raw_task_name:
+            dlq_id = str(uuid5(NAMESPACE_URL, f"{task_id}:{raw_task_name}"))
+        else:
+            dlq_id = str(uuid5(NAMESPACE_URL, "unknown:unknown"))
 
-            dlq_id = None
-            if task_id and raw_task_name:
-                dlq_id = str(uuid5(NAMESPACE_URL, f"{task_id}:{raw_task_name}"))
-            else:
-                dlq_id = str(uuid5(NAMESPACE_URL, "unknown:unknown"))
-
-            cur.execute("""
-                INSERT INTO worker_failed_jobs (
-                    id, task_id, task_name, queue, worker,
-                    task_args, task_kwargs, tenant_id,
-                    error_type, exception_class, error_message, traceback,
-                    retry_count, status, correlation_id, failed_at
-                ) VALUES (
-                    %s, %s, %s, %s, %s,
-                    %s, %s, %s,
-                    %s, %s, %s, %s,
-                    %s, %s, %s, CURRENT_TIMESTAMP
-                )
-            """, (
-                dlq_id,
-                task_id,
-                raw_task_name,
-                queue,
-                worker_name,
-                psycopg2.extras.Json(serialized_args),  # G4-JSON: Explicit JSONB encoding with UUID serialization
-                psycopg2.extras.Json(serialized_kwargs),  # G4-JSON: Explicit JSONB encoding with UUID serialization
-                str(tenant_id) if tenant_id else None,
-                error_type,
-                exception.__class__.__name__ if exception else "Unknown",
-                str(exception)[:500] if exception else "",
-                str(einfo)[:2000] if einfo else None,
-                retry_count,
-                "pending",
-                str(correlation_id) if correlation_id else None,
-            ))
-            conn.commit()
-
-            # G4-AUTH: Confirm successful persistence
-            if os.getenv("CI") == "true":
-                logger.info(
-                    "[G4-AUTH] DB CONNECT OK - DLQ row persisted",
-                    extra={"task_id": task_id, "task_name": raw_task_name}
-                )
-        finally:
-            conn.close()
+        # B0.5.3.1: Write to canonical worker_failed_jobs table
+        # B0.5.3.1: Serialize UUIDs to strings before JSON encoding
+        row = FailedJobRow(
+            id=dlq_id,
+            task_id=task_id,
+            task_name=raw_task_name,
+            queue=queue,
+            worker=worker_name,
+            task_args=_serialize_for_json(args if args else []),
+            task_kwargs=_serialize_for_json(kwargs if kwargs else {}),
+            tenant_id=str(tenant_id) if tenant_id else None,
+            error_type=error_type,
+            exception_class=exception.__class__.__name__ if exception else "Unknown",
+            error_message=str(exception)[:500] if exception else "",
+            traceback=str(einfo)[:2000] if einfo else None,
+            retry_count=retry_count,
+            correlation_id=str(correlation_id) if correlation_id else None,
+            failed_at=datetime.now(timezone.utc),
+        )
+        writer = _get_worker_dlq_writer()
+        writer.submit(row)
+        # Eager (in-process) execution has no worker lifecycle to flush on; write through.
+        if task is not None and getattr(task.request, "is_eager", False):
+            writer.flush()
 
     except Exception as dlq_error:
         # DLQ failure should not crash worker
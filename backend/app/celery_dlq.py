@@ -0,0 +1,212 @@
+"""
+Buffered writer for the worker DLQ (worker_failed_jobs).
+
+Task failures are queued in a bounded per-process buffer and written by a
+background flusher thread in multi-row INSERTs over one persistent psycopg2
+connection, so a failure storm costs one connection per worker process instead
+of a connect/insert/disconnect per failed task. Failures arriving while the
+buffer is full are counted (worker_dlq_rows_overflowed_total) and dropped; the
+buffer is flushed when the worker (process) shuts down.
+"""
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+from dataclasses import astuple, dataclass
+from datetime import datetime
+from itertools import groupby
+from typing import Any, Callable, Optional
+
+import psycopg2.extras
+
+from app.observability import metrics
+
+logger = logging.getLogger(__name__)
+
+_INSERT_SQL = """
+    INSERT INTO worker_failed_jobs (
+        id, task_id, task_name, queue, worker,
+        task_args, task_kwargs, tenant_id,
+        error_type, exception_class, error_message, traceback,
+        retry_count, correlation_id, failed_at, status
+    ) VALUES %s
+    ON CONFLICT (id) DO NOTHING
+"""
+_ROW_TEMPLATE = "(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 'pending')"
+
+
+@dataclass(frozen=True)
+class FailedJobRow:
+    """One worker_failed_jobs row; field order matches _INSERT_SQL."""
+
+    id: str
+    task_id: Optional[str]
+    task_name: str
+    queue: Optional[str]
+    worker: Optional[str]
+    task_args: Any
+    task_kwargs: Any
+    tenant_id: Optional[str]
+    error_type: str
+    exception_class: str
+    error_message: str
+    traceback: Optional[str]
+    retry_count: int
+    correlation_id: Optional[str]
+    failed_at: datetime
+
+    def params(self) -> tuple:
+        values = astuple(self)
+        # G4-JSON: Explicit JSONB encoding for task_args/task_kwargs
+        return values[:5] + (psycopg2.extras.Json(self.task_args), psycopg2.extras.Json(self.task_kwargs)) + values[7:]
+
+
+class WorkerDLQWriter:
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        *,
+        buffer_size: int,
+        batch_size: int,
+        flush_interval_s: float,
+    ) -> None:
+        self._connect = connect
+        self._buffer: queue.Queue[FailedJobRow] = queue.Queue(maxsize=buffer_size)
+        self._batch_size = batch_size
+        self._flush_interval_s = flush_interval_s
+        self._conn: Any = None
+        self._write_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, row: FailedJobRow) -> bool:
+        """Buffer a failure for the flusher; returns False if it was dropped on overflow."""
+        try:
+            self._buffer.put_nowait(row)
+        except queue.Full:
+            metrics.worker_dlq_rows_overflowed_total.inc()
+            logger.warning(
+                "celery_dlq_buffer_overflow",
+                extra={"task_id": row.task_id, "task_name": row.task_name},
+            )
+            return False
+        self._ensure_flusher()
+        if self._buffer.qsize() >= self._batch_size:
+            self._wake.set()
+        return True
+
+    def flush(self) -> int:
+        """Write everything buffered so far on the calling thread; returns rows written."""
+        written = 0
+        with self._write_lock:
+            while True:
+                batch = self._drain()
+                if not batch:
+                    return written
+                written += self._write(batch)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Stop the flusher, write what is still buffered and close the connection."""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+        with self._write_lock:
+            self._discard_connection()
+
+    def _ensure_flusher(self) -> None:
+        if self._thread is not None or self._stopped.is_set():
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="worker-dlq-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wake.wait(self._flush_interval_s)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("celery_dlq_flush_failed")
+
+    def _drain(self) -> list[FailedJobRow]:
+        batch: list[FailedJobRow] = []
+        while len(batch) < self._batch_size:
+            try:
+                batch.append(self._buffer.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: list[FailedJobRow]) -> int:
+        try:
+            self._insert(batch)
+        except Exception:
+            # The connection may have gone away; reconnect and retry once before
+            # falling back to row-by-row so one bad row cannot lose the batch.
+            self._discard_connection()
+            try:
+                self._insert(batch)
+            except Exception:
+                return sum(self._write_one(row) for row in batch)
+        metrics.worker_dlq_rows_written_total.inc(len(batch))
+        metrics.worker_dlq_flush_batch_size.observe(len(batch))
+        return len(batch)
+
+    def _write_one(self, row: FailedJobRow) -> int:
+        try:
+            self._insert([row])
+        except Exception as dlq_error:
+            self._discard_connection()
+            metrics.worker_dlq_rows_failed_total.inc()
+            logger.error(
+                "celery_dlq_persist_failed",
+                exc_info=dlq_error,
+                extra={"task_id": row.task_id, "task_name": row.task_name},
+            )
+            return 0
+        metrics.worker_dlq_rows_written_total.inc()
+        metrics.worker_dlq_flush_batch_size.observe(1)
+        return 1
+
+    def _insert(self, rows: list[FailedJobRow]) -> None:
+        if self._conn is None or self._conn.closed:
+            self._conn = self._connect()
+        conn = self._conn
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT set_config('app.execution_context', 'worker', true)")
+                # RLS on worker_failed_jobs checks tenant_id against the tenant GUC,
+                # so each tenant's rows go in their own statement.
+                ordered = sorted(rows, key=lambda row: row.tenant_id or "")
+                for tenant_id, tenant_rows in groupby(ordered, key=lambda row: row.tenant_id or ""):
+                    tenant_rows = list(tenant_rows)
+                    cur.execute("SELECT set_config('app.current_tenant_id', %s, true)", (tenant_id,))
+                    psycopg2.extras.execute_values(
+                        cur,
+                        _INSERT_SQL,
+                        [row.params() for row in tenant_rows],
+                        template=_ROW_TEMPLATE,
+                        page_size=len(tenant_rows),
+                    )
+            conn.commit()
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            raise
+
+    def _discard_connection(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
@@ -0,0 +1,362 @@
+"""
+Postgres-tuned Kombu SQLAlchemy broker transport.
+
+Keeps the stock sqla transport's URL (sqla+...) and kombu_* tables, and changes:
+
+- Dequeue: a single UPDATE ... RETURNING over a FOR UPDATE SKIP LOCKED pick,
+  so concurrent consumers never wait on each other's candidate row.
+- Ack: the message row is deleted (stock Kombu only flips visible=false and
+  keeps every message forever); rejects with requeue and restores flip the
+  original row back to visible instead of inserting a copy.
+- Wakeups: enqueues issue NOTIFY on a per-queue channel inside the insert
+  transaction, and idle workers block on LISTEN instead of sleeping between
+  polls. A long fallback poll still runs so messages made visible without a
+  NOTIFY (visibility recovery sweep) are picked up, and the transport degrades
+  to plain polling whenever the LISTEN connection is unavailable.
+- Routing metadata: enqueues record task_name/task_id columns and dequeues
+  stamp lease_expires_at, so the visibility recovery sweep
+  (app.celery_app._recover_invisible_kombu_messages) walks a partial index
+  of expired leases instead of scanning payloads.
+- Storage: kombu_message is range-partitioned by enqueued_at (migration
+  202610171100); dequeue orders by it and ack/restore address rows by
+  (id, enqueued_at) so each statement touches a single partition.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+import hashlib
+from json import dumps, loads
+import logging
+from queue import Empty
+import select
+import socket
+from time import monotonic, sleep
+from typing import Optional
+
+from kombu.transport import TRANSPORT_ALIASES, _transport_cache, virtual
+from kombu.transport import sqlalchemy as kombu_sqla
+from kombu.utils.encoding import bytes_to_str
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import NullPool
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL_PREFIX = "kombu_q_"
+# Postgres truncates identifiers (and therefore LISTEN channels) at NAMEDATALEN - 1 bytes.
+_MAX_CHANNEL_BYTES = 63
+# Transport options consumed by kombu or by this module; the rest go to create_engine().
+_NON_ENGINE_OPTIONS = frozenset(
+    {
+        "queue_tablename",
+        "message_tablename",
+        "callback",
+        "errback",
+        "max_retries",
+        "interval_start",
+        "interval_step",
+        "interval_max",
+        "retry_errors",
+        "polling_interval",
+        "listen_notify",
+        "notify_fallback_interval",
+        "delete_on_ack",
+        "visibility_timeout",
+    }
+)
+
+# Oldest visible message first; SKIP LOCKED lets concurrent consumers pass over
+# rows another consumer is claiming instead of queueing behind its lock.
+_DEQUEUE_SQL = """
+    UPDATE {table}
+    SET visible = false,
+        "timestamp" = LOCALTIMESTAMP,
+        lease_expires_at = now() + make_interval(secs => :visibility_timeout),
+        version = version + 1
+    WHERE (id, enqueued_at) = (
+        SELECT id, enqueued_at FROM {table}
+        WHERE queue_id = :queue_id AND visible
+        ORDER BY enqueued_at, id
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, enqueued_at, payload
+"""
+# Routing metadata is copied out of the payload so visibility recovery can use an index.
+_INSERT_MESSAGE_SQL = (
+    "INSERT INTO {table} (queue_id, payload, task_name, task_id) "
+    "VALUES (:queue_id, :payload, :task_name, :task_id)"
+)
+# enqueued_at is the partition key: including it prunes the statement to one partition.
+_DELETE_MESSAGE_SQL = "DELETE FROM {table} WHERE id = :id AND enqueued_at = :enqueued_at"
+_RESTORE_MESSAGE_SQL = (
+    "UPDATE {table} SET visible = true, lease_expires_at = NULL, payload = :payload, version = version + 1 "
+    "WHERE id = :id AND enqueued_at = :enqueued_at"
+)
+
+
+def notify_channel_name(queue: str) -> str:
+    """Per-queue NOTIFY channel; long queue names (e.g. reply queues) are hashed."""
+    name = f"{NOTIFY_CHANNEL_PREFIX}{queue}"
+    if len(name.encode("utf-8")) <= _MAX_CHANNEL_BYTES:
+        return name
+    return f"{NOTIFY_CHANNEL_PREFIX}{hashlib.sha1(queue.encode('utf-8')).hexdigest()}"
+
+
+def _quote_channel(channel: str) -> str:
+    return '"' + channel.replace('"', '""') + '"'
+
+
+class QoS(virtual.QoS):
+    def ack(self, delivery_tag):
+        self.channel._delete_delivered(delivery_tag)
+        super().ack(delivery_tag)
+
+    def reject(self, delivery_tag, requeue=False):
+        if not requeue:
+            self.channel._delete_delivered(delivery_tag)
+        super().reject(delivery_tag, requeue=requeue)
+
+
+class Channel(kombu_sqla.Channel):
+    QoS = QoS
+
+    def __init__(self, connection, **kwargs):
+        super().__init__(connection, **kwargs)
+        # delivery_tag -> kombu_message (id, enqueued_at) for messages dequeued but not yet acked.
+        self._delivered_ids: dict[str, tuple[int, datetime]] = {}
+
+    def _table(self) -> str:
+        return self.session.bind.dialect.identifier_preparer.quote(self.message_tablename)
+
+    def _engine_from_config(self):
+        conninfo = self.connection.client
+        options = {
+            key: value for key, value in conninfo.transport_options.items() if key not in _NON_ENGINE_OPTIONS
+        }
+        return create_engine(conninfo.hostname, **options)
+
+    def _put(self, queue, payload, **kwargs):
+        obj = self._get_or_create(queue)
+        if self.session.bind.dialect.name == "postgresql":
+            headers = payload.get("headers") or {}
+            self.session.execute(
+                text(_INSERT_MESSAGE_SQL.format(table=self._table())),
+                {
+                    "queue_id": obj.id,
+                    "payload": dumps(payload),
+                    "task_name": headers.get("task"),
+                    "task_id": headers.get("id"),
+                },
+            )
+        else:
+            self.session.add(self.message_cls(dumps(payload), obj))
+        if self.connection.listen_notify:
+            # Delivered on commit, so a woken worker always sees the new row.
+            self.session.execute(
+                text("SELECT pg_notify(:channel, '')"),
+                {"channel": notify_channel_name(queue)},
+            )
+        try:
+            self.session.commit()
+        except OperationalError:
+            self.session.rollback()
+
+    def _get(self, queue):
+        if self.session.bind.dialect.name != "postgresql":
+            return super()._get(queue)
+        obj = self._get_or_create(queue)
+        try:
+            row = self.session.execute(
+                text(_DEQUEUE_SQL.format(table=self._table())),
+                {"queue_id": obj.id, "visibility_timeout": self.connection.visibility_timeout},
+            ).first()
+        finally:
+            self.session.commit()
+        if row is None:
+            raise Empty()
+        payload = loads(bytes_to_str(row.payload))
+        if self.connection.delete_on_ack:
+            delivery_tag = payload.get("properties", {}).get("delivery_tag")
+            if delivery_tag is not None:
+                self._delivered_ids[delivery_tag] = (row.id, row.enqueued_at)
+        return payload
+
+    def basic_consume(self, queue, no_ack, callback, consumer_tag, **kwargs):
+        if not no_ack:
+            return super().basic_consume(queue, no_ack, callback, consumer_tag, **kwargs)
+
+        def _delete_then_deliver(message):
+            # Nothing will ack these: drop the row as soon as it is delivered.
+            self._delete_delivered(message.delivery_tag)
+            return callback(message)
+
+        return super().basic_consume(queue, no_ack, _delete_then_deliver, consumer_tag, **kwargs)
+
+    def basic_get(self, queue, no_ack=False, **kwargs):
+        message = super().basic_get(queue, no_ack=no_ack, **kwargs)
+        if message is not None and no_ack:
+            self._delete_delivered(message.delivery_tag)
+        return message
+
+    def _delete_delivered(self, delivery_tag) -> None:
+        key = self._delivered_ids.pop(delivery_tag, None)
+        if key is None:
+            return
+        message_id, enqueued_at = key
+        try:
+            self.session.execute(
+                text(_DELETE_MESSAGE_SQL.format(table=self._table())),
+                {"id": message_id, "enqueued_at": enqueued_at},
+            )
+            self.session.commit()
+        except OperationalError:
+            # Row stays invisible; the visibility recovery sweep redelivers it (at-least-once).
+            self.session.rollback()
+            logger.warning("celery_broker_ack_delete_failed", extra={"message_id": message_id})
+
+    def _restore(self, message):
+        key = self._delivered_ids.pop(message.delivery_tag, None)
+        if key is None:
+            return super()._restore(message)
+        message_id, enqueued_at = key
+        payload = message.serializable()
+        payload["redelivered"] = True
+        try:
+            self.session.execute(
+                text(_RESTORE_MESSAGE_SQL.format(table=self._table())),
+                {"id": message_id, "enqueued_at": enqueued_at, "payload": dumps(payload)},
+            )
+            self.session.commit()
+        except OperationalError:
+            self.session.rollback()
+            raise
+
+
+class Transport(kombu_sqla.Transport):
+    Channel = Channel
+
+    def __init__(self, client, **kwargs):
+        super().__init__(client, **kwargs)
+        options = client.transport_options
+        self.listen_notify = bool(options.get("listen_notify", False)) and str(client.hostname).startswith(
+            "postgresql"
+        )
+        self.notify_fallback_interval = float(options.get("notify_fallback_interval", 30.0))
+        self.delete_on_ack = bool(options.get("delete_on_ack", False))
+        self.visibility_timeout = int(options.get("visibility_timeout", 3600))
+        self._listener = None
+        self._listener_raw = None
+        self._listener_engine = None
+        self._listening: set[str] = set()
+        self._listener_retry_at = 0.0
+
+    def drain_events(self, connection, timeout=None):
+        if not self.listen_notify:
+            return super().drain_events(connection, timeout=timeout)
+
+        time_start = monotonic()
+        get = self.cycle.get
+        while True:
+            try:
+                get(self._deliver, timeout=timeout)
+            except Empty:
+                elapsed = monotonic() - time_start
+                if timeout is not None and elapsed >= timeout:
+                    raise socket.timeout()
+                subscribed = self._sync_listen()
+                if subscribed:
+                    # New LISTEN: re-check first, a NOTIFY may have fired before it.
+                    continue
+                wait = self.notify_fallback_interval if subscribed is False else self.polling_interval
+                if timeout is not None:
+                    wait = min(wait, timeout - elapsed)
+                self._wait_for_notify(wait)
+            else:
+                return
+
+    def close_connection(self, connection):
+        self._close_listener()
+        super().close_connection(connection)
+
+    def _active_queues(self) -> set[str]:
+        return {queue for channel in self.channels for queue in channel._active_queues}
+
+    def _sync_listen(self) -> Optional[bool]:
+        """
+        LISTEN on every consumed queue.
+
+        Returns None without a listener (caller polls at polling_interval),
+        True when new channels were subscribed, False otherwise.
+        """
+        if self._listener is None:
+            if monotonic() < self._listener_retry_at:
+                return None
+            try:
+                self._open_listener()
+            except Exception as exc:
+                self._listener_retry_at = monotonic() + self.notify_fallback_interval
+                logger.warning("celery_broker_listen_unavailable", extra={"error_type": exc.__class__.__name__})
+                return None
+
+        channels = {notify_channel_name(queue) for queue in self._active_queues()}
+        new_channels = channels - self._listening
+        if not new_channels:
+            return False
+        try:
+            cur = self._listener.cursor()
+            for channel in sorted(new_channels):
+                cur.execute(f"LISTEN {_quote_channel(channel)}")
+            cur.close()
+        except Exception as exc:
+            logger.warning("celery_broker_listen_failed", extra={"error_type": exc.__class__.__name__})
+            self._close_listener()
+            return None
+        self._listening |= new_channels
+        return True
+
+    def _open_listener(self) -> None:
+        if self._listener_engine is None:
+            self._listener_engine = create_engine(self.client.hostname, poolclass=NullPool)
+        raw = self._listener_engine.raw_connection()
+        dbapi_connection = raw.dbapi_connection
+        if not hasattr(dbapi_connection, "notifies"):
+            raw.close()
+            self.listen_notify = False
+            raise RuntimeError("broker DBAPI driver does not support LISTEN/NOTIFY")
+        dbapi_connection.autocommit = True
+        self._listener = dbapi_connection
+        self._listener_raw = raw
+        self._listening = set()
+
+    def _wait_for_notify(self, wait: float) -> None:
+        listener = self._listener
+        if listener is None:
+            sleep(max(wait, 0))
+            return
+        try:
+            ready, _, _ = select.select([listener], [], [], max(wait, 0))
+            if ready:
+                listener.poll()
+                del listener.notifies[:]
+        except Exception as exc:
+            logger.warning("celery_broker_listen_failed", extra={"error_type": exc.__class__.__name__})
+            self._close_listener()
+
+    def _close_listener(self) -> None:
+        raw = self._listener_raw
+        self._listener = None
+        self._listener_raw = None
+        self._listening = set()
+        if raw is not None:
+            try:
+                raw.close()
+            except Exception:
+                pass
+
+
+def register_sqla_transport() -> None:
+    """Route the sqla+ broker URL scheme to this transport."""
+    for alias in ("sqla", "sqlalchemy"):
+        TRANSPORT_ALIASES[alias] = "app.celery_transport:Transport"
+        _transport_cache.pop(alias, None)
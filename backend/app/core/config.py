@@ -38,6 +38,15 @@ class Settings(BaseSettings):
     TENANT_API_KEY_HEADER: str = Field(
         "X-Skeldir-Tenant-Key", description="Header carrying tenant API key"
     )
+    TENANT_SECRETS_CACHE_TTL_SECONDS: int = Field(
+        30, description="TTL for cached webhook secret lookups (0 disables the cache)."
+    )
+    TENANT_SECRETS_CACHE_NEGATIVE_TTL_SECONDS: int = Field(
+        5, description="TTL for cached unknown-API-key lookups (0 disables negative caching)."
+    )
+    TENANT_SECRETS_CACHE_MAX_ENTRIES: int = Field(
+        10000, description="Maximum API-key hashes held in the webhook secret cache."
+    )
     # JWT Authentication (Phase 1)
     AUTH_JWT_SECRET: Optional[str] = Field(
         None, description="JWT HMAC secret (HS*). Required when JWKS URL is not set."
@@ -54,6 +63,18 @@ class Settings(BaseSettings):
     AUTH_JWT_JWKS_URL: Optional[str] = Field(
         None, description="JWKS URL for JWT signature verification."
     )
+    AUTH_JWT_JWKS_CACHE_TTL_SECONDS: int = Field(
+        300, description="Lifetime of a fetched JWKS key set before it is refreshed."
+    )
+    AUTH_JWT_JWKS_MIN_REFETCH_INTERVAL_SECONDS: int = Field(
+        30, description="Minimum spacing between JWKS refetches triggered by unknown kids."
+    )
+    AUTH_JWT_VERIFIED_TOKEN_CACHE_TTL_SECONDS: int = Field(
+        30, description="Window for reusing verified token claims (0 disables)."
+    )
+    AUTH_JWT_VERIFIED_TOKEN_CACHE_MAX_ENTRIES: int = Field(
+        10000, description="Maximum verified tokens held in the claims cache."
+    )
 
     # Platform Credentials (Phase 2)
     PLATFORM_TOKEN_ENCRYPTION_KEY: Optional[str] = Field(
@@ -117,6 +138,79 @@ class Settings(BaseSettings):
     IDEMPOTENCY_CACHE_TTL: int = Field(
         86400, description="Idempotency cache TTL in seconds (24 hours)"
     )
+    INGESTION_BATCH_MAX_EVENTS: int = Field(
+        1000, description="Maximum events accepted by a single batch webhook request."
+    )
+    DLQ_TRACEBACK_MAX_CHARS: int = Field(
+        2000,
+        description="Characters of traceback stored per dead event (0 disables traceback capture).",
+    )
+    DLQ_WRITER_BATCH_SIZE: int = Field(
+        200,
+        description="Maximum dead events written per group-commit transaction by the buffered webhook DLQ writer.",
+    )
+    DLQ_REPLAY_BATCH_SIZE: int = Field(
+        500,
+        description="Dead events replayed per transaction by the bulk DLQ replay engine.",
+    )
+    DLQ_REPLAY_MAX_EVENTS_PER_SECOND: float = Field(
+        200.0,
+        description="Upper bound on bulk DLQ replay throughput so a replay cannot starve live ingestion.",
+    )
+    ATTRIBUTION_RECOMPUTE_DEBOUNCE_SECONDS: int = Field(
+        10,
+        description="Delay before a tenant's dirty attribution windows are flushed to recompute; marks within the interval are coalesced.",
+    )
+    ATTRIBUTION_BASELINE_FETCH_SIZE: int = Field(
+        1000,
+        description="Rows fetched per round trip by the attribution allocator's server-side cursor (bounds worker memory per window).",
+    )
+    ATTRIBUTION_RECOMPUTE_MAX_SHARDS: int = Field(
+        8,
+        description="Maximum parallel shard tasks a single recompute_window fans out to (1 disables sharding).",
+    )
+    ATTRIBUTION_RECOMPUTE_SHARD_MIN_EVENTS: int = Field(
+        50000,
+        description="Minimum events per shard; windows with fewer events to allocate run in a single task.",
+    )
+    ATTRIBUTION_INCREMENTAL_WATERMARK_LAG_SECONDS: int = Field(
+        300,
+        description="Overlap re-scanned behind a recompute job's event watermark to absorb clock skew and late-committing ingestion transactions.",
+    )
+
+    # Materialized views
+    MATVIEW_REFRESH_BACKEND: str = Field(
+        "matview",
+        description="'matview' refreshes every registry view globally; 'summary_tables' stops refreshing the global views that have a per-tenant summary table and keeps those summary tables current instead (dirty-bucket triggers on, incremental per-tenant refresh). Nothing reads the summary tables yet, so the skipped views go stale.",
+    )
+    MATVIEW_REFRESH_MAX_PARALLEL: int = Field(
+        3,
+        description="Independent matviews refreshed concurrently per worker process; also the size of the persistent refresh connection pool (1 refreshes sequentially).",
+    )
+    MATVIEW_SUMMARY_REFRESH_BATCH_SIZE: int = Field(
+        5000,
+        description="Dirty summary buckets claimed per transaction by the incremental summary refresh.",
+    )
+    MATVIEW_REFRESH_ADAPTIVE: bool = Field(
+        False,
+        description="Derive each view's refresh interval from matview_refresh_history: cheap views whose refreshes keep changing rows refresh early, expensive or rarely-changing views stretch to max_staleness_seconds.",
+    )
+    MATVIEW_ADAPTIVE_MIN_INTERVAL_RATIO: float = Field(
+        0.25,
+        description="Adaptive mode floor, as a fraction of a view's max_staleness_seconds.",
+    )
+    MATVIEW_ADAPTIVE_EXPENSIVE_REFRESH_SECONDS: float = Field(
+        5.0,
+        description="Average refresh duration at which adaptive mode stretches a view fully to max_staleness_seconds.",
+    )
+    MATVIEW_ADAPTIVE_HISTORY_WINDOW: int = Field(
+        20,
+        description="Most recent successful refreshes per view considered by adaptive mode.",
+    )
+    MATVIEW_REFRESH_HISTORY_RETENTION_DAYS: int = Field(
+        14,
+        description="Days of matview_refresh_history kept; older rows are pruned by the matview pulse.",
+    )
 
     # Celery (Postgres-only broker/result backend)
     CELERY_BROKER_URL: Optional[str] = Field(
@@ -162,6 +256,26 @@ class Settings(BaseSettings):
         250000,
         description="Restart worker child processes after exceeding this memory (KB).",
     )
+    WORKER_EVENT_LOOPS: int = Field(
+        1,
+        description="Event loops (each with its own thread and async DB engine) that run async task bodies in a worker process; task threads are pinned to the least-loaded loop.",
+    )
+    WORKER_LOOP_CALL_TIMEOUT_S: float = Field(
+        60.0,
+        description="Timeout (seconds) for one async call submitted from a task thread to its worker event loop.",
+    )
+    WORKER_DLQ_BUFFER_SIZE: int = Field(
+        10000,
+        description="Task failures buffered per worker process for worker_failed_jobs; failures beyond this are counted and dropped.",
+    )
+    WORKER_DLQ_BATCH_SIZE: int = Field(
+        200,
+        description="Maximum worker_failed_jobs rows written per multi-row INSERT.",
+    )
+    WORKER_DLQ_FLUSH_INTERVAL_S: float = Field(
+        0.5,
+        description="Maximum delay (seconds) before a buffered task failure is written to worker_failed_jobs.",
+    )
     CELERY_CHORD_UNLOCK_MAX_RETRIES: int = Field(
         5,
         description="Maximum retries for Celery chord unlock orchestration task.",
@@ -198,6 +312,34 @@ class Settings(BaseSettings):
         None,
         description="If set, kombu visibility recovery only requeues messages whose payload contains this substring (e.g., a task name).",
     )
+    CELERY_BROKER_RECOVERY_BATCH_SIZE: int = Field(
+        500,
+        description="Expired-lease kombu_message rows made visible per transaction by the visibility recovery sweep.",
+    )
+    CELERY_BROKER_LISTEN_NOTIFY: bool = Field(
+        True,
+        description="Wake sqla+ Postgres broker consumers with LISTEN/NOTIFY on enqueue instead of polling kombu_message.",
+    )
+    CELERY_BROKER_DELETE_ON_ACK: bool = Field(
+        True,
+        description="Delete kombu_message rows when the sqla+ Postgres broker acks a message (stock Kombu keeps every message as visible=false forever).",
+    )
+    CELERY_BROKER_COMPACTION_BATCH_SIZE: int = Field(
+        5000,
+        description="kombu_message rows deleted per transaction by the broker compaction task.",
+    )
+    CELERY_BROKER_NOTIFY_FALLBACK_POLL_S: float = Field(
+        30.0,
+        description="With LISTEN/NOTIFY enabled, idle consumers still poll kombu_message at this interval (seconds) to pick up messages made visible without a NOTIFY.",
+    )
+    CELERY_BROKER_PARTITION_PRECREATE_DAYS: int = Field(
+        3,
+        description="Daily kombu_message partitions created ahead of time by the broker partition maintenance task.",
+    )
+    CELERY_BROKER_PARTITION_RETENTION_DAYS: int = Field(
+        2,
+        description="kombu_message partitions older than this many days are dropped once empty (no unacked message left).",
+    )
 
     model_config = SettingsConfigDict(
         env_file=None,
@@ -279,6 +421,112 @@ class Settings(BaseSettings):
             raise ValueError("IDEMPOTENCY_CACHE_TTL must be greater than zero")
         return value
 
+    @field_validator(
+        "TENANT_SECRETS_CACHE_TTL_SECONDS",
+        "TENANT_SECRETS_CACHE_NEGATIVE_TTL_SECONDS",
+        "AUTH_JWT_VERIFIED_TOKEN_CACHE_TTL_SECONDS",
+        "AUTH_JWT_JWKS_MIN_REFETCH_INTERVAL_SECONDS",
+    )
+    @classmethod
+    def validate_non_negative_cache_windows(cls, value: int, info) -> int:
+        if value < 0:
+            raise ValueError(f"{info.field_name} must be >= 0")
+        return value
+
+    @field_validator(
+        "TENANT_SECRETS_CACHE_MAX_ENTRIES",
+        "AUTH_JWT_JWKS_CACHE_TTL_SECONDS",
+        "AUTH_JWT_VERIFIED_TOKEN_CACHE_MAX_ENTRIES",
+    )
+    @classmethod
+    def validate_positive_cache_bounds(cls, value: int, info) -> int:
+        if value < 1:
+            raise ValueError(f"{info.field_name} must be >= 1")
+        return value
+
+    @field_validator("INGESTION_BATCH_MAX_EVENTS")
+    @classmethod
+    def validate_ingestion_batch_max_events(cls, value: int) -> int:
+        if value < 1:
+            raise ValueError("INGESTION_BATCH_MAX_EVENTS must be >= 1")
+        return value
+
+    @field_validator("DLQ_TRACEBACK_MAX_CHARS")
+    @classmethod
+    def validate_dlq_traceback_max_chars(cls, value: int) -> int:
+        if value < 0:
+            raise ValueError("DLQ_TRACEBACK_MAX_CHARS must be >= 0")
+        return value
+
+    @field_validator("DLQ_WRITER_BATCH_SIZE", "DLQ_REPLAY_BATCH_SIZE")
+    @classmethod
+    def validate_dlq_batch_sizes(cls, value: int, info) -> int:
+        if value < 1:
+            raise ValueError(f"{info.field_name} must be >= 1")
+        return value
+
+    @field_validator("DLQ_REPLAY_MAX_EVENTS_PER_SECOND")
+    @classmethod
+    def validate_dlq_replay_rate(cls, value: float) -> float:
+        if value <= 0:
+            raise ValueError("DLQ_REPLAY_MAX_EVENTS_PER_SECOND must be > 0")
+        return value
+
+    @field_validator(
+        "ATTRIBUTION_BASELINE_FETCH_SIZE",
+        "ATTRIBUTION_RECOMPUTE_MAX_SHARDS",
+        "ATTRIBUTION_RECOMPUTE_SHARD_MIN_EVENTS",
+    )
+    @classmethod
+    def validate_attribution_positive_limits(cls, value: int, info) -> int:
+        if value < 1:
+            raise ValueError(f"{info.field_name} must be >= 1")
+        return value
+
+    @field_validator(
+        "ATTRIBUTION_RECOMPUTE_DEBOUNCE_SECONDS",
+        "ATTRIBUTION_INCREMENTAL_WATERMARK_LAG_SECONDS",
+    )
+    @classmethod
+    def validate_attribution_recompute_intervals(cls, value: int, info) -> int:
+        if value < 0:
+            raise ValueError(f"{info.field_name} must be >= 0")
+        return value
+
+    @field_validator("MATVIEW_REFRESH_BACKEND")
+    @classmethod
+    def validate_matview_refresh_backend(cls, value: str) -> str:
+        cleaned = value.strip().lower()
+        if cleaned not in {"matview", "summary_tables"}:
+            raise ValueError("MATVIEW_REFRESH_BACKEND must be 'matview' or 'summary_tables'")
+        return cleaned
+
+    @field_validator(
+        "MATVIEW_REFRESH_MAX_PARALLEL",
+        "MATVIEW_SUMMARY_REFRESH_BATCH_SIZE",
+        "MATVIEW_ADAPTIVE_HISTORY_WINDOW",
+        "MATVIEW_REFRESH_HISTORY_RETENTION_DAYS",
+    )
+    @classmethod
+    def validate_matview_positive_limits(cls, value: int, info) -> int:
+        if value < 1:
+            raise ValueError(f"{info.field_name} must be >= 1")
+        return value
+
+    @field_validator("MATVIEW_ADAPTIVE_MIN_INTERVAL_RATIO")
+    @classmethod
+    def validate_matview_adaptive_min_interval_ratio(cls, value: float) -> float:
+        if not 0 < value <= 1:
+            raise ValueError("MATVIEW_ADAPTIVE_MIN_INTERVAL_RATIO must be in (0, 1]")
+        return value
+
+    @field_validator("MATVIEW_ADAPTIVE_EXPENSIVE_REFRESH_SECONDS")
+    @classmethod
+    def validate_matview_adaptive_expensive_refresh_seconds(cls, value: float) -> float:
+        if value <= 0:
+            raise ValueError("MATVIEW_ADAPTIVE_EXPENSIVE_REFRESH_SECONDS must be > 0")
+        return value
+
     @field_validator(
         "LLM_MONTHLY_CAP_CENTS",
         "LLM_HOURLY_SHUTOFF_CENTS",
@@ -313,6 +561,34 @@ class Settings(BaseSettings):
             raise ValueError(f"{info.field_name} must be >= 1")
         return value
 
+    @field_validator("WORKER_EVENT_LOOPS")
+    @classmethod
+    def validate_worker_event_loops(cls, value: int) -> int:
+        if value < 1:
+            raise ValueError("WORKER_EVENT_LOOPS must be >= 1")
+        return value
+
+    @field_validator("WORKER_LOOP_CALL_TIMEOUT_S")
+    @classmethod
+    def validate_worker_loop_call_timeout(cls, value: float) -> float:
+        if value <= 0:
+            raise ValueError("WORKER_LOOP_CALL_TIMEOUT_S must be > 0")
+        return value
+
+    @field_validator("WORKER_DLQ_BUFFER_SIZE", "WORKER_DLQ_BATCH_SIZE")
+    @classmethod
+    def validate_worker_dlq_sizes(cls, value: int, info) -> int:
+        if value < 1:
+            raise ValueError(f"{info.field_name} must be >= 1")
+        return value
+
+    @field_validator("WORKER_DLQ_FLUSH_INTERVAL_S")
+    @classmethod
+    def validate_worker_dlq_flush_interval(cls, value: float) -> float:
+        if value <= 0:
+            raise ValueError("WORKER_DLQ_FLUSH_INTERVAL_S must be > 0")
+        return value
+
     @field_validator("CELERY_CHORD_UNLOCK_MAX_RETRIES", "CELERY_CHORD_UNLOCK_RETRY_DELAY_S")
     @classmethod
     def validate_celery_chord_unlock_limits(cls, value: int, info) -> int:
@@ -353,6 +629,27 @@ class Settings(BaseSettings):
             raise ValueError("CELERY_BROKER_RECOVERY_SWEEP_INTERVAL_S must be > 0")
         return value
 
+    @field_validator("CELERY_BROKER_COMPACTION_BATCH_SIZE", "CELERY_BROKER_RECOVERY_BATCH_SIZE")
+    @classmethod
+    def validate_celery_broker_batch_sizes(cls, value: int, info) -> int:
+        if value < 1:
+            raise ValueError(f"{info.field_name} must be >= 1")
+        return value
+
+    @field_validator("CELERY_BROKER_NOTIFY_FALLBACK_POLL_S")
+    @classmethod
+    def validate_celery_notify_fallback_poll(cls, value: float) -> float:
+        if value <= 0:
+            raise ValueError("CELERY_BROKER_NOTIFY_FALLBACK_POLL_S must be > 0")
+        return value
+
+    @field_validator("CELERY_BROKER_PARTITION_PRECREATE_DAYS", "CELERY_BROKER_PARTITION_RETENTION_DAYS")
+    @classmethod
+    def validate_celery_partition_days(cls, value: int, info) -> int:
+        if value < 1:
+            raise ValueError(f"{info.field_name} must be >= 1")
+        return value
+
     @model_validator(mode="after")
     def validate_llm_provider_config(self) -> "Settings":
         if self.LLM_PROVIDER_ENABLED and not self.LLM_PROVIDER_API_KEY:
@@ -12,8 +12,11 @@ Related Documents:
 - db/docs/ROLES_AND_GRANTS.md (Role model)
 """
 
+import asyncio
 import logging
 import hashlib
+import time
+from collections import OrderedDict
 from typing import Optional
 from uuid import UUID
 
@@ -21,34 +24,144 @@ from fastapi import Request, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 
+from app.core.config import settings
 from app.db.session import engine
+from app.observability.api_metrics import (
+    tenant_secrets_cache_hits_total,
+    tenant_secrets_cache_invalidations_total,
+    tenant_secrets_cache_misses_total,
+    tenant_secrets_cache_negative_hits_total,
+)
 
 logger = logging.getLogger(__name__)
 
+TENANT_SECRETS_NOTIFY_CHANNEL = "tenant_webhook_secrets_changed"
+
 
 class TenantContextError(Exception):
     """Raised when tenant context cannot be derived or is invalid."""
     pass
 
 
-async def get_tenant_with_webhook_secrets(api_key: str) -> dict:
+class _WebhookSecretsCache:
     """
-    Resolve tenant identity and webhook secrets by tenant API key.
+    Bounded TTL/LRU cache of webhook secret lookups keyed by api_key_hash.
 
-    Webhook ingress (B0.4) uses a tenant-scoped API key header to select the tenant
-    and verify vendor signatures deterministically.
+    Unknown keys are cached as ``None`` with a shorter TTL so credential-stuffing
+    traffic does not translate 1:1 into DB round trips. Entries are evicted on
+    ``tenant_webhook_secrets_changed`` notifications; TTL bounds staleness if the
+    listener is unavailable.
+    """
 
-    Returns:
-        dict with keys: tenant_id (UUID), shopify_webhook_secret, stripe_webhook_secret,
-        paypal_webhook_secret, woocommerce_webhook_secret
+    _MISSING = object()
 
-    Raises:
-        HTTPException(401): if the key is missing/unknown
+    def __init__(self) -> None:
+        self._entries: "OrderedDict[str, tuple[float, Optional[dict]]]" = OrderedDict()
+        # Bumped on every invalidation so a lookup that raced a rotation is not cached.
+        self.generation = 0
+
+    def get(self, api_key_hash: str):
+        entry = self._entries.get(api_key_hash)
+        if entry is None:
+            return self._MISSING
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._entries.pop(api_key_hash, None)
+            return self._MISSING
+        self._entries.move_to_end(api_key_hash)
+        return value
+
+    def put(self, api_key_hash: str, value: Optional[dict], generation: int) -> None:
+        if generation != self.generation:
+            return
+        ttl = (
+            settings.TENANT_SECRETS_CACHE_TTL_SECONDS
+            if value is not None
+            else settings.TENANT_SECRETS_CACHE_NEGATIVE_TTL_SECONDS
+        )
+        if ttl <= 0:
+            return
+        self._entries[api_key_hash] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(api_key_hash)
+        while len(self._entries) > settings.TENANT_SECRETS_CACHE_MAX_ENTRIES:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, api_key_hash: Optional[str] = None) -> None:
+        self.generation += 1
+        if api_key_hash:
+            self._entries.pop(api_key_hash, None)
+        else:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_secrets_cache = _WebhookSecretsCache()
+_listener_task: Optional[asyncio.Task] = None
+_listener_retry_at = 0.0
+_LISTENER_RETRY_SECONDS = 30.0
+
+
+def invalidate_webhook_secrets_cache(
+    api_key_hash: Optional[str] = None, *, reason: str = "manual"
+) -> None:
     """
-    if not api_key or not api_key.strip():
-        raise HTTPException(status_code=401, detail={"status": "invalid_tenant_key"})
+    Evict one api_key_hash (or everything) from the webhook secret cache.
+    """
+    _secrets_cache.invalidate(api_key_hash)
+    tenant_secrets_cache_invalidations_total.inc()
+    logger.debug(
+        "tenant_secrets_cache_invalidated",
+        extra={"reason": reason, "scope": "key" if api_key_hash else "all"},
+    )
 
-    api_key_hash = hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+def _on_secrets_changed_notify(_conn, _pid, _channel, payload: str) -> None:
+    # An empty payload means the old hash was NULL; nothing keyed on it is cached,
+    # but clearing is cheap and keeps semantics obvious.
+    invalidate_webhook_secrets_cache(payload or None, reason="notify")
+
+
+async def _run_secrets_invalidation_listener() -> None:
+    """
+    Hold one dedicated connection LISTENing for secret rotation notifications.
+
+    Anything cached before LISTEN is established (or after the connection drops)
+    may have missed a notification, so the cache is flushed on both edges.
+    """
+    global _listener_retry_at
+    try:
+        async with engine.connect() as conn:
+            raw = await conn.get_raw_connection()
+            driver_conn = raw.driver_connection
+            await driver_conn.add_listener(TENANT_SECRETS_NOTIFY_CHANNEL, _on_secrets_changed_notify)
+            invalidate_webhook_secrets_cache(reason="listener_reset")
+            closed = asyncio.Event()
+            driver_conn.add_termination_listener(lambda _c: closed.set())
+            await closed.wait()
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        logger.warning("tenant_secrets_listener_unavailable", exc_info=True)
+    finally:
+        _listener_retry_at = time.monotonic() + _LISTENER_RETRY_SECONDS
+        invalidate_webhook_secrets_cache(reason="listener_reset")
+
+
+def _ensure_secrets_invalidation_listener() -> None:
+    global _listener_task
+    if _listener_task is not None and not _listener_task.done():
+        if _listener_task.get_loop() is asyncio.get_running_loop():
+            return
+    elif _listener_task is not None and time.monotonic() < _listener_retry_at:
+        return
+    _listener_task = asyncio.get_running_loop().create_task(
+        _run_secrets_invalidation_listener()
+    )
+
+
+async def _resolve_webhook_secrets(api_key_hash: str) -> Optional[dict]:
     async with engine.connect() as conn:
         res = await conn.execute(
             text(
@@ -67,7 +180,7 @@ async def get_tenant_with_webhook_secrets(api_key: str) -> dict:
         row = res.mappings().first()
 
     if not row:
-        raise HTTPException(status_code=401, detail={"status": "invalid_tenant_key"})
+        return None
 
     return {
         "tenant_id": UUID(str(row["tenant_id"])),
@@ -78,6 +191,49 @@ async def get_tenant_with_webhook_secrets(api_key: str) -> dict:
     }
 
 
+async def get_tenant_with_webhook_secrets(api_key: str) -> dict:
+    """
+    Resolve tenant identity and webhook secrets by tenant API key.
+
+    Webhook ingress (B0.4) uses a tenant-scoped API key header to select the tenant
+    and verify vendor signatures deterministically. Results (including unknown keys)
+    are cached in-process by api_key_hash; see `_WebhookSecretsCache`.
+
+    Returns:
+        dict with keys: tenant_id (UUID), shopify_webhook_secret, stripe_webhook_secret,
+        paypal_webhook_secret, woocommerce_webhook_secret
+
+    Raises:
+        HTTPException(401): if the key is missing/unknown
+    """
+    if not api_key or not api_key.strip():
+        raise HTTPException(status_code=401, detail={"status": "invalid_tenant_key"})
+
+    api_key_hash = hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+    cache_enabled = settings.TENANT_SECRETS_CACHE_TTL_SECONDS > 0
+
+    if cache_enabled:
+        _ensure_secrets_invalidation_listener()
+        cached = _secrets_cache.get(api_key_hash)
+        if cached is not _WebhookSecretsCache._MISSING:
+            if cached is None:
+                tenant_secrets_cache_negative_hits_total.inc()
+                raise HTTPException(status_code=401, detail={"status": "invalid_tenant_key"})
+            tenant_secrets_cache_hits_total.inc()
+            return dict(cached)
+
+    tenant_secrets_cache_misses_total.inc()
+    generation = _secrets_cache.generation
+    resolved = await _resolve_webhook_secrets(api_key_hash)
+    if cache_enabled:
+        _secrets_cache.put(api_key_hash, resolved, generation)
+
+    if resolved is None:
+        raise HTTPException(status_code=401, detail={"status": "invalid_tenant_key"})
+
+    return dict(resolved)
+
+
 def derive_tenant_id_from_request(request: Request) -> Optional[UUID]:
     """
     Canonical algorithm for deriving tenant_id from API requests.
@@ -8,9 +8,11 @@ row-level security enforcement.
 
 from __future__ import annotations
 
+import asyncio
 import ssl
 import os
 from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from typing import AsyncGenerator
 from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 from uuid import UUID
@@ -19,6 +21,7 @@ from sqlalchemy import text
 from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import (
     AsyncConnection,
+    AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
@@ -29,6 +32,17 @@ from sqlalchemy.exc import SQLAlchemyError
 from app.core.config import settings
 from app.core.identity import resolve_user_id
 
+# app.execution_context applied by get_session(); set to "worker" by app.tasks.context.tenant_task.
+_execution_context: ContextVar[str | None] = ContextVar("db_execution_context", default=None)
+
+
+def set_execution_context(value: str | None) -> None:
+    _execution_context.set(value)
+
+
+def get_execution_context() -> str | None:
+    return _execution_context.get()
+
 
 # Normalize DSN to ensure asyncpg driver is used and map unsupported parameters to connect_args.
 def _build_async_database_url_and_args() -> tuple[str, dict]:
@@ -76,6 +90,34 @@ engine = create_async_engine(
     **engine_kwargs,
 )
 
+# asyncpg connections are bound to the loop that opened them, so each extra worker
+# event loop (app.tasks.context.WorkerLoopPool) gets its own engine and pool.
+_loop_engines: dict[asyncio.AbstractEventLoop, AsyncEngine] = {}
+
+
+def create_loop_engine() -> AsyncEngine:
+    """Create an engine with the shared engine's settings for use on one event loop only."""
+    return create_async_engine(_ASYNC_DATABASE_URL, **engine_kwargs)
+
+
+def bind_loop_engine(loop: asyncio.AbstractEventLoop, loop_engine: AsyncEngine) -> None:
+    _loop_engines[loop] = loop_engine
+
+
+def current_engine() -> AsyncEngine:
+    """
+    Engine owned by the running event loop, falling back to the shared engine.
+
+    Code that can run on a worker loop pool loop must use this instead of the
+    module-level `engine` so pooled connections never cross loops.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return engine
+    return _loop_engines.get(loop, engine)
+
+
 # Factory for tenant-scoped async sessions.
 AsyncSessionLocal = async_sessionmaker(
     bind=engine,
@@ -92,25 +134,27 @@ async def get_session(
     """
     Yield an async session with tenant context set for RLS enforcement.
 
-    The session variables `app.current_tenant_id` and `app.current_user_id` are
-    set before yielding the session so all subsequent queries evaluate row-level
-    policies correctly.
+    The session variables `app.current_tenant_id`, `app.current_user_id` and
+    `app.execution_context` are set in a single round trip before yielding the
+    session so all subsequent queries evaluate row-level policies correctly.
+    The execution context is always written (empty outside tenant tasks) so a
+    pooled connection never carries a previous caller's value.
     Session lifecycle is managed automatically with rollback on exception and
     closure on exit.
     """
-    async with AsyncSessionLocal() as session:
+    async with AsyncSessionLocal(bind=current_engine()) as session:
         resolved_user_id = resolve_user_id(user_id)
         await session.execute(
             text(
-                "SELECT set_config('app.current_tenant_id', :tenant_id, false)"
-            ),
-            {"tenant_id": str(tenant_id)},
-        )
-        await session.execute(
-            text(
-                "SELECT set_config('app.current_user_id', :user_id, false)"
+                "SELECT set_config('app.current_tenant_id', :tenant_id, false),"
+                " set_config('app.current_user_id', :user_id, false),"
+                " set_config('app.execution_context', :execution_context, false)"
             ),
-            {"user_id": str(resolved_user_id)},
+            {
+                "tenant_id": str(tenant_id),
+                "user_id": str(resolved_user_id),
+                "execution_context": _execution_context.get() or "",
+            },
         )
         try:
             yield session
@@ -6,15 +6,21 @@ remediation status state machine for failed event ingestion.
 
 Related: B0.4.4 DLQ Handler Enhancement
 """
+import hashlib
+import re
+import sys
 import traceback
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
 from enum import Enum
-from typing import Optional
-from uuid import UUID
+from typing import Any, List, Optional
+from uuid import UUID, uuid4
 
+from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError, OperationalError
 
+from app.core.config import settings
 from app.observability.context import log_context
 from app.observability.api_metrics import events_dlq_total
 
@@ -62,6 +68,14 @@ class RemediationStatus(str, Enum):
     IGNORED = "abandoned"            # Intentionally skipped (maps to 'abandoned')
 
 
+# Error types classify_error always marks PERMANENT; replay skips them unless forced.
+PERMANENT_ERROR_TYPES = frozenset({
+    ErrorType.FK_CONSTRAINT.value,
+    ErrorType.DUPLICATE_KEY.value,
+    ErrorType.PII_VIOLATION.value,
+})
+
+
 # Remediation status state machine transitions
 # Note: Since RETRYING=MANUAL_REVIEW='in_progress' and MAX_RETRIES_EXCEEDED=IGNORED='abandoned',
 # we define transitions using the enum values (which map to database values)
@@ -149,6 +163,120 @@ def validate_status_transition(current: str, new: str) -> bool:
     return new in VALID_TRANSITIONS[current]
 
 
+@dataclass
+class DLQFailure:
+    """
+    A failed event awaiting DLQ routing.
+
+    traceback_source is captured eagerly (the exception object, or the exception
+    being handled when ``error`` was constructed rather than raised); formatting
+    it into text is deferred to the DLQ write.
+    """
+
+    original_payload: dict
+    error: Exception
+    correlation_id: Any
+    source: str = "ingestion_service"
+    traceback_source: Optional[BaseException] = field(default=None)
+
+    def __post_init__(self) -> None:
+        if self.traceback_source is None:
+            if self.error.__traceback__ is not None:
+                self.traceback_source = self.error
+            else:
+                self.traceback_source = sys.exc_info()[1]
+
+
+def format_dlq_traceback(exc: Optional[BaseException]) -> Optional[str]:
+    """Format a traceback for dead_events.error_traceback, truncated to DLQ_TRACEBACK_MAX_CHARS."""
+    if exc is None:
+        return None
+    limit = settings.DLQ_TRACEBACK_MAX_CHARS
+    if limit == 0:
+        return None
+    return "".join(traceback.format_exception(type(exc), exc, exc.__traceback__))[:limit]
+
+
+# Order matters: UUIDs and quoted values contain digits. Mirrored by the SQL
+# function dead_event_error_signature() (migration 202610171140), which
+# backfills existing rows and fills rows inserted without a signature.
+_SIGNATURE_PARAMETERS = (
+    (re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"), "<uuid>"),
+    (re.compile(r"'[^']*'|\"[^\"]*\""), "<str>"),
+    (re.compile(r"\b0x[0-9a-f]+\b"), "<hex>"),
+    (re.compile(r"[0-9]+(\.[0-9]+)?"), "<num>"),
+    (re.compile(r"\s+"), " "),
+)
+
+
+def error_signature(error_code: str, error_message: str) -> str:
+    """
+    Cluster key for a dead event: exception type plus a hash of its message
+    with parameters (ids, quoted values, numbers) stripped, so failures that
+    differ only in the offending value share a signature.
+    """
+    normalized = error_message.lower()
+    for pattern, placeholder in _SIGNATURE_PARAMETERS:
+        normalized = pattern.sub(placeholder, normalized)
+    digest = hashlib.md5(normalized.strip().encode("utf-8")).hexdigest()[:16]
+    return f"{error_code}:{digest}"
+
+
+def _dead_event_values(tenant_id: UUID, failure: DLQFailure) -> tuple[dict, ErrorClassification]:
+    error = failure.error
+    error_type, classification = classify_error(error)
+
+    # Convert correlation_id to UUID if it's a string (or None if invalid)
+    correlation_uuid = None
+    if failure.correlation_id:
+        try:
+            if isinstance(failure.correlation_id, UUID):
+                correlation_uuid = failure.correlation_id
+            else:
+                correlation_uuid = UUID(str(failure.correlation_id))
+        except (ValueError, TypeError):
+            # Invalid UUID format - leave as None
+            correlation_uuid = None
+
+    message = str(error)[:500]
+    error_code = type(error).__name__
+    values = {
+        "id": uuid4(),
+        "tenant_id": tenant_id,
+        "source": failure.source,
+        "raw_payload": failure.original_payload,
+        "correlation_id": correlation_uuid,
+        "error_type": error_type.value,
+        "error_code": error_code,
+        "error_signature": error_signature(error_code, message),
+        "error_detail": {"error": message},  # JSONB field requires dict
+        "error_message": message,  # Text field for error message
+        "event_type": failure.original_payload.get("event_type", "unknown"),
+        "retry_count": 0,
+        "remediation_status": RemediationStatus.PENDING.value,
+        "ingested_at": datetime.now(timezone.utc),
+    }
+    return values, classification
+
+
+def _log_routed(values: dict, classification: ErrorClassification, correlation_id: Any) -> None:
+    ctx = log_context()
+    ctx.update(
+        {
+            "dead_event_id": str(values["id"]),
+            "tenant_id": str(values["tenant_id"]),
+            "error_type": values["error_type"],
+            "error_code": values["error_code"],
+            "classification": classification.value,
+            "correlation_id_business": correlation_id,
+            "event": "event_routed_to_dlq",
+            "vendor": values["source"] or "unknown",
+            "event_type": (values["raw_payload"] or {}).get("event_type", "unknown"),
+        }
+    )
+    logger.error("event_routed_to_dlq", extra=ctx)
+
+
 class DLQHandler:
     """
     Dead Letter Queue handler with retry logic and error classification.
@@ -190,66 +318,84 @@ class DLQHandler:
         Side Effects:
             - Inserts row into dead_events table
             - Logs error event
-            - Captures full traceback for debugging
+            - Captures traceback (once, truncated to DLQ_TRACEBACK_MAX_CHARS)
         """
         from app.models.dead_event import DeadEvent
-        from uuid import uuid4
-
-        error_type, classification = classify_error(error)
-
-        # Convert correlation_id to UUID if it's a string (or None if invalid)
-        correlation_uuid = None
-        if correlation_id:
-            try:
-                if isinstance(correlation_id, UUID):
-                    correlation_uuid = correlation_id
-                else:
-                    correlation_uuid = UUID(str(correlation_id))
-            except (ValueError, TypeError):
-                # Invalid UUID format - leave as None
-                correlation_uuid = None
-
-        dead_event = DeadEvent(
-            id=uuid4(),
-            tenant_id=tenant_id,
+
+        failure = DLQFailure(
+            original_payload=original_payload,
+            error=error,
+            correlation_id=correlation_id,
             source=source,
-            raw_payload=original_payload,
-            correlation_id=correlation_uuid,
-            error_type=error_type.value,
-            error_code=type(error).__name__,
-            error_detail={"error": str(error)[:500]},  # JSONB field requires dict
-            error_message=str(error)[:500],  # Text field for error message
-            error_traceback=traceback.format_exc()[:2000] if traceback.format_exc() != 'NoneType: None\n' else None,
-            event_type=original_payload.get("event_type", "unknown"),
-            retry_count=0,
-            remediation_status=RemediationStatus.PENDING.value,
-            ingested_at=datetime.now(timezone.utc),
         )
+        values, classification = _dead_event_values(tenant_id, failure)
+        values["error_traceback"] = format_dlq_traceback(failure.traceback_source)
+        dead_event = DeadEvent(**values)
 
         session.add(dead_event)
         await session.flush()
 
         # B0.5.6.3: No labels on event metrics (bounded cardinality)
         events_dlq_total.inc()
-
-        ctx = log_context()
-        ctx.update(
-            {
-                "dead_event_id": str(dead_event.id),
-                "tenant_id": str(tenant_id),
-                "error_type": error_type.value,
-                "error_code": dead_event.error_code,
-                "classification": classification.value,
-                "correlation_id_business": correlation_id,
-                "event": "event_routed_to_dlq",
-                "vendor": source or "unknown",
-                "event_type": (original_payload or {}).get("event_type", "unknown"),
-            }
-        )
-        logger.error("event_routed_to_dlq", extra=ctx)
+        _log_routed(values, classification, correlation_id)
 
         return dead_event
 
+    async def route_many_to_dlq(
+        self,
+        session: AsyncSession,
+        tenant_id: UUID,
+        failures: List["DLQFailure"],
+    ) -> List[UUID]:
+        """
+        Route several failed events in one multi-row INSERT.
+
+        Tracebacks are formatted once per distinct error signature (exception
+        type + message) in the batch, and identical failures (same correlation
+        id, source, signature and payload) collapse into a single dead event.
+
+        Args:
+            session: Database session (tenant context already set)
+            tenant_id: Tenant UUID
+            failures: Failed events, in caller order
+
+        Returns:
+            Dead event id for each failure, in input order
+        """
+        from app.models.dead_event import DeadEvent
+
+        rows: List[dict] = []
+        ids: List[UUID] = []
+        rows_by_key: dict = {}
+        tracebacks: dict = {}
+        for failure in failures:
+            values, classification = _dead_event_values(tenant_id, failure)
+            key = (
+                values["correlation_id"],
+                values["source"],
+                values["error_code"],
+                values["error_message"],
+            )
+            existing = rows_by_key.get(key) if values["correlation_id"] else None
+            if existing is not None and existing["raw_payload"] == values["raw_payload"]:
+                ids.append(existing["id"])
+                continue
+
+            signature = (values["error_code"], values["error_message"])
+            if signature not in tracebacks:
+                tracebacks[signature] = format_dlq_traceback(failure.traceback_source)
+            values["error_traceback"] = tracebacks[signature]
+            rows_by_key.setdefault(key, values)
+            rows.append(values)
+            ids.append(values["id"])
+            _log_routed(values, classification, failure.correlation_id)
+
+        if rows:
+            await session.execute(insert(DeadEvent), rows)
+            # B0.5.6.3: No labels on event metrics (bounded cardinality)
+            events_dlq_total.inc(len(rows))
+        return ids
+
     async def retry_dead_event(
         self,
         session: AsyncSession,
@@ -0,0 +1,426 @@
+"""
+Bulk DLQ replay engine.
+
+Replays a tenant's dead events (optionally narrowed by error type, error
+signature cluster and an ingested_at range) through EventIngestionService.ingest_events_batch, the
+set-based ingestion path, in keyset-ordered batches. Each batch ingests its
+events, updates their dead_events rows in one statement and advances the run
+checkpoint in dead_event_replay_runs inside a single transaction, so a crashed
+replay resumes after its last committed batch; idempotency keys (the original
+webhook key, else one derived from the dead event id) keep a replay from
+double-ingesting. Throughput is capped by DLQ_REPLAY_MAX_EVENTS_PER_SECOND so a
+replay cannot starve live ingestion of connections or lock time.
+
+Must run outside Celery worker context: dead_events and attribution_events are
+read-only when app.execution_context = 'worker'.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import get_session
+from app.ingestion.dlq_handler import PERMANENT_ERROR_TYPES, DLQHandler
+from app.ingestion.event_service import EventIngestionService
+from app.observability.api_metrics import (
+    dlq_replay_batch_duration_seconds,
+    dlq_replay_failed_total,
+    dlq_replay_resolved_total,
+    dlq_replay_throttle_seconds_total,
+)
+
+logger = logging.getLogger(__name__)
+
+_RUN_COLUMNS = """
+    id, tenant_id, error_type, error_signature, ingested_from, ingested_to, force, status,
+    cursor_ingested_at, cursor_id, selected_count, resolved_count, duplicate_count,
+    failed_count, started_at, updated_at
+"""
+
+_INSERT_RUN_SQL = text(
+    """
+    INSERT INTO dead_event_replay_runs (
+        id, tenant_id, error_type, error_signature, ingested_from, ingested_to, force
+    )
+    VALUES (:id, :tenant_id, :error_type, :error_signature, :ingested_from, :ingested_to, :force)
+    """
+)
+
+_SELECT_RUN_SQL = text(f"SELECT {_RUN_COLUMNS} FROM dead_event_replay_runs WHERE id = :run_id")
+
+# Row lock serializes concurrent resumers of the same run.
+_LOCK_RUN_SQL = text(f"SELECT {_RUN_COLUMNS} FROM dead_event_replay_runs WHERE id = :run_id FOR UPDATE")
+
+# The literal remediation_status IN (...) lets the planner use idx_dead_events_replay
+# (or idx_dead_events_tenant_signature when replaying one cluster).
+_SELECT_BATCH_SQL = text(
+    """
+    SELECT id, ingested_at, source, raw_payload
+    FROM dead_events
+    WHERE tenant_id = CAST(:tenant_id AS uuid)
+      AND remediation_status IN ('pending', 'abandoned')
+      AND (CAST(:force AS boolean) OR (
+            remediation_status = 'pending'
+            AND retry_count < :max_retries
+            AND error_type <> ALL(CAST(:permanent_error_types AS text[]))
+      ))
+      AND (CAST(:error_type AS text) IS NULL OR error_type = CAST(:error_type AS text))
+      AND (CAST(:error_signature AS text) IS NULL OR error_signature = CAST(:error_signature AS text))
+      AND (CAST(:ingested_from AS timestamptz) IS NULL OR ingested_at >= CAST(:ingested_from AS timestamptz))
+      AND (CAST(:ingested_to AS timestamptz) IS NULL OR ingested_at < CAST(:ingested_to AS timestamptz))
+      AND (
+            CAST(:cursor_ingested_at AS timestamptz) IS NULL
+            OR (ingested_at, id) > (CAST(:cursor_ingested_at AS timestamptz), CAST(:cursor_id AS uuid))
+      )
+    ORDER BY ingested_at, id
+    LIMIT :batch_size
+    FOR UPDATE
+    """
+)
+
+_UPDATE_DEAD_EVENTS_SQL = text(
+    """
+    UPDATE dead_events AS d
+    SET remediation_status = CASE WHEN r.resolved THEN 'resolved' ELSE 'pending' END,
+        resolved_at = CASE WHEN r.resolved THEN CAST(:now AS timestamptz) ELSE d.resolved_at END,
+        retry_count = d.retry_count + CASE WHEN r.resolved THEN 0 ELSE 1 END,
+        last_retry_at = CASE WHEN r.resolved THEN d.last_retry_at ELSE CAST(:now AS timestamptz) END,
+        remediation_notes = r.note
+    FROM unnest(
+        CAST(:ids AS uuid[]),
+        CAST(:resolved AS boolean[]),
+        CAST(:notes AS text[])
+    ) AS r(id, resolved, note)
+    WHERE d.id = r.id
+    """
+)
+
+_ADVANCE_RUN_SQL = text(
+    f"""
+    UPDATE dead_event_replay_runs
+    SET cursor_ingested_at = COALESCE(CAST(:cursor_ingested_at AS timestamptz), cursor_ingested_at),
+        cursor_id = COALESCE(CAST(:cursor_id AS uuid), cursor_id),
+        selected_count = selected_count + :selected,
+        resolved_count = resolved_count + :resolved,
+        duplicate_count = duplicate_count + :duplicates,
+        failed_count = failed_count + :failed,
+        status = CASE WHEN CAST(:done AS boolean) THEN 'completed' ELSE status END,
+        completed_at = CASE WHEN CAST(:done AS boolean) THEN now() ELSE completed_at END,
+        updated_at = now()
+    WHERE id = :run_id
+    RETURNING {_RUN_COLUMNS}
+    """
+)
+
+_TOP_CLUSTERS_SQL = text(
+    """
+    SELECT error_signature, error_code, error_type, sample_message,
+           event_count, open_count, first_seen_at, last_seen_at
+    FROM dead_event_error_clusters
+    WHERE tenant_id = CAST(:tenant_id AS uuid)
+      AND (NOT CAST(:open_only AS boolean) OR open_count > 0)
+    ORDER BY open_count DESC, event_count DESC, error_signature
+    LIMIT :limit
+    """
+)
+
+_CANCEL_RUN_SQL = text(
+    """
+    UPDATE dead_event_replay_runs
+    SET status = 'cancelled', updated_at = now()
+    WHERE id = :run_id AND status = 'running'
+    """
+)
+
+
+@dataclass(frozen=True)
+class ReplayFilter:
+    """
+    Dead event selection for one replay run.
+
+    RLS scopes dead_events to one tenant per session, so tenant_id is required.
+    force mirrors DLQHandler.retry_dead_event(force_retry=True): include abandoned
+    events, events past MAX_RETRIES and permanently classified error types.
+    """
+
+    tenant_id: UUID
+    error_type: Optional[str] = None
+    error_signature: Optional[str] = None
+    ingested_from: Optional[datetime] = None
+    ingested_to: Optional[datetime] = None
+    force: bool = False
+
+
+@dataclass(frozen=True)
+class ErrorCluster:
+    """One dead_event_error_clusters row: dead events sharing an error signature."""
+
+    error_signature: str
+    error_code: str
+    error_type: str
+    sample_message: str
+    event_count: int
+    open_count: int
+    first_seen_at: datetime
+    last_seen_at: datetime
+
+
+async def top_error_clusters(
+    session: AsyncSession, tenant_id: UUID, *, limit: int = 20, open_only: bool = True
+) -> List[ErrorCluster]:
+    """
+    Largest failure clusters for a tenant, read from the trigger-maintained rollup
+    (no dead_events scan). Replay one with ReplayFilter(error_signature=...).
+    """
+    rows = await session.execute(
+        _TOP_CLUSTERS_SQL, {"tenant_id": tenant_id, "open_only": open_only, "limit": limit}
+    )
+    return [ErrorCluster(**row._mapping) for row in rows]
+
+
+@dataclass(frozen=True)
+class ReplayProgress:
+    run_id: UUID
+    status: str
+    selected: int
+    resolved: int
+    duplicates: int
+    failed: int
+    elapsed_seconds: float
+
+    @property
+    def events_per_second(self) -> float:
+        return self.selected / self.elapsed_seconds if self.elapsed_seconds > 0 else 0.0
+
+    @classmethod
+    def from_row(cls, row: Any) -> "ReplayProgress":
+        return cls(
+            run_id=row.id,
+            status=row.status,
+            selected=row.selected_count,
+            resolved=row.resolved_count,
+            duplicates=row.duplicate_count,
+            failed=row.failed_count,
+            elapsed_seconds=(row.updated_at - row.started_at).total_seconds(),
+        )
+
+
+def replay_idempotency_key(dead_event_id: UUID, raw_payload: Dict[str, Any]) -> str:
+    """Original ingestion key when the payload carries one, else a stable per-dead-event key."""
+    return raw_payload.get("idempotency_key") or f"dlq-replay:{dead_event_id}"
+
+
+class DLQReplayEngine:
+    """
+    Resumable, rate-limited bulk replay of dead events.
+
+    Usage:
+        engine = DLQReplayEngine()
+        progress = await engine.replay(ReplayFilter(tenant_id=tenant_id, error_type="schema_validation"))
+        # after a crash:
+        progress = await engine.run(tenant_id, run_id)
+    """
+
+    def __init__(
+        self,
+        *,
+        batch_size: Optional[int] = None,
+        max_events_per_second: Optional[float] = None,
+        service: Optional[EventIngestionService] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+    ):
+        self.batch_size = batch_size or settings.DLQ_REPLAY_BATCH_SIZE
+        self.max_events_per_second = max_events_per_second or settings.DLQ_REPLAY_MAX_EVENTS_PER_SECOND
+        self.service = service or EventIngestionService()
+        self._clock = clock
+        self._sleep = sleep
+
+    async def replay(self, replay_filter: ReplayFilter) -> ReplayProgress:
+        run_id = await self.start(replay_filter)
+        return await self.run(replay_filter.tenant_id, run_id)
+
+    async def start(self, replay_filter: ReplayFilter) -> UUID:
+        """Record a new replay run and return its id (the handle for run/progress/cancel)."""
+        run_id = uuid4()
+        async with get_session(tenant_id=replay_filter.tenant_id) as session:
+            await session.execute(
+                _INSERT_RUN_SQL,
+                {
+                    "id": run_id,
+                    "tenant_id": replay_filter.tenant_id,
+                    "error_type": replay_filter.error_type,
+                    "error_signature": replay_filter.error_signature,
+                    "ingested_from": replay_filter.ingested_from,
+                    "ingested_to": replay_filter.ingested_to,
+                    "force": replay_filter.force,
+                },
+            )
+        logger.info(
+            "dlq_replay_started",
+            extra={
+                "run_id": str(run_id),
+                "tenant_id": str(replay_filter.tenant_id),
+                "error_type": replay_filter.error_type,
+                "error_signature": replay_filter.error_signature,
+                "force": replay_filter.force,
+            },
+        )
+        return run_id
+
+    async def run(self, tenant_id: UUID, run_id: UUID) -> ReplayProgress:
+        """Replay batches from the run's checkpoint until it completes or is cancelled."""
+        started = self._clock()
+        replayed = 0
+        while True:
+            batch_started = self._clock()
+            async with get_session(tenant_id=tenant_id) as session:
+                progress, selected = await self._replay_batch(session, tenant_id, run_id)
+            dlq_replay_batch_duration_seconds.observe(self._clock() - batch_started)
+            logger.info(
+                "dlq_replay_progress",
+                extra={
+                    "run_id": str(run_id),
+                    "tenant_id": str(tenant_id),
+                    "status": progress.status,
+                    "batch_selected": selected,
+                    "selected": progress.selected,
+                    "resolved": progress.resolved,
+                    "duplicates": progress.duplicates,
+                    "failed": progress.failed,
+                    "events_per_second": progress.events_per_second,
+                },
+            )
+            if progress.status != "running":
+                return progress
+            replayed += selected
+            await self._throttle(replayed, started)
+
+    async def progress(self, tenant_id: UUID, run_id: UUID) -> Optional[ReplayProgress]:
+        async with get_session(tenant_id=tenant_id) as session:
+            row = (await session.execute(_SELECT_RUN_SQL, {"run_id": run_id})).first()
+        return ReplayProgress.from_row(row) if row else None
+
+    async def cancel(self, tenant_id: UUID, run_id: UUID) -> bool:
+        """Stop a running replay after its current batch; returns False if it was not running."""
+        async with get_session(tenant_id=tenant_id) as session:
+            res = await session.execute(_CANCEL_RUN_SQL, {"run_id": run_id})
+        return res.rowcount == 1
+
+    async def _replay_batch(
+        self, session: AsyncSession, tenant_id: UUID, run_id: UUID
+    ) -> tuple[ReplayProgress, int]:
+        run = (await session.execute(_LOCK_RUN_SQL, {"run_id": run_id})).first()
+        if run is None:
+            raise LookupError(f"Unknown DLQ replay run {run_id}")
+        if run.status != "running":
+            return ReplayProgress.from_row(run), 0
+
+        rows = (
+            await session.execute(
+                _SELECT_BATCH_SQL,
+                {
+                    "tenant_id": tenant_id,
+                    "force": run.force,
+                    "max_retries": DLQHandler.MAX_RETRIES,
+                    "permanent_error_types": sorted(PERMANENT_ERROR_TYPES),
+                    "error_type": run.error_type,
+                    "error_signature": run.error_signature,
+                    "ingested_from": run.ingested_from,
+                    "ingested_to": run.ingested_to,
+                    "cursor_ingested_at": run.cursor_ingested_at,
+                    "cursor_id": run.cursor_id,
+                    "batch_size": self.batch_size,
+                },
+            )
+        ).all()
+
+        outcomes = await self._ingest(session, tenant_id, rows)
+        resolved = duplicates = failed = 0
+        notes: List[str] = []
+        for row, outcome in zip(rows, outcomes):
+            if outcome["status"] == "inserted":
+                resolved += 1
+                notes.append(f"Replay {run_id} succeeded: event_id={outcome['event_id']}")
+            elif outcome["status"] == "duplicate":
+                duplicates += 1
+                notes.append(f"Replay {run_id} found existing event_id={outcome['event_id']}")
+            else:
+                failed += 1
+                notes.append(f"Replay {run_id} failed: {str(outcome['error'])[:200]}")
+
+        if rows:
+            await session.execute(
+                _UPDATE_DEAD_EVENTS_SQL,
+                {
+                    "now": datetime.now(timezone.utc),
+                    "ids": [row.id for row in rows],
+                    "resolved": [outcome["status"] in ("inserted", "duplicate") for outcome in outcomes],
+                    "notes": notes,
+                },
+            )
+
+        last = rows[-1] if rows else None
+        advanced = (
+            await session.execute(
+                _ADVANCE_RUN_SQL,
+                {
+                    "run_id": run_id,
+                    "cursor_ingested_at": last.ingested_at if last else None,
+                    "cursor_id": last.id if last else None,
+                    "selected": len(rows),
+                    "resolved": resolved,
+                    "duplicates": duplicates,
+                    "failed": failed,
+                    "done": len(rows) < self.batch_size,
+                },
+            )
+        ).one()
+
+        if resolved + duplicates:
+            dlq_replay_resolved_total.inc(resolved + duplicates)
+        if failed:
+            dlq_replay_failed_total.inc(failed)
+        return ReplayProgress.from_row(advanced), len(rows)
+
+    async def _ingest(
+        self, session: AsyncSession, tenant_id: UUID, rows: List[Any]
+    ) -> List[Dict[str, Any]]:
+        """One ingest_events_batch call per source; outcomes are returned in row order."""
+        positions_by_source: Dict[str, List[int]] = {}
+        for position, row in enumerate(rows):
+            positions_by_source.setdefault(row.source, []).append(position)
+
+        outcomes: List[Dict[str, Any]] = [{} for _ in rows]
+        for source, positions in positions_by_source.items():
+            items = [
+                {
+                    "event_data": rows[position].raw_payload,
+                    "idempotency_key": replay_idempotency_key(rows[position].id, rows[position].raw_payload),
+                }
+                for position in positions
+            ]
+            batch_outcomes = await self.service.ingest_events_batch(
+                session=session,
+                tenant_id=tenant_id,
+                items=items,
+                source=source,
+                route_invalid_to_dlq=False,
+            )
+            for position, outcome in zip(positions, batch_outcomes):
+                outcomes[position] = outcome
+        return outcomes
+
+    async def _throttle(self, replayed: int, started: float) -> None:
+        delay = replayed / self.max_events_per_second - (self._clock() - started)
+        if delay > 0:
+            dlq_replay_throttle_seconds_total.inc(delay)
+            await self._sleep(delay)
@@ -0,0 +1,99 @@
+"""
+Buffered (group-commit) DLQ writer for webhook rejections.
+
+Webhook routes that reject input before ingestion used to open a session and
+insert one dead event per request. Under a malformed-payload flood that makes
+the failure path costlier than the success path. Here each rejection is queued
+and awaited; while one write is in flight, later rejections accumulate and are
+written together by the next one, via DLQHandler.route_many_to_dlq (one
+multi-row INSERT per tenant, tracebacks formatted once per error signature).
+Idle rejections are written immediately; a flood costs one transaction per
+batch of up to DLQ_WRITER_BATCH_SIZE rows and at most one DB connection per
+event loop. Callers still get the dead event id only after it is committed.
+"""
+
+import asyncio
+import contextvars
+import weakref
+from typing import List, Optional, Tuple
+from uuid import UUID
+
+from app.core.config import settings
+from app.db.session import get_session
+from app.ingestion.dlq_handler import DLQFailure, DLQHandler
+
+try:
+    import structlog
+    logger = structlog.get_logger(__name__)
+except ImportError:
+    import logging
+    logger = logging.getLogger(__name__)
+
+
+_Pending = Tuple[UUID, DLQFailure, "asyncio.Future[UUID]"]
+
+
+class BufferedDLQWriter:
+    def __init__(self, batch_size: Optional[int] = None, handler: Optional[DLQHandler] = None):
+        self.batch_size = batch_size or settings.DLQ_WRITER_BATCH_SIZE
+        self.handler = handler or DLQHandler()
+        self._pending: List[_Pending] = []
+        self._draining = False
+
+    async def submit(self, tenant_id: UUID, failure: DLQFailure) -> UUID:
+        """Queue a failure and return its dead event id once the batch holding it commits."""
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[UUID] = loop.create_future()
+        self._pending.append((tenant_id, failure, future))
+        if not self._draining:
+            self._draining = True
+            # Fresh context: the drain writes other requests' rows too.
+            loop.create_task(self._drain(), context=contextvars.Context())
+        return await future
+
+    async def _drain(self) -> None:
+        try:
+            while self._pending:
+                batch = self._pending[: self.batch_size]
+                del self._pending[: self.batch_size]
+                await self._write(batch)
+        finally:
+            self._draining = False
+
+    async def _write(self, batch: List[_Pending]) -> None:
+        by_tenant: dict[UUID, List[_Pending]] = {}
+        for entry in batch:
+            by_tenant.setdefault(entry[0], []).append(entry)
+
+        for tenant_id, entries in by_tenant.items():
+            try:
+                async with get_session(tenant_id=tenant_id) as session:
+                    ids = await self.handler.route_many_to_dlq(
+                        session=session,
+                        tenant_id=tenant_id,
+                        failures=[failure for _, failure, _ in entries],
+                    )
+            except Exception as exc:
+                logger.error(
+                    "dlq_batch_write_failed",
+                    extra={"tenant_id": str(tenant_id), "batch_size": len(entries), "error": str(exc)[:200]},
+                )
+                for _, _, future in entries:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            for (_, _, future), dead_event_id in zip(entries, ids):
+                if not future.done():
+                    future.set_result(dead_event_id)
+
+
+_WRITERS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, BufferedDLQWriter]" = weakref.WeakKeyDictionary()
+
+
+def get_dlq_writer() -> BufferedDLQWriter:
+    """The running event loop's writer (futures and the drain task are loop-bound)."""
+    loop = asyncio.get_running_loop()
+    writer = _WRITERS.get(loop)
+    if writer is None:
+        writer = _WRITERS[loop] = BufferedDLQWriter()
+    return writer
@@ -7,25 +7,28 @@ and dead-letter queue routing for failed events.
 B0.4.4 Enhancement: Integrated DLQHandler with error classification and retry logic.
 """
 
+import json
 import logging
 from datetime import datetime, timezone
 from decimal import Decimal, InvalidOperation
 import time
-from typing import Dict, Optional
+from typing import Any, Dict, List, Optional
 from uuid import UUID, uuid4
 
-from sqlalchemy import select
+from sqlalchemy import select, text
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.ingestion.channel_normalization import normalize_channel
-from app.ingestion.dlq_handler import DLQHandler
+from app.ingestion.dlq_handler import DLQFailure, DLQHandler
 from app.models import AttributionEvent, DeadEvent
 from app.observability.context import log_context
 from app.observability.api_metrics import (
     events_dlq_total,
     events_duplicate_total,
     events_ingested_total,
+    ingestion_batch_duration_seconds,
+    ingestion_batch_size,
     ingestion_duration_seconds,
 )
 
@@ -97,9 +100,74 @@ async def _fetch_existing_event_for_key(
     return res.scalar_one_or_none()
 
 
+_BATCH_INSERT_SQL = text(
+    """
+    INSERT INTO attribution_events (
+        id, tenant_id, idempotency_key, channel, event_type,
+        event_timestamp, occurred_at, session_id, revenue_cents, currency,
+        raw_payload, correlation_id, external_event_id, campaign_id,
+        conversion_value_cents, processing_status, retry_count,
+        created_at, updated_at
+    )
+    SELECT
+        r.id, CAST(:tenant_id AS uuid), r.idempotency_key, r.channel, r.event_type,
+        r.event_timestamp, r.event_timestamp, r.session_id, r.revenue_cents, r.currency,
+        CAST(r.raw_payload AS jsonb), r.correlation_id, r.external_event_id, r.campaign_id,
+        r.conversion_value_cents, 'pending', 0,
+        CAST(:now AS timestamptz), CAST(:now AS timestamptz)
+    FROM unnest(
+        CAST(:ids AS uuid[]),
+        CAST(:idempotency_keys AS text[]),
+        CAST(:channels AS text[]),
+        CAST(:event_types AS text[]),
+        CAST(:event_timestamps AS timestamptz[]),
+        CAST(:session_ids AS uuid[]),
+        CAST(:revenue_cents AS integer[]),
+        CAST(:currencies AS text[]),
+        CAST(:raw_payloads AS text[]),
+        CAST(:correlation_ids AS uuid[]),
+        CAST(:external_event_ids AS text[]),
+        CAST(:campaign_ids AS text[]),
+        CAST(:conversion_value_cents AS integer[])
+    ) AS r(
+        id, idempotency_key, channel, event_type, event_timestamp, session_id,
+        revenue_cents, currency, raw_payload, correlation_id, external_event_id,
+        campaign_id, conversion_value_cents
+    )
+    ORDER BY r.idempotency_key
+    ON CONFLICT ON CONSTRAINT uq_attribution_events_tenant_idempotency_key DO NOTHING
+    RETURNING id, idempotency_key
+    """
+)
+
+_BATCH_EXISTING_SQL = text(
+    """
+    SELECT id, idempotency_key, channel
+    FROM attribution_events
+    WHERE tenant_id = CAST(:tenant_id AS uuid)
+      AND idempotency_key = ANY(CAST(:idempotency_keys AS text[]))
+    """
+)
+
+
+async def _fetch_existing_events_for_keys(
+    session: AsyncSession, *, tenant_id: UUID, idempotency_keys: List[str]
+) -> Dict[str, tuple[UUID, str]]:
+    if not idempotency_keys:
+        return {}
+    res = await session.execute(
+        _BATCH_EXISTING_SQL,
+        {"tenant_id": tenant_id, "idempotency_keys": idempotency_keys},
+    )
+    return {row.idempotency_key: (row.id, row.channel) for row in res}
+
+
 class ValidationError(Exception):
     """Raised when event data fails validation"""
-    pass
+
+    # Set by ingest_event once the failure is routed to the DLQ, so callers can
+    # report the dead event without looking it up again.
+    dead_event_id: Optional[UUID] = None
 
 
 class EventIngestionService:
@@ -250,7 +318,7 @@ class EventIngestionService:
                     **log_context(),
                 }
             )
-            await self._route_to_dlq(
+            dead_event = await self._route_to_dlq(
                 session=session,
                 tenant_id=tenant_id,
                 event_data=event_data,
@@ -258,6 +326,7 @@ class EventIngestionService:
                 error_message=str(e),
                 source=source,
             )
+            e.dead_event_id = dead_event.id
             duration = time.perf_counter() - start_time
             # B0.5.6.3: No labels on event metrics (bounded cardinality)
             events_dlq_total.inc()
@@ -292,6 +361,240 @@ class EventIngestionService:
 
             raise
 
+    async def ingest_events_batch(
+        self,
+        session: AsyncSession,
+        tenant_id: UUID,
+        items: List[Dict[str, Any]],
+        source: str = "webhook",
+        route_invalid_to_dlq: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """
+        Ingest a batch of events for one tenant using set-based statements.
+
+        Each item is a dict with ``event_data`` and ``idempotency_key``. Instead
+        of a duplicate SELECT plus ORM flush per event, the batch issues one
+        ``idempotency_key = ANY(...)`` lookup and one multi-row ``unnest`` insert
+        guarded by ``ON CONFLICT DO NOTHING``. Keys that lose a concurrent race
+        are resolved with a single follow-up lookup.
+
+        Args:
+            session: Database session with RLS context set (app.current_tenant_id)
+            tenant_id: Tenant UUID for event ownership
+            items: Ordered list of {"event_data": dict, "idempotency_key": str}
+            source: Event source identifier (e.g., 'shopify', 'stripe')
+            route_invalid_to_dlq: When False, invalid items are reported as
+                'rejected' instead of being written to dead_events (DLQ replay
+                updates the dead events it is replaying instead)
+
+        Returns:
+            One outcome dict per input item, in input order, with keys:
+                - index: Position in the input list
+                - status: 'inserted', 'duplicate', 'dlq_routed' or 'rejected'
+                - idempotency_key: Deduplication key (may be None if missing)
+                - event_id: Attribution event UUID string (inserted/duplicate)
+                - channel: Canonical channel code (inserted/duplicate)
+                - dead_event_id: Dead event UUID string (dlq_routed)
+                - error: Validation error message (dlq_routed/rejected)
+        """
+        start_time = time.perf_counter()
+        outcomes: List[Dict[str, Any]] = [
+            {
+                "index": index,
+                "status": None,
+                "idempotency_key": item.get("idempotency_key"),
+                "event_id": None,
+                "channel": None,
+                "dead_event_id": None,
+                "error": None,
+            }
+            for index, item in enumerate(items)
+        ]
+
+        # 1. Validate and normalize; first occurrence of a key wins within the batch.
+        #    Invalid items are routed to the DLQ together in one multi-row insert.
+        dlq_failures: List[tuple[int, DLQFailure]] = []
+        rows_by_key: Dict[str, Dict[str, Any]] = {}
+        indexes_by_key: Dict[str, List[int]] = {}
+        for index, item in enumerate(items):
+            event_data = item.get("event_data") or {}
+            idempotency_key = item.get("idempotency_key")
+            try:
+                if not idempotency_key:
+                    raise ValidationError("Missing required field: idempotency_key")
+                validated = self._validate_schema(event_data)
+            except ValidationError as e:
+                if not route_invalid_to_dlq:
+                    outcomes[index].update(status="rejected", error=str(e))
+                    continue
+                logger.warning(
+                    "validation_error_routed_to_dlq",
+                    extra={
+                        "event": "validation_error_routed_to_dlq",
+                        "error": str(e),
+                        "idempotency_key": idempotency_key,
+                        "source": source,
+                        "tenant_id": str(tenant_id),
+                        "vendor": event_data.get("vendor", source),
+                        "event_type": event_data.get("event_type"),
+                        "batch_index": index,
+                        **log_context(),
+                    },
+                )
+                dlq_failures.append(
+                    (
+                        index,
+                        self._dlq_failure(
+                            event_data=event_data,
+                            error_type="validation_error",
+                            error_message=str(e),
+                            source=source,
+                        ),
+                    )
+                )
+                outcomes[index].update(status="dlq_routed", error=str(e))
+                continue
+
+            indexes_by_key.setdefault(idempotency_key, []).append(index)
+            if idempotency_key in rows_by_key:
+                continue
+
+            rows_by_key[idempotency_key] = {
+                "id": uuid4(),
+                "channel": normalize_channel(
+                    utm_source=event_data.get("utm_source"),
+                    utm_medium=event_data.get("utm_medium"),
+                    vendor=event_data.get("vendor", source),
+                    tenant_id=str(tenant_id),
+                ),
+                "event_data": event_data,
+                "validated": validated,
+            }
+
+        if dlq_failures:
+            dead_event_ids = await self.dlq_handler.route_many_to_dlq(
+                session=session,
+                tenant_id=tenant_id,
+                failures=[failure for _, failure in dlq_failures],
+            )
+            for (index, _), dead_event_id in zip(dlq_failures, dead_event_ids):
+                outcomes[index]["dead_event_id"] = str(dead_event_id)
+
+        # 2. One set-based duplicate check against persisted events.
+        resolved = await _fetch_existing_events_for_keys(
+            session, tenant_id=tenant_id, idempotency_keys=list(rows_by_key)
+        )
+        existing_keys = set(resolved)
+        new_rows = [(key, row) for key, row in rows_by_key.items() if key not in resolved]
+
+        # 3. One multi-row insert for the remainder.
+        inserted_keys: set[str] = set()
+        if new_rows:
+            params: Dict[str, Any] = {
+                "tenant_id": tenant_id,
+                "now": datetime.now(timezone.utc),
+                "ids": [row["id"] for _, row in new_rows],
+                "idempotency_keys": [key for key, _ in new_rows],
+                "channels": [row["channel"] for _, row in new_rows],
+                "event_types": [row["validated"]["event_type"] for _, row in new_rows],
+                "event_timestamps": [
+                    row["validated"]["event_timestamp"] for _, row in new_rows
+                ],
+                "session_ids": [row["validated"]["session_id"] for _, row in new_rows],
+                "revenue_cents": [row["validated"]["revenue_cents"] for _, row in new_rows],
+                "currencies": [
+                    row["validated"].get("currency") or "USD" for _, row in new_rows
+                ],
+                "raw_payloads": [
+                    json.dumps(row["event_data"], default=str) for _, row in new_rows
+                ],
+                "correlation_ids": [
+                    row["validated"].get("correlation_id") for _, row in new_rows
+                ],
+                "external_event_ids": [
+                    row["event_data"].get("external_event_id") for _, row in new_rows
+                ],
+                "campaign_ids": [row["event_data"].get("campaign_id") for _, row in new_rows],
+                "conversion_value_cents": [
+                    row["event_data"].get("conversion_value_cents") for _, row in new_rows
+                ],
+            }
+            res = await session.execute(_BATCH_INSERT_SQL, params)
+            for returned in res:
+                inserted_keys.add(returned.idempotency_key)
+                resolved[returned.idempotency_key] = (
+                    returned.id,
+                    rows_by_key[returned.idempotency_key]["channel"],
+                )
+
+            # Keys skipped by ON CONFLICT lost a race with a concurrent writer.
+            raced_keys = [key for key, _ in new_rows if key not in inserted_keys]
+            if raced_keys:
+                resolved.update(
+                    await _fetch_existing_events_for_keys(
+                        session, tenant_id=tenant_id, idempotency_keys=raced_keys
+                    )
+                )
+                logger.info(
+                    "duplicate_event_detected_race",
+                    extra={
+                        "event": "duplicate_event_detected_race",
+                        "tenant_id": str(tenant_id),
+                        "race_count": len(raced_keys),
+                        **log_context(),
+                    },
+                )
+
+        # 4. Fan outcomes back out to input positions.
+        inserted = duplicates = dlq_routed = rejected = 0
+        for key, indexes in indexes_by_key.items():
+            event_id, channel = resolved[key]
+            for position, index in enumerate(indexes):
+                is_insert = position == 0 and key in inserted_keys
+                outcomes[index].update(
+                    status="inserted" if is_insert else "duplicate",
+                    event_id=str(event_id),
+                    channel=channel,
+                )
+        for outcome in outcomes:
+            if outcome["status"] == "inserted":
+                inserted += 1
+            elif outcome["status"] == "duplicate":
+                duplicates += 1
+            elif outcome["status"] == "rejected":
+                rejected += 1
+            else:
+                dlq_routed += 1
+
+        duration = time.perf_counter() - start_time
+        logger.info(
+            "event_batch_ingested",
+            extra={
+                "event": "event_batch_ingested",
+                "tenant_id": str(tenant_id),
+                "vendor": source,
+                "batch_size": len(items),
+                "inserted": inserted,
+                "duplicates": duplicates,
+                "existing_duplicates": len(existing_keys),
+                "dlq_routed": dlq_routed,
+                "rejected": rejected,
+                "duration_seconds": duration,
+                **log_context(),
+            },
+        )
+        # B0.5.6.3: No labels on event metrics (bounded cardinality)
+        if inserted:
+            events_ingested_total.inc(inserted)
+        if duplicates:
+            events_duplicate_total.inc(duplicates)
+        if dlq_routed:
+            events_dlq_total.inc(dlq_routed)
+        ingestion_batch_size.observe(len(items))
+        ingestion_batch_duration_seconds.observe(duration)
+
+        return outcomes
+
     async def _check_duplicate(
         self, session: AsyncSession, tenant_id: UUID, idempotency_key: str
     ) -> Optional[AttributionEvent]:
@@ -423,6 +726,23 @@ class EventIngestionService:
         Returns:
             DeadEvent instance with error classification and retry metadata
         """
+        dead_event = await self.dlq_handler.route_to_dlq(
+            session=session,
+            tenant_id=tenant_id,
+            **self._dlq_route_kwargs(event_data, error_type, error_message, source),
+        )
+
+        return dead_event
+
+    def _dlq_failure(
+        self, event_data: dict, error_type: str, error_message: str, source: str
+    ) -> DLQFailure:
+        return DLQFailure(**self._dlq_route_kwargs(event_data, error_type, error_message, source))
+
+    @staticmethod
+    def _dlq_route_kwargs(
+        event_data: dict, error_type: str, error_message: str, source: str
+    ) -> Dict[str, Any]:
         # Create exception object from error message for classification
         # This allows DLQHandler to classify errors properly
         if "ValidationError" in error_message or error_type == "validation_error":
@@ -432,24 +752,18 @@ class EventIngestionService:
         else:
             error = Exception(error_message)
 
-        # Use enhanced DLQHandler for routing with classification
         correlation_id = (
             event_data.get("correlation_id")
             or event_data.get("idempotency_key")
             or event_data.get("external_event_id")
             or str(uuid4())
         )
-
-        dead_event = await self.dlq_handler.route_to_dlq(
-            session=session,
-            tenant_id=tenant_id,
-            original_payload=event_data,
-            error=error,
-            correlation_id=correlation_id,
-            source=source,
-        )
-
-        return dead_event
+        return {
+            "original_payload": event_data,
+            "error": error,
+            "correlation_id": correlation_id,
+            "source": source,
+        }
 
 
 # Transaction Wrapper for External API
@@ -516,6 +830,7 @@ async def ingest_with_transaction(
                 "status": "error",
                 "error_type": "validation_error",
                 "error": str(e),
+                "dlq_event_id": str(e.dead_event_id) if e.dead_event_id else None,
             }
 
         except IntegrityError as e:
@@ -551,3 +866,61 @@ async def ingest_with_transaction(
                 exc_info=True,
             )
             raise
+
+
+async def ingest_batch_with_transaction(
+    tenant_id: UUID,
+    items: List[Dict[str, Any]],
+    source: str = "webhook",
+) -> Dict[str, Any]:
+    """
+    Transactional wrapper for batch event ingestion.
+
+    All items share a single session and transaction: inserts and DLQ rows
+    commit together, and any unexpected failure rolls back the whole batch.
+
+    Args:
+        tenant_id: Tenant UUID (from auth context or API key)
+        items: Ordered list of {"event_data": dict, "idempotency_key": str}
+        source: Event source identifier
+
+    Returns:
+        dict with keys:
+            - status: 'success'
+            - items: Per-item outcomes (see EventIngestionService.ingest_events_batch)
+            - inserted / duplicates / dlq_routed: Outcome counts
+
+    Raises:
+        Exception: Database errors, unexpected failures
+    """
+    from app.db.session import get_session
+
+    async with get_session(tenant_id=tenant_id) as session:
+        try:
+            service = EventIngestionService()
+            outcomes = await service.ingest_events_batch(
+                session=session,
+                tenant_id=tenant_id,
+                items=items,
+                source=source,
+            )
+        except Exception as e:
+            await session.rollback()
+            logger.error(
+                "Batch ingestion failed - unexpected error",
+                extra={
+                    "error": str(e),
+                    "tenant_id": str(tenant_id),
+                    "batch_size": len(items),
+                },
+                exc_info=True,
+            )
+            raise
+
+    return {
+        "status": "success",
+        "items": outcomes,
+        "inserted": sum(1 for o in outcomes if o["status"] == "inserted"),
+        "duplicates": sum(1 for o in outcomes if o["status"] == "duplicate"),
+        "dlq_routed": sum(1 for o in outcomes if o["status"] == "dlq_routed"),
+    }
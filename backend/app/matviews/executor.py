@@ -7,11 +7,15 @@ RefreshResult telemetry for all refresh paths.
 from __future__ import annotations
 
 import asyncio
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from enum import Enum
 import logging
-from typing import Iterable, Optional
+import os
+import threading
+from typing import Iterable, Iterator, Optional
 from uuid import UUID
 
 from sqlalchemy import text
@@ -21,7 +25,7 @@ from sqlalchemy.sql.compiler import IdentifierPreparer
 
 from app.core.pg_locks import RefreshLockKey, build_refresh_lock_key, try_acquire_refresh_xact_lock
 from app.db.session import engine, set_tenant_guc
-from app.matviews import registry
+from app.matviews import registry, scheduler
 
 logger = logging.getLogger(__name__)
 _IDENTIFIER_PREPARER = IdentifierPreparer(postgresql.dialect())
@@ -31,6 +35,7 @@ _PUBLIC_SCHEMA = _IDENTIFIER_PREPARER.quote_schema("public")
 class RefreshOutcome(str, Enum):
     SUCCESS = "SUCCESS"
     SKIPPED_LOCK_HELD = "SKIPPED_LOCK_HELD"
+    SKIPPED_FRESH = "SKIPPED_FRESH"
     FAILED = "FAILED"
 
 
@@ -45,6 +50,14 @@ class RefreshResult:
     error_type: Optional[str]
     error_message: Optional[str]
     lock_key_debug: Optional[RefreshLockKey]
+    rows_inserted: Optional[int] = None
+    rows_deleted: Optional[int] = None
+
+    @property
+    def rows_changed(self) -> Optional[int]:
+        if self.rows_inserted is None or self.rows_deleted is None:
+            return None
+        return self.rows_inserted + self.rows_deleted
 
     def to_log_dict(self) -> dict:
         return {
@@ -57,9 +70,30 @@ class RefreshResult:
             "error_type": self.error_type,
             "error_message": self.error_message,
             "lock_key_debug": self.lock_key_debug.as_dict() if self.lock_key_debug else None,
+            "rows_inserted": self.rows_inserted,
+            "rows_deleted": self.rows_deleted,
         }
 
 
+# Tuples written by this transaction so far; REFRESH ... CONCURRENTLY applies its
+# diff as inserts/deletes, so this is the exact change set without rescanning.
+_XACT_ROW_CHANGES_SQL = (
+    "SELECT n_tup_ins, n_tup_del FROM pg_stat_xact_all_tables WHERE relid = to_regclass(%s)"
+)
+_RECORD_HISTORY_SQL = """
+    INSERT INTO matview_refresh_history (
+        view_name, outcome, started_at, duration_ms, rows_inserted, rows_deleted,
+        tenant_id, correlation_id, error_type
+    ) VALUES (
+        %(view_name)s, %(outcome)s, %(started_at)s, %(duration_ms)s, %(rows_inserted)s, %(rows_deleted)s,
+        %(tenant_id)s, %(correlation_id)s, %(error_type)s
+    )
+"""
+_PRUNE_HISTORY_SQL = (
+    "DELETE FROM matview_refresh_history WHERE started_at < now() - make_interval(days => %(days)s)"
+)
+
+
 def _qualified_matview_identifier(view_name: str) -> str:
     registry.get_entry(view_name)
     quoted_view = _IDENTIFIER_PREPARER.quote(view_name)
@@ -94,6 +128,144 @@ def _build_sync_dsn() -> str:
     return "".join(dsn_parts)
 
 
+_sync_pool_lock = threading.Lock()
+_sync_pool = None
+_sync_pool_slots: Optional[threading.BoundedSemaphore] = None
+_sync_pool_pid: Optional[int] = None
+
+
+def _get_sync_pool():
+    """
+    Lazily create the per-process psycopg2 pool (recreated after fork: a child
+    must never reuse, or close, sockets inherited from its parent).
+    """
+    global _sync_pool, _sync_pool_slots, _sync_pool_pid
+    from psycopg2.pool import ThreadedConnectionPool
+
+    from app.core.config import settings
+
+    with _sync_pool_lock:
+        if _sync_pool is None or _sync_pool_pid != os.getpid():
+            size = settings.MATVIEW_REFRESH_MAX_PARALLEL
+            _sync_pool = ThreadedConnectionPool(0, size, _build_sync_dsn())
+            _sync_pool_slots = threading.BoundedSemaphore(size)
+            _sync_pool_pid = os.getpid()
+        return _sync_pool, _sync_pool_slots
+
+
+@contextmanager
+def sync_connection() -> Iterator:
+    """
+    Borrow a psycopg2 connection from the persistent refresh pool.
+
+    Blocks while the pool is exhausted. Any open transaction is rolled back
+    before the connection is returned; GUCs set with is_local=true do not leak.
+    """
+    import psycopg2
+
+    pool, slots = _get_sync_pool()
+    slots.acquire()
+    conn = None
+    try:
+        conn = pool.getconn()
+        yield conn
+    finally:
+        if conn is not None:
+            discard = bool(conn.closed)
+            if not discard:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    discard = True
+            pool.putconn(conn, close=discard)
+        slots.release()
+
+
+def close_sync_pool() -> None:
+    global _sync_pool, _sync_pool_slots, _sync_pool_pid
+    with _sync_pool_lock:
+        if _sync_pool is not None and _sync_pool_pid == os.getpid():
+            _sync_pool.closeall()
+        _sync_pool = None
+        _sync_pool_slots = None
+        _sync_pool_pid = None
+
+
+def _skipped_result(
+    view_name: str,
+    tenant_id: Optional[UUID],
+    correlation_id: Optional[str],
+    outcome: RefreshOutcome,
+    started_at: datetime,
+    lock_key: Optional[RefreshLockKey],
+) -> RefreshResult:
+    return RefreshResult(
+        view_name=view_name,
+        tenant_id=tenant_id,
+        correlation_id=correlation_id,
+        outcome=outcome,
+        started_at=started_at,
+        duration_ms=int((_now_utc() - started_at).total_seconds() * 1000),
+        error_type=None,
+        error_message=None,
+        lock_key_debug=lock_key,
+    )
+
+
+def _record_history(cur, result: RefreshResult) -> None:
+    cur.execute(
+        _RECORD_HISTORY_SQL,
+        {
+            "view_name": result.view_name,
+            "outcome": result.outcome.value,
+            "started_at": result.started_at,
+            "duration_ms": max(result.duration_ms, 0),
+            "rows_inserted": result.rows_inserted,
+            "rows_deleted": result.rows_deleted,
+            "tenant_id": str(result.tenant_id) if result.tenant_id else None,
+            "correlation_id": result.correlation_id,
+            "error_type": result.error_type,
+        },
+    )
+
+
+def _skip_and_record(conn, cur, result: RefreshResult) -> RefreshResult:
+    """Roll back the refresh transaction and record the skip on the same connection."""
+    conn.rollback()
+    try:
+        _record_history(cur, result)
+        conn.commit()
+    except Exception as exc:
+        conn.rollback()
+        logger.warning(
+            "matview_refresh_history_write_failed",
+            extra={"view_name": result.view_name, "error_type": exc.__class__.__name__},
+        )
+    return result
+
+
+def _record_failure_history(result: RefreshResult) -> None:
+    """Best effort: the refresh connection may be the thing that failed."""
+    try:
+        with sync_connection() as conn:
+            _record_history(conn.cursor(), result)
+            conn.commit()
+    except Exception as exc:
+        logger.warning(
+            "matview_refresh_history_write_failed",
+            extra={"view_name": result.view_name, "error_type": exc.__class__.__name__},
+        )
+
+
+def prune_refresh_history_sync(retention_days: int) -> int:
+    with sync_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(_PRUNE_HISTORY_SQL, {"days": retention_days})
+        deleted = cur.rowcount
+        conn.commit()
+    return deleted
+
+
 def _topological_order(entries: Iterable[registry.MatviewRegistryEntry]) -> list[registry.MatviewRegistryEntry]:
     graph = {entry.name: set(entry.dependencies) for entry in entries}
     ordered: list[registry.MatviewRegistryEntry] = []
@@ -155,6 +327,24 @@ async def refresh_single_async(
                 refresh_sql = entry.refresh_sql.format(qualified_name=qualified_view)
                 await conn.execute(text(refresh_sql))
 
+            await conn.execute(
+                text(
+                    """
+                    INSERT INTO matview_refresh_state (view_name, last_refreshed_at, last_duration_ms, refresh_count)
+                    VALUES (:view_name, now(), :duration_ms, 1)
+                    ON CONFLICT (view_name) DO UPDATE SET
+                        last_refreshed_at = EXCLUDED.last_refreshed_at,
+                        last_duration_ms = EXCLUDED.last_duration_ms,
+                        refresh_count = matview_refresh_state.refresh_count + 1,
+                        updated_at = now()
+                    """
+                ),
+                {
+                    "view_name": view_name,
+                    "duration_ms": int((_now_utc() - started_at).total_seconds() * 1000),
+                },
+            )
+
         duration_ms = int((_now_utc() - started_at).total_seconds() * 1000)
         return RefreshResult(
             view_name=view_name,
@@ -195,21 +385,27 @@ def refresh_single(
     view_name: str,
     tenant_id: Optional[UUID],
     correlation_id: Optional[str] = None,
+    *,
+    skip_if_fresh: bool = False,
+    interval_seconds: Optional[float] = None,
 ) -> RefreshResult:
     """
     Synchronous wrapper for refresh_single_async.
-    """
-    import psycopg2
 
+    The view's matview_refresh_state row is locked for the duration of the
+    refresh and stamped on success. With skip_if_fresh, a view that another
+    transaction is refreshing, or that is still inside its refresh interval
+    (interval_seconds, defaulting to max_staleness_seconds), is skipped
+    instead of refreshed again. Every attempt is recorded in
+    matview_refresh_history.
+    """
     entry = registry.get_entry(view_name)
     started_at = _now_utc()
     lock_key: Optional[RefreshLockKey] = None
 
     try:
         qualified_view = _qualified_matview_identifier(view_name)
-        dsn = _build_sync_dsn()
-        conn = psycopg2.connect(dsn)
-        try:
+        with sync_connection() as conn:
             cur = conn.cursor()
             if tenant_id:
                 cur.execute(
@@ -227,19 +423,40 @@ def refresh_single(
             )
             acquired = bool(cur.fetchone()[0])
             if not acquired:
-                conn.rollback()
-                return RefreshResult(
-                    view_name=view_name,
-                    tenant_id=tenant_id,
-                    correlation_id=correlation_id,
-                    outcome=RefreshOutcome.SKIPPED_LOCK_HELD,
-                    started_at=started_at,
-                    duration_ms=int((_now_utc() - started_at).total_seconds() * 1000),
-                    error_type=None,
-                    error_message=None,
-                    lock_key_debug=lock_key,
+                return _skip_and_record(
+                    conn,
+                    cur,
+                    _skipped_result(
+                        view_name, tenant_id, correlation_id, RefreshOutcome.SKIPPED_LOCK_HELD, started_at, lock_key
+                    ),
+                )
+
+            state_params = {"view_name": view_name}
+            cur.execute(scheduler.ENSURE_STATE_ROW_SQL, state_params)
+            cur.execute(
+                scheduler.LOCK_STATE_ROW_SKIP_LOCKED_SQL if skip_if_fresh else scheduler.LOCK_STATE_ROW_SQL,
+                state_params,
+            )
+            state_row = cur.fetchone()
+            if state_row is None:
+                return _skip_and_record(
+                    conn,
+                    cur,
+                    _skipped_result(
+                        view_name, tenant_id, correlation_id, RefreshOutcome.SKIPPED_LOCK_HELD, started_at, lock_key
+                    ),
+                )
+            if skip_if_fresh and scheduler.is_fresh(entry, state_row[0], state_row[1], interval_seconds):
+                return _skip_and_record(
+                    conn,
+                    cur,
+                    _skipped_result(
+                        view_name, tenant_id, correlation_id, RefreshOutcome.SKIPPED_FRESH, started_at, lock_key
+                    ),
                 )
 
+            rows_inserted: Optional[int] = None
+            rows_deleted: Optional[int] = None
             if entry.refresh_fn:
                 result = entry.refresh_fn()
                 if asyncio.iscoroutine(result):
@@ -249,23 +466,28 @@ def refresh_single(
                     raise ValueError(f"View '{view_name}' missing refresh_sql")
                 refresh_sql = entry.refresh_sql.format(qualified_name=qualified_view)
                 cur.execute(refresh_sql)
-
+                cur.execute(_XACT_ROW_CHANGES_SQL, (qualified_view,))
+                changes = cur.fetchone()
+                rows_inserted, rows_deleted = (int(changes[0]), int(changes[1])) if changes else (0, 0)
+
+            duration_ms = int((_now_utc() - started_at).total_seconds() * 1000)
+            success = RefreshResult(
+                view_name=view_name,
+                tenant_id=tenant_id,
+                correlation_id=correlation_id,
+                outcome=RefreshOutcome.SUCCESS,
+                started_at=started_at,
+                duration_ms=duration_ms,
+                error_type=None,
+                error_message=None,
+                lock_key_debug=lock_key,
+                rows_inserted=rows_inserted,
+                rows_deleted=rows_deleted,
+            )
+            cur.execute(scheduler.RECORD_SUCCESS_SQL, {**state_params, "duration_ms": duration_ms})
+            _record_history(cur, success)
             conn.commit()
-        finally:
-            conn.close()
-
-        duration_ms = int((_now_utc() - started_at).total_seconds() * 1000)
-        return RefreshResult(
-            view_name=view_name,
-            tenant_id=tenant_id,
-            correlation_id=correlation_id,
-            outcome=RefreshOutcome.SUCCESS,
-            started_at=started_at,
-            duration_ms=duration_ms,
-            error_type=None,
-            error_message=None,
-            lock_key_debug=lock_key,
-        )
+        return success
     except Exception as exc:
         duration_ms = int((_now_utc() - started_at).total_seconds() * 1000)
         logger.error(
@@ -277,7 +499,7 @@ def refresh_single(
                 "correlation_id": correlation_id,
             },
         )
-        return RefreshResult(
+        failure = RefreshResult(
             view_name=view_name,
             tenant_id=tenant_id,
             correlation_id=correlation_id,
@@ -288,6 +510,8 @@ def refresh_single(
             error_message=str(exc),
             lock_key_debug=lock_key,
         )
+        _record_failure_history(failure)
+        return failure
 
 
 async def refresh_all_for_tenant_async(
@@ -301,15 +525,150 @@ async def refresh_all_for_tenant_async(
     return results
 
 
+def refresh_entries_concurrently(
+    entries: list[registry.MatviewRegistryEntry],
+    tenant_id: Optional[UUID],
+    correlation_id: Optional[str] = None,
+    *,
+    skip_if_fresh: bool = False,
+    max_parallel: Optional[int] = None,
+    intervals: Optional[dict[str, float]] = None,
+) -> list[RefreshResult]:
+    """
+    Refresh entries over the connection pool, running independent views in parallel.
+
+    A view starts once every dependency within `entries` has finished; ready
+    views start in the order given (callers pass priority order). Each view
+    still runs in its own transaction under its advisory xact lock. Results
+    are returned in the order of `entries`. `intervals` carries per-view
+    adaptive refresh intervals for the skip_if_fresh re-check.
+    """
+    from app.core.config import settings
+
+    max_parallel = max_parallel or settings.MATVIEW_REFRESH_MAX_PARALLEL
+    intervals = intervals or {}
+    names = [entry.name for entry in entries]
+    name_set = set(names)
+    pending = {entry.name: {dep for dep in entry.dependencies if dep in name_set} for entry in entries}
+    results: dict[str, RefreshResult] = {}
+
+    def _ready() -> list[str]:
+        ready = [name for name in names if name in pending and not pending[name]]
+        for name in ready:
+            pending.pop(name)
+        return ready
+
+    def _finish(name: str, result: RefreshResult) -> None:
+        results[name] = result
+        for deps in pending.values():
+            deps.discard(name)
+
+    def _cycle_error() -> ValueError:
+        return ValueError(f"Matview registry dependency cycle: {','.join(sorted(pending.keys()))}")
+
+    if max_parallel <= 1:
+        while pending:
+            ready = _ready()
+            if not ready:
+                raise _cycle_error()
+            for name in ready:
+                _finish(
+                    name,
+                    refresh_single(
+                        name,
+                        tenant_id,
+                        correlation_id,
+                        skip_if_fresh=skip_if_fresh,
+                        interval_seconds=intervals.get(name),
+                    ),
+                )
+        return [results[name] for name in names]
+
+    running: dict[Future, str] = {}
+    with ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix="matview-refresh") as pool:
+        while pending or running:
+            for name in _ready():
+                future = pool.submit(
+                    refresh_single,
+                    name,
+                    tenant_id,
+                    correlation_id,
+                    skip_if_fresh=skip_if_fresh,
+                    interval_seconds=intervals.get(name),
+                )
+                running[future] = name
+            if not running:
+                raise _cycle_error()
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                _finish(running.pop(future), future.result())
+    return [results[name] for name in names]
+
+
 def refresh_all_for_tenant(
     tenant_id: UUID,
     correlation_id: Optional[str] = None,
+    entries: Optional[Iterable[registry.MatviewRegistryEntry]] = None,
 ) -> list[RefreshResult]:
     """
     Synchronous wrapper to refresh all matviews for a tenant.
     """
-    entries = _topological_order(registry.list_entries())
-    results: list[RefreshResult] = []
-    for entry in entries:
-        results.append(refresh_single(entry.name, tenant_id, correlation_id))
+    entries = _topological_order(list(entries) if entries is not None else registry.list_entries())
+    return refresh_entries_concurrently(entries, tenant_id, correlation_id)
+
+
+def load_refresh_plan_sync(
+    entries: Optional[Iterable[registry.MatviewRegistryEntry]] = None,
+) -> scheduler.RefreshPlan:
+    """
+    Plan due views from matview_refresh_state; in adaptive mode each view's
+    interval comes from its recent matview_refresh_history.
+    """
+    from app.core.config import settings
+
+    entries = list(entries) if entries is not None else registry.list_entries()
+    intervals: Optional[dict[str, float]] = None
+    with sync_connection() as conn:
+        cur = conn.cursor()
+        last_refreshed, now = scheduler.load_refresh_state_sync(cur)
+        if settings.MATVIEW_REFRESH_ADAPTIVE:
+            stats = scheduler.load_refresh_stats_sync(cur, settings.MATVIEW_ADAPTIVE_HISTORY_WINDOW)
+            intervals = {
+                entry.name: scheduler.adaptive_interval_seconds(
+                    entry,
+                    stats.get(entry.name),
+                    min_interval_ratio=settings.MATVIEW_ADAPTIVE_MIN_INTERVAL_RATIO,
+                    expensive_refresh_seconds=settings.MATVIEW_ADAPTIVE_EXPENSIVE_REFRESH_SECONDS,
+                )
+                for entry in entries
+            }
+    return scheduler.plan_refresh(entries, last_refreshed, now, intervals)
+
+
+def refresh_due_for_tenant(
+    tenant_id: UUID,
+    correlation_id: Optional[str] = None,
+    *,
+    entries: Optional[Iterable[registry.MatviewRegistryEntry]] = None,
+    plan: Optional[scheduler.RefreshPlan] = None,
+) -> list[RefreshResult]:
+    """
+    Refresh only the views outside their staleness budget, most overdue first.
+
+    Fresh views yield SKIPPED_FRESH results without touching the database.
+    Each due view is re-checked under its state row lock, so concurrent
+    tenants racing on the same due view refresh it once.
+    """
+    plan = plan or load_refresh_plan_sync(entries)
+    results = refresh_entries_concurrently(
+        [item.entry for item in plan.due],
+        tenant_id,
+        correlation_id,
+        skip_if_fresh=True,
+        intervals=plan.due_intervals,
+    )
+    for item in plan.fresh:
+        results.append(
+            _skipped_result(item.entry.name, tenant_id, correlation_id, RefreshOutcome.SKIPPED_FRESH, _now_utc(), None)
+        )
     return results
@@ -0,0 +1,222 @@
+"""
+Staleness-aware refresh planning for registry materialized views.
+
+A view is due once the time since its last successful refresh reaches its
+refresh interval: the registry max_staleness_seconds, or in adaptive mode an
+interval derived from recent refresh history (never above max_staleness_seconds).
+Due views are ordered most-overdue first (age / interval), without ever
+refreshing a view before its due dependencies.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+import math
+from typing import Iterable, Mapping, Optional
+
+from app.matviews import registry
+
+# Serializes refreshes of one view across tenants: the row stays locked until the
+# refresh transaction commits. SKIP LOCKED variant is used by scheduled refreshes,
+# which treat an in-flight refresh of the same view as "already being handled".
+ENSURE_STATE_ROW_SQL = (
+    "INSERT INTO matview_refresh_state (view_name) VALUES (%(view_name)s) ON CONFLICT DO NOTHING"
+)
+LOCK_STATE_ROW_SQL = (
+    "SELECT last_refreshed_at, now() FROM matview_refresh_state "
+    "WHERE view_name = %(view_name)s FOR UPDATE"
+)
+LOCK_STATE_ROW_SKIP_LOCKED_SQL = LOCK_STATE_ROW_SQL + " SKIP LOCKED"
+RECORD_SUCCESS_SQL = (
+    "UPDATE matview_refresh_state SET last_refreshed_at = now(), "
+    "last_duration_ms = %(duration_ms)s, refresh_count = refresh_count + 1, updated_at = now() "
+    "WHERE view_name = %(view_name)s"
+)
+LOAD_STATE_SQL = "SELECT view_name, last_refreshed_at, now() FROM matview_refresh_state"
+CLAIM_DEFERRED_REFRESH_SQL = """
+    UPDATE matview_refresh_state
+    SET deferred_refresh_at = last_refreshed_at + make_interval(secs => %(max_staleness_seconds)s),
+        updated_at = now()
+    WHERE view_name = %(view_name)s
+      AND last_refreshed_at IS NOT NULL
+      AND (deferred_refresh_at IS NULL OR deferred_refresh_at <= now())
+    RETURNING GREATEST(EXTRACT(EPOCH FROM deferred_refresh_at - now()), 0)
+"""
+# Most recent successful refreshes per view, newest first via
+# idx_matview_refresh_history_view_started_at.
+LOAD_REFRESH_STATS_SQL = """
+    SELECT
+        s.view_name,
+        count(h.duration_ms),
+        avg(h.duration_ms),
+        avg(CASE WHEN COALESCE(h.rows_inserted, 0) + COALESCE(h.rows_deleted, 0) > 0 THEN 1.0 ELSE 0.0 END)
+    FROM matview_refresh_state s
+    CROSS JOIN LATERAL (
+        SELECT duration_ms, rows_inserted, rows_deleted
+        FROM matview_refresh_history
+        WHERE view_name = s.view_name AND outcome = 'SUCCESS'
+        ORDER BY started_at DESC
+        LIMIT %(window)s
+    ) h
+    GROUP BY s.view_name
+"""
+
+
+@dataclass(frozen=True)
+class RefreshStats:
+    """Aggregates over a view's most recent successful refreshes."""
+
+    view_name: str
+    samples: int
+    avg_duration_seconds: float
+    change_rate: float
+
+
+@dataclass(frozen=True)
+class DueView:
+    entry: registry.MatviewRegistryEntry
+    last_refreshed_at: Optional[datetime]
+    overdue_ratio: float
+    interval_seconds: float
+
+
+@dataclass(frozen=True)
+class FreshView:
+    entry: registry.MatviewRegistryEntry
+    last_refreshed_at: datetime
+    due_in_seconds: float
+
+
+@dataclass(frozen=True)
+class RefreshPlan:
+    due: list[DueView]
+    fresh: list[FreshView]
+
+    @property
+    def due_names(self) -> list[str]:
+        return [item.entry.name for item in self.due]
+
+    @property
+    def due_intervals(self) -> dict[str, float]:
+        return {item.entry.name: item.interval_seconds for item in self.due}
+
+
+def adaptive_interval_seconds(
+    entry: registry.MatviewRegistryEntry,
+    stats: Optional[RefreshStats],
+    *,
+    min_interval_ratio: float,
+    expensive_refresh_seconds: float,
+) -> float:
+    """
+    Refresh interval for a view between a floor and its max_staleness_seconds.
+
+    The floor is min_interval_ratio * max_staleness_seconds. A view is
+    stretched toward max_staleness_seconds as its refreshes get expensive
+    (average duration relative to expensive_refresh_seconds) or rarely
+    change rows; only cheap views whose refreshes keep changing data stay
+    near the floor. Without history the view keeps max_staleness_seconds.
+    """
+    ceiling = float(entry.max_staleness_seconds)
+    if stats is None or stats.samples == 0:
+        return ceiling
+    floor = ceiling * min_interval_ratio
+    expense = min(max(stats.avg_duration_seconds / expensive_refresh_seconds, 0.0), 1.0)
+    stability = 1.0 - min(max(stats.change_rate, 0.0), 1.0)
+    stretch = 1.0 - (1.0 - expense) * (1.0 - stability)
+    return floor + (ceiling - floor) * stretch
+
+
+def is_fresh(
+    entry: registry.MatviewRegistryEntry,
+    last_refreshed_at: Optional[datetime],
+    now: datetime,
+    interval_seconds: Optional[float] = None,
+) -> bool:
+    if last_refreshed_at is None:
+        return False
+    interval = entry.max_staleness_seconds if interval_seconds is None else interval_seconds
+    return (now - last_refreshed_at).total_seconds() < interval
+
+
+def _overdue_ratio(
+    interval_seconds: float,
+    last_refreshed_at: Optional[datetime],
+    now: datetime,
+) -> float:
+    if last_refreshed_at is None:
+        return math.inf
+    age_s = (now - last_refreshed_at).total_seconds()
+    return age_s / max(interval_seconds, 1)
+
+
+def plan_refresh(
+    entries: Iterable[registry.MatviewRegistryEntry],
+    last_refreshed: Mapping[str, Optional[datetime]],
+    now: datetime,
+    intervals: Optional[Mapping[str, float]] = None,
+) -> RefreshPlan:
+    """
+    Split entries into due (ordered) and fresh views.
+
+    intervals overrides max_staleness_seconds per view (adaptive mode).
+    Ordering is a topological sort over the due views only, picking the most
+    overdue ready view at each step (ties broken by name for determinism).
+    """
+    intervals = intervals or {}
+    due: dict[str, DueView] = {}
+    fresh: list[FreshView] = []
+    for entry in entries:
+        last = last_refreshed.get(entry.name)
+        interval = intervals.get(entry.name, float(entry.max_staleness_seconds))
+        if is_fresh(entry, last, now, interval):
+            age_s = (now - last).total_seconds()
+            fresh.append(FreshView(entry, last, interval - age_s))
+        else:
+            due[entry.name] = DueView(entry, last, _overdue_ratio(interval, last, now), interval)
+
+    pending = {name: {dep for dep in item.entry.dependencies if dep in due} for name, item in due.items()}
+    ordered: list[DueView] = []
+    while pending:
+        ready = [name for name, deps in pending.items() if not deps]
+        if not ready:
+            cycle = ",".join(sorted(pending.keys()))
+            raise ValueError(f"Matview registry dependency cycle: {cycle}")
+        name = min(ready, key=lambda n: (-due[n].overdue_ratio, n))
+        ordered.append(due[name])
+        pending.pop(name)
+        for deps in pending.values():
+            deps.discard(name)
+
+    fresh.sort(key=lambda item: (item.due_in_seconds, item.entry.name))
+    return RefreshPlan(due=ordered, fresh=fresh)
+
+
+def load_refresh_state_sync(cur) -> tuple[dict[str, Optional[datetime]], datetime]:
+    """
+    Return ({view_name: last_refreshed_at}, database now()) using a DB-API cursor.
+    """
+    cur.execute(LOAD_STATE_SQL)
+    rows = cur.fetchall()
+    if rows:
+        now = rows[0][2]
+    else:
+        cur.execute("SELECT now()")
+        now = cur.fetchone()[0]
+    return {row[0]: row[1] for row in rows}, now
+
+
+def load_refresh_stats_sync(cur, window: int) -> dict[str, RefreshStats]:
+    """
+    Return {view_name: RefreshStats} over each view's last `window` successful refreshes.
+    """
+    cur.execute(LOAD_REFRESH_STATS_SQL, {"window": window})
+    return {
+        row[0]: RefreshStats(
+            view_name=row[0],
+            samples=int(row[1]),
+            avg_duration_seconds=float(row[2] or 0) / 1000.0,
+            change_rate=float(row[3] or 0),
+        )
+        for row in cur.fetchall()
+    }
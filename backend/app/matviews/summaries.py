@@ -0,0 +1,367 @@
+"""
+Per-tenant incremental summary tables (alternative to global matview refresh).
+
+Statement-level triggers on attribution_allocations and revenue_ledger record
+the (tenant, summary, bucket) groups that changed in summary_dirty_buckets.
+refresh_tenant_summaries claims one tenant's dirty buckets and recomputes only
+those groups from the base tables, so refresh cost scales with that tenant's
+changes instead of every tenant's rows.
+
+check_tenant_summary_consistency compares each summary against a full
+recompute for the tenant and can rebuild it when they diverge (e.g. after a
+change the triggers do not observe, such as an attribution_events revenue fix).
+
+The triggers are disabled unless the summary_tables backend is active;
+set_summary_dirty_tracking switches them and reseeds every tenant's buckets
+when tracking comes back on.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+import logging
+from typing import Callable, Iterator, Optional
+from uuid import UUID
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_UTC_DAY_JOIN = (
+    "unnest(%(buckets)s::date[]) AS b(day) "
+    "JOIN {table} src ON src.tenant_id = %(tenant_id)s "
+    "AND src.{ts_column} >= (b.day::timestamp AT TIME ZONE 'UTC') "
+    "AND src.{ts_column} < ((b.day + 1)::timestamp AT TIME ZONE 'UTC')"
+)
+
+
+def _day_params(buckets: list[str]) -> dict:
+    return {"buckets": buckets}
+
+
+def _event_params(buckets: list[str]) -> dict:
+    return {
+        "event_ids": [bucket for bucket in buckets if bucket != "null"],
+        "include_orphans": "null" in buckets,
+    }
+
+
+def _tenant_params(buckets: list[str]) -> dict:
+    return {}
+
+
+@dataclass(frozen=True)
+class SummarySpec:
+    name: str
+    table: str
+    replaces_view: str
+    columns: tuple[str, ...]
+    delete_sql: str
+    recompute_sql: str
+    full_sql: str
+    bucket_params: Callable[[list[str]], dict]
+
+
+SUMMARY_SPECS: tuple[SummarySpec, ...] = (
+    SummarySpec(
+        name="channel_performance",
+        table="summary_channel_performance",
+        replaces_view="mv_channel_performance",
+        columns=(
+            "tenant_id",
+            "channel_code",
+            "allocation_date",
+            "total_conversions",
+            "total_revenue_cents",
+            "avg_confidence_score",
+            "total_allocations",
+        ),
+        delete_sql=(
+            "DELETE FROM summary_channel_performance "
+            "WHERE tenant_id = %(tenant_id)s AND allocation_date = ANY(%(buckets)s::date[])"
+        ),
+        recompute_sql=(
+            "SELECT src.tenant_id, src.channel_code, b.day, COUNT(DISTINCT src.event_id), "
+            "SUM(src.allocated_revenue_cents), AVG(src.confidence_score), COUNT(*) "
+            "FROM " + _UTC_DAY_JOIN.format(table="attribution_allocations", ts_column="created_at") + " "
+            "GROUP BY src.tenant_id, src.channel_code, b.day"
+        ),
+        full_sql=(
+            "SELECT tenant_id, channel_code, (created_at AT TIME ZONE 'UTC')::date, COUNT(DISTINCT event_id), "
+            "SUM(allocated_revenue_cents), AVG(confidence_score), COUNT(*) "
+            "FROM attribution_allocations WHERE tenant_id = %(tenant_id)s "
+            "GROUP BY tenant_id, channel_code, (created_at AT TIME ZONE 'UTC')::date"
+        ),
+        bucket_params=_day_params,
+    ),
+    SummarySpec(
+        name="daily_revenue",
+        table="summary_daily_revenue",
+        replaces_view="mv_daily_revenue_summary",
+        columns=(
+            "tenant_id",
+            "revenue_date",
+            "state",
+            "currency",
+            "total_amount_cents",
+            "transaction_count",
+        ),
+        delete_sql=(
+            "DELETE FROM summary_daily_revenue "
+            "WHERE tenant_id = %(tenant_id)s AND revenue_date = ANY(%(buckets)s::date[])"
+        ),
+        recompute_sql=(
+            "SELECT src.tenant_id, b.day, src.state, src.currency, SUM(src.amount_cents), COUNT(*) "
+            "FROM " + _UTC_DAY_JOIN.format(table="revenue_ledger", ts_column="verification_timestamp") + " "
+            "WHERE src.state IN ('captured', 'refunded', 'chargeback') "
+            "GROUP BY src.tenant_id, b.day, src.state, src.currency"
+        ),
+        full_sql=(
+            "SELECT tenant_id, (verification_timestamp AT TIME ZONE 'UTC')::date, state, currency, "
+            "SUM(amount_cents), COUNT(*) "
+            "FROM revenue_ledger WHERE tenant_id = %(tenant_id)s "
+            "AND state IN ('captured', 'refunded', 'chargeback') "
+            "GROUP BY tenant_id, (verification_timestamp AT TIME ZONE 'UTC')::date, state, currency"
+        ),
+        bucket_params=_day_params,
+    ),
+    SummarySpec(
+        name="allocation_totals",
+        table="summary_allocation_totals",
+        replaces_view="mv_allocation_summary",
+        columns=(
+            "tenant_id",
+            "event_id",
+            "model_version",
+            "total_allocated_cents",
+            "event_revenue_cents",
+            "is_balanced",
+            "drift_cents",
+        ),
+        delete_sql=(
+            "DELETE FROM summary_allocation_totals WHERE tenant_id = %(tenant_id)s "
+            "AND (event_id = ANY(%(event_ids)s::uuid[]) OR (event_id IS NULL AND %(include_orphans)s))"
+        ),
+        recompute_sql=(
+            "SELECT aa.tenant_id, aa.event_id, aa.model_version, SUM(aa.allocated_revenue_cents), e.revenue_cents, "
+            "CASE WHEN e.revenue_cents IS NULL THEN NULL ELSE SUM(aa.allocated_revenue_cents) = e.revenue_cents END, "
+            "CASE WHEN e.revenue_cents IS NULL THEN NULL ELSE ABS(SUM(aa.allocated_revenue_cents) - e.revenue_cents) END "
+            "FROM attribution_allocations aa LEFT JOIN attribution_events e ON aa.event_id = e.id "
+            "WHERE aa.tenant_id = %(tenant_id)s "
+            "AND (aa.event_id = ANY(%(event_ids)s::uuid[]) OR (aa.event_id IS NULL AND %(include_orphans)s)) "
+            "GROUP BY aa.tenant_id, aa.event_id, aa.model_version, e.revenue_cents"
+        ),
+        full_sql=(
+            "SELECT aa.tenant_id, aa.event_id, aa.model_version, SUM(aa.allocated_revenue_cents), e.revenue_cents, "
+            "CASE WHEN e.revenue_cents IS NULL THEN NULL ELSE SUM(aa.allocated_revenue_cents) = e.revenue_cents END, "
+            "CASE WHEN e.revenue_cents IS NULL THEN NULL ELSE ABS(SUM(aa.allocated_revenue_cents) - e.revenue_cents) END "
+            "FROM attribution_allocations aa LEFT JOIN attribution_events e ON aa.event_id = e.id "
+            "WHERE aa.tenant_id = %(tenant_id)s "
+            "GROUP BY aa.tenant_id, aa.event_id, aa.model_version, e.revenue_cents"
+        ),
+        bucket_params=_event_params,
+    ),
+    SummarySpec(
+        name="realtime_revenue",
+        table="summary_realtime_revenue",
+        replaces_view="mv_realtime_revenue",
+        columns=("tenant_id", "total_revenue", "verified", "last_updated_at"),
+        delete_sql="DELETE FROM summary_realtime_revenue WHERE tenant_id = %(tenant_id)s",
+        recompute_sql=(
+            "SELECT tenant_id, COALESCE(SUM(COALESCE(amount_cents, revenue_cents)), 0) / 100.0, "
+            "BOOL_OR(COALESCE(is_verified, false)), MAX(updated_at) "
+            "FROM revenue_ledger WHERE tenant_id = %(tenant_id)s GROUP BY tenant_id"
+        ),
+        full_sql=(
+            "SELECT tenant_id, COALESCE(SUM(COALESCE(amount_cents, revenue_cents)), 0) / 100.0, "
+            "BOOL_OR(COALESCE(is_verified, false)), MAX(updated_at) "
+            "FROM revenue_ledger WHERE tenant_id = %(tenant_id)s GROUP BY tenant_id"
+        ),
+        bucket_params=_tenant_params,
+    ),
+)
+
+SUMMARY_BACKEND_VIEW_NAMES: frozenset[str] = frozenset(spec.replaces_view for spec in SUMMARY_SPECS)
+
+_CLAIM_DIRTY_BUCKETS_SQL = """
+    DELETE FROM summary_dirty_buckets
+    WHERE (tenant_id, summary_name, bucket) IN (
+        SELECT tenant_id, summary_name, bucket
+        FROM summary_dirty_buckets
+        WHERE tenant_id = %(tenant_id)s
+        ORDER BY summary_name, bucket
+        LIMIT %(limit)s
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING summary_name, bucket
+"""
+
+
+@dataclass(frozen=True)
+class SummaryRefreshResult:
+    summary_name: str
+    bucket_count: int
+    duration_ms: int
+
+    def to_log_dict(self) -> dict:
+        return {
+            "summary_name": self.summary_name,
+            "bucket_count": self.bucket_count,
+            "duration_ms": self.duration_ms,
+        }
+
+
+@dataclass(frozen=True)
+class SummaryConsistencyResult:
+    summary_name: str
+    missing_rows: int
+    unexpected_rows: int
+    repaired: bool
+
+    @property
+    def consistent(self) -> bool:
+        return self.missing_rows == 0 and self.unexpected_rows == 0
+
+    def to_log_dict(self) -> dict:
+        return {
+            "summary_name": self.summary_name,
+            "missing_rows": self.missing_rows,
+            "unexpected_rows": self.unexpected_rows,
+            "repaired": self.repaired,
+        }
+
+
+def _now_utc() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _insert_sql(spec: SummarySpec, select_sql: str) -> str:
+    return f"INSERT INTO {spec.table} ({', '.join(spec.columns)}) {select_sql}"
+
+
+@contextmanager
+def _tenant_cursor(tenant_id: UUID) -> Iterator:
+    from app.matviews.executor import sync_connection
+
+    with sync_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT set_config('app.current_tenant_id', %s, true)", (str(tenant_id),))
+        cur.execute("SELECT set_config('app.execution_context', 'worker', true)")
+        yield conn, cur
+
+
+def set_summary_dirty_tracking(enabled: bool) -> bool:
+    """
+    Enable or disable the dirty-bucket triggers; returns whether the state changed.
+
+    Writes made while tracking was off were never recorded, so enabling also
+    marks all existing data dirty. The seed commits separately, after the
+    triggers are on, so every write is covered by one or the other.
+    """
+    from app.matviews.executor import sync_connection
+
+    seeded = None
+    with sync_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT security.set_summary_dirty_tracking(%s)", (enabled,))
+        changed = bool(cur.fetchone()[0])
+        conn.commit()
+        if changed and enabled:
+            cur.execute("SELECT security.seed_summary_dirty_buckets()")
+            seeded = int(cur.fetchone()[0])
+            conn.commit()
+    if changed:
+        logger.info(
+            "matview_summary_dirty_tracking_changed",
+            extra={"enabled": enabled, "seeded_buckets": seeded},
+        )
+    return changed
+
+
+def refresh_summary_buckets(cur, tenant_id: UUID, spec: SummarySpec, buckets: list[str]) -> None:
+    """
+    Recompute the given buckets of one summary for one tenant on an open cursor.
+    """
+    params = {"tenant_id": str(tenant_id), **spec.bucket_params(buckets)}
+    cur.execute(spec.delete_sql, params)
+    cur.execute(_insert_sql(spec, spec.recompute_sql), params)
+
+
+def refresh_tenant_summaries(
+    tenant_id: UUID,
+    correlation_id: Optional[str] = None,
+) -> list[SummaryRefreshResult]:
+    """
+    Drain a tenant's dirty summary buckets, one transaction per claimed batch.
+
+    Batches are claimed with SKIP LOCKED, so concurrent refreshes for the same
+    tenant split the work instead of waiting on each other.
+    """
+    bucket_counts: dict[str, int] = defaultdict(int)
+    durations_ms: dict[str, int] = defaultdict(int)
+    specs = {spec.name: spec for spec in SUMMARY_SPECS}
+    while True:
+        with _tenant_cursor(tenant_id) as (conn, cur):
+            cur.execute(
+                _CLAIM_DIRTY_BUCKETS_SQL,
+                {"tenant_id": str(tenant_id), "limit": settings.MATVIEW_SUMMARY_REFRESH_BATCH_SIZE},
+            )
+            claimed: dict[str, list[str]] = defaultdict(list)
+            for summary_name, bucket in cur.fetchall():
+                claimed[summary_name].append(bucket)
+            for summary_name, buckets in claimed.items():
+                started_at = _now_utc()
+                refresh_summary_buckets(cur, tenant_id, specs[summary_name], buckets)
+                bucket_counts[summary_name] += len(buckets)
+                durations_ms[summary_name] += int((_now_utc() - started_at).total_seconds() * 1000)
+            conn.commit()
+        if sum(len(buckets) for buckets in claimed.values()) < settings.MATVIEW_SUMMARY_REFRESH_BATCH_SIZE:
+            break
+
+    results = [
+        SummaryRefreshResult(name, bucket_counts[name], durations_ms[name])
+        for name in specs
+        if bucket_counts[name]
+    ]
+    if results:
+        logger.info(
+            "matview_summary_refresh_completed",
+            extra={
+                "tenant_id": str(tenant_id),
+                "correlation_id": correlation_id,
+                "summaries": [result.to_log_dict() for result in results],
+            },
+        )
+    return results
+
+
+def check_tenant_summary_consistency(
+    tenant_id: UUID,
+    *,
+    repair: bool = False,
+) -> list[SummaryConsistencyResult]:
+    """
+    Compare every summary for a tenant against a full recompute from base tables.
+
+    With repair=True, a divergent summary is rebuilt from the full recompute in
+    the same transaction as the comparison.
+    """
+    results: list[SummaryConsistencyResult] = []
+    with _tenant_cursor(tenant_id) as (conn, cur):
+        params = {"tenant_id": str(tenant_id)}
+        for spec in SUMMARY_SPECS:
+            current_sql = f"SELECT {', '.join(spec.columns)} FROM {spec.table} WHERE tenant_id = %(tenant_id)s"
+            cur.execute(f"SELECT count(*) FROM (({spec.full_sql}) EXCEPT ALL ({current_sql})) AS missing", params)
+            missing = int(cur.fetchone()[0])
+            cur.execute(f"SELECT count(*) FROM (({current_sql}) EXCEPT ALL ({spec.full_sql})) AS unexpected", params)
+            unexpected = int(cur.fetchone()[0])
+            repaired = False
+            if repair and (missing or unexpected):
+                cur.execute(f"DELETE FROM {spec.table} WHERE tenant_id = %(tenant_id)s", params)
+                cur.execute(_insert_sql(spec, spec.full_sql), params)
+                repaired = True
+            results.append(SummaryConsistencyResult(spec.name, missing, unexpected, repaired))
+        conn.commit()
+    return results
@@ -1,8 +1,7 @@
 import uuid
-from typing import Callable
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.observability.context import (
     set_request_correlation_id,
@@ -12,19 +11,39 @@ from app.observability.context import (
 )
 
 
-class ObservabilityMiddleware(BaseHTTPMiddleware):
+class ObservabilityMiddleware:
     """
     Captures correlation_id from header (X-Correlation-ID) or generates one.
     Adds the correlation_id to response headers and initializes tenant_id context (filled later).
+
+    Implemented as raw ASGI so responses stream straight through (no per-request
+    task or memory stream as with BaseHTTPMiddleware); the header is injected on
+    `http.response.start`.
     """
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        correlation_id = request.headers.get("X-Correlation-ID") or str(uuid.uuid4())
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        correlation_id = None
+        for key, value in scope.get("headers") or ():
+            if key == b"x-correlation-id":
+                correlation_id = value.decode("latin-1")
+                break
+        correlation_id = correlation_id or str(uuid.uuid4())
         set_request_correlation_id(correlation_id)
         # business correlation is set later (idempotency key)
         set_business_correlation_id(None)
         set_tenant_id(None)
 
-        response = await call_next(request)
-        response.headers["X-Correlation-ID"] = get_request_correlation_id() or correlation_id
-        return response
+        async def send_with_correlation(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-Correlation-ID"] = get_request_correlation_id() or correlation_id
+            await send(message)
+
+        await self.app(scope, receive, send_with_correlation)
@@ -19,18 +19,26 @@ PII Keys Detected:
 - passport: Passport numbers
 
 Behavior:
-- Recursively traverses incoming JSON payloads
-- Replaces values of PII keys with "[REDACTED]"
+- Pure ASGI middleware: the request body is buffered and parsed exactly once
+- PII keys are removed in place (no copy of the payload tree)
+- Redaction paths are built only for keys that are actually removed
+- The body is re-serialized only when something was removed; otherwise the
+  original bytes are replayed unchanged
+- The parsed (stripped) object is exposed as `request.state.parsed_body`;
+  routes using `ParsedBodyRoute` validate their body params from it instead of
+  decoding the JSON a second time
 - Logs redaction events for monitoring
 - Allows request to proceed (does not block)
 """
 
+import copy
 import json
 import logging
-from typing import Any, Dict, Set
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
+from typing import Any, Callable, Coroutine, Optional, Set
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 logger = logging.getLogger(__name__)
 
@@ -63,136 +71,209 @@ PII_KEYS: Set[str] = {
 PII_STRIP_PATH_PREFIXES: tuple[str, ...] = ("/api/webhooks",)
 
 
+# Precompiled lookup set: payload keys are lower-cased once per node and checked
+# against this frozenset.
+_PII_KEYS_LOWER: frozenset[str] = frozenset(key.lower() for key in PII_KEYS)
+
+_BODY_METHODS: frozenset[str] = frozenset({"POST", "PUT", "PATCH"})
+
+
+def _format_path(root: str, segments: list[Any]) -> str:
+    parts = [root]
+    for segment in segments:
+        if isinstance(segment, int):
+            parts.append(f"[{segment}]")
+        else:
+            parts.append(f".{segment}")
+    return "".join(parts)
+
+
+def _strip_in_place(node: Any, root: str, segments: list[Any], removed: list[str]) -> None:
+    if isinstance(node, dict):
+        for key in list(node.keys()):
+            if isinstance(key, str) and key.lower() in _PII_KEYS_LOWER:
+                # Remove the key entirely to satisfy key-based DB guardrails.
+                del node[key]
+                removed.append(_format_path(root, segments + [key]))
+                continue
+            value = node[key]
+            if isinstance(value, (dict, list)):
+                segments.append(key)
+                _strip_in_place(value, root, segments, removed)
+                segments.pop()
+    elif isinstance(node, list):
+        for index, item in enumerate(node):
+            if isinstance(item, (dict, list)):
+                segments.append(index)
+                _strip_in_place(item, root, segments, removed)
+                segments.pop()
+
+
+def strip_pii_keys_in_place(data: Any, path: str = "root") -> list[str]:
+    """
+    Remove PII keys from a parsed JSON structure, mutating it in place.
+
+    Args:
+        data: Parsed JSON (dict, list, or scalar)
+        path: Root label used for reported paths
+
+    Returns:
+        Paths of removed keys in traversal order (e.g. "root.customer.email",
+        "root.items[0].phone").
+    """
+    removed: list[str] = []
+    _strip_in_place(data, path, [], removed)
+    return removed
+
+
 def strip_pii_keys_recursive(data: Any, path: str = "root") -> tuple[Any, list[str]]:
     """
-    Recursively traverse data structure and redact PII values.
-    
+    Copying variant of `strip_pii_keys_in_place`.
+
     Args:
         data: Data structure to traverse (dict, list, or scalar)
         path: Current path in data structure (for logging)
-    
+
     Returns:
         Tuple of (redacted_data, redacted_keys_list)
     """
-    redacted_keys = []
-    
-    if isinstance(data, dict):
-        sanitized: dict[str, Any] = {}
-        for key, value in data.items():
-            current_path = f"{path}.{key}"
-            
-            if key.lower() in PII_KEYS:
-                # Remove the key entirely to satisfy key-based DB guardrails.
-                redacted_keys.append(current_path)
-                continue
+    sanitized = copy.deepcopy(data)
+    return sanitized, strip_pii_keys_in_place(sanitized, path)
+
 
-            # Recursively process nested structures
-            sanitized_value, nested_redactions = strip_pii_keys_recursive(value, current_path)
-            sanitized[key] = sanitized_value
-            redacted_keys.extend(nested_redactions)
-        
-        return sanitized, redacted_keys
-    
-    elif isinstance(data, list):
-        sanitized_list: list[Any] = []
-        for i, item in enumerate(data):
-            current_path = f"{path}[{i}]"
-            sanitized_item, nested_redactions = strip_pii_keys_recursive(item, current_path)
-            sanitized_list.append(sanitized_item)
-            redacted_keys.extend(nested_redactions)
-        
-        return sanitized_list, redacted_keys
-    
-    else:
-        # Scalar value - return as-is
-        return data, redacted_keys
-
-
-class PIIStrippingMiddleware(BaseHTTPMiddleware):
+def _header_value(scope: Scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers") or ():
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+class PIIStrippingMiddleware:
     """
-    FastAPI middleware that strips PII from incoming request payloads.
-    
+    ASGI middleware that strips PII from incoming request payloads.
+
     Executes before Pydantic validation to ensure PII never reaches
-    application logic or database layer.
-    
+    application logic or database layer. Request state set for ingestion routes:
+        - original_body: raw bytes as received (for signature verification)
+        - parsed_body: parsed JSON after PII removal
+        - pii_redacted_paths: list of removed key paths
+
     Usage:
         app.add_middleware(PIIStrippingMiddleware)
     """
-    
-    async def dispatch(self, request: Request, call_next):
-        """
-        Process request and strip PII from JSON payloads.
-        
-        Args:
-            request: Incoming HTTP request
-            call_next: Next middleware/handler in chain
-        
-        Returns:
-            HTTP response from downstream handler
-        """
-        # Only process ingestion-boundary requests.
-        if not any(request.url.path.startswith(prefix) for prefix in PII_STRIP_PATH_PREFIXES):
-            return await call_next(request)
-
-        # Only process POST/PUT/PATCH requests with JSON content
-        if request.method in ["POST", "PUT", "PATCH"]:
-            content_type = request.headers.get("content-type", "")
-            
-            if "application/json" in content_type:
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope.get("method") not in _BODY_METHODS
+            # Only strip PII at ingestion boundary to avoid breaking non-ingestion APIs.
+            or not scope.get("path", "").startswith(PII_STRIP_PATH_PREFIXES)
+            or "application/json" not in (_header_value(scope, b"content-type") or "")
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        body, trailing = await _read_body(receive)
+        state = scope.setdefault("state", {})
+        state["original_body"] = body
+        downstream_body = body
+
+        if body:
+            try:
+                payload = json.loads(body)
+            except json.JSONDecodeError:
+                # Invalid JSON - let it pass through for proper error handling
+                logger.warning("Invalid JSON in request body, skipping PII redaction")
+                payload = None
+            else:
                 try:
-                    # Read request body
-                    body = await request.body()
-                    setattr(request.state, "original_body", body)
-                    
-                    if body:
-                        # Parse JSON
-                        try:
-                            payload = json.loads(body)
-                        except json.JSONDecodeError:
-                            # Invalid JSON - let it pass through for proper error handling
-                            logger.warning("Invalid JSON in request body, skipping PII redaction")
-                            return await call_next(request)
-                        
-                        # Strip PII keys
-                        redacted_payload, redacted_keys = strip_pii_keys_recursive(payload)
-                        setattr(request.state, "pii_redacted_paths", redacted_keys)
-                        
-                        # Log redaction events
-                        if redacted_keys:
-                            logger.info(
-                                "PII keys stripped from ingestion request",
-                                extra={
-                                    "event_type": "pii_redaction",
-                                    "path": request.url.path,
-                                    "method": request.method,
-                                    "redacted_keys": redacted_keys,
-                                    "redaction_count": len(redacted_keys)
-                                }
-                            )
-                        
-                        # Replace request body with redacted version
-                        redacted_body = json.dumps(redacted_payload).encode('utf-8')
-                        
-                        # Create new request with redacted body
-                        async def receive():
-                            return {"type": "http.request", "body": redacted_body}
-                        
-                        request._receive = receive
-                        # Starlette caches request.body() on first read; override cache too.
-                        request._body = redacted_body
-                
+                    redacted_keys = strip_pii_keys_in_place(payload)
+                    state["pii_redacted_paths"] = redacted_keys
+                    state["parsed_body"] = payload
+                    if redacted_keys:
+                        logger.info(
+                            "PII keys stripped from ingestion request",
+                            extra={
+                                "event_type": "pii_redaction",
+                                "path": scope.get("path"),
+                                "method": scope.get("method"),
+                                "redacted_keys": redacted_keys,
+                                "redaction_count": len(redacted_keys),
+                            },
+                        )
+                        downstream_body = json.dumps(payload).encode("utf-8")
                 except Exception as e:
                     logger.error(
                         f"Error during PII redaction: {e}",
                         extra={
                             "event_type": "pii_redaction_error",
-                            "path": request.url.path,
-                            "method": request.method,
-                            "error": str(e)
-                        }
+                            "path": scope.get("path"),
+                            "method": scope.get("method"),
+                            "error": str(e),
+                        },
                     )
                     # Continue processing request despite error
-        
-        # Continue to next middleware/handler
-        response = await call_next(request)
-        return response
+
+        await self.app(scope, _replay_receive(downstream_body, trailing, receive), send)
+
+
+async def _read_body(receive: Receive) -> tuple[bytes, Optional[Message]]:
+    """
+    Drain http.request messages. Returns the body and any non-body message
+    (e.g. http.disconnect) received while reading, so it can be replayed.
+    """
+    chunks: list[bytes] = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            return b"".join(chunks), message
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks), None
+
+
+def _replay_receive(body: bytes, trailing: Optional[Message], receive: Receive) -> Receive:
+    sent = False
+
+    async def replay() -> Message:
+        nonlocal sent, trailing
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        if trailing is not None:
+            message, trailing = trailing, None
+            return message
+        return await receive()
+
+    return replay
+
+
+class ParsedBodyRequest(Request):
+    """Request whose `json()` returns the middleware's parsed (stripped) body when present."""
+
+    async def json(self) -> Any:
+        parsed = getattr(self.state, "parsed_body", None)
+        if parsed is not None:
+            return parsed
+        return await super().json()
+
+
+class ParsedBodyRoute(APIRoute):
+    """
+    APIRoute that hands FastAPI's body validation the payload already parsed by
+    PIIStrippingMiddleware, so ingestion routes parse each request body once.
+
+    Usage:
+        router = APIRouter(route_class=ParsedBodyRoute)
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            return await handler(ParsedBodyRequest(request.scope, request.receive))
+
+        return route_handler
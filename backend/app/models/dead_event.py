@@ -73,6 +73,9 @@ class DeadEvent(Base):
     error_type: Mapped[str] = mapped_column(String(100), nullable=False)
     error_message: Mapped[str] = mapped_column(Text, nullable=False)
     error_traceback: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # Clustering key (see dlq_handler.error_signature); rolled up per tenant
+    # in dead_event_error_clusters.
+    error_signature: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
 
     # Retry Tracking
     retry_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
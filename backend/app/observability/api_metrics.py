@@ -34,3 +34,71 @@ ingestion_duration_seconds = Histogram(
     buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5),
 )
 
+
+ingestion_batch_duration_seconds = Histogram(
+    "ingestion_batch_duration_seconds",
+    "Ingestion duration per batch request",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30),
+)
+
+ingestion_batch_size = Histogram(
+    "ingestion_batch_size",
+    "Number of events per batch ingestion request",
+    buckets=(1, 10, 50, 100, 250, 500, 1000, 2500, 5000),
+)
+
+# B0.5.6.3: No labels on API metrics (bounded cardinality); one counter per result.
+tenant_secrets_cache_hits_total = Counter(
+    "tenant_secrets_cache_hits_total",
+    "Webhook tenant secret lookups served from cache",
+)
+
+tenant_secrets_cache_negative_hits_total = Counter(
+    "tenant_secrets_cache_negative_hits_total",
+    "Unknown tenant API keys rejected from the negative cache",
+)
+
+tenant_secrets_cache_misses_total = Counter(
+    "tenant_secrets_cache_misses_total",
+    "Webhook tenant secret lookups resolved from the database",
+)
+
+tenant_secrets_cache_invalidations_total = Counter(
+    "tenant_secrets_cache_invalidations_total",
+    "Webhook tenant secret cache invalidations (rotation notifications and listener resets)",
+)
+
+# Coalesced attribution recompute scheduling. Ratio marks/flushes_scheduled is the
+# API-side coalescing factor; worker-side counters live in app.observability.metrics.
+attribution_recompute_marks_total = Counter(
+    "attribution_recompute_marks_total",
+    "Ingested events that marked an attribution window dirty",
+)
+
+attribution_recompute_flushes_scheduled_total = Counter(
+    "attribution_recompute_flushes_scheduled_total",
+    "Dirty-window flush tasks enqueued by ingestion (at most one pending per tenant)",
+)
+
+# Bulk DLQ replay (app.ingestion.dlq_replay). Throughput = rate of the *_total counters;
+# per-run progress is persisted in dead_event_replay_runs.
+dlq_replay_resolved_total = Counter(
+    "dlq_replay_resolved_total",
+    "Dead events resolved by bulk replay (ingested or already present)",
+)
+
+dlq_replay_failed_total = Counter(
+    "dlq_replay_failed_total",
+    "Dead events whose bulk replay was rejected again",
+)
+
+dlq_replay_batch_duration_seconds = Histogram(
+    "dlq_replay_batch_duration_seconds",
+    "Duration of one bulk DLQ replay batch transaction",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30),
+)
+
+dlq_replay_throttle_seconds_total = Counter(
+    "dlq_replay_throttle_seconds_total",
+    "Time bulk DLQ replay spent sleeping to stay under DLQ_REPLAY_MAX_EVENTS_PER_SECOND",
+)
@@ -3,7 +3,8 @@ Broker-truth Celery queue depth + max age metrics (B0.5.6.4).
 
 These metrics are derived from the Postgres SQLAlchemy kombu transport tables:
 - public.kombu_queue
-- public.kombu_message
+- public.kombu_queue_stats (trigger-maintained per-queue counters)
+- public.kombu_message (max age only, via a partial index)
 
 Design constraints:
 - Read-only: SELECT-only SQL
@@ -111,23 +112,32 @@ async def _fetch_broker_truth_stats_from_db() -> tuple[
     """
     Fetch queue stats from kombu tables using SELECT-only SQL.
 
+    Depth comes from kombu_queue_stats, the per-queue counters that triggers on
+    kombu_message keep current, so the cost is O(queues) rather than O(messages);
+    max age is an index probe per queue.
+
     Returns (visible_counts, invisible_counts, total_counts, max_age_seconds) keyed by raw queue name.
     """
     sql = text(
         """
         SELECT
             q.name AS queue_name,
-            COALESCE(SUM(CASE WHEN m.visible THEN 1 ELSE 0 END), 0) AS visible_count,
-            COALESCE(SUM(CASE WHEN NOT m.visible THEN 1 ELSE 0 END), 0) AS invisible_count,
-            COALESCE(COUNT(m.id), 0) AS total_count,
-            COALESCE(
-                EXTRACT(EPOCH FROM (NOW() - (MIN(m.timestamp) FILTER (WHERE m.visible)))),
-                0
-            ) AS max_age_seconds
+            COALESCE(s.visible_count, 0) AS visible_count,
+            COALESCE(s.invisible_count, 0) AS invisible_count,
+            COALESCE(s.visible_count + s.invisible_count, 0) AS total_count,
+            COALESCE(EXTRACT(EPOCH FROM (NOW() - oldest.redelivered_at)), 0) AS max_age_seconds
         FROM kombu_queue q
-        LEFT JOIN kombu_message m ON m.queue_id = q.id
+        LEFT JOIN (
+            SELECT queue_id, SUM(visible_count) AS visible_count, SUM(invisible_count) AS invisible_count
+            FROM kombu_queue_stats
+            GROUP BY queue_id
+        ) s ON s.queue_id = q.id
+        LEFT JOIN LATERAL (
+            SELECT MIN(m.timestamp) AS redelivered_at
+            FROM kombu_message m
+            WHERE m.queue_id = q.id AND m.visible AND m.timestamp IS NOT NULL
+        ) oldest ON true
         WHERE q.name NOT LIKE :pidbox_like
-        GROUP BY q.name
         """
     )
     async with engine.connect() as conn:
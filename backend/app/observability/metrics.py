@@ -85,6 +85,14 @@ matview_refresh_failures_total = Counter(
     ["view_name", "outcome"],
 )
 
+# Rows inserted + deleted by successful refreshes (0 = no-op refresh).
+matview_refresh_rows_changed = Histogram(
+    "matview_refresh_rows_changed",
+    "Rows changed by successful materialized view refreshes",
+    ["view_name"],
+    buckets=(0, 1, 10, 100, 1000, 10000, 100000, 1000000),
+)
+
 
 # =============================================================================
 # Multiprocess Shard Hygiene (B0.5.6.5: parent-owned pruning)
@@ -105,3 +113,77 @@ multiproc_dir_overflow_total = Counter(
     "multiproc_dir_overflow_total",
     "Total times multiprocess shard file count exceeded configured threshold",
 )
+
+
+# =============================================================================
+# Worker Event Loop Pool Backpressure
+# =============================================================================
+# No labels. Queue wait = submit -> coroutine start on the task thread's loop;
+# inflight_at_submit = coroutines already running on that loop.
+
+worker_loop_calls_total = Counter(
+    "worker_loop_calls_total",
+    "Async calls submitted from Celery task threads to worker event loops",
+)
+
+worker_loop_queue_wait_seconds = Histogram(
+    "worker_loop_queue_wait_seconds",
+    "Delay between submitting an async call and it starting on its worker event loop",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5),
+)
+
+worker_loop_inflight_at_submit = Histogram(
+    "worker_loop_inflight_at_submit",
+    "Async calls already in flight on the target worker event loop at submit time",
+    buckets=(0, 1, 2, 4, 8, 16, 32, 64),
+)
+
+
+# =============================================================================
+# Worker DLQ Writer
+# =============================================================================
+# No labels. Per-process buffer for worker_failed_jobs; overflowed rows were
+# never buffered, failed rows were buffered but could not be written.
+
+worker_dlq_rows_written_total = Counter(
+    "worker_dlq_rows_written_total",
+    "Task failures written to worker_failed_jobs by the buffered DLQ writer",
+)
+
+worker_dlq_rows_overflowed_total = Counter(
+    "worker_dlq_rows_overflowed_total",
+    "Task failures dropped because the worker DLQ buffer was full",
+)
+
+worker_dlq_rows_failed_total = Counter(
+    "worker_dlq_rows_failed_total",
+    "Buffered task failures dropped after worker_failed_jobs writes failed",
+)
+
+worker_dlq_flush_batch_size = Histogram(
+    "worker_dlq_flush_batch_size",
+    "Rows written per worker_failed_jobs multi-row INSERT",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 200, 500),
+)
+
+
+# =============================================================================
+# Attribution Recompute Coalescing
+# =============================================================================
+# No labels. Coalescing ratio = flush_marks_total / flush_windows_total
+# (ingestion requests absorbed per recompute actually executed).
+
+attribution_recompute_flushes_total = Counter(
+    "attribution_recompute_flushes_total",
+    "Dirty-window flushes executed (one per tenant per debounce interval)",
+)
+
+attribution_recompute_flush_windows_total = Counter(
+    "attribution_recompute_flush_windows_total",
+    "Distinct attribution windows enqueued for recompute by dirty-window flushes",
+)
+
+attribution_recompute_flush_marks_total = Counter(
+    "attribution_recompute_flush_marks_total",
+    "Ingestion recompute requests coalesced into dirty-window flushes",
+)
@@ -91,13 +91,19 @@ ALLOWED_TASK_NAMES: frozenset[str] = frozenset({
     "app.tasks.matviews.refresh_single",
     "app.tasks.matviews.refresh_all_for_tenant",
     "app.tasks.matviews.pulse_matviews_global",
+    "app.tasks.matviews.check_summary_consistency",
     # maintenance
     "app.tasks.maintenance.refresh_all_matviews_global_legacy",
     "app.tasks.maintenance.refresh_matview_for_tenant",
     "app.tasks.maintenance.scan_for_pii_contamination",
     "app.tasks.maintenance.enforce_data_retention",
+    "app.tasks.maintenance.compact_broker_messages",
+    "app.tasks.maintenance.maintain_broker_partitions",
     # attribution
     "app.tasks.attribution.recompute_window",
+    "app.tasks.attribution.flush_dirty_windows",
+    "app.tasks.attribution.recompute_window_shard",
+    "app.tasks.attribution.finalize_recompute_job",
     # r4_failure_semantics
     "app.tasks.r4_failure_semantics.poison_pill",
     "app.tasks.r4_failure_semantics.crash_after_write_pre_ack",
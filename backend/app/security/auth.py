@@ -6,11 +6,17 @@ from uuid import UUID
 
 from fastapi import Header, Request
 import jwt
-from jwt import InvalidTokenError, PyJWKClient
+from jwt import InvalidTokenError
 
 from app.core.config import settings
 from app.core.identity import resolve_user_id
 from app.observability.context import set_tenant_id, set_user_id
+from app.security.jwks import VerifiedTokenCache, get_jwks_cache
+
+_verified_tokens = VerifiedTokenCache(
+    ttl_seconds=settings.AUTH_JWT_VERIFIED_TOKEN_CACHE_TTL_SECONDS,
+    max_entries=settings.AUTH_JWT_VERIFIED_TOKEN_CACHE_MAX_ENTRIES,
+)
 
 
 class AuthError(Exception):
@@ -71,6 +77,18 @@ def _ensure_auth_configured() -> None:
 
 def _decode_token(token: str) -> dict[str, Any]:
     _ensure_auth_configured()
+    cache_key = VerifiedTokenCache.make_key(
+        token,
+        settings.AUTH_JWT_JWKS_URL,
+        settings.AUTH_JWT_SECRET,
+        settings.AUTH_JWT_ALGORITHM,
+        settings.AUTH_JWT_ISSUER,
+        settings.AUTH_JWT_AUDIENCE,
+    )
+    cached = _verified_tokens.get(cache_key)
+    if cached is not None:
+        return cached
+
     options = {"require": ["exp"]}
     decode_kwargs: dict[str, Any] = {"options": options}
     if settings.AUTH_JWT_ISSUER:
@@ -79,20 +97,28 @@ def _decode_token(token: str) -> dict[str, Any]:
         decode_kwargs["audience"] = settings.AUTH_JWT_AUDIENCE
 
     if settings.AUTH_JWT_JWKS_URL:
-        jwks_client = PyJWKClient(settings.AUTH_JWT_JWKS_URL)
-        signing_key = jwks_client.get_signing_key_from_jwt(token).key
-        return jwt.decode(
+        jwks_cache = get_jwks_cache(
+            settings.AUTH_JWT_JWKS_URL,
+            ttl_seconds=settings.AUTH_JWT_JWKS_CACHE_TTL_SECONDS,
+            min_refetch_interval_seconds=settings.AUTH_JWT_JWKS_MIN_REFETCH_INTERVAL_SECONDS,
+        )
+        kid = jwt.get_unverified_header(token).get("kid")
+        signing_key = jwks_cache.get_signing_key(kid).key
+        claims = jwt.decode(
             token,
             signing_key,
             algorithms=[settings.AUTH_JWT_ALGORITHM],
             **decode_kwargs,
         )
-    return jwt.decode(
-        token,
-        settings.AUTH_JWT_SECRET,
-        algorithms=[settings.AUTH_JWT_ALGORITHM],
-        **decode_kwargs,
-    )
+    else:
+        claims = jwt.decode(
+            token,
+            settings.AUTH_JWT_SECRET,
+            algorithms=[settings.AUTH_JWT_ALGORITHM],
+            **decode_kwargs,
+        )
+    _verified_tokens.put(cache_key, claims)
+    return claims
 
 
 def _require_tenant_id(claims: dict[str, Any]) -> UUID:
@@ -0,0 +1,259 @@
+"""
+Process-wide JWKS and verified-token caches for JWT authentication.
+
+`PyJWKClient` instances were previously built per request, so every authenticated
+call paid for a JWKS fetch. `JWKSCache` keeps one kid-indexed key set per JWKS URL,
+refreshes it on a daemon thread ahead of expiry, and refetches on an unknown kid at
+most once per `min_refetch_interval_seconds`. `VerifiedTokenCache` memoizes decoded
+claims for a short window (never past the token's own `exp`).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+from jwt import InvalidTokenError, PyJWK, PyJWKSet
+from jwt.exceptions import PyJWKClientConnectionError
+
+logger = logging.getLogger(__name__)
+
+JWKSFetcher = Callable[[str], dict[str, Any]]
+
+# Background refresh retries a failing JWKS URL with exponential back-off from
+# max(min_refetch_interval_seconds, 1s) up to this ceiling.
+REFRESH_FAILURE_BACKOFF_MAX_SECONDS = 300.0
+
+
+class UnknownSigningKeyError(InvalidTokenError):
+    """Raised when a token references a kid absent from the (refreshed) key set."""
+
+
+def _fetch_jwks_over_urllib(url: str, timeout: float = 5.0) -> dict[str, Any]:
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return json.load(response)
+    except Exception as exc:
+        raise PyJWKClientConnectionError(f'Fail to fetch data from the url, err: "{exc}"') from exc
+
+
+class JWKSCache:
+    """
+    Kid-indexed JWKS cache with background refresh and rate-limited refetch.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        *,
+        ttl_seconds: float = 300.0,
+        refresh_ahead_seconds: float = 30.0,
+        min_refetch_interval_seconds: float = 30.0,
+        fetcher: Optional[JWKSFetcher] = None,
+        start_background_refresh: bool = True,
+    ) -> None:
+        self.url = url
+        self.ttl_seconds = ttl_seconds
+        self.refresh_ahead_seconds = min(refresh_ahead_seconds, ttl_seconds / 2)
+        self.min_refetch_interval_seconds = min_refetch_interval_seconds
+        self._fetcher = fetcher or _fetch_jwks_over_urllib
+        self._lock = threading.Lock()
+        self._keys: dict[str, PyJWK] = {}
+        self._expires_at = 0.0
+        self._last_fetch_at: Optional[float] = None
+        self._stop = threading.Event()
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._start_background_refresh = start_background_refresh
+        self.fetch_count = 0
+
+    def get_signing_key(self, kid: Optional[str]) -> PyJWK:
+        now = time.monotonic()
+        with self._lock:
+            if now >= self._expires_at:
+                self._refresh_locked(force=self._last_fetch_at is None)
+            key = self._lookup_locked(kid)
+            if key is None and self._may_refetch_locked(time.monotonic()):
+                self._refresh_locked(force=True)
+                key = self._lookup_locked(kid)
+        self._ensure_refresh_thread()
+        if key is None:
+            raise UnknownSigningKeyError(f"Unable to find a signing key that matches: {kid!r}")
+        return key
+
+    def close(self) -> None:
+        self._stop.set()
+
+    def _lookup_locked(self, kid: Optional[str]) -> Optional[PyJWK]:
+        if kid is not None:
+            return self._keys.get(kid)
+        # Tokens without a kid are only unambiguous against a single-key set.
+        if len(self._keys) == 1:
+            return next(iter(self._keys.values()))
+        return None
+
+    def _may_refetch_locked(self, now: float) -> bool:
+        return (
+            self._last_fetch_at is None
+            or now - self._last_fetch_at >= self.min_refetch_interval_seconds
+        )
+
+    def _fetch_key_set(self) -> PyJWKSet:
+        data = self._fetcher(self.url)
+        self.fetch_count += 1
+        return PyJWKSet.from_dict(data)
+
+    def _install_locked(self, key_set: PyJWKSet, fetched_at: float) -> None:
+        self._keys = {(key.key_id or ""): key for key in key_set.keys}
+        self._expires_at = fetched_at + self.ttl_seconds
+
+    def _refresh_locked(self, *, force: bool) -> None:
+        now = time.monotonic()
+        if not force and not self._may_refetch_locked(now):
+            return
+        self._last_fetch_at = now
+        try:
+            key_set = self._fetch_key_set()
+        except Exception:
+            if not self._keys:
+                raise
+            # Serve the last good key set rather than failing every request.
+            logger.warning("jwks_refresh_failed_serving_stale", extra={"jwks_url": self.url}, exc_info=True)
+            return
+        self._install_locked(key_set, now)
+
+    def _ensure_refresh_thread(self) -> None:
+        if not self._start_background_refresh:
+            return
+        thread = self._refresh_thread
+        if thread is not None and thread.is_alive():
+            return
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            self._refresh_thread = threading.Thread(
+                target=self._refresh_loop,
+                name="jwks-refresh",
+                daemon=True,
+            )
+            self._refresh_thread.start()
+
+    def _failure_backoff_seconds(self, failures: int) -> float:
+        base = max(self.min_refetch_interval_seconds, 1.0)
+        return min(base * 2 ** min(failures - 1, 16), max(REFRESH_FAILURE_BACKOFF_MAX_SECONDS, base))
+
+    def _refresh_loop(self) -> None:
+        failures = 0
+        while not self._stop.is_set():
+            if failures:
+                wait_s = self._failure_backoff_seconds(failures)
+            else:
+                with self._lock:
+                    wait_s = max(
+                        self._expires_at - self.refresh_ahead_seconds - time.monotonic(),
+                        self.min_refetch_interval_seconds,
+                    )
+            if self._stop.wait(wait_s):
+                return
+            # Fetch outside the lock so request threads keep serving the current keys.
+            fetched_at = time.monotonic()
+            try:
+                key_set = self._fetch_key_set()
+            except Exception:
+                failures += 1
+                logger.warning(
+                    "jwks_background_refresh_failed",
+                    extra={"jwks_url": self.url, "consecutive_failures": failures},
+                    exc_info=True,
+                )
+                continue
+            failures = 0
+            with self._lock:
+                self._last_fetch_at = fetched_at
+                self._install_locked(key_set, fetched_at)
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of verified claims keyed by token digest and verification config.
+    """
+
+    def __init__(self, *, ttl_seconds: float = 30.0, max_entries: int = 10000) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple[float, dict[str, Any]]]" = OrderedDict()
+
+    @staticmethod
+    def make_key(token: str, *config: Any) -> str:
+        digest = hashlib.sha256()
+        digest.update(token.encode("utf-8"))
+        for part in config:
+            digest.update(b"\x00")
+            digest.update(repr(part).encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[dict[str, Any]]:
+        if self.ttl_seconds <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, claims = entry
+            if expires_at <= time.time():
+                self._entries.pop(key, None)
+                return None
+            self._entries.move_to_end(key)
+            return dict(claims)
+
+    def put(self, key: str, claims: dict[str, Any]) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        expires_at = time.time() + self.ttl_seconds
+        exp = claims.get("exp")
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, float(exp))
+        with self._lock:
+            self._entries[key] = (expires_at, dict(claims))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_jwks_caches: dict[str, JWKSCache] = {}
+_jwks_caches_lock = threading.Lock()
+
+
+def get_jwks_cache(url: str, **kwargs: Any) -> JWKSCache:
+    """
+    Return the process-wide JWKSCache for `url`, creating it on first use.
+    """
+    cache = _jwks_caches.get(url)
+    if cache is not None:
+        return cache
+    with _jwks_caches_lock:
+        cache = _jwks_caches.get(url)
+        if cache is None:
+            cache = JWKSCache(url, **kwargs)
+            _jwks_caches[url] = cache
+        return cache
+
+
+def reset_jwks_caches() -> None:
+    """
+    Drop all process-wide JWKS caches (test helper).
+    """
+    with _jwks_caches_lock:
+        for cache in _jwks_caches.values():
+            cache.close()
+        _jwks_caches.clear()
@@ -4,14 +4,26 @@ Scheduling utilities for attribution recompute workflows.
 B0.5.3.6 closes the ingestion → scheduling gap by providing a single entry point
 for enqueueing recompute_window on the real Celery worker, with deterministic
 window validation and correlation propagation.
+
+Ingestion does not enqueue recompute per event: it marks (tenant, window) rows in
+attribution_dirty_windows via mark_windows_dirty, and at most one
+flush_dirty_windows task is pending per tenant per debounce interval.
 """
+import logging
+from collections import Counter
 from datetime import datetime, timezone
-from typing import Optional, Union
+from typing import Iterable, Optional, Union
 from uuid import UUID, uuid4
 
 from celery.result import AsyncResult
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.session import get_session
+from app.observability import api_metrics
+from app.tasks.attribution import _normalize_timestamp, flush_dirty_windows, recompute_window
 
-from app.tasks.attribution import _normalize_timestamp, recompute_window
+logger = logging.getLogger(__name__)
 
 WindowBoundary = Union[str, datetime]
 
@@ -73,3 +85,112 @@ def schedule_recompute_window(
         correlation_id=str(correlation_uuid),
     )
 
+
+
+# A schedule row whose flush is this far overdue is assumed lost (enqueue failed
+# after commit, or the flush task died) and is re-armed by the next mark.
+_STALE_SCHEDULE_GRACE_SECONDS = 300
+
+# Upsert the per-tenant schedule row first: ON CONFLICT DO UPDATE row-locks it
+# until commit, so a concurrent flush (which deletes this row before claiming the
+# dirty windows) either sees our window or leaves us to schedule the next flush.
+# A row is returned only when a flush must be enqueued (new or stale row).
+_ARM_SCHEDULE_SQL = text(
+    """
+    INSERT INTO attribution_recompute_schedule (tenant_id, flush_due_at)
+    VALUES (:tenant_id, now() + make_interval(secs => :debounce_s))
+    ON CONFLICT (tenant_id) DO UPDATE
+        SET flush_due_at = EXCLUDED.flush_due_at
+        WHERE attribution_recompute_schedule.flush_due_at
+            < now() - make_interval(secs => :grace_s)
+    RETURNING flush_due_at
+    """
+)
+
+_MARK_WINDOWS_SQL = text(
+    """
+    INSERT INTO attribution_dirty_windows (tenant_id, window_start, window_end, mark_count)
+    SELECT CAST(:tenant_id AS uuid), w.window_start, w.window_end, w.mark_count
+    FROM unnest(
+        CAST(:window_starts AS timestamptz[]),
+        CAST(:window_ends AS timestamptz[]),
+        CAST(:mark_counts AS integer[])
+    ) AS w(window_start, window_end, mark_count)
+    ORDER BY w.window_start, w.window_end
+    ON CONFLICT (tenant_id, window_start, window_end) DO UPDATE
+        SET mark_count = attribution_dirty_windows.mark_count + EXCLUDED.mark_count,
+            last_marked_at = now()
+    """
+)
+
+
+async def mark_windows_dirty(
+    tenant_id: UUID,
+    windows: Iterable[tuple[WindowBoundary, WindowBoundary]],
+    correlation_id: Optional[str] = None,
+) -> bool:
+    """
+    Record attribution windows needing recompute and arm the tenant's flush.
+
+    One entry per ingested event; repeated windows are coalesced into a single
+    dirty row whose mark_count records how many requests it absorbed. The flush
+    task is enqueued (after commit) only when this call armed the tenant's
+    schedule row, so a burst of events yields one flush per debounce interval.
+
+    Returns:
+        True if a flush_dirty_windows task was enqueued by this call.
+    """
+    marks: Counter[tuple[datetime, datetime]] = Counter()
+    for window_start, window_end in windows:
+        start_dt = _normalize_window_boundary(window_start)
+        end_dt = _normalize_window_boundary(window_end)
+        if start_dt >= end_dt:
+            raise ValueError(f"window_start ({window_start}) must be < window_end ({window_end})")
+        marks[(start_dt, end_dt)] += 1
+    if not marks:
+        return False
+
+    debounce_s = settings.ATTRIBUTION_RECOMPUTE_DEBOUNCE_SECONDS
+    ordered = sorted(marks.items())
+    async with get_session(tenant_id=tenant_id) as session:
+        armed = (
+            await session.execute(
+                _ARM_SCHEDULE_SQL,
+                {
+                    "tenant_id": tenant_id,
+                    "debounce_s": debounce_s,
+                    "grace_s": debounce_s + _STALE_SCHEDULE_GRACE_SECONDS,
+                },
+            )
+        ).first() is not None
+        await session.execute(
+            _MARK_WINDOWS_SQL,
+            {
+                "tenant_id": str(tenant_id),
+                "window_starts": [window[0] for window, _ in ordered],
+                "window_ends": [window[1] for window, _ in ordered],
+                "mark_counts": [count for _, count in ordered],
+            },
+        )
+
+    api_metrics.attribution_recompute_marks_total.inc(sum(marks.values()))
+    if not armed:
+        return False
+
+    correlation = str(correlation_id or uuid4())
+    flush_dirty_windows.apply_async(
+        kwargs={"tenant_id": str(tenant_id), "correlation_id": correlation},
+        countdown=debounce_s,
+        correlation_id=correlation,
+    )
+    api_metrics.attribution_recompute_flushes_scheduled_total.inc()
+    logger.info(
+        "attribution_recompute_flush_scheduled",
+        extra={
+            "tenant_id": str(tenant_id),
+            "correlation_id": correlation,
+            "debounce_seconds": debounce_s,
+            "windows": len(ordered),
+        },
+    )
+    return True
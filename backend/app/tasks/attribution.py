@@ -11,17 +11,18 @@ table and deterministic baseline allocation proof harness.
 import asyncio
 import logging
 import os
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal, ROUND_HALF_UP
 from typing import Optional
 from uuid import NAMESPACE_URL, UUID, uuid4, uuid5
 
+from celery import chord
 from pydantic import BaseModel, Field
 from sqlalchemy import text
 
 from app.celery_app import celery_app
-from app.core.db import engine
-from app.db.session import set_tenant_guc
+from app.core.config import settings
+from app.db.session import current_engine, set_tenant_guc
 from app.observability.context import set_request_correlation_id, set_tenant_id
 from app.tasks.context import tenant_task, run_in_worker_loop
 
@@ -36,10 +37,11 @@ _R5_FAILED_ONCE_KEYS: set[str] = set()
 
 def _run_async(coro_factory, *args, **kwargs):
     """
-    Execute async coroutines on the dedicated worker event loop.
+    Execute async coroutines on this thread's worker event loop.
 
-    Reusing a single loop prevents asyncpg/SQLAlchemy pools from being bound to
-    multiple event loops across sequential task executions.
+    Reusing the thread's pinned loop (and that loop's engine) prevents
+    asyncpg/SQLAlchemy pools from being bound to multiple event loops across
+    sequential task executions.
     """
     coro = coro_factory(*args, **kwargs)
     return run_in_worker_loop(coro)
@@ -123,7 +125,7 @@ async def _upsert_job_identity(
     window_end: datetime,
     model_version: str,
     correlation_id: str,
-) -> tuple[UUID, int, str]:
+) -> tuple[UUID, int, str, Optional[datetime]]:
     """
     Upsert job identity row in attribution_recompute_jobs table.
 
@@ -132,12 +134,13 @@ async def _upsert_job_identity(
     window will update the existing row, not create a duplicate.
 
     Returns:
-        Tuple of (job_id, run_count, previous_status)
+        Tuple of (job_id, run_count, previous_status, watermark_created_at).
+        The watermark is NULL for a new identity (new window or model version).
 
     Raises:
         Exception: On database errors
     """
-    async with engine.begin() as conn:
+    async with current_engine().begin() as conn:
         # Ensure tenant-scoped RLS context for this transaction
         await set_tenant_guc(conn, tenant_id, local=True)
         # Attempt INSERT to create new job identity
@@ -158,7 +161,7 @@ async def _upsert_job_identity(
                     last_correlation_id = EXCLUDED.last_correlation_id,
                     updated_at = CURRENT_TIMESTAMP,
                     started_at = CURRENT_TIMESTAMP
-                RETURNING id, run_count, NULL as previous_status
+                RETURNING id, run_count, NULL as previous_status, watermark_created_at
             """),
             {
                 "job_id": uuid4(),
@@ -177,6 +180,7 @@ async def _upsert_job_identity(
         job_id = row[0]
         run_count = row[1]
         previous_status = row[2] if row[2] else "new"
+        watermark_created_at = row[3]
 
         logger.info(
             "attribution_job_identity_upserted",
@@ -188,11 +192,12 @@ async def _upsert_job_identity(
                 "model_version": model_version,
                 "run_count": run_count,
                 "previous_status": previous_status,
+                "watermark_created_at": watermark_created_at.isoformat() if watermark_created_at else None,
                 "correlation_id": correlation_id,
             }
         )
 
-        return (job_id, run_count, previous_status)
+        return (job_id, run_count, previous_status, watermark_created_at)
 
 
 async def _mark_job_status(
@@ -200,6 +205,9 @@ async def _mark_job_status(
     tenant_id: UUID,
     status: str,
     error_message: Optional[str] = None,
+    watermark_created_at: Optional[datetime] = None,
+    watermark_event_id: Optional[UUID] = None,
+    run_mode: Optional[str] = None,
 ) -> None:
     """
     Update job status in attribution_recompute_jobs table.
@@ -211,8 +219,12 @@ async def _mark_job_status(
         tenant_id: Tenant UUID (for RLS enforcement)
         status: New status (succeeded|failed)
         error_message: Error message (if status=failed)
+        watermark_created_at: Newest allocated event created_at (advances the
+            incremental watermark; never moves it backwards)
+        watermark_event_id: Event id at the watermark
+        run_mode: full|incremental (recorded on success)
     """
-    async with engine.begin() as conn:
+    async with current_engine().begin() as conn:
         # Ensure tenant-scoped RLS context for this transaction
         await set_tenant_guc(conn, tenant_id, local=True)
         await conn.execute(
@@ -220,7 +232,18 @@ async def _mark_job_status(
                 UPDATE attribution_recompute_jobs
                 SET status = :status,
                     updated_at = CURRENT_TIMESTAMP,
-                    finished_at = CURRENT_TIMESTAMP
+                    finished_at = CURRENT_TIMESTAMP,
+                    last_run_mode = COALESCE(CAST(:run_mode AS text), last_run_mode),
+                    watermark_event_id = CASE
+                        WHEN CAST(:watermark_created_at AS timestamptz) IS NOT NULL
+                         AND (watermark_created_at IS NULL
+                              OR CAST(:watermark_created_at AS timestamptz) >= watermark_created_at)
+                        THEN CAST(:watermark_event_id AS uuid)
+                        ELSE watermark_event_id
+                    END,
+                    watermark_created_at = GREATEST(
+                        watermark_created_at, CAST(:watermark_created_at AS timestamptz)
+                    )
                 WHERE id = :job_id
                   AND tenant_id = :tenant_id
             """),
@@ -228,6 +251,9 @@ async def _mark_job_status(
                 "job_id": job_id,
                 "tenant_id": tenant_id,
                 "status": status,
+                "run_mode": run_mode,
+                "watermark_created_at": watermark_created_at,
+                "watermark_event_id": watermark_event_id,
             }
         )
 
@@ -248,6 +274,7 @@ async def _compute_allocations_deterministic_baseline(
     window_end: datetime,
     model_version: str = "1.0.0",
     *,
+    since: Optional[datetime] = None,
     inject_fail_once_key: Optional[str] = None,
     inject_fail_after_batches: int = 1,
 ) -> dict:
@@ -264,8 +291,13 @@ async def _compute_allocations_deterministic_baseline(
     a fixed set of channels. Rerunning the same window MUST produce identical
     allocations (same rows + same values).
 
+    Incremental mode: when `since` is given, only events with created_at >= since
+    are read. Allocations are per-event and deterministic, so allocating the new
+    events alone yields the same rows as a full recompute.
+
     Returns:
-        Dict with metadata (event_count, allocation_count)
+        Dict with metadata (event_count, allocation_count, mode, and the
+        watermark_created_at / watermark_event_id of the newest event read)
     """
     batch_events = int(os.getenv("ATTRIBUTION_BASELINE_BATCH_EVENTS", "2000"))
     if batch_events < 1:
@@ -284,7 +316,7 @@ async def _compute_allocations_deterministic_baseline(
     confidence_score = allocation_ratio.quantize(Decimal("0.001"), rounding=ROUND_HALF_UP)
     model_type = "deterministic_baseline"
 
-    async with engine.begin() as conn:
+    async with current_engine().begin() as conn:
         # Set tenant context for RLS policy
         await set_tenant_guc(conn, tenant_id, local=True)
 
@@ -373,42 +405,42 @@ async def _compute_allocations_deterministic_baseline(
                 rows,
             )
 
-        events_result = await conn.execute(
+        mode = "full" if since is None else "incremental"
+        events_params = {
+            "tenant_id": tenant_id,
+            "window_start": window_start,
+            "window_end": window_end,
+        }
+        since_clause = ""
+        if since is not None:
+            since_clause = "AND created_at >= :since"
+            events_params["since"] = since
+        # Server-side cursor: rows are fetched `fetch_size` at a time and upserted
+        # in `batch_events` partitions, so worker memory is bounded by the batch,
+        # not by the number of events in the window.
+        events_result = await conn.stream(
             text(
-                """
-                SELECT id, revenue_cents, occurred_at
+                f"""
+                SELECT id, revenue_cents, occurred_at, created_at
                 FROM attribution_events
                 WHERE tenant_id = :tenant_id
                   AND occurred_at >= :window_start
                   AND occurred_at < :window_end
+                  {since_clause}
                 ORDER BY occurred_at ASC, id ASC
                 """
             ),
-            {
-                "tenant_id": tenant_id,
-                "window_start": window_start,
-                "window_end": window_end,
-            },
+            events_params,
+            execution_options={"yield_per": settings.ATTRIBUTION_BASELINE_FETCH_SIZE},
         )
-        events = events_result.fetchall()
-        if not events:
-            logger.info(
-                "attribution_baseline_no_events_in_window",
-                extra={
-                    "tenant_id": str(tenant_id),
-                    "window_start": window_start.isoformat(),
-                    "window_end": window_end.isoformat(),
-                    "model_version": model_version,
-                },
-            )
-            return {"event_count": 0, "allocation_count": 0}
 
-        event_count = len(events)
+        event_count = 0
         allocation_count = 0
         batches_written = 0
+        watermark: Optional[tuple[datetime, UUID]] = None
 
-        for offset in range(0, len(events), batch_events):
-            batch = events[offset : offset + batch_events]
+        async for batch in events_result.partitions(batch_events):
+            event_count += len(batch)
 
             batch_rows: dict[str, list] = {
                 "ids": [],
@@ -425,7 +457,9 @@ async def _compute_allocations_deterministic_baseline(
                 "updated_ats": [],
             }
 
-            for event_id, revenue_cents, _occurred_at in batch:
+            for event_id, revenue_cents, _occurred_at, created_at in batch:
+                if watermark is None or (created_at, event_id) > watermark:
+                    watermark = (created_at, event_id)
                 allocated = _split_revenue_cents_evenly(int(revenue_cents), len(BASELINE_CHANNELS))
                 for channel_code, allocated_revenue_cents in zip(
                     BASELINE_CHANNELS, allocated, strict=True
@@ -469,6 +503,28 @@ async def _compute_allocations_deterministic_baseline(
                     )
                     raise RuntimeError("R5 retry injection: transient failure")
 
+        if event_count == 0:
+            logger.info(
+                "attribution_baseline_no_events_in_window",
+                extra={
+                    "tenant_id": str(tenant_id),
+                    "window_start": window_start.isoformat(),
+                    "window_end": window_end.isoformat(),
+                    "model_version": model_version,
+                    "mode": mode,
+                    "since": since.isoformat() if since else None,
+                },
+            )
+            return {
+                "event_count": 0,
+                "allocation_count": 0,
+                "mode": mode,
+                "watermark_created_at": None,
+                "watermark_event_id": None,
+            }
+
+        watermark_created_at, watermark_event_id = watermark
+
         logger.info(
             "attribution_baseline_allocations_computed",
             extra={
@@ -476,6 +532,7 @@ async def _compute_allocations_deterministic_baseline(
                 "window_start": window_start.isoformat(),
                 "window_end": window_end.isoformat(),
                 "model_version": model_version,
+                "mode": mode,
                 "event_count": event_count,
                 "allocation_count": allocation_count,
             }
@@ -484,9 +541,109 @@ async def _compute_allocations_deterministic_baseline(
         return {
             "event_count": event_count,
             "allocation_count": allocation_count,
+            "mode": mode,
+            "watermark_created_at": watermark_created_at,
+            "watermark_event_id": watermark_event_id,
         }
 
 
+_SHARD_HISTOGRAM_BUCKETS = 1024
+
+
+def _isoformat_z(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _window_shard_bounds(
+    window_start: datetime,
+    window_end: datetime,
+    histogram: list[tuple[int, int]],
+    *,
+    buckets: int,
+    max_shards: int,
+    min_events_per_shard: int,
+) -> list[tuple[datetime, datetime]]:
+    """
+    Split [window_start, window_end) into contiguous time slices of roughly
+    equal event count.
+
+    `histogram` is (bucket, event_count) over `buckets` equal-width buckets
+    (1-based, as returned by width_bucket). Slice edges fall on bucket edges;
+    the slices always cover the window exactly, so bucket precision only
+    affects balance, never correctness.
+    """
+    total = sum(count for _, count in histogram)
+    shard_count = min(max_shards, total // min_events_per_shard)
+    if shard_count <= 1:
+        return [(window_start, window_end)]
+
+    span = window_end - window_start
+    target = total / shard_count
+    edges = [window_start]
+    cumulative = 0
+    for bucket, count in sorted(histogram):
+        cumulative += count
+        if len(edges) < shard_count and cumulative >= target * len(edges):
+            edge = window_start + span * bucket / buckets
+            if edges[-1] < edge < window_end:
+                edges.append(edge)
+    edges.append(window_end)
+    return list(zip(edges, edges[1:]))
+
+
+async def _plan_window_shards(
+    tenant_id: UUID,
+    window_start: datetime,
+    window_end: datetime,
+    since: Optional[datetime],
+) -> list[tuple[datetime, datetime]]:
+    """
+    Plan recompute shards from one index pass over the events to allocate.
+    """
+    params = {
+        "tenant_id": tenant_id,
+        "window_start": window_start,
+        "window_end": window_end,
+        "buckets": _SHARD_HISTOGRAM_BUCKETS,
+    }
+    since_clause = ""
+    if since is not None:
+        since_clause = "AND created_at >= :since"
+        params["since"] = since
+    async with current_engine().begin() as conn:
+        await set_tenant_guc(conn, tenant_id, local=True)
+        result = await conn.execute(
+            text(
+                f"""
+                SELECT
+                    width_bucket(
+                        extract(epoch FROM occurred_at),
+                        extract(epoch FROM CAST(:window_start AS timestamptz)),
+                        extract(epoch FROM CAST(:window_end AS timestamptz)),
+                        CAST(:buckets AS integer)
+                    ) AS bucket,
+                    count(*) AS event_count
+                FROM attribution_events
+                WHERE tenant_id = :tenant_id
+                  AND occurred_at >= :window_start
+                  AND occurred_at < :window_end
+                  {since_clause}
+                GROUP BY 1
+                """
+            ),
+            params,
+        )
+        histogram = [(int(row[0]), int(row[1])) for row in result.fetchall()]
+    return _window_shard_bounds(
+        window_start,
+        window_end,
+        histogram,
+        buckets=_SHARD_HISTOGRAM_BUCKETS,
+        max_shards=settings.ATTRIBUTION_RECOMPUTE_MAX_SHARDS,
+        min_events_per_shard=settings.ATTRIBUTION_RECOMPUTE_SHARD_MIN_EVENTS,
+    )
+
+
 @celery_app.task(
     bind=True,
     name="app.tasks.attribution.recompute_window",
@@ -504,6 +661,7 @@ def recompute_window(
     correlation_id: Optional[str] = None,
     model_version: str = "1.0.0",
     fail: bool = False,
+    full_recompute: bool = False,
 ):
     """
     Attribution recompute window task with window-scoped idempotency.
@@ -515,6 +673,10 @@ def recompute_window(
     2. Increment run_count for observability
     3. Produce identical allocations (deterministic baseline proof harness)
 
+    Reruns are incremental: only events created since the job's watermark
+    (minus ATTRIBUTION_INCREMENTAL_WATERMARK_LAG_SECONDS) are allocated. A new
+    window definition or model version has no watermark and recomputes fully.
+
     Args:
         tenant_id: Tenant context for RLS enforcement
         user_id: Optional user context for RLS enforcement
@@ -523,6 +685,7 @@ def recompute_window(
         correlation_id: Request correlation for observability
         model_version: Attribution model version (default: 1.0.0)
         fail: If True, deliberately raise an error for DLQ testing
+        full_recompute: If True, ignore the watermark and reallocate the whole window
 
     Returns:
         Dict with status and metadata (job_id, run_count, event_count, allocation_count)
@@ -577,7 +740,7 @@ def recompute_window(
 
     # B0.5.3.2: Upsert job identity (idempotency gate)
     try:
-        job_id, run_count, previous_status = _run_async(
+        job_id, run_count, previous_status, watermark_created_at = _run_async(
             _upsert_job_identity,
             tenant_id=model.tenant_id,
             window_start=window_start_dt,
@@ -614,6 +777,73 @@ def recompute_window(
         },
     )
 
+    since = None
+    if not full_recompute and watermark_created_at is not None:
+        since = watermark_created_at - timedelta(
+            seconds=settings.ATTRIBUTION_INCREMENTAL_WATERMARK_LAG_SECONDS
+        )
+
+    # Large windows fan out to parallel shard tasks; a chord callback finalizes
+    # the job row. Allocation ids are uuid5-deterministic, so shards never conflict.
+    if settings.ATTRIBUTION_RECOMPUTE_MAX_SHARDS > 1:
+        try:
+            shards = _run_async(
+                _plan_window_shards,
+                tenant_id=model.tenant_id,
+                window_start=window_start_dt,
+                window_end=window_end_dt,
+                since=since,
+            )
+        except Exception as exc:
+            logger.warning(
+                "attribution_recompute_window_shard_plan_failed",
+                exc_info=exc,
+                extra={"task_id": self.request.id, "job_id": str(job_id), "tenant_id": str(model.tenant_id)},
+            )
+            shards = [(window_start_dt, window_end_dt)]
+        if len(shards) > 1:
+            shard_kwargs = {
+                "tenant_id": str(model.tenant_id),
+                "job_id": str(job_id),
+                "model_version": model_version,
+                "since": _isoformat_z(since) if since else None,
+                "correlation_id": correlation,
+            }
+            canvas = chord(
+                [
+                    recompute_window_shard.si(
+                        shard_start=_isoformat_z(shard_start),
+                        shard_end=_isoformat_z(shard_end),
+                        shard_index=index,
+                        **shard_kwargs,
+                    ).set(correlation_id=correlation)
+                    for index, (shard_start, shard_end) in enumerate(shards)
+                ],
+                finalize_recompute_job.s(
+                    tenant_id=str(model.tenant_id),
+                    job_id=str(job_id),
+                    run_count=run_count,
+                    window_start=window_start,
+                    window_end=window_end,
+                    model_version=model_version,
+                    mode="full" if since is None else "incremental",
+                    correlation_id=correlation,
+                ).set(correlation_id=correlation),
+            )
+            logger.info(
+                "attribution_recompute_window_sharded",
+                extra={
+                    "task_id": self.request.id,
+                    "job_id": str(job_id),
+                    "tenant_id": str(model.tenant_id),
+                    "correlation_id": correlation,
+                    "window_start": window_start,
+                    "window_end": window_end,
+                    "shard_count": len(shards),
+                },
+            )
+            return self.replace(canvas)
+
     # B0.5.3.2: Compute allocations (deterministic baseline proof harness)
     try:
         result = _run_async(
@@ -622,6 +852,7 @@ def recompute_window(
             window_start=window_start_dt,
             window_end=window_end_dt,
             model_version=model_version,
+            since=since,
         )
 
         # Mark job as succeeded
@@ -630,6 +861,9 @@ def recompute_window(
             job_id=job_id,
             tenant_id=model.tenant_id,
             status="succeeded",
+            watermark_created_at=result["watermark_created_at"],
+            watermark_event_id=result["watermark_event_id"],
+            run_mode=result["mode"],
         )
 
         logger.info(
@@ -643,6 +877,7 @@ def recompute_window(
                 "window_end": window_end,
                 "model_version": model_version,
                 "run_count": run_count,
+                "mode": result["mode"],
                 "event_count": result["event_count"],
                 "allocation_count": result["allocation_count"],
             },
@@ -655,6 +890,7 @@ def recompute_window(
             "window_start": window_start,
             "window_end": window_end,
             "model_version": model_version,
+            "mode": result["mode"],
             "event_count": result["event_count"],
             "allocation_count": result["allocation_count"],
             "request_id": model.request_id,
@@ -685,3 +921,277 @@ def recompute_window(
             },
         )
         raise
+
+
+@celery_app.task(
+    bind=True,
+    name="app.tasks.attribution.recompute_window_shard",
+    routing_key="attribution.task",
+    max_retries=3,
+    default_retry_delay=30,
+)
+@tenant_task
+def recompute_window_shard(
+    self,
+    tenant_id: UUID,
+    job_id: str,
+    shard_start: str,
+    shard_end: str,
+    shard_index: int,
+    user_id: Optional[UUID] = None,
+    model_version: str = "1.0.0",
+    since: Optional[str] = None,
+    correlation_id: Optional[str] = None,
+):
+    """
+    Allocate one time slice of a sharded recompute_window.
+
+    A failed shard marks the job failed; the chord callback then never runs,
+    so the watermark is not advanced past unallocated events.
+
+    Returns:
+        Dict with shard event/allocation counts and the shard's newest event
+        (watermark) as ISO/str values for the chord callback.
+    """
+    model = AttributionTaskPayload(
+        tenant_id=tenant_id,
+        correlation_id=correlation_id,
+        window_start=shard_start,
+        window_end=shard_end,
+    )
+    _prepare_context(model)
+
+    try:
+        result = _run_async(
+            _compute_allocations_deterministic_baseline,
+            tenant_id=model.tenant_id,
+            window_start=_normalize_timestamp(shard_start),
+            window_end=_normalize_timestamp(shard_end),
+            model_version=model_version,
+            since=_normalize_timestamp(since),
+        )
+    except Exception as exc:
+        _run_async(
+            _mark_job_status,
+            job_id=UUID(job_id),
+            tenant_id=model.tenant_id,
+            status="failed",
+            error_message=str(exc),
+        )
+        logger.error(
+            "attribution_recompute_window_shard_failed",
+            exc_info=exc,
+            extra={
+                "task_id": self.request.id,
+                "job_id": job_id,
+                "tenant_id": str(model.tenant_id),
+                "shard_index": shard_index,
+                "shard_start": shard_start,
+                "shard_end": shard_end,
+            },
+        )
+        raise
+
+    watermark_created_at = result["watermark_created_at"]
+    watermark_event_id = result["watermark_event_id"]
+    return {
+        "shard_index": shard_index,
+        "event_count": result["event_count"],
+        "allocation_count": result["allocation_count"],
+        "watermark_created_at": watermark_created_at.isoformat() if watermark_created_at else None,
+        "watermark_event_id": str(watermark_event_id) if watermark_event_id else None,
+    }
+
+
+@celery_app.task(
+    bind=True,
+    name="app.tasks.attribution.finalize_recompute_job",
+    routing_key="attribution.task",
+    max_retries=3,
+    default_retry_delay=30,
+)
+@tenant_task
+def finalize_recompute_job(
+    self,
+    shard_results: list[dict],
+    tenant_id: UUID,
+    job_id: str,
+    run_count: int,
+    window_start: str,
+    window_end: str,
+    user_id: Optional[UUID] = None,
+    model_version: str = "1.0.0",
+    mode: str = "full",
+    correlation_id: Optional[str] = None,
+):
+    """
+    Chord callback for sharded recompute_window: mark the job succeeded and
+    advance its watermark to the newest event across all shards.
+
+    Returns:
+        The same payload shape as an unsharded recompute_window run.
+    """
+    model = AttributionTaskPayload(tenant_id=tenant_id, correlation_id=correlation_id)
+    correlation = _prepare_context(model)
+
+    watermark: Optional[tuple[datetime, UUID]] = None
+    for shard in shard_results:
+        if shard["watermark_created_at"] is None:
+            continue
+        candidate = (
+            datetime.fromisoformat(shard["watermark_created_at"]),
+            UUID(shard["watermark_event_id"]),
+        )
+        if watermark is None or candidate > watermark:
+            watermark = candidate
+    event_count = sum(shard["event_count"] for shard in shard_results)
+    allocation_count = sum(shard["allocation_count"] for shard in shard_results)
+
+    _run_async(
+        _mark_job_status,
+        job_id=UUID(job_id),
+        tenant_id=model.tenant_id,
+        status="succeeded",
+        watermark_created_at=watermark[0] if watermark else None,
+        watermark_event_id=watermark[1] if watermark else None,
+        run_mode=mode,
+    )
+
+    logger.info(
+        "attribution_recompute_window_succeeded",
+        extra={
+            "task_id": self.request.id,
+            "job_id": job_id,
+            "tenant_id": str(model.tenant_id),
+            "correlation_id": correlation,
+            "window_start": window_start,
+            "window_end": window_end,
+            "model_version": model_version,
+            "run_count": run_count,
+            "mode": mode,
+            "shard_count": len(shard_results),
+            "event_count": event_count,
+            "allocation_count": allocation_count,
+        },
+    )
+
+    return {
+        "status": "succeeded",
+        "job_id": job_id,
+        "run_count": run_count,
+        "window_start": window_start,
+        "window_end": window_end,
+        "model_version": model_version,
+        "mode": mode,
+        "shard_count": len(shard_results),
+        "event_count": event_count,
+        "allocation_count": allocation_count,
+        "request_id": model.request_id,
+        "correlation_id": correlation,
+    }
+
+
+async def _claim_dirty_windows(tenant_id: UUID, enqueue) -> list[tuple[datetime, datetime, int]]:
+    """
+    Claim (delete) all dirty windows for a tenant and hand them to `enqueue`.
+
+    The schedule row is deleted first so marks racing with this flush either
+    commit before the claim (and are included) or re-arm the schedule for the
+    next flush. `enqueue` runs inside the transaction: if publishing fails the
+    claim rolls back and the windows stay dirty.
+    """
+    async with current_engine().begin() as conn:
+        await set_tenant_guc(conn, tenant_id, local=True)
+        await conn.execute(
+            text("DELETE FROM attribution_recompute_schedule WHERE tenant_id = :tenant_id"),
+            {"tenant_id": tenant_id},
+        )
+        result = await conn.execute(
+            text("""
+                DELETE FROM attribution_dirty_windows
+                WHERE tenant_id = :tenant_id
+                RETURNING window_start, window_end, mark_count
+            """),
+            {"tenant_id": tenant_id},
+        )
+        windows = sorted((row[0], row[1], row[2]) for row in result.fetchall())
+        if windows:
+            enqueue(windows)
+        return windows
+
+
+@celery_app.task(
+    bind=True,
+    name="app.tasks.attribution.flush_dirty_windows",
+    routing_key="attribution.task",
+    max_retries=3,
+    default_retry_delay=30,
+)
+@tenant_task
+def flush_dirty_windows(
+    self,
+    tenant_id: UUID,
+    user_id: Optional[UUID] = None,
+    correlation_id: Optional[str] = None,
+    model_version: str = "1.0.0",
+):
+    """
+    Drain a tenant's coalesced dirty windows into independent recomputes.
+
+    Enqueued by ingestion (app.services.attribution.mark_windows_dirty) at most
+    once per tenant per debounce interval. Each claimed window is recomputed once
+    regardless of how many events marked it, as its own task, so a window that
+    exhausts its retries does not cancel the others; a single
+    matview_refresh_all_for_tenant runs as the chord callback once all succeed.
+
+    Returns:
+        Dict with window count and the number of ingestion marks coalesced.
+    """
+    from app.observability import metrics
+    from app.tasks.matviews import matview_refresh_all_for_tenant
+
+    model = AttributionTaskPayload(tenant_id=tenant_id, correlation_id=correlation_id)
+    correlation = _prepare_context(model)
+
+    def _enqueue(windows: list[tuple[datetime, datetime, int]]) -> None:
+        recomputes = [
+            recompute_window.si(
+                tenant_id=str(model.tenant_id),
+                window_start=_isoformat_z(window_start),
+                window_end=_isoformat_z(window_end),
+                correlation_id=correlation,
+                model_version=model_version,
+            ).set(correlation_id=correlation)
+            for window_start, window_end, _ in windows
+        ]
+        chord(
+            recomputes,
+            matview_refresh_all_for_tenant.si(
+                tenant_id=str(model.tenant_id),
+                correlation_id=correlation,
+                schedule_class="realtime",
+            ).set(correlation_id=correlation),
+        ).apply_async()
+
+    windows = _run_async(_claim_dirty_windows, model.tenant_id, _enqueue)
+    marks = sum(mark_count for _, _, mark_count in windows)
+
+    metrics.attribution_recompute_flushes_total.inc()
+    metrics.attribution_recompute_flush_windows_total.inc(len(windows))
+    metrics.attribution_recompute_flush_marks_total.inc(marks)
+    logger.info(
+        "attribution_dirty_windows_flushed",
+        extra={
+            "task_id": self.request.id,
+            "tenant_id": str(model.tenant_id),
+            "correlation_id": correlation,
+            "window_count": len(windows),
+            "mark_count": marks,
+        },
+    )
+    return {
+        "status": "succeeded",
+        "window_count": len(windows),
+        "mark_count": marks,
+        "correlation_id": correlation,
+    }
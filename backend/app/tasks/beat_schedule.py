@@ -39,6 +39,17 @@ def build_beat_schedule() -> Dict[str, Dict[str, Any]]:
             "options": {"expires": max(int(interval), 1) * 2},
             "kwargs": {"schedule_class": "minute"},
         },
+        "summary-consistency-check": {
+            "task": "app.tasks.matviews.check_summary_consistency",
+            "schedule": crontab(hour=4, minute=30),
+            "options": {"expires": 3600},
+            "kwargs": {"repair": True},
+        },
+        "broker-partition-maintenance": {
+            "task": "app.tasks.maintenance.maintain_broker_partitions",
+            "schedule": crontab(minute=15),
+            "options": {"expires": 3600},
+        },
         "pii-audit-scanner": {
             "task": "app.tasks.maintenance.scan_for_pii_contamination",
             "schedule": crontab(hour=4, minute=0),
@@ -2,74 +2,157 @@
 Tenant context helpers for Celery tasks.
 
 Provides a decorator that enforces tenant_id presence, sets contextvars for
-logging, applies the tenant GUC using the shared engine, and normalizes
-correlation IDs for observability.
+logging and for the DB execution context, and normalizes correlation IDs for
+observability. Tenant GUCs are applied by the task body on the connection it
+actually uses (get_session() or set_tenant_guc()), not by the decorator.
 """
 import asyncio
+import concurrent.futures
 import functools
 import logging
 import threading
 import time
-from typing import Any, Awaitable, Callable, Optional
+from typing import Any, Awaitable, Callable
 from uuid import UUID
 
-from sqlalchemy import text
-
+from app.core.config import settings
 from app.core.identity import resolve_user_id
-from app.db.session import engine, set_tenant_guc, set_user_guc
+from app.db.session import bind_loop_engine, create_loop_engine, set_execution_context
 from app.observability.context import set_request_correlation_id, set_tenant_id, set_user_id
 
 logger = logging.getLogger(__name__)
 
-# Dedicated worker event loop reused for all async DB bridge calls from Celery tasks.
-_WORKER_LOOP: asyncio.AbstractEventLoop | None = None
-_WORKER_LOOP_THREAD: threading.Thread | None = None
-_WORKER_LOOP_LOCK = threading.Lock()
+
+class _LoopSlot:
+    def __init__(self, index: int) -> None:
+        self.index = index
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.thread: threading.Thread | None = None
+        self.threads_pinned = 0
+        self.inflight = 0
+
+
+class WorkerLoopPool:
+    """
+    Fixed set of event loops, each on its own daemon thread, for worker-side async bridges.
+
+    Each calling (task) thread is pinned to the loop with the fewest pinned threads
+    on first use and keeps it, so sequential calls from one task always share a
+    loop. Loop 0 uses the shared app.db.session engine; every other loop gets its
+    own engine, so asyncpg connections never cross loops (code on these loops must
+    use current_engine()/get_session()). With a thread-based Celery pool, slow
+    awaits or loop-blocking work in one task no longer delay tasks on other loops.
+    """
+
+    def __init__(self, size: int) -> None:
+        self._slots = [_LoopSlot(index) for index in range(size)]
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def size(self) -> int:
+        return len(self._slots)
+
+    def loop_for_current_thread(self) -> asyncio.AbstractEventLoop:
+        return self._ensure_running(self._slot_for_current_thread())
+
+    def run(self, coro: Awaitable[Any], timeout: float) -> Any:
+        from app.observability import metrics
+
+        slot = self._slot_for_current_thread()
+        loop = self._ensure_running(slot)
+        with self._lock:
+            inflight = slot.inflight
+            slot.inflight += 1
+        metrics.worker_loop_calls_total.inc()
+        metrics.worker_loop_inflight_at_submit.observe(inflight)
+        logger.info(
+            "tenant_guc_event_loop_selected",
+            extra={"loop_id": id(loop), "loop_index": slot.index, "loop_running": loop.is_running()},
+        )
+        submitted = time.perf_counter()
+
+        async def _timed() -> Any:
+            metrics.worker_loop_queue_wait_seconds.observe(time.perf_counter() - submitted)
+            return await coro
+
+        future = asyncio.run_coroutine_threadsafe(_timed(), loop)
+        try:
+            return future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            # Free the loop instead of leaving an abandoned coroutine running on it.
+            future.cancel()
+            raise
+        finally:
+            with self._lock:
+                slot.inflight -= 1
+
+    def _slot_for_current_thread(self) -> _LoopSlot:
+        slot = getattr(self._local, "slot", None)
+        if slot is None:
+            with self._lock:
+                slot = min(self._slots, key=lambda candidate: (candidate.threads_pinned, candidate.index))
+                slot.threads_pinned += 1
+            self._local.slot = slot
+        return slot
+
+    def _ensure_running(self, slot: _LoopSlot) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if slot.loop is None or slot.loop.is_closed():
+                loop = asyncio.new_event_loop()
+                if slot.index > 0:
+                    bind_loop_engine(loop, create_loop_engine())
+
+                def _runner(loop: asyncio.AbstractEventLoop) -> None:
+                    asyncio.set_event_loop(loop)
+                    loop.run_forever()
+
+                slot.loop = loop
+                slot.thread = threading.Thread(
+                    target=_runner,
+                    args=(loop,),
+                    name="worker-event-loop" if slot.index == 0 else f"worker-event-loop-{slot.index}",
+                    daemon=True,
+                )
+                slot.thread.start()
+            loop = slot.loop
+        # Ensure the loop is running before returning
+        while not loop.is_running():
+            time.sleep(0.01)
+        return loop
+
+
+_WORKER_LOOP_POOL: WorkerLoopPool | None = None
+_WORKER_LOOP_POOL_LOCK = threading.Lock()
+
+
+def get_worker_loop_pool() -> WorkerLoopPool:
+    """Process-wide loop pool sized by WORKER_EVENT_LOOPS (created on first use, i.e. after fork)."""
+    global _WORKER_LOOP_POOL
+    with _WORKER_LOOP_POOL_LOCK:
+        if _WORKER_LOOP_POOL is None:
+            _WORKER_LOOP_POOL = WorkerLoopPool(settings.WORKER_EVENT_LOOPS)
+        return _WORKER_LOOP_POOL
 
 
 def get_worker_event_loop() -> asyncio.AbstractEventLoop:
     """
-    Return a reusable event loop for worker-side async bridges.
+    Return the reusable event loop pinned to the calling thread.
 
-    Using a single loop prevents asyncpg/SQLAlchemy pools from being bound to
-    different loops across sequential Celery tasks.
+    Reusing a loop per thread prevents asyncpg/SQLAlchemy pools from being bound
+    to different loops across sequential Celery tasks.
     """
-    global _WORKER_LOOP
-    global _WORKER_LOOP_THREAD
-    with _WORKER_LOOP_LOCK:
-        if _WORKER_LOOP is None or _WORKER_LOOP.is_closed():
-            _WORKER_LOOP = asyncio.new_event_loop()
-            def _runner(loop: asyncio.AbstractEventLoop) -> None:
-                asyncio.set_event_loop(loop)
-                loop.run_forever()
-
-            _WORKER_LOOP_THREAD = threading.Thread(
-                target=_runner,
-                args=(_WORKER_LOOP,),
-                name="worker-event-loop",
-                daemon=True,
-            )
-            _WORKER_LOOP_THREAD.start()
-    # Ensure the loop is running before returning
-    while _WORKER_LOOP is not None and not _WORKER_LOOP.is_running():
-        time.sleep(0.01)
-    return _WORKER_LOOP
+    return get_worker_loop_pool().loop_for_current_thread()
 
 
 def run_in_worker_loop(coro: Awaitable[Any]) -> Any:
     """
-    Execute the given coroutine on the dedicated worker loop.
+    Execute the given coroutine on the calling thread's worker loop.
 
     This avoids creating a fresh loop per call (the source of the cross-loop
     Future failure) while keeping execution synchronous for the caller.
     """
-    loop = get_worker_event_loop()
-    logger.info(
-        "tenant_guc_event_loop_selected",
-        extra={"loop_id": id(loop), "loop_running": loop.is_running()},
-    )
-    future = asyncio.run_coroutine_threadsafe(coro, loop)
-    return future.result(timeout=60)
+    return get_worker_loop_pool().run(coro, timeout=settings.WORKER_LOOP_CALL_TIMEOUT_S)
 
 
 def _normalize_tenant_id(value: Any) -> UUID:
@@ -78,39 +161,18 @@ def _normalize_tenant_id(value: Any) -> UUID:
     return UUID(str(value))
 
 
-async def _set_tenant_guc_global(tenant_id: UUID, user_id: UUID) -> None:
-    loop = asyncio.get_running_loop()
-    logger.info(
-        "tenant_guc_async_entry",
-        extra={
-            "loop_id": id(loop),
-            "loop_running": loop.is_running(),
-            "tenant_id": str(tenant_id),
-            "user_id": str(user_id),
-        },
-    )
-    async with engine.begin() as conn:
-        # Use SET LOCAL semantics so the value is scoped to this transaction only.
-        # This prevents connection pool reuse from leaking a previous tenant_id into
-        # a subsequent task when the same connection is returned to the pool.
-        await set_tenant_guc(conn, tenant_id, local=True)
-        await set_user_guc(conn, user_id, local=True)
-        # Explicitly mark execution context as worker so DB guardrails can distinguish
-        # worker traffic from ingestion/API traffic (B0.5.3.5).
-        await conn.execute(
-            text("SELECT set_config('app.execution_context', 'worker', true)")
-        )
-        # Guardrail: read back to prove the GUC is set for this transaction
-        await conn.execute(text("SELECT current_setting('app.current_tenant_id', true)"))
-        await conn.execute(text("SELECT current_setting('app.current_user_id', true)"))
-
-
 def tenant_task(task_fn: Callable) -> Callable:
     """
     Decorator for tenant-scoped Celery tasks.
 
-    Enforces tenant_id, sets contextvars for logging, applies tenant GUC, and
-    guarantees a correlation_id is present for downstream logs/metrics.
+    Enforces tenant_id, sets contextvars for logging and the "worker" DB
+    execution context, and guarantees a correlation_id is present for
+    downstream logs/metrics.
+
+    The decorator itself does no DB I/O: get_session() applies tenant, user and
+    execution context in one statement on the body's session. (It used to run a
+    separate BEGIN/set_config x3/read-back x2/COMMIT transaction whose settings
+    were discarded before the body ran.)
     """
 
     @functools.wraps(task_fn)
@@ -130,33 +192,9 @@ def tenant_task(task_fn: Callable) -> Callable:
         kwargs["user_id"] = user_uuid
         kwargs["correlation_id"] = correlation_id
 
-        # B0.5.3.1: Skip GUC setting in eager mode (already in event loop)
-        # Eager mode is used for testing - GUC not needed for DLQ capture tests
-        is_eager = getattr(self.app.conf, 'task_always_eager', False) if hasattr(self, 'app') else False
-
-        if not is_eager:
-            try:
-                run_in_worker_loop(_set_tenant_guc_global(tenant_uuid, user_uuid))
-            except RuntimeError as exc:
-                # If already in event loop (shouldn't happen in worker mode), log and continue
-                if "cannot be called from a running event loop" in str(exc):
-                    logger.warning(
-                        "celery_tenant_guc_skipped_event_loop",
-                        extra={"tenant_id": str(tenant_uuid), "task_name": getattr(self, "name", None)},
-                    )
-                else:
-                    raise
-            except Exception as exc:
-                logger.error(
-                    "celery_tenant_guc_failed",
-                    exc_info=exc,
-                    extra={
-                        "tenant_id": str(tenant_uuid),
-                        "user_id": str(user_uuid),
-                        "task_name": getattr(self, "name", None),
-                    },
-                )
-                raise
+        # Contextvars propagate into run_in_worker_loop() coroutines, which are
+        # scheduled with a copy of the calling thread's context.
+        set_execution_context("worker")
 
         try:
             return task_fn(self, *args, **kwargs)
@@ -165,5 +203,6 @@ def tenant_task(task_fn: Callable) -> Callable:
             set_tenant_id(None)
             set_user_id(None)
             set_request_correlation_id(None)
+            set_execution_context(None)
 
     return _wrapped
@@ -290,3 +290,134 @@ def enforce_data_retention_task(
             extra={"tenant_id": str(tenant_id), "task_id": self.request.id, "correlation_id": correlation_id},
         )
         raise self.retry(exc=exc, countdown=60)
+
+
+# Invisible rows left behind by the stock Kombu transport, which never deletes on ack.
+# SKIP LOCKED keeps compaction off rows a consumer is dequeueing right now.
+_COMPACT_BROKER_MESSAGES_SQL = text(
+    """
+    DELETE FROM kombu_message
+    WHERE id IN (
+        SELECT id FROM kombu_message
+        WHERE visible = false
+          AND "timestamp" < now() - make_interval(secs => :older_than_s)
+        ORDER BY id
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    """
+)
+
+
+async def _compact_broker_messages(older_than_s: int, batch_size: int, max_batches: Optional[int]) -> Dict[str, int]:
+    deleted = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        async with engine.begin() as conn:
+            batch_deleted = (
+                await conn.execute(
+                    _COMPACT_BROKER_MESSAGES_SQL,
+                    {"older_than_s": older_than_s, "batch_size": batch_size},
+                )
+            ).rowcount or 0
+        deleted += batch_deleted
+        batches += 1
+        if batch_deleted < batch_size:
+            break
+    return {"deleted": deleted, "batches": batches}
+
+
+@celery_app.task(
+    bind=True,
+    name="app.tasks.maintenance.compact_broker_messages",
+    routing_key="maintenance.task",
+)
+def compact_broker_messages(
+    self,
+    older_than_s: Optional[int] = None,
+    max_batches: Optional[int] = None,
+    correlation_id: Optional[str] = None,
+) -> Dict[str, int]:
+    """
+    One-time compaction of the kombu_message backlog accumulated before delete-on-ack.
+
+    Deletes invisible messages older than older_than_s (default: the broker
+    visibility timeout) in CELERY_BROKER_COMPACTION_BATCH_SIZE transactions.
+    Under the stock transport such rows are acked leftovers; a row that is
+    instead a lost in-flight message would otherwise be redelivered by the
+    visibility recovery sweep, so pass a larger older_than_s when unsure.
+    """
+    from app.core.config import settings
+
+    correlation_id = correlation_id or str(uuid4())
+    set_request_correlation_id(correlation_id)
+    older_than_s = older_than_s or settings.CELERY_BROKER_VISIBILITY_TIMEOUT_S
+    results = asyncio.run(
+        _compact_broker_messages(older_than_s, settings.CELERY_BROKER_COMPACTION_BATCH_SIZE, max_batches)
+    )
+    logger.info(
+        "broker_messages_compacted",
+        extra={
+            "task_id": self.request.id,
+            "correlation_id": correlation_id,
+            "older_than_s": older_than_s,
+            **results,
+        },
+    )
+    return results
+
+
+_CREATE_BROKER_PARTITIONS_SQL = text("SELECT security.kombu_message_create_partitions(:days_ahead)")
+_DROP_BROKER_PARTITIONS_SQL = text(
+    "SELECT security.kombu_message_drop_partitions(:retention_days, :visibility_timeout_s)"
+)
+
+
+async def _maintain_broker_partitions(
+    days_ahead: int, retention_days: int, visibility_timeout_s: int
+) -> Dict[str, object]:
+    async with engine.begin() as conn:
+        created = (await conn.execute(_CREATE_BROKER_PARTITIONS_SQL, {"days_ahead": days_ahead})).scalar_one()
+        dropped = (
+            await conn.execute(
+                _DROP_BROKER_PARTITIONS_SQL,
+                {"retention_days": retention_days, "visibility_timeout_s": visibility_timeout_s},
+            )
+        ).scalars().all()
+    return {"created": int(created), "dropped": list(dropped)}
+
+
+@celery_app.task(
+    bind=True,
+    name="app.tasks.maintenance.maintain_broker_partitions",
+    routing_key="maintenance.task",
+)
+def maintain_broker_partitions(self, correlation_id: Optional[str] = None) -> Dict[str, object]:
+    """
+    Keep the daily kombu_message partitions rolling.
+
+    Pre-creates CELERY_BROKER_PARTITION_PRECREATE_DAYS of future partitions
+    and drops partitions older than CELERY_BROKER_PARTITION_RETENTION_DAYS
+    once they are empty (any remaining row is an unacked message).
+    """
+    from app.core.config import settings
+
+    correlation_id = correlation_id or str(uuid4())
+    set_request_correlation_id(correlation_id)
+    results = asyncio.run(
+        _maintain_broker_partitions(
+            settings.CELERY_BROKER_PARTITION_PRECREATE_DAYS,
+            settings.CELERY_BROKER_PARTITION_RETENTION_DAYS,
+            settings.CELERY_BROKER_VISIBILITY_TIMEOUT_S,
+        )
+    )
+    logger.info(
+        "broker_partitions_maintained",
+        extra={
+            "task_id": self.request.id,
+            "correlation_id": correlation_id,
+            "partitions_created": results["created"],
+            "partitions_dropped": results["dropped"],
+        },
+    )
+    return results
@@ -7,14 +7,30 @@ exceptions without embedding refresh SQL in tasks.
 from __future__ import annotations
 
 import logging
+import math
 from enum import Enum
 from typing import Optional
 from uuid import UUID, uuid4
 
-from sqlalchemy.engine.url import make_url
-
 from app.celery_app import celery_app
-from app.matviews.executor import RefreshOutcome, RefreshResult, refresh_all_for_tenant, refresh_single
+from app.core.config import settings
+from app.matviews import registry, scheduler
+from app.matviews.executor import (
+    RefreshOutcome,
+    RefreshResult,
+    load_refresh_plan_sync,
+    prune_refresh_history_sync,
+    refresh_all_for_tenant,
+    refresh_due_for_tenant,
+    refresh_single,
+    sync_connection,
+)
+from app.matviews.summaries import (
+    SUMMARY_BACKEND_VIEW_NAMES,
+    check_tenant_summary_consistency,
+    refresh_tenant_summaries,
+    set_summary_dirty_tracking,
+)
 from app.observability import metrics
 from app.observability.context import set_request_correlation_id, set_tenant_id
 from app.observability.metrics_policy import normalize_view_name
@@ -40,6 +56,7 @@ class MatviewTaskFailure(RuntimeError):
 _OUTCOME_STRATEGY_MAP: dict[RefreshOutcome, TaskOutcomeStrategy] = {
     RefreshOutcome.SUCCESS: TaskOutcomeStrategy.SUCCESS,
     RefreshOutcome.SKIPPED_LOCK_HELD: TaskOutcomeStrategy.SILENT_SKIP,
+    RefreshOutcome.SKIPPED_FRESH: TaskOutcomeStrategy.SILENT_SKIP,
     RefreshOutcome.FAILED: TaskOutcomeStrategy.DEAD_LETTER,
 }
 
@@ -56,6 +73,7 @@ def _map_refresh_outcome_to_policy(outcome: RefreshOutcome) -> str:
     mapping = {
         RefreshOutcome.SUCCESS: "success",
         RefreshOutcome.SKIPPED_LOCK_HELD: "skipped",
+        RefreshOutcome.SKIPPED_FRESH: "skipped",
         RefreshOutcome.FAILED: "failure",
     }
     return mapping.get(outcome, "failure")
@@ -76,6 +94,8 @@ def _record_metrics(result: RefreshResult, strategy: TaskOutcomeStrategy) -> Non
         view_name=view_name,
         outcome=outcome,
     ).observe(duration_s)
+    if result.rows_changed is not None:
+        metrics.matview_refresh_rows_changed.labels(view_name=view_name).observe(result.rows_changed)
     if result.outcome == RefreshOutcome.FAILED:
         metrics.matview_refresh_failures_total.labels(
             view_name=view_name,
@@ -83,47 +103,100 @@ def _record_metrics(result: RefreshResult, strategy: TaskOutcomeStrategy) -> Non
         ).inc()
 
 
+def _prune_refresh_history() -> None:
+    """Best-effort retention for matview_refresh_history; never blocks the pulse."""
+    try:
+        prune_refresh_history_sync(settings.MATVIEW_REFRESH_HISTORY_RETENTION_DAYS)
+    except Exception as exc:
+        logger.warning("matview_refresh_history_prune_failed", extra={"error_type": exc.__class__.__name__})
+
+
 def _normalize_tenant_id(value: UUID | str) -> UUID:
     if isinstance(value, UUID):
         return value
     return UUID(str(value))
 
 
-def _build_sync_dsn() -> str:
-    from app.core.config import settings
-    url = make_url(settings.DATABASE_URL.unicode_string())
-    query = dict(url.query)
-    query.pop("channel_binding", None)
-    url = url.set(query=query)
-    if url.drivername.startswith("postgresql+"):
-        url = url.set(drivername="postgresql")
-
-    dsn_parts = ["postgresql://"]
-    if url.username:
-        dsn_parts.append(url.username)
-        if url.password:
-            dsn_parts.append(":")
-            dsn_parts.append(url.password)
-        dsn_parts.append("@")
-    dsn_parts.append(url.host or "localhost")
-    if url.port:
-        dsn_parts.append(f":{url.port}")
-    if url.database:
-        dsn_parts.append(f"/{url.database}")
-    return "".join(dsn_parts)
-
-
 def _fetch_tenant_ids_sync() -> list[UUID]:
-    import psycopg2
-    dsn = _build_sync_dsn()
-    conn = psycopg2.connect(dsn)
-    try:
+    with sync_connection() as conn:
         cur = conn.cursor()
         cur.execute("SELECT id FROM tenants ORDER BY id")
         rows = cur.fetchall()
-        return [UUID(str(row[0])) for row in rows]
-    finally:
-        conn.close()
+    return [UUID(str(row[0])) for row in rows]
+
+
+def _summary_backend_enabled() -> bool:
+    return settings.MATVIEW_REFRESH_BACKEND == "summary_tables"
+
+
+def _sync_summary_dirty_tracking() -> None:
+    """Best-effort: keep the summary dirty-bucket triggers on only under the summary backend."""
+    try:
+        set_summary_dirty_tracking(_summary_backend_enabled())
+    except Exception as exc:
+        logger.warning("matview_summary_dirty_tracking_sync_failed", extra={"error_type": exc.__class__.__name__})
+
+
+def _backend_entries() -> list[registry.MatviewRegistryEntry]:
+    """
+    Registry views the global refresh path is responsible for under the active backend.
+    """
+    entries = registry.list_entries()
+    if _summary_backend_enabled():
+        entries = [entry for entry in entries if entry.name not in SUMMARY_BACKEND_VIEW_NAMES]
+    return entries
+
+
+def _claim_deferred_refreshes_sync(views: list[registry.MatviewRegistryEntry]) -> dict[str, float]:
+    """
+    Claim at most one pending deferred refresh per view; return {view_name: countdown_s}.
+    """
+    claimed: dict[str, float] = {}
+    with sync_connection() as conn:
+        cur = conn.cursor()
+        for entry in views:
+            cur.execute(
+                scheduler.CLAIM_DEFERRED_REFRESH_SQL,
+                {"view_name": entry.name, "max_staleness_seconds": entry.max_staleness_seconds},
+            )
+            row = cur.fetchone()
+            if row is not None:
+                claimed[entry.name] = float(row[0])
+        conn.commit()
+    return claimed
+
+
+def _defer_fresh_realtime_refreshes(
+    *,
+    tenant_id: UUID,
+    correlation_id: str,
+    results: list[RefreshResult],
+) -> list[str]:
+    """
+    A realtime trigger means new data landed. Views still inside their budget are
+    not refreshed now; instead one refresh per view is enqueued for when the
+    budget expires, so the new data is visible within max_staleness_seconds.
+    """
+    fresh_realtime = [
+        registry.get_entry(result.view_name)
+        for result in results
+        if result.outcome == RefreshOutcome.SKIPPED_FRESH
+        and registry.get_entry(result.view_name).schedule_class == registry.SCHEDULE_CLASS_REALTIME
+    ]
+    if not fresh_realtime:
+        return []
+    claimed = _claim_deferred_refreshes_sync(fresh_realtime)
+    for view_name, countdown_s in claimed.items():
+        matview_refresh_single.apply_async(
+            kwargs={
+                "tenant_id": str(tenant_id),
+                "view_name": view_name,
+                "correlation_id": correlation_id,
+                "schedule_class": registry.SCHEDULE_CLASS_REALTIME,
+            },
+            countdown=math.ceil(countdown_s),
+        )
+    return sorted(claimed)
 
 
 def _log_start(
@@ -278,6 +351,7 @@ def matview_refresh_all_for_tenant(
     tenant_id: UUID,
     correlation_id: Optional[str] = None,
     schedule_class: Optional[str] = None,
+    force: bool = False,
 ) -> dict:
     tenant_uuid = _normalize_tenant_id(tenant_id)
     correlation_id = correlation_id or str(uuid4())
@@ -290,9 +364,29 @@ def matview_refresh_all_for_tenant(
             "tenant_id": str(tenant_uuid),
             "correlation_id": correlation_id,
             "schedule_class": schedule_class,
+            "force": force,
         },
     )
-    results = refresh_all_for_tenant(tenant_uuid, correlation_id)
+    entries = _backend_entries()
+    if force:
+        results = refresh_all_for_tenant(tenant_uuid, correlation_id, entries)
+    else:
+        results = refresh_due_for_tenant(tenant_uuid, correlation_id, entries=entries)
+    deferred: list[str] = []
+    if not force and schedule_class == registry.SCHEDULE_CLASS_REALTIME:
+        try:
+            deferred = _defer_fresh_realtime_refreshes(
+                tenant_id=tenant_uuid,
+                correlation_id=correlation_id,
+                results=results,
+            )
+        except Exception as exc:
+            # The next pulse still refreshes these views once their budget expires.
+            logger.warning(
+                "matview_refresh_deferral_failed",
+                exc_info=exc,
+                extra={"tenant_id": str(tenant_uuid), "correlation_id": correlation_id},
+            )
     strategies: list[TaskOutcomeStrategy] = []
     for result in results:
         strategy = strategy_for_refresh_result(result)
@@ -305,11 +399,42 @@ def matview_refresh_all_for_tenant(
             schedule_class=schedule_class,
         )
 
-    if TaskOutcomeStrategy.DEAD_LETTER in strategies:
+    # Summary tables are maintained under either backend so their dirty buckets
+    # never accumulate; the refresh only touches this tenant's changed groups.
+    # They only serve reads under the summary_tables backend, so only there does
+    # a failed summary refresh fail the task; otherwise the dirty buckets remain
+    # for the next run.
+    summary_results = []
+    try:
+        summary_results = refresh_tenant_summaries(tenant_uuid, correlation_id)
+    except Exception as exc:
+        summary_backend = _summary_backend_enabled()
+        (logger.error if summary_backend else logger.warning)(
+            "matview_summary_refresh_failed",
+            exc_info=exc,
+            extra={
+                "task_id": self.request.id,
+                "tenant_id": str(tenant_uuid),
+                "correlation_id": correlation_id,
+                "backend": settings.MATVIEW_REFRESH_BACKEND,
+            },
+        )
+        if summary_backend:
+            set_tenant_id(None)
+            set_request_correlation_id(None)
+            raise MatviewTaskFailure(f"summary refresh failed: tenant={tenant_uuid}") from exc
+
+    # Views skipped for freshness are the steady state, not a degraded run.
+    considered = [
+        strategy
+        for result, strategy in zip(results, strategies)
+        if result.outcome != RefreshOutcome.SKIPPED_FRESH
+    ] or strategies
+    if TaskOutcomeStrategy.DEAD_LETTER in considered:
         overall = TaskOutcomeStrategy.DEAD_LETTER
-    elif TaskOutcomeStrategy.RETRY in strategies:
+    elif TaskOutcomeStrategy.RETRY in considered:
         overall = TaskOutcomeStrategy.RETRY
-    elif TaskOutcomeStrategy.SILENT_SKIP in strategies:
+    elif TaskOutcomeStrategy.SILENT_SKIP in considered:
         overall = TaskOutcomeStrategy.SILENT_SKIP
     else:
         overall = TaskOutcomeStrategy.SUCCESS
@@ -334,6 +459,8 @@ def matview_refresh_all_for_tenant(
             "status": "skipped" if overall == TaskOutcomeStrategy.SILENT_SKIP else "ok",
             "results": [r.to_log_dict() for r in results],
             "strategy": overall.value,
+            "deferred_views": deferred,
+            "summaries": [r.to_log_dict() for r in summary_results],
         }
     finally:
         set_tenant_id(None)
@@ -363,6 +490,22 @@ def pulse_matviews_global(
                 "schedule_class": schedule_class,
             },
         )
+        _prune_refresh_history()
+        _sync_summary_dirty_tracking()
+        plan = load_refresh_plan_sync(_backend_entries())
+        # Under the summary backend every tenant may have dirty buckets to drain.
+        if not plan.due and not _summary_backend_enabled():
+            logger.info(
+                "matview_pulse_task_nothing_due",
+                extra={
+                    "task_id": self.request.id,
+                    "correlation_id": correlation_id,
+                    "schedule_class": schedule_class,
+                    "next_due_in_seconds": plan.fresh[0].due_in_seconds if plan.fresh else None,
+                },
+            )
+            return {"status": "ok", "tenant_count": 0, "due_views": [], "correlation_id": correlation_id}
+
         tenant_ids = _fetch_tenant_ids_sync()
         for tenant_id in tenant_ids:
             matview_refresh_all_for_tenant.delay(
@@ -377,8 +520,70 @@ def pulse_matviews_global(
                 "correlation_id": correlation_id,
                 "tenant_count": len(tenant_ids),
                 "schedule_class": schedule_class,
+                "due_views": plan.due_names,
             },
         )
-        return {"status": "ok", "tenant_count": len(tenant_ids), "correlation_id": correlation_id}
+        return {
+            "status": "ok",
+            "tenant_count": len(tenant_ids),
+            "due_views": plan.due_names,
+            "correlation_id": correlation_id,
+        }
+    finally:
+        set_request_correlation_id(None)
+
+
+@celery_app.task(
+    bind=True,
+    name="app.tasks.matviews.check_summary_consistency",
+    routing_key="maintenance.task",
+    max_retries=3,
+    default_retry_delay=60,
+)
+def check_summary_consistency(
+    self,
+    tenant_id: Optional[UUID] = None,
+    correlation_id: Optional[str] = None,
+    repair: bool = False,
+) -> dict:
+    """
+    Compare per-tenant summary tables with a full recompute (all tenants when tenant_id is None).
+    """
+    correlation_id = correlation_id or str(uuid4())
+    set_request_correlation_id(correlation_id)
+    try:
+        tenant_ids = [_normalize_tenant_id(tenant_id)] if tenant_id else _fetch_tenant_ids_sync()
+        divergent: dict[str, list[dict]] = {}
+        for tenant_uuid in tenant_ids:
+            results = check_tenant_summary_consistency(tenant_uuid, repair=repair)
+            mismatches = [result.to_log_dict() for result in results if not result.consistent]
+            if mismatches:
+                divergent[str(tenant_uuid)] = mismatches
+                logger.error(
+                    "matview_summary_consistency_mismatch",
+                    extra={
+                        "task_id": self.request.id,
+                        "tenant_id": str(tenant_uuid),
+                        "correlation_id": correlation_id,
+                        "mismatches": mismatches,
+                    },
+                )
+        logger.info(
+            "matview_summary_consistency_completed",
+            extra={
+                "task_id": self.request.id,
+                "correlation_id": correlation_id,
+                "tenant_count": len(tenant_ids),
+                "divergent_tenant_count": len(divergent),
+                "repair": repair,
+            },
+        )
+        return {
+            "status": "ok" if not divergent else "divergent",
+            "tenant_count": len(tenant_ids),
+            "divergent": divergent,
+            "repaired": repair and bool(divergent),
+            "correlation_id": correlation_id,
+        }
     finally:
         set_request_correlation_id(None)
@@ -0,0 +1,138 @@
+"""
+Coalesced attribution recompute scheduling tests.
+
+Ingestion marks (tenant, window) rows dirty; a burst of marks arms a single
+flush per tenant, and the flush claims every dirty window exactly once.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+
+from app.api import webhooks
+from app.db.session import get_session
+from app.services import attribution as attribution_service
+from app.tasks.attribution import _claim_dirty_windows
+
+_DAY = datetime(2026, 3, 1, tzinfo=timezone.utc)
+_WINDOW = (_DAY, _DAY + timedelta(days=1))
+_NEXT_WINDOW = (_DAY + timedelta(days=1), _DAY + timedelta(days=2))
+
+
+@pytest.fixture
+def enqueued_flushes(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        attribution_service.flush_dirty_windows,
+        "apply_async",
+        lambda **kwargs: calls.append(kwargs),
+    )
+    return calls
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_burst_of_marks_arms_single_flush_and_coalesces_windows(test_tenant, enqueued_flushes):
+    tenant_id = test_tenant
+
+    assert await attribution_service.mark_windows_dirty(tenant_id, [_WINDOW, _WINDOW]) is True
+    assert await attribution_service.mark_windows_dirty(tenant_id, [_WINDOW, _NEXT_WINDOW]) is False
+
+    assert len(enqueued_flushes) == 1
+    assert enqueued_flushes[0]["kwargs"]["tenant_id"] == str(tenant_id)
+
+    claimed_batches = []
+    claimed = await _claim_dirty_windows(tenant_id, claimed_batches.append)
+
+    assert [(start, end, count) for start, end, count in claimed] == [
+        (_WINDOW[0], _WINDOW[1], 3),
+        (_NEXT_WINDOW[0], _NEXT_WINDOW[1], 1),
+    ]
+    assert claimed_batches == [claimed]
+
+    async with get_session(tenant_id=tenant_id) as session:
+        remaining = await session.scalar(
+            text("SELECT count(*) FROM attribution_dirty_windows WHERE tenant_id = :tenant_id"),
+            {"tenant_id": tenant_id},
+        )
+        scheduled = await session.scalar(
+            text("SELECT count(*) FROM attribution_recompute_schedule WHERE tenant_id = :tenant_id"),
+            {"tenant_id": tenant_id},
+        )
+    assert (remaining, scheduled) == (0, 0)
+
+    # After a flush claims the windows, the next mark arms a new flush.
+    assert await attribution_service.mark_windows_dirty(tenant_id, [_WINDOW]) is True
+    assert len(enqueued_flushes) == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_failed_enqueue_leaves_windows_dirty(test_tenant, enqueued_flushes):
+    tenant_id = test_tenant
+    await attribution_service.mark_windows_dirty(tenant_id, [_WINDOW])
+
+    def _broker_down(windows):
+        raise ConnectionError("broker unavailable")
+
+    with pytest.raises(ConnectionError):
+        await _claim_dirty_windows(tenant_id, _broker_down)
+
+    claimed = await _claim_dirty_windows(tenant_id, lambda windows: None)
+    assert [count for _, _, count in claimed] == [1]
+
+
+@pytest.mark.asyncio
+async def test_downstream_scheduling_marks_all_event_windows_in_one_call(monkeypatch):
+    calls = []
+
+    async def _fake_mark(**kwargs):
+        calls.append(kwargs)
+        return True
+
+    monkeypatch.setattr(attribution_service, "mark_windows_dirty", _fake_mark)
+
+    await webhooks._schedule_downstream_tasks(
+        tenant_id="00000000-0000-0000-0000-000000000001",
+        event_timestamps=["2026-03-01T10:00:00Z", "2026-03-01T23:59:59Z", "2026-03-02T00:00:00Z"],
+        correlation_id="corr-1",
+    )
+
+    assert len(calls) == 1
+    assert calls[0]["windows"] == [
+        ("2026-03-01T00:00:00Z", "2026-03-02T00:00:00Z"),
+        ("2026-03-01T00:00:00Z", "2026-03-02T00:00:00Z"),
+        ("2026-03-02T00:00:00Z", "2026-03-03T00:00:00Z"),
+    ]
+
+
+def test_flush_publishes_each_window_independently_with_refresh_callback(monkeypatch):
+    from uuid import uuid4
+
+    from app.tasks import attribution as attribution_tasks
+
+    published = []
+
+    class _Chord:
+        def __init__(self, header, body):
+            self.header, self.body = header, body
+
+        def apply_async(self):
+            published.append(self)
+
+    async def _fake_claim(tenant_id, enqueue):
+        windows = [(*_WINDOW, 3), (*_NEXT_WINDOW, 1)]
+        enqueue(windows)
+        return windows
+
+    monkeypatch.setattr(attribution_tasks, "_claim_dirty_windows", _fake_claim)
+    monkeypatch.setattr(attribution_tasks, "chord", _Chord)
+
+    result = attribution_tasks.flush_dirty_windows.run(tenant_id=str(uuid4()))
+
+    [canvas] = published
+    assert [sig.task for sig in canvas.header] == ["app.tasks.attribution.recompute_window"] * 2
+    assert [sig.kwargs["window_start"] for sig in canvas.header] == ["2026-03-01T00:00:00Z", "2026-03-02T00:00:00Z"]
+    assert canvas.body.task == "app.tasks.matviews.refresh_all_for_tenant"
+    assert (result["window_count"], result["mark_count"]) == (2, 4)
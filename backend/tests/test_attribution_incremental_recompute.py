@@ -0,0 +1,128 @@
+"""
+Incremental attribution recompute tests.
+
+Reruns of the same (tenant, window, model_version) allocate only events created
+since the job's watermark; a new model version recomputes the full window.
+"""
+
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.db import engine
+from app.db.session import set_tenant_guc
+from app.tasks.attribution import recompute_window
+from tests.conftest import _insert_tenant
+
+WINDOW_START = "2025-03-01T00:00:00Z"
+WINDOW_END = "2025-03-02T00:00:00Z"
+
+
+async def _insert_event(tenant_id, *, created_at: datetime, revenue_cents: int = 900):
+    event_id = uuid4()
+    async with engine.begin() as conn:
+        await set_tenant_guc(conn, tenant_id, local=True)
+        await conn.execute(text("SELECT set_config('app.execution_context', 'ingestion', true)"))
+        await conn.execute(
+            text(
+                # RAW_SQL_ALLOWLIST: seeds events with fixed timestamps and revenue to place them in known windows
+                """
+                INSERT INTO attribution_events (
+                    id, tenant_id, session_id, occurred_at, event_timestamp,
+                    idempotency_key, event_type, channel, revenue_cents, raw_payload,
+                    created_at, updated_at
+                ) VALUES (
+                    :id, :tenant_id, :session_id,
+                    '2025-03-01T12:00:00Z'::timestamptz, '2025-03-01T12:00:00Z'::timestamptz,
+                    :idempotency_key, 'conversion', 'direct', :revenue_cents, '{}'::jsonb,
+                    :created_at, :created_at
+                )
+                """
+            ),
+            {
+                "id": event_id,
+                "tenant_id": tenant_id,
+                "session_id": uuid4(),
+                "idempotency_key": f"incremental:{event_id}",
+                "revenue_cents": revenue_cents,
+                "created_at": created_at,
+            },
+        )
+    return event_id
+
+
+async def _allocated_event_ids(tenant_id, model_version: str) -> set:
+    async with engine.begin() as conn:
+        await set_tenant_guc(conn, tenant_id, local=True)
+        rows = await conn.execute(
+            text(
+                """
+                SELECT DISTINCT event_id FROM attribution_allocations
+                WHERE tenant_id = :tenant_id AND model_version = :model_version
+                """
+            ),
+            {"tenant_id": tenant_id, "model_version": model_version},
+        )
+        return {row[0] for row in rows}
+
+
+def _run(tenant_id, model_version: str = "1.0.0", **kwargs) -> dict:
+    return recompute_window.delay(
+        tenant_id=tenant_id,
+        window_start=WINDOW_START,
+        window_end=WINDOW_END,
+        model_version=model_version,
+        **kwargs,
+    ).get()
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_rerun_allocates_only_events_after_watermark(monkeypatch):
+    from app.celery_app import celery_app
+
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    monkeypatch.setattr(settings, "ATTRIBUTION_INCREMENTAL_WATERMARK_LAG_SECONDS", 0)
+
+    tenant_id = uuid4()
+    async with engine.begin() as conn:
+        await _insert_tenant(conn, tenant_id, api_key_hash=f"test_hash_{tenant_id}")
+
+    now = datetime.now(timezone.utc)
+    event_a = await _insert_event(tenant_id, created_at=now - timedelta(hours=2))
+    event_b = await _insert_event(tenant_id, created_at=now - timedelta(hours=1))
+
+    first = _run(tenant_id)
+    assert (first["mode"], first["event_count"]) == ("full", 2)
+
+    event_c = await _insert_event(tenant_id, created_at=now)
+    second = _run(tenant_id)
+    # Watermark is event_b's created_at (inclusive): event_a is not re-read.
+    assert (second["mode"], second["event_count"]) == ("incremental", 2)
+    assert await _allocated_event_ids(tenant_id, "1.0.0") == {event_a, event_b, event_c}
+
+    forced = _run(tenant_id, full_recompute=True)
+    assert (forced["mode"], forced["event_count"]) == ("full", 3)
+
+    new_model = _run(tenant_id, model_version="2.0.0")
+    assert (new_model["mode"], new_model["event_count"]) == ("full", 3)
+    assert await _allocated_event_ids(tenant_id, "2.0.0") == {event_a, event_b, event_c}
+
+    async with engine.begin() as conn:
+        await set_tenant_guc(conn, tenant_id, local=True)
+        row = (
+            await conn.execute(
+                text(
+                    """
+                    SELECT watermark_event_id, last_run_mode FROM attribution_recompute_jobs
+                    WHERE tenant_id = :tenant_id AND model_version = '1.0.0'
+                    """
+                ),
+                {"tenant_id": tenant_id},
+            )
+        ).one()
+    assert tuple(row) == (event_c, "full")
+
@@ -0,0 +1,126 @@
+"""
+Sharded attribution recompute tests.
+
+Large windows are split into time slices of roughly equal event count, each
+allocated by its own task; a chord callback finalizes the job row.
+"""
+
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.db import engine
+from app.db.session import set_tenant_guc
+from app.tasks.attribution import _window_shard_bounds, recompute_window
+from tests.conftest import _insert_tenant
+
+_START = datetime(2025, 4, 1, tzinfo=timezone.utc)
+_END = _START + timedelta(days=1)
+
+
+def test_shard_bounds_balance_event_counts_and_cover_window():
+    # 8 buckets of 3h; traffic concentrated in the afternoon.
+    histogram = [(1, 10), (5, 40), (6, 40), (8, 10)]
+    bounds = _window_shard_bounds(
+        _START, _END, histogram, buckets=8, max_shards=4, min_events_per_shard=25
+    )
+
+    assert bounds[0][0] == _START and bounds[-1][1] == _END
+    assert all(left[1] == right[0] for left, right in zip(bounds, bounds[1:]))
+    assert bounds == [
+        (_START, _START + timedelta(hours=15)),
+        (_START + timedelta(hours=15), _START + timedelta(hours=18)),
+        (_START + timedelta(hours=18), _END),
+    ]
+
+
+def test_small_windows_are_not_sharded():
+    bounds = _window_shard_bounds(
+        _START, _END, [(1, 5), (2, 5)], buckets=8, max_shards=8, min_events_per_shard=50
+    )
+    assert bounds == [(_START, _END)]
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_sharded_recompute_matches_single_task_and_finalizes_job(monkeypatch):
+    from app.celery_app import celery_app
+
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    monkeypatch.setattr(settings, "ATTRIBUTION_RECOMPUTE_MAX_SHARDS", 4)
+    monkeypatch.setattr(settings, "ATTRIBUTION_RECOMPUTE_SHARD_MIN_EVENTS", 3)
+
+    tenant_id = uuid4()
+    async with engine.begin() as conn:
+        await _insert_tenant(conn, tenant_id, api_key_hash=f"test_hash_{tenant_id}")
+        await set_tenant_guc(conn, tenant_id, local=True)
+        await conn.execute(text("SELECT set_config('app.execution_context', 'ingestion', true)"))
+        await conn.execute(
+            text(
+                # RAW_SQL_ALLOWLIST: bulk generate_series seed spanning fixed hourly windows
+                """
+                INSERT INTO attribution_events (
+                    tenant_id, session_id, occurred_at, event_timestamp,
+                    idempotency_key, event_type, channel, revenue_cents, raw_payload
+                )
+                SELECT
+                    :tenant_id, gen_random_uuid(),
+                    '2025-04-01T00:00:00Z'::timestamptz + (n * interval '1 hour'),
+                    '2025-04-01T00:00:00Z'::timestamptz + (n * interval '1 hour'),
+                    CAST(:key_prefix AS text) || n, 'conversion', 'direct', 1000, '{}'::jsonb
+                FROM generate_series(0, 11) AS n
+                """
+            ),
+            {"tenant_id": tenant_id, "key_prefix": f"shard:{tenant_id}:"},
+        )
+
+    def _run(model_version: str) -> dict:
+        return recompute_window.delay(
+            tenant_id=tenant_id,
+            window_start="2025-04-01T00:00:00Z",
+            window_end="2025-04-02T00:00:00Z",
+            model_version=model_version,
+        ).get()
+
+    sharded = _run("1.0.0")
+    assert sharded["shard_count"] == 4
+    assert (sharded["event_count"], sharded["allocation_count"]) == (12, 36)
+
+    monkeypatch.setattr(settings, "ATTRIBUTION_RECOMPUTE_MAX_SHARDS", 1)
+    single = _run("1.0.0-single")
+    assert "shard_count" not in single
+
+    async with engine.begin() as conn:
+        await set_tenant_guc(conn, tenant_id, local=True)
+        rows = await conn.execute(
+            text(
+                """
+                SELECT model_version, event_id, channel_code, allocated_revenue_cents
+                FROM attribution_allocations
+                WHERE tenant_id = :tenant_id
+                ORDER BY event_id, channel_code
+                """
+            ),
+            {"tenant_id": tenant_id},
+        )
+        by_version: dict[str, list] = {}
+        for model_version, *allocation in rows:
+            by_version.setdefault(model_version, []).append(tuple(allocation))
+        job = (
+            await conn.execute(
+                text(
+                    """
+                    SELECT status, last_run_mode, watermark_event_id IS NOT NULL
+                    FROM attribution_recompute_jobs
+                    WHERE tenant_id = :tenant_id AND model_version = '1.0.0'
+                    """
+                ),
+                {"tenant_id": tenant_id},
+            )
+        ).one()
+
+    assert by_version["1.0.0"] == by_version["1.0.0-single"]
+    assert tuple(job) == ("succeeded", "full", True)
@@ -0,0 +1,75 @@
+"""
+Streaming window allocation tests.
+
+The baseline allocator reads the window through a server-side cursor, so peak
+worker memory is bounded by the batch size rather than the window's event count.
+"""
+
+import tracemalloc
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.db import engine
+from app.db.session import set_tenant_guc
+from app.tasks.attribution import _compute_allocations_deterministic_baseline
+from tests.conftest import _insert_tenant
+
+
+async def _insert_events_bulk(tenant_id, count: int) -> None:
+    async with engine.begin() as conn:
+        await set_tenant_guc(conn, tenant_id, local=True)
+        await conn.execute(text("SELECT set_config('app.execution_context', 'ingestion', true)"))
+        await conn.execute(
+            text(
+                # RAW_SQL_ALLOWLIST: bulk generate_series seed (builder inserts one row per round trip)
+                """
+                INSERT INTO attribution_events (
+                    tenant_id, session_id, occurred_at, event_timestamp,
+                    idempotency_key, event_type, channel, revenue_cents, raw_payload
+                )
+                SELECT
+                    :tenant_id, gen_random_uuid(),
+                    '2025-03-01T00:00:00Z'::timestamptz + (n * interval '1 second'),
+                    '2025-03-01T00:00:00Z'::timestamptz + (n * interval '1 second'),
+                    CAST(:key_prefix AS text) || n, 'conversion', 'direct', 300, '{}'::jsonb
+                FROM generate_series(1, :count) AS n
+                """
+            ),
+            {"tenant_id": tenant_id, "key_prefix": f"bulk:{tenant_id}:", "count": count},
+        )
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_allocator_peak_memory_is_flat_in_window_size(monkeypatch):
+    monkeypatch.setenv("ATTRIBUTION_BASELINE_BATCH_EVENTS", "200")
+    monkeypatch.setattr(settings, "ATTRIBUTION_BASELINE_FETCH_SIZE", 200)
+
+    async def _peak_bytes(event_count: int) -> int:
+        tenant_id = uuid4()
+        async with engine.begin() as conn:
+            await _insert_tenant(conn, tenant_id, api_key_hash=f"test_hash_{tenant_id}")
+        await _insert_events_bulk(tenant_id, event_count)
+
+        tracemalloc.start()
+        try:
+            result = await _compute_allocations_deterministic_baseline(
+                tenant_id=tenant_id,
+                window_start=datetime(2025, 3, 1, tzinfo=timezone.utc),
+                window_end=datetime(2025, 3, 2, tzinfo=timezone.utc),
+            )
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        assert result["event_count"] == event_count
+        return peak
+
+    small = await _peak_bytes(1_000)
+    large = await _peak_bytes(10_000)
+
+    # 10x the events must not mean 10x the memory: the window is streamed.
+    assert large < small * 2, f"peak grew with window size: {small} -> {large} bytes"
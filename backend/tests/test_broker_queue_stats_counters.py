@@ -0,0 +1,94 @@
+"""
+Trigger-maintained broker queue counters.
+
+Queue depth metrics read kombu_queue_stats (O(queues) rows) instead of
+aggregating kombu_message; triggers keep the counters equal to a full count
+across enqueue, dequeue, requeue and ack.
+"""
+
+from types import SimpleNamespace
+
+from kombu import Connection
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.celery_app import _build_broker_url, _sync_sqlalchemy_url
+from app.core import config
+from app.observability import broker_queue_stats
+
+
+class _FakeConnection:
+    def __init__(self, rows):
+        self.rows = rows
+        self.sql = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement, params):
+        self.sql = str(statement)
+        return SimpleNamespace(fetchall=lambda: self.rows)
+
+
+@pytest.mark.asyncio
+async def test_fetch_reads_counter_table_not_message_aggregates(monkeypatch):
+    row = SimpleNamespace(
+        queue_name="housekeeping", visible_count=3, invisible_count=2, total_count=5, max_age_seconds=7.5
+    )
+    conn = _FakeConnection([row])
+    monkeypatch.setattr(broker_queue_stats, "engine", SimpleNamespace(connect=lambda: conn))
+
+    visible, invisible, total, max_age = await broker_queue_stats._fetch_broker_truth_stats_from_db()
+
+    assert (visible, invisible, total, max_age) == (
+        {"housekeeping": 3},
+        {"housekeeping": 2},
+        {"housekeeping": 5},
+        {"housekeeping": 7.5},
+    )
+    assert "FROM kombu_queue_stats" in conn.sql
+    assert "COUNT(" not in conn.sql.upper()
+
+
+@pytest.mark.integration
+def test_counters_match_full_count_through_message_lifecycle():
+    queue = "queue_stats_probe"
+    engine = create_engine(_sync_sqlalchemy_url(config.settings.DATABASE_URL.unicode_string()))
+
+    def _counts():
+        with engine.connect() as db:
+            counters = db.execute(
+                text(
+                    "SELECT COALESCE(SUM(s.visible_count), 0), COALESCE(SUM(s.invisible_count), 0), "
+                    "COALESCE(SUM(s.enqueued_total), 0), COALESCE(SUM(s.acked_total), 0) "
+                    "FROM kombu_queue_stats s JOIN kombu_queue q ON q.id = s.queue_id WHERE q.name = :queue"
+                ),
+                {"queue": queue},
+            ).one()
+            actual = db.execute(
+                text(
+                    "SELECT count(*) FILTER (WHERE m.visible), count(*) FILTER (WHERE NOT m.visible) "
+                    "FROM kombu_message m JOIN kombu_queue q ON q.id = m.queue_id WHERE q.name = :queue"
+                ),
+                {"queue": queue},
+            ).one()
+        return tuple(counters), tuple(actual)
+
+    with Connection(_build_broker_url(), transport_options={"delete_on_ack": True}) as conn:
+        channel = conn.default_channel
+        channel._purge(queue)
+        _, _, enqueued_before, acked_before = _counts()[0]
+        for n in range(3):
+            channel._put(queue, {"body": str(n), "properties": {"delivery_tag": f"stats-{n}"}})
+        channel._get(queue)
+        channel._get(queue)
+        channel._delete_delivered("stats-0")
+
+        counters, actual = _counts()
+        channel._purge(queue)
+
+    assert counters[:2] == actual == (1, 1)
+    assert (counters[2] - enqueued_before, counters[3] - acked_before) == (3, 1)
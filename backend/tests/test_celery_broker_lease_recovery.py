@@ -0,0 +1,118 @@
+"""
+Indexed visibility recovery for the sqla+ Postgres broker.
+
+Enqueues copy task_name/task_id out of the payload and dequeues stamp
+lease_expires_at; recovery re-queues expired leases in bounded SKIP LOCKED
+batches over a partial index instead of scanning payloads.
+"""
+
+from json import loads
+from types import SimpleNamespace
+
+from kombu import Connection
+import pytest
+from sqlalchemy import create_engine, text
+
+from app import celery_transport
+from app.celery_app import _build_broker_url, _recover_invisible_kombu_messages, _sync_sqlalchemy_url
+from app.core import config
+
+
+class _FakeSession:
+    bind = SimpleNamespace(dialect=SimpleNamespace(name="postgresql"))
+
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        self.statements.append((str(statement), params))
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+class _FakeEngine:
+    """Returns the queued rowcounts, one per batch transaction."""
+
+    def __init__(self, rowcounts):
+        self.rowcounts = list(rowcounts)
+        self.statements = []
+
+    def begin(self):
+        engine = self
+
+        class _Begin:
+            def __enter__(self):
+                return engine
+
+            def __exit__(self, *exc):
+                return False
+
+        return _Begin()
+
+    def execute(self, statement, params):
+        self.statements.append((str(statement), params))
+        return SimpleNamespace(rowcount=self.rowcounts.pop(0))
+
+
+def test_enqueue_extracts_routing_columns():
+    client = Connection("sqla+postgresql://u:p@127.0.0.1:1/db")
+    transport = celery_transport.Transport(client)
+    channel = transport.create_channel(transport)
+    channel._session = _FakeSession()
+    channel._table = lambda: "kombu_message"
+    channel._get_or_create = lambda queue: SimpleNamespace(id=7)
+
+    payload = {"body": "e30=", "headers": {"task": "app.tasks.llm.explain", "id": "task-1"}, "properties": {}}
+    channel._put("llm", payload)
+
+    [(sql, params)] = channel._session.statements
+    assert sql.startswith("INSERT INTO kombu_message (queue_id, payload, task_name, task_id)")
+    assert (params["queue_id"], params["task_name"], params["task_id"]) == (7, "app.tasks.llm.explain", "task-1")
+    assert loads(params["payload"]) == payload
+
+
+def test_recovery_runs_bounded_batches_over_expired_leases():
+    engine = _FakeEngine([100, 100, 3])
+
+    recovered = _recover_invisible_kombu_messages(engine=engine, task_name_filter="llm.explain", batch_size=100)
+
+    assert recovered == 203
+    assert len(engine.statements) == 3
+    sql, params = engine.statements[0]
+    assert "lease_expires_at < now()" in sql and "FOR UPDATE SKIP LOCKED" in sql
+    assert "payload" not in sql
+    assert params == {"batch_size": 100, "task_name_filter": "%llm.explain%"}
+
+
+@pytest.mark.integration
+def test_expired_lease_is_recovered_and_live_lease_is_not():
+    queue = "lease_recovery_probe"
+    with Connection(_build_broker_url(), transport_options={"visibility_timeout": 3600}) as conn:
+        channel = conn.default_channel
+        for n in range(2):
+            headers = {"task": "probe.task", "id": f"lease-{n}"}
+            channel._put(queue, {"body": str(n), "headers": headers, "properties": {}})
+        channel._get(queue)
+        channel._get(queue)
+
+        engine = create_engine(_sync_sqlalchemy_url(config.settings.DATABASE_URL.unicode_string()))
+        with engine.begin() as db:
+            db.execute(
+                text(
+                    "UPDATE kombu_message SET lease_expires_at = now() - interval '1 second' "
+                    "WHERE task_id = 'lease-0'"
+                )
+            )
+        assert _recover_invisible_kombu_messages(engine=engine, task_name_filter="probe.task") == 1
+
+        with engine.connect() as db:
+            rows = dict(
+                db.execute(text("SELECT task_id, visible FROM kombu_message WHERE task_name = 'probe.task'")).all()
+            )
+        channel._purge(queue)
+
+    assert rows == {"lease-0": True, "lease-1": False}
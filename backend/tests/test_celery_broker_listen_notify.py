@@ -0,0 +1,99 @@
+"""
+LISTEN/NOTIFY wakeups for the sqla+ Postgres broker.
+
+Enqueues NOTIFY a per-queue channel; idle consumers block on LISTEN (with a
+long fallback poll) instead of sleeping polling_interval between queries.
+"""
+
+from queue import Empty
+import select
+
+from kombu import Connection
+from kombu.transport import resolve_transport
+import pytest
+
+from app import celery_transport
+from app.celery_app import _build_broker_url, _ensure_celery_configured, celery_app
+
+
+def _transport(**options) -> celery_transport.Transport:
+    client = Connection(
+        "sqla+postgresql://u:p@127.0.0.1:1/db",
+        transport_options={"listen_notify": True, "notify_fallback_interval": 30.0, **options},
+    )
+    return celery_transport.Transport(client)
+
+
+def _fake_cycle(transport, empty_polls: int) -> list:
+    calls = []
+
+    def fake_get(callback, timeout=None):
+        calls.append(timeout)
+        if len(calls) <= empty_polls:
+            raise Empty()
+
+    transport.cycle.get = fake_get
+    return calls
+
+
+def test_notify_channel_names_fit_postgres_identifiers():
+    assert celery_transport.notify_channel_name("llm") == "kombu_q_llm"
+    long_queue = "celery.pidbox.reply." + "x" * 80
+    channel = celery_transport.notify_channel_name(long_queue)
+    assert len(channel.encode()) <= 63
+    assert channel == celery_transport.notify_channel_name(long_queue)
+    assert channel != celery_transport.notify_channel_name(long_queue + "y")
+
+
+def test_idle_consumer_waits_on_listen_instead_of_polling(monkeypatch):
+    transport = _transport()
+    calls = _fake_cycle(transport, empty_polls=2)
+    subscriptions = iter([True, False])
+    waits = []
+    monkeypatch.setattr(transport, "_sync_listen", lambda: next(subscriptions))
+    monkeypatch.setattr(transport, "_wait_for_notify", waits.append)
+
+    transport.drain_events(None, timeout=2.0)
+
+    # First empty poll subscribes and re-checks at once; the second blocks on LISTEN
+    # for the rest of the drain timeout rather than polling_interval.
+    assert len(calls) == 3
+    assert len(waits) == 1
+    assert transport.polling_interval < waits[0] <= 2.0
+
+
+def test_consumer_polls_while_listener_is_unavailable(monkeypatch):
+    transport = _transport()
+    _fake_cycle(transport, empty_polls=1)
+    waits = []
+    monkeypatch.setattr(transport, "_sync_listen", lambda: None)
+    monkeypatch.setattr(transport, "_wait_for_notify", waits.append)
+
+    transport.drain_events(None, timeout=10.0)
+
+    assert waits == [transport.polling_interval]
+
+
+def test_sqla_broker_resolves_to_listen_notify_transport():
+    if not _build_broker_url().startswith("sqla+"):
+        pytest.skip("broker is not sqla+")
+    _ensure_celery_configured()
+    assert celery_app.conf.broker_transport_options["listen_notify"] is True
+    assert resolve_transport("sqla") is celery_transport.Transport
+
+
+@pytest.mark.integration
+def test_enqueue_notifies_listening_consumer():
+    with Connection(_build_broker_url(), transport_options={"listen_notify": True}) as conn:
+        transport = conn.transport
+        channel = conn.default_channel
+        channel._active_queues.append("listen_notify_probe")
+        assert transport._sync_listen() is True
+
+        channel._put("listen_notify_probe", {"body": "probe"})
+
+        ready, _, _ = select.select([transport._listener], [], [], 5.0)
+        assert ready
+        transport._listener.poll()
+        assert [n.channel for n in transport._listener.notifies] == ["kombu_q_listen_notify_probe"]
+        channel._purge("listen_notify_probe")
@@ -0,0 +1,144 @@
+"""
+Time-partitioned kombu_message maintenance.
+
+kombu_message is range-partitioned by enqueued_at into daily partitions; a
+maintenance task pre-creates future partitions and drops old partitions once
+they are empty (acks delete rows, so any row left is an unacked message).
+"""
+
+from datetime import datetime, timezone
+
+from kombu import Connection
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.celery_app import _build_broker_url, _sync_sqlalchemy_url
+from app.core import config
+from app.tasks import maintenance
+from app.tasks.beat_schedule import build_beat_schedule
+
+
+def test_maintenance_task_passes_partition_settings(monkeypatch):
+    calls = []
+
+    async def fake_maintain(days_ahead, retention_days, visibility_timeout_s):
+        calls.append((days_ahead, retention_days, visibility_timeout_s))
+        return {"created": 1, "dropped": ["kombu_message_p20261010"]}
+
+    monkeypatch.setattr(maintenance, "_maintain_broker_partitions", fake_maintain)
+    monkeypatch.setattr(config.settings, "CELERY_BROKER_PARTITION_PRECREATE_DAYS", 5)
+    monkeypatch.setattr(config.settings, "CELERY_BROKER_PARTITION_RETENTION_DAYS", 2)
+
+    result = maintenance.maintain_broker_partitions.run(correlation_id="partition-test")
+
+    assert result == {"created": 1, "dropped": ["kombu_message_p20261010"]}
+    assert calls == [(5, 2, config.settings.CELERY_BROKER_VISIBILITY_TIMEOUT_S)]
+
+
+def test_partition_maintenance_is_scheduled():
+    entry = build_beat_schedule()["broker-partition-maintenance"]
+    assert entry["task"] == "app.tasks.maintenance.maintain_broker_partitions"
+
+
+@pytest.mark.integration
+def test_messages_land_in_todays_partition_and_live_partitions_survive_drop():
+    result = maintenance.maintain_broker_partitions.run()
+    today = f"kombu_message_p{datetime.now(timezone.utc):%Y%m%d}"
+    assert today not in result["dropped"]
+
+    queue = "partition_probe"
+    with Connection(_build_broker_url()) as conn:
+        conn.default_channel._put(queue, {"body": "probe", "properties": {"delivery_tag": "partition-probe"}})
+        engine = create_engine(_sync_sqlalchemy_url(config.settings.DATABASE_URL.unicode_string()))
+        with engine.connect() as db:
+            relkind = db.execute(
+                text("SELECT relkind FROM pg_class WHERE oid = 'public.kombu_message'::regclass")
+            ).scalar_one()
+            partitions = db.execute(
+                text(
+                    "SELECT DISTINCT m.tableoid::regclass::text FROM kombu_message m "
+                    "JOIN kombu_queue q ON q.id = m.queue_id WHERE q.name = :queue"
+                ),
+                {"queue": queue},
+            ).scalars().all()
+        conn.default_channel._purge(queue)
+
+    assert relkind == "p"
+    assert partitions == [today]
+
+
+@pytest.mark.integration
+def test_partition_with_expired_lease_message_is_kept_until_empty():
+    day = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    partition = f"kombu_message_p{day:%Y%m%d}"
+    engine = create_engine(_sync_sqlalchemy_url(config.settings.DATABASE_URL.unicode_string()))
+    drop = text("SELECT security.kombu_message_drop_partitions(2, :visibility_timeout_s)")
+    params = {"visibility_timeout_s": config.settings.CELERY_BROKER_VISIBILITY_TIMEOUT_S}
+    with engine.begin() as db:
+        db.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS public.{partition} PARTITION OF public.kombu_message "
+                "FOR VALUES FROM ('2020-01-01 00:00+00') TO ('2020-01-02 00:00+00')"
+            )
+        )
+        queue_id = db.execute(
+            text(
+                "INSERT INTO kombu_queue (name) VALUES ('partition_lease_probe') "
+                "ON CONFLICT (name) DO UPDATE SET name = EXCLUDED.name RETURNING id"
+            )
+        ).scalar_one()
+        # Dequeued long ago and never acked: the lease expired before recovery ran.
+        db.execute(
+            text(
+                "INSERT INTO kombu_message (visible, \"timestamp\", payload, queue_id, enqueued_at) "
+                "VALUES (false, '2020-01-01 00:05', 'unacked', :queue_id, :day)"
+            ),
+            {"queue_id": queue_id, "day": day},
+        )
+
+    with engine.begin() as db:
+        kept = db.execute(drop, params).scalars().all()
+        db.execute(text(f"DELETE FROM public.{partition}"))
+    with engine.begin() as db:
+        dropped = db.execute(drop, params).scalars().all()
+
+    assert partition not in kept
+    assert partition in dropped
+
+
+@pytest.mark.integration
+def test_drop_skips_partition_in_use_without_waiting():
+    day = datetime(2020, 1, 2, tzinfo=timezone.utc)
+    partition = f"kombu_message_p{day:%Y%m%d}"
+    engine = create_engine(_sync_sqlalchemy_url(config.settings.DATABASE_URL.unicode_string()))
+    drop = text("SELECT security.kombu_message_drop_partitions(2, :visibility_timeout_s)")
+    params = {"visibility_timeout_s": config.settings.CELERY_BROKER_VISIBILITY_TIMEOUT_S}
+    with engine.begin() as db:
+        db.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS public.{partition} PARTITION OF public.kombu_message "
+                "FOR VALUES FROM ('2020-01-02 00:00+00') TO ('2020-01-03 00:00+00')"
+            )
+        )
+
+    with engine.connect() as reader:
+        # An open transaction that has read the partition holds ACCESS SHARE on it.
+        reader.execute(text(f"SELECT count(*) FROM public.{partition}"))
+        with engine.begin() as db:
+            db.execute(text("SET LOCAL lock_timeout = '5s'"))
+            skipped = db.execute(drop, params).scalars().all()
+            held = db.execute(
+                text(
+                    "SELECT count(*) FROM pg_locks WHERE relation = to_regclass(:partition) "
+                    "AND pid = pg_backend_pid() AND mode = 'AccessExclusiveLock'"
+                ),
+                {"partition": f"public.{partition}"},
+            ).scalar_one()
+        reader.rollback()
+
+    with engine.begin() as db:
+        dropped = db.execute(drop, params).scalars().all()
+
+    assert partition not in skipped
+    assert held == 0
+    assert partition in dropped
@@ -0,0 +1,129 @@
+"""
+SKIP LOCKED dequeue and delete-on-ack for the sqla+ Postgres broker.
+
+Acked and dead-lettered messages are deleted; requeued messages flip their
+original row back to visible instead of inserting a copy.
+"""
+
+from base64 import b64encode
+from datetime import datetime, timezone
+from json import loads
+
+from kombu import Connection
+import pytest
+from sqlalchemy import create_engine, text
+
+from app import celery_transport
+from app.celery_app import _build_broker_url, _sync_sqlalchemy_url
+from app.core.config import settings
+from app.tasks.maintenance import compact_broker_messages
+
+ENQUEUED_AT = datetime(2026, 10, 17, 12, 0, tzinfo=timezone.utc)
+
+
+class _FakeSession:
+    def __init__(self):
+        self.statements = []
+        self.commits = 0
+
+    def execute(self, statement, params=None):
+        self.statements.append((str(statement), params))
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+def _channel():
+    client = Connection("sqla+postgresql://u:p@127.0.0.1:1/db", transport_options={"delete_on_ack": True})
+    transport = celery_transport.Transport(client)
+    channel = transport.create_channel(transport)
+    channel._session = _FakeSession()
+    channel._table = lambda: "kombu_message"
+    return channel
+
+
+def _deliver(channel, delivery_tag: str, message_id: int):
+    payload = {
+        "body": b64encode(b"{}").decode(),
+        "properties": {
+            "body_encoding": "base64",
+            "delivery_tag": delivery_tag,
+            "delivery_info": {"exchange": "", "routing_key": "llm"},
+        },
+        "content-type": "application/json",
+        "content-encoding": "utf-8",
+        "headers": {},
+    }
+    message = channel.Message(payload, channel=channel)
+    channel.qos.append(message, delivery_tag)
+    channel._delivered_ids[delivery_tag] = (message_id, ENQUEUED_AT)
+    return message
+
+
+def test_ack_and_dead_letter_reject_delete_the_message_row():
+    channel = _channel()
+    _deliver(channel, "acked", 11)
+    _deliver(channel, "rejected", 12)
+
+    channel.basic_ack("acked")
+    channel.basic_reject("rejected", requeue=False)
+
+    statements = channel._session.statements
+    assert [params for _, params in statements] == [
+        {"id": 11, "enqueued_at": ENQUEUED_AT},
+        {"id": 12, "enqueued_at": ENQUEUED_AT},
+    ]
+    assert all(sql.startswith("DELETE FROM kombu_message") for sql, _ in statements)
+    assert channel._delivered_ids == {}
+
+    # Acking an untracked tag (e.g. a basic_get fallback path) issues no SQL.
+    channel._delete_delivered("unknown")
+    assert len(statements) == 2
+
+
+def test_requeue_flips_original_row_visible_with_redelivered_flag():
+    channel = _channel()
+    _deliver(channel, "requeued", 21)
+
+    channel.basic_reject("requeued", requeue=True)
+
+    [(sql, params)] = channel._session.statements
+    assert sql.startswith("UPDATE kombu_message SET visible = true")
+    assert (params["id"], params["enqueued_at"]) == (21, ENQUEUED_AT)
+    assert loads(params["payload"])["redelivered"] is True
+    assert channel._delivered_ids == {}
+
+
+@pytest.mark.integration
+def test_concurrent_consumers_get_distinct_messages_and_ack_deletes():
+    queue = "skip_locked_probe"
+    with Connection(_build_broker_url(), transport_options={"delete_on_ack": True}) as producer:
+        for n in range(2):
+            producer.default_channel._put(queue, {"body": str(n), "properties": {"delivery_tag": f"probe-{n}"}})
+
+    engine = create_engine(_sync_sqlalchemy_url(settings.DATABASE_URL.unicode_string()))
+    with Connection(_build_broker_url(), transport_options={"delete_on_ack": True}) as first, Connection(
+        _build_broker_url(), transport_options={"delete_on_ack": True}
+    ) as second:
+        first_channel, second_channel = first.default_channel, second.default_channel
+        got = {first_channel._get(queue)["body"], second_channel._get(queue)["body"]}
+        assert got == {"0", "1"}
+
+        first_channel._delete_delivered("probe-0")
+        first_channel._delete_delivered("probe-1")
+        second_channel._delete_delivered("probe-0")
+        second_channel._delete_delivered("probe-1")
+
+    with engine.connect() as conn:
+        remaining = conn.execute(
+            text(
+                "SELECT count(*) FROM kombu_message m JOIN kombu_queue q ON q.id = m.queue_id "
+                "WHERE q.name = :queue"
+            ),
+            {"queue": queue},
+        ).scalar_one()
+    assert remaining == 0
+    assert compact_broker_messages.run(older_than_s=3600, max_batches=1)["batches"] == 1
@@ -0,0 +1,119 @@
+"""
+Batched DLQ routing.
+
+Rejections are written as multi-row inserts with tracebacks formatted once per
+error signature and identical failures collapsed; the webhook writer
+group-commits concurrent rejections so a malformed flood costs one
+transaction per batch instead of one per request.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from uuid import uuid4
+
+import pytest
+
+from app.ingestion import dlq_handler, dlq_writer
+from app.ingestion.dlq_handler import DLQFailure, DLQHandler
+from app.ingestion.dlq_writer import BufferedDLQWriter
+
+
+class _FakeSession:
+    def __init__(self):
+        self.inserts = []
+
+    async def execute(self, statement, rows):
+        self.inserts.append(rows)
+
+
+def _failure(correlation_id, message="created must be an integer unix timestamp", payload=None):
+    try:
+        raise ValueError(message)
+    except ValueError as exc:
+        return DLQFailure(
+            original_payload=payload or {"event_type": "purchase", "idempotency_key": str(correlation_id)},
+            error=exc,
+            correlation_id=str(correlation_id),
+            source="stripe",
+        )
+
+
+@pytest.mark.asyncio
+async def test_route_many_formats_once_per_signature_and_inserts_once(monkeypatch):
+    formatted = []
+    original_format = dlq_handler.traceback.format_exception
+
+    def _counting_format(*args, **kwargs):
+        formatted.append(args[1])
+        return original_format(*args, **kwargs)
+
+    monkeypatch.setattr(dlq_handler.traceback, "format_exception", _counting_format)
+    monkeypatch.setattr(dlq_handler.settings, "DLQ_TRACEBACK_MAX_CHARS", 40)
+
+    keys = [uuid4() for _ in range(3)]
+    duplicate = _failure(keys[0])
+    failures = [_failure(key) for key in keys] + [duplicate, _failure(uuid4(), message="amount must be an integer")]
+    session = _FakeSession()
+
+    ids = await DLQHandler().route_many_to_dlq(session=session, tenant_id=uuid4(), failures=failures)
+
+    [rows] = session.inserts
+    assert len(rows) == 4
+    assert ids[3] == ids[0]
+    assert len(set(ids)) == 4
+    assert len(formatted) == 2
+    assert all(len(row["error_traceback"]) == 40 for row in rows)
+    assert rows[0]["error_traceback"] == rows[2]["error_traceback"]
+
+
+def test_constructed_error_outside_handler_has_no_traceback():
+    failure = DLQFailure(original_payload={}, error=ValueError("bad"), correlation_id=None)
+
+    assert failure.traceback_source is None
+    assert dlq_handler.format_dlq_traceback(failure.traceback_source) is None
+
+
+class _RecordingHandler:
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    async def route_many_to_dlq(self, session, tenant_id, failures):
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise RuntimeError("db down")
+        self.batches.append(len(failures))
+        return [uuid4() for _ in failures]
+
+
+@asynccontextmanager
+async def _fake_session(tenant_id):
+    yield object()
+
+
+@pytest.mark.asyncio
+async def test_writer_group_commits_concurrent_rejections(monkeypatch):
+    monkeypatch.setattr(dlq_writer, "get_session", _fake_session)
+    handler = _RecordingHandler()
+    writer = BufferedDLQWriter(batch_size=20, handler=handler)
+    tenant_id = uuid4()
+
+    ids = await asyncio.gather(*(writer.submit(tenant_id, _failure(uuid4())) for _ in range(50)))
+
+    assert len(set(ids)) == 50
+    assert sum(handler.batches) == 50
+    # Rejections arriving while a write is pending share its transaction.
+    assert handler.batches == [20, 20, 10]
+
+
+@pytest.mark.asyncio
+async def test_writer_fails_every_waiter_in_a_failed_batch(monkeypatch):
+    monkeypatch.setattr(dlq_writer, "get_session", _fake_session)
+    writer = BufferedDLQWriter(batch_size=10, handler=_RecordingHandler(fail=True))
+
+    results = await asyncio.gather(
+        *(writer.submit(uuid4(), _failure(uuid4())) for _ in range(3)), return_exceptions=True
+    )
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert writer._pending == [] and not writer._draining
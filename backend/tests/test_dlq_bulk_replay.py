@@ -0,0 +1,222 @@
+"""
+Bulk DLQ replay engine.
+
+Dead events are replayed in keyset batches through the set-based ingestion
+path; each batch updates its dead events and the run checkpoint in the same
+transaction, so a replay resumes from its checkpoint and never re-ingests.
+"""
+
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import func, select
+
+from app.db.session import get_session
+from app.ingestion import dlq_replay
+from app.ingestion.dlq_handler import DLQHandler
+from app.ingestion.dlq_replay import DLQReplayEngine, ReplayFilter, replay_idempotency_key
+from app.models import AttributionEvent, DeadEvent
+
+
+class _Result:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def first(self):
+        return self.rows[0] if self.rows else None
+
+    def one(self):
+        [row] = self.rows
+        return row
+
+    def all(self):
+        return self.rows
+
+
+class _FakeDb:
+    """Holds dead events and one run row; executes the engine's statements in memory."""
+
+    def __init__(self, dead_events):
+        self.dead_events = dead_events
+        self.run = None
+        self.dead_event_updates = []
+
+    def _run_row(self):
+        return SimpleNamespace(**self.run)
+
+    async def execute(self, statement, params):
+        sql = str(statement)
+        if sql.lstrip().startswith("INSERT INTO dead_event_replay_runs"):
+            now = datetime.now(timezone.utc)
+            self.run = {
+                **params, "status": "running", "cursor_ingested_at": None, "cursor_id": None,
+                "selected_count": 0, "resolved_count": 0, "duplicate_count": 0, "failed_count": 0,
+                "started_at": now, "updated_at": now,
+            }
+            return _Result([])
+        if "FROM dead_event_replay_runs" in sql:
+            return _Result([self._run_row()])
+        if "FROM dead_events" in sql:
+            cursor = params["cursor_ingested_at"], params["cursor_id"]
+            rows = [
+                row for row in self.dead_events
+                if cursor[0] is None or (row.ingested_at, row.id) > cursor
+            ]
+            return _Result(rows[: params["batch_size"]])
+        if sql.lstrip().startswith("UPDATE dead_events"):
+            self.dead_event_updates.append(params)
+            return _Result([])
+        if sql.lstrip().startswith("UPDATE dead_event_replay_runs"):
+            run = self.run
+            if params["cursor_id"] is not None:
+                run["cursor_ingested_at"], run["cursor_id"] = params["cursor_ingested_at"], params["cursor_id"]
+            run["selected_count"] += params["selected"]
+            run["resolved_count"] += params["resolved"]
+            run["duplicate_count"] += params["duplicates"]
+            run["failed_count"] += params["failed"]
+            run["status"] = "completed" if params["done"] else run["status"]
+            return _Result([self._run_row()])
+        raise AssertionError(f"unexpected statement: {sql}")
+
+
+class _FakeService:
+    def __init__(self):
+        self.calls = []
+
+    async def ingest_events_batch(self, session, tenant_id, items, source, route_invalid_to_dlq):
+        self.calls.append((source, [item["idempotency_key"] for item in items], route_invalid_to_dlq))
+        outcomes = []
+        for item in items:
+            status = item["event_data"]["expect"]
+            outcomes.append(
+                {"status": status, "event_id": str(uuid4()), "error": "bad payload" if status == "rejected" else None}
+            )
+        return outcomes
+
+
+def _dead_event(n, expect, source="shopify"):
+    payload = {"expect": expect}
+    if n % 2 == 0:
+        payload["idempotency_key"] = f"original-{n}"
+    return SimpleNamespace(
+        id=uuid4(),
+        ingested_at=datetime(2026, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=n),
+        source=source,
+        raw_payload=payload,
+    )
+
+
+@pytest.mark.asyncio
+async def test_replay_batches_through_checkpoint_and_rate_limits(monkeypatch):
+    dead_events = [
+        _dead_event(0, "inserted"),
+        _dead_event(1, "duplicate", source="stripe"),
+        _dead_event(2, "rejected"),
+        _dead_event(3, "inserted"),
+        _dead_event(4, "inserted"),
+    ]
+    db = _FakeDb(dead_events)
+
+    @asynccontextmanager
+    async def _session(tenant_id):
+        yield db
+
+    monkeypatch.setattr(dlq_replay, "get_session", _session)
+    sleeps = []
+
+    async def _sleep(delay):
+        sleeps.append(delay)
+
+    service = _FakeService()
+    engine = DLQReplayEngine(
+        batch_size=2, max_events_per_second=10, service=service, clock=lambda: 0.0, sleep=_sleep
+    )
+
+    progress = await engine.replay(ReplayFilter(tenant_id=uuid4()))
+
+    assert (progress.status, progress.selected) == ("completed", 5)
+    assert (progress.resolved, progress.duplicates, progress.failed) == (3, 1, 1)
+    assert db.run["cursor_id"] == dead_events[-1].id
+    # Batches of 2 are split per source; invalid payloads are reported, not re-queued.
+    assert [call[0] for call in service.calls] == ["shopify", "stripe", "shopify", "shopify"]
+    assert service.calls[0][1] == ["original-0"]
+    assert service.calls[1][1] == [f"dlq-replay:{dead_events[1].id}"]
+    assert all(call[2] is False for call in service.calls)
+    assert [update["resolved"] for update in db.dead_event_updates] == [[True, True], [False, True], [True]]
+    # 2 then 4 events replayed at 10/s with a frozen clock.
+    assert sleeps == pytest.approx([0.2, 0.4])
+
+
+@pytest.mark.asyncio
+async def test_completed_run_is_not_replayed_again(monkeypatch):
+    db = _FakeDb([_dead_event(0, "inserted")])
+
+    @asynccontextmanager
+    async def _session(tenant_id):
+        yield db
+
+    monkeypatch.setattr(dlq_replay, "get_session", _session)
+    service = _FakeService()
+    engine = DLQReplayEngine(batch_size=10, max_events_per_second=1000, service=service)
+
+    tenant_id = uuid4()
+    first = await engine.replay(ReplayFilter(tenant_id=tenant_id))
+    resumed = await engine.run(tenant_id, first.run_id)
+
+    assert resumed.status == "completed"
+    assert resumed.selected == 1
+    assert len(service.calls) == 1
+
+
+def test_idempotency_key_prefers_original_webhook_key():
+    dead_event_id = uuid4()
+    assert replay_idempotency_key(dead_event_id, {"idempotency_key": "shopify_order_1"}) == "shopify_order_1"
+    assert replay_idempotency_key(dead_event_id, {}) == f"dlq-replay:{dead_event_id}"
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_replay_resolves_dead_events_once(test_tenant):
+    tenant_id = test_tenant
+    keys = [f"dlq_replay_{uuid4()}" for _ in range(3)]
+    async with get_session(tenant_id=tenant_id) as session:
+        for key in keys:
+            payload = {
+                "event_type": "purchase",
+                "event_timestamp": datetime.now(timezone.utc).isoformat(),
+                "revenue_amount": "10.00",
+                "session_id": str(uuid4()),
+                "vendor": "shopify",
+                "idempotency_key": key,
+            }
+            await DLQHandler().route_to_dlq(
+                session=session,
+                tenant_id=tenant_id,
+                original_payload=payload,
+                error=TimeoutError("upstream timeout"),
+                correlation_id=key,
+                source="shopify",
+            )
+
+    engine = DLQReplayEngine(batch_size=2, max_events_per_second=1000)
+    first = await engine.replay(ReplayFilter(tenant_id=tenant_id, error_type="unknown"))
+    second = await engine.replay(ReplayFilter(tenant_id=tenant_id, error_type="unknown"))
+
+    async with get_session(tenant_id=tenant_id) as session:
+        ingested = await session.scalar(
+            select(func.count())
+            .select_from(AttributionEvent)
+            .where(AttributionEvent.tenant_id == tenant_id, AttributionEvent.idempotency_key.in_(keys))
+        )
+        pending = await session.scalar(
+            select(func.count())
+            .select_from(DeadEvent)
+            .where(DeadEvent.tenant_id == tenant_id, DeadEvent.remediation_status != "resolved")
+        )
+
+    assert (first.status, first.selected, first.resolved) == ("completed", 3, 3)
+    assert second.selected == 0
+    assert (ingested, pending) == (3, 0)
@@ -0,0 +1,162 @@
+"""
+Dead event error-signature clusters.
+
+Dead events carry an error signature (exception type + hash of the message with
+parameters stripped), computed at insert; dead_event_error_clusters keeps
+per-tenant counts per signature so the top clusters are listed, and replayed,
+without scanning dead_events.
+"""
+
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import text
+
+from app.db.session import get_session
+from app.ingestion.dlq_handler import DLQFailure, DLQHandler, error_signature
+from app.ingestion.dlq_replay import DLQReplayEngine, ReplayFilter, top_error_clusters
+
+_MESSAGES = [
+    "Missing required field 'session_id' in event 12",
+    "missing required field \"order_id\" in event 98412",
+    "Tenant 3f2b9c1e-8d4a-4c6b-9e2f-1a2b3c4d5e6f not found",
+    "amount 12.50 exceeds limit 10 at 0x7ffe4a",
+    "  connection   reset\tby peer  ",
+]
+
+
+def test_signature_ignores_parameters_but_not_type_or_shape():
+    assert error_signature("ValueError", _MESSAGES[0]) == error_signature("ValueError", _MESSAGES[1])
+    assert error_signature("ValueError", "amount 12.50 exceeds limit 10 at 0x7ffe4a") == error_signature(
+        "ValueError", "Amount 3 exceeds limit 250.0 at 0xdeadbeef"
+    )
+    assert error_signature("ValueError", _MESSAGES[0]) != error_signature("KeyError", _MESSAGES[0])
+    assert error_signature("ValueError", _MESSAGES[0]) != error_signature("ValueError", _MESSAGES[3])
+    assert error_signature("ValueError", _MESSAGES[0]).startswith("ValueError:")
+
+
+class _FakeSession:
+    def __init__(self):
+        self.inserts = []
+
+    async def execute(self, statement, rows):
+        self.inserts.append(rows)
+
+
+@pytest.mark.asyncio
+async def test_routed_rows_carry_signature():
+    failures = [
+        DLQFailure(original_payload={}, error=ValueError(message), correlation_id=str(uuid4()))
+        for message in _MESSAGES[:2]
+    ]
+    session = _FakeSession()
+
+    await DLQHandler().route_many_to_dlq(session=session, tenant_id=uuid4(), failures=failures)
+
+    [rows] = session.inserts
+    assert rows[0]["error_signature"] == rows[1]["error_signature"] == error_signature("ValueError", _MESSAGES[0])
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_sql_signature_matches_python():
+    async with get_session(tenant_id=uuid4()) as session:
+        for message in _MESSAGES:
+            in_sql = await session.scalar(
+                text("SELECT dead_event_error_signature('ValueError', :message)"), {"message": message}
+            )
+            assert in_sql == error_signature("ValueError", message)
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_clusters_track_inserts_and_replay_one_cluster(test_tenant):
+    tenant_id = test_tenant
+    failures = [
+        DLQFailure(
+            original_payload={"event_type": "purchase"},
+            error=ValueError(f"Missing required field 'session_id' in event {n}"),
+            correlation_id=str(uuid4()),
+        )
+        for n in range(3)
+    ] + [
+        DLQFailure(
+            original_payload={"event_type": "purchase"},
+            error=KeyError("vendor"),
+            correlation_id=str(uuid4()),
+        )
+    ]
+    async with get_session(tenant_id=tenant_id) as session:
+        await DLQHandler().route_many_to_dlq(session=session, tenant_id=tenant_id, failures=failures)
+        # Rows inserted without a signature get one from the BEFORE INSERT trigger.
+        await session.execute(
+            text(
+                """
+                INSERT INTO dead_events (tenant_id, source, error_code, error_detail, raw_payload,
+                                         event_type, error_type, error_message)
+                VALUES (:tenant_id, 'shopify', 'ValueError', '{}'::jsonb, '{}'::jsonb,
+                        'purchase', 'unknown', 'Missing required field ''order_id'' in event 7')
+                """
+            ),
+            {"tenant_id": tenant_id},
+        )
+
+    async with get_session(tenant_id=tenant_id) as session:
+        clusters = await top_error_clusters(session, tenant_id)
+
+    top = clusters[0]
+    assert top.error_signature == error_signature("ValueError", "missing required field 'x' in event 1")
+    assert (top.event_count, top.open_count) == (4, 4)
+    assert sorted(cluster.event_count for cluster in clusters) == [1, 4]
+
+    engine = DLQReplayEngine(batch_size=10, max_events_per_second=1000)
+    progress = await engine.replay(
+        ReplayFilter(tenant_id=tenant_id, error_signature=top.error_signature, force=True)
+    )
+
+    assert progress.selected == 4
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_rebuild_backfills_pre_existing_dead_events(test_tenant):
+    tenant_id = test_tenant
+    failures = [
+        DLQFailure(
+            original_payload={"event_type": "purchase"},
+            error=ValueError(f"Missing required field 'session_id' in event {n}"),
+            correlation_id=str(uuid4()),
+        )
+        for n in range(2)
+    ]
+    async with get_session(tenant_id=tenant_id) as session:
+        await DLQHandler().route_many_to_dlq(session=session, tenant_id=tenant_id, failures=failures)
+        # Rows as they stood before the migration: no signature, no clusters.
+        await session.execute(
+            text("UPDATE dead_events SET error_signature = NULL WHERE tenant_id = :tenant_id"),
+            {"tenant_id": tenant_id},
+        )
+        await session.execute(
+            text("DELETE FROM dead_event_error_clusters WHERE tenant_id = :tenant_id"),
+            {"tenant_id": tenant_id},
+        )
+
+    async with get_session(tenant_id=tenant_id) as session:
+        await session.execute(text("SELECT security.rebuild_dead_event_error_clusters()"))
+        # The tenant GUC survives the per-tenant loop.
+        assert await session.scalar(text("SELECT current_setting('app.current_tenant_id', true)")) == str(tenant_id)
+
+    async with get_session(tenant_id=tenant_id) as session:
+        signatures = (
+            await session.scalars(
+                text("SELECT error_signature FROM dead_events WHERE tenant_id = :tenant_id"),
+                {"tenant_id": tenant_id},
+            )
+        ).all()
+        clusters = await top_error_clusters(session, tenant_id)
+
+    expected = error_signature("ValueError", _MESSAGES[0])
+    assert signatures == [expected, expected]
+    assert [(cluster.error_signature, cluster.event_count, cluster.open_count) for cluster in clusters] == [
+        (expected, 2, 2)
+    ]
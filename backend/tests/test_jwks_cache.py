@@ -0,0 +1,159 @@
+"""
+JWKS cache tests.
+
+Uses a local JWKS file (file:// URL) with symmetric `oct` keys so no network or
+asymmetric crypto backend is required.
+"""
+
+import base64
+import json
+import time
+from uuid import uuid4
+
+import jwt
+import pytest
+
+from app.core.config import settings
+from app.security import auth
+from app.security.jwks import JWKSCache, UnknownSigningKeyError, get_jwks_cache, reset_jwks_caches
+
+
+def _b64(secret: bytes) -> str:
+    return base64.urlsafe_b64encode(secret).rstrip(b"=").decode()
+
+
+def _write_jwks(path, keys: dict[str, bytes]) -> None:
+    path.write_text(
+        json.dumps(
+            {"keys": [{"kty": "oct", "kid": kid, "alg": "HS256", "k": _b64(secret)} for kid, secret in keys.items()]}
+        )
+    )
+
+
+def _token(kid: str, secret: bytes, *, exp_in: int = 300) -> str:
+    payload = {
+        "sub": "user-1",
+        "tenant_id": str(uuid4()),
+        "iss": settings.AUTH_JWT_ISSUER,
+        "aud": settings.AUTH_JWT_AUDIENCE,
+        "exp": int(time.time()) + exp_in,
+    }
+    return jwt.encode(payload, secret, algorithm="HS256", headers={"kid": kid})
+
+
+@pytest.fixture
+def jwks_file(tmp_path, monkeypatch):
+    path = tmp_path / "jwks.json"
+    _write_jwks(path, {"k1": b"secret-one-secret-one-secret-one"})
+    monkeypatch.setattr(settings, "AUTH_JWT_JWKS_URL", path.as_uri())
+    monkeypatch.setattr(settings, "AUTH_JWT_SECRET", None)
+    monkeypatch.setattr(settings, "AUTH_JWT_ALGORITHM", "HS256")
+    reset_jwks_caches()
+    auth._verified_tokens.clear()
+    yield path
+    reset_jwks_caches()
+    auth._verified_tokens.clear()
+
+
+def test_key_set_fetched_once_across_requests(jwks_file):
+    secret = b"secret-one-secret-one-secret-one"
+    for _ in range(5):
+        claims = auth._decode_token(_token("k1", secret))
+        assert claims["sub"] == "user-1"
+
+    assert get_jwks_cache(settings.AUTH_JWT_JWKS_URL).fetch_count == 1
+
+
+def test_unknown_kid_refetches_once_then_rate_limits(jwks_file):
+    cache = get_jwks_cache(settings.AUTH_JWT_JWKS_URL, min_refetch_interval_seconds=60)
+    cache.get_signing_key("k1")
+
+    # Age the last fetch so the first unknown kid may refetch.
+    cache._last_fetch_at -= 120
+    with pytest.raises(UnknownSigningKeyError):
+        cache.get_signing_key("missing")
+    with pytest.raises(UnknownSigningKeyError):
+        cache.get_signing_key("missing")
+
+    assert cache.fetch_count == 2
+
+
+def test_rotated_key_is_picked_up_on_unknown_kid(jwks_file):
+    secret_two = b"secret-two-secret-two-secret-two"
+    cache = get_jwks_cache(settings.AUTH_JWT_JWKS_URL)
+    cache.get_signing_key("k1")
+
+    _write_jwks(jwks_file, {"k1": b"secret-one-secret-one-secret-one", "k2": secret_two})
+    cache._last_fetch_at -= cache.min_refetch_interval_seconds + 1
+
+    claims = auth._decode_token(_token("k2", secret_two))
+    assert claims["sub"] == "user-1"
+
+
+def test_unknown_kid_maps_to_invalid_token(jwks_file):
+    with pytest.raises(jwt.InvalidTokenError):
+        auth._decode_token(_token("nope", b"other-secret-other-secret-other!"))
+
+
+def test_verified_token_cache_never_outlives_exp(jwks_file):
+    secret = b"secret-one-secret-one-secret-one"
+    token = _token("k1", secret, exp_in=1)
+    auth._decode_token(token)
+
+    time.sleep(1.1)
+    with pytest.raises(jwt.ExpiredSignatureError):
+        auth._decode_token(token)
+
+
+def test_stale_keys_served_when_refresh_fails():
+    calls = {"n": 0}
+
+    def _fetch(_url):
+        calls["n"] += 1
+        if calls["n"] > 1:
+            raise RuntimeError("jwks endpoint down")
+        return {"keys": [{"kty": "oct", "kid": "k1", "k": _b64(b"x" * 32)}]}
+
+    cache = JWKSCache(
+        "https://jwks.invalid",
+        ttl_seconds=1,
+        min_refetch_interval_seconds=0,
+        fetcher=_fetch,
+        start_background_refresh=False,
+    )
+    first = cache.get_signing_key("k1")
+    cache._expires_at = 0.0
+
+    assert cache.get_signing_key("k1") is first
+    assert calls["n"] == 2
+
+
+def test_background_refresh_backs_off_while_provider_is_down():
+    def _fetch(_url):
+        raise RuntimeError("jwks endpoint down")
+
+    class _Stop:
+        def __init__(self, rounds):
+            self.waits = []
+            self.rounds = rounds
+
+        def is_set(self):
+            return False
+
+        def wait(self, timeout):
+            self.waits.append(timeout)
+            return len(self.waits) > self.rounds
+
+    cache = JWKSCache(
+        "https://jwks.invalid",
+        ttl_seconds=1,
+        min_refetch_interval_seconds=0,
+        fetcher=_fetch,
+        start_background_refresh=False,
+    )
+    cache._stop = _Stop(rounds=12)
+    cache._refresh_loop()
+
+    waits = cache._stop.waits
+    assert waits[1:5] == [1.0, 2.0, 4.0, 8.0]
+    assert max(waits) == 300.0
@@ -0,0 +1,91 @@
+"""
+Parallel matview refresh tests.
+
+Independent views refresh concurrently; a view never starts before the views
+it depends on have finished.
+"""
+
+from dataclasses import replace
+from datetime import datetime, timezone
+import threading
+import time
+
+from app.matviews import executor, registry
+
+_BASE = registry.get_entry("mv_allocation_summary")
+_DELAY_S = 0.2
+
+
+def _entry(name: str, *dependencies: str) -> registry.MatviewRegistryEntry:
+    return replace(_BASE, name=name, dependencies=dependencies)
+
+
+def _install_fake_refresh(monkeypatch):
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0, "started": [], "finished": []}
+
+    def fake_refresh_single(view_name, tenant_id, correlation_id=None, *, skip_if_fresh=False, interval_seconds=None):
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+            state["started"].append(view_name)
+        time.sleep(_DELAY_S)
+        with lock:
+            state["running"] -= 1
+            state["finished"].append(view_name)
+        return executor.RefreshResult(
+            view_name=view_name,
+            tenant_id=tenant_id,
+            correlation_id=correlation_id,
+            outcome=executor.RefreshOutcome.SUCCESS,
+            started_at=datetime.now(timezone.utc),
+            duration_ms=int(_DELAY_S * 1000),
+            error_type=None,
+            error_message=None,
+            lock_key_debug=None,
+        )
+
+    monkeypatch.setattr(executor, "refresh_single", fake_refresh_single)
+    return state
+
+
+def test_independent_views_refresh_concurrently(monkeypatch):
+    state = _install_fake_refresh(monkeypatch)
+    entries = [_entry(f"mv_{i}") for i in range(5)]
+
+    started = time.monotonic()
+    results = executor.refresh_entries_concurrently(entries, None, "corr", max_parallel=5)
+    elapsed = time.monotonic() - started
+
+    assert [result.view_name for result in results] == [entry.name for entry in entries]
+    assert state["peak"] == 5
+    # Roughly the slowest single view, not the sum of all five.
+    assert elapsed < _DELAY_S * 3
+
+
+def test_dependents_wait_for_their_dependencies(monkeypatch):
+    state = _install_fake_refresh(monkeypatch)
+    entries = [
+        _entry("mv_root"),
+        _entry("mv_child", "mv_root"),
+        _entry("mv_independent"),
+        _entry("mv_grandchild", "mv_child", "mv_independent"),
+    ]
+
+    executor.refresh_entries_concurrently(entries, None, "corr", max_parallel=4)
+
+    finished, started = state["finished"], state["started"]
+    assert finished.index("mv_root") < started.index("mv_child")
+    assert finished.index("mv_child") < started.index("mv_grandchild")
+    assert finished.index("mv_independent") < started.index("mv_grandchild")
+    assert set(started[:2]) == {"mv_root", "mv_independent"}
+
+
+def test_single_slot_refreshes_sequentially_in_given_order(monkeypatch):
+    state = _install_fake_refresh(monkeypatch)
+    entries = [_entry("mv_b"), _entry("mv_a"), _entry("mv_c", "mv_a")]
+
+    executor.refresh_entries_concurrently(entries, None, "corr", max_parallel=1)
+
+    assert state["peak"] == 1
+    assert state["started"] == ["mv_b", "mv_a", "mv_c"]
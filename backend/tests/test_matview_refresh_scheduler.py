@@ -0,0 +1,155 @@
+"""
+Staleness-aware matview refresh scheduling tests.
+
+Views inside their max_staleness_seconds budget are skipped; due views are
+refreshed most-overdue first without violating registry dependencies.
+"""
+
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+
+from app.matviews import executor, registry, scheduler
+from app.tasks import matviews as matview_tasks
+
+NOW = datetime(2026, 10, 17, 12, 0, tzinfo=timezone.utc)
+
+
+def _ago(seconds: int) -> datetime:
+    return NOW - timedelta(seconds=seconds)
+
+
+def test_views_inside_budget_are_skipped_and_due_views_ordered_by_overdue_ratio():
+    last_refreshed = {
+        "mv_allocation_summary": _ago(30),  # 60s budget: fresh
+        "mv_realtime_revenue": _ago(90),  # 60s budget: 1.5x overdue
+        "mv_reconciliation_status": _ago(300),  # 60s budget: 5x overdue
+        "mv_channel_performance": _ago(4000),  # 3600s budget: 1.1x overdue
+        "mv_daily_revenue_summary": _ago(600),  # 3600s budget: fresh
+    }
+
+    plan = scheduler.plan_refresh(registry.list_entries(), last_refreshed, NOW)
+
+    assert plan.due_names == ["mv_reconciliation_status", "mv_realtime_revenue", "mv_channel_performance"]
+    assert [(item.entry.name, item.due_in_seconds) for item in plan.fresh] == [
+        ("mv_allocation_summary", 30.0),
+        ("mv_daily_revenue_summary", 3000.0),
+    ]
+
+
+def test_never_refreshed_views_are_due_first():
+    plan = scheduler.plan_refresh(
+        registry.list_entries(),
+        {"mv_reconciliation_status": _ago(3600)},
+        NOW,
+    )
+
+    assert plan.due_names[-1] == "mv_reconciliation_status"
+    assert sorted(plan.due_names[:-1]) == sorted(
+        name for name in registry.list_names() if name != "mv_reconciliation_status"
+    )
+
+
+def test_due_dependencies_refresh_before_more_overdue_dependents():
+    base = registry.get_entry("mv_allocation_summary")
+    upstream = replace(base, name="mv_upstream", max_staleness_seconds=3600)
+    downstream = replace(base, name="mv_downstream", dependencies=("mv_upstream",))
+    fresh_upstream = replace(base, name="mv_fresh_upstream", max_staleness_seconds=3600)
+    sibling = replace(base, name="mv_sibling", dependencies=("mv_fresh_upstream",))
+
+    plan = scheduler.plan_refresh(
+        [downstream, upstream, fresh_upstream, sibling],
+        {
+            "mv_upstream": _ago(3700),
+            "mv_downstream": _ago(600),
+            "mv_fresh_upstream": _ago(60),
+            "mv_sibling": _ago(120),
+        },
+        NOW,
+    )
+
+    # mv_downstream (10x) and mv_sibling (2x) are more overdue than mv_upstream (~1.03x),
+    # but mv_downstream waits for its due upstream; a fresh upstream does not block.
+    assert plan.due_names == ["mv_sibling", "mv_upstream", "mv_downstream"]
+
+
+def test_refresh_all_task_with_every_view_fresh_reports_skip(monkeypatch):
+    tenant_id = uuid4()
+
+    def fake_refresh_due(tenant_id_arg, correlation_id_arg, **_kwargs):
+        return [
+            executor._skipped_result(
+                name, tenant_id_arg, correlation_id_arg, executor.RefreshOutcome.SKIPPED_FRESH, NOW, None
+            )
+            for name in registry.list_names()
+        ]
+
+    monkeypatch.setattr(matview_tasks, "refresh_due_for_tenant", fake_refresh_due)
+    monkeypatch.setattr(matview_tasks, "refresh_tenant_summaries", lambda *_args: [])
+
+    result = matview_tasks.matview_refresh_all_for_tenant.run(
+        tenant_id=str(tenant_id),
+        schedule_class="minute",
+    )
+
+    assert result["status"] == "skipped"
+    assert {item["outcome"] for item in result["results"]} == {"SKIPPED_FRESH"}
+    assert result["deferred_views"] == []
+
+
+@pytest.mark.parametrize("backend", ["matview", "summary_tables"])
+def test_summary_refresh_failure_only_fails_task_under_summary_backend(monkeypatch, backend):
+    def fake_refresh_due(tenant_id_arg, correlation_id_arg, **_kwargs):
+        return [
+            executor._skipped_result(
+                name, tenant_id_arg, correlation_id_arg, executor.RefreshOutcome.SKIPPED_FRESH, NOW, None
+            )
+            for name in registry.list_names()
+        ]
+
+    def failing_summaries(*_args):
+        raise RuntimeError("summary refresh down")
+
+    monkeypatch.setattr(matview_tasks.settings, "MATVIEW_REFRESH_BACKEND", backend)
+    monkeypatch.setattr(matview_tasks, "refresh_due_for_tenant", fake_refresh_due)
+    monkeypatch.setattr(matview_tasks, "refresh_tenant_summaries", failing_summaries)
+
+    def run():
+        return matview_tasks.matview_refresh_all_for_tenant.run(tenant_id=str(uuid4()), schedule_class="minute")
+
+    if backend == "summary_tables":
+        with pytest.raises(matview_tasks.MatviewTaskFailure):
+            run()
+    else:
+        result = run()
+        assert result["status"] == "skipped"
+        assert result["summaries"] == []
+
+
+@pytest.mark.parametrize("backend", ["matview", "summary_tables"])
+def test_pulse_keeps_summary_dirty_tracking_in_line_with_backend(monkeypatch, backend):
+    tracking_calls = []
+
+    monkeypatch.setattr(matview_tasks.settings, "MATVIEW_REFRESH_BACKEND", backend)
+    monkeypatch.setattr(matview_tasks, "_prune_refresh_history", lambda: None)
+    monkeypatch.setattr(matview_tasks, "set_summary_dirty_tracking", tracking_calls.append)
+    monkeypatch.setattr(matview_tasks, "load_refresh_plan_sync", lambda entries: scheduler.RefreshPlan(due=[], fresh=[]))
+    monkeypatch.setattr(matview_tasks, "_fetch_tenant_ids_sync", lambda: [])
+
+    result = matview_tasks.pulse_matviews_global.run(schedule_class="minute")
+
+    assert result["status"] == "ok"
+    assert tracking_calls == [backend == "summary_tables"]
+
+
+def test_pulse_survives_summary_dirty_tracking_failure(monkeypatch):
+    def failing_tracking(_enabled):
+        raise RuntimeError("database down")
+
+    monkeypatch.setattr(matview_tasks, "_prune_refresh_history", lambda: None)
+    monkeypatch.setattr(matview_tasks, "set_summary_dirty_tracking", failing_tracking)
+    monkeypatch.setattr(matview_tasks, "load_refresh_plan_sync", lambda entries: scheduler.RefreshPlan(due=[], fresh=[]))
+
+    assert matview_tasks.pulse_matviews_global.run(schedule_class="minute")["status"] == "ok"
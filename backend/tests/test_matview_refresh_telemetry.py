@@ -0,0 +1,90 @@
+"""
+Matview refresh telemetry and adaptive refresh interval tests.
+
+Every refresh attempt lands in matview_refresh_history; adaptive mode keeps
+cheap, frequently-changing views near the interval floor and stretches
+expensive or rarely-changing views to their max_staleness_seconds.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+
+from app.db.session import engine
+from app.matviews import executor, registry, scheduler
+
+NOW = datetime(2026, 10, 17, 12, 0, tzinfo=timezone.utc)
+_HOURLY = registry.get_entry("mv_channel_performance")  # 3600s budget
+
+
+def _interval(avg_duration_seconds: float, change_rate: float, samples: int = 20) -> float:
+    stats = scheduler.RefreshStats(_HOURLY.name, samples, avg_duration_seconds, change_rate)
+    return scheduler.adaptive_interval_seconds(
+        _HOURLY, stats, min_interval_ratio=0.25, expensive_refresh_seconds=5.0
+    )
+
+
+def test_adaptive_interval_stays_within_floor_and_max_staleness():
+    no_history = scheduler.adaptive_interval_seconds(
+        _HOURLY, None, min_interval_ratio=0.25, expensive_refresh_seconds=5.0
+    )
+    assert no_history == 3600
+    assert _interval(0.0, 1.0) == 900  # cheap, every refresh changes rows
+    assert _interval(30.0, 1.0) == 3600  # expensive
+    assert _interval(0.0, 0.0) == 3600  # refreshes never change anything
+    assert 900 < _interval(1.0, 0.5) < 3600
+    assert _interval(1.0, 0.5) < _interval(2.5, 0.5) < _interval(2.5, 0.1)
+
+
+def test_adaptive_intervals_drive_due_decisions_and_fresh_rechecks():
+    last_refreshed = {_HOURLY.name: NOW - timedelta(seconds=1200)}
+
+    fixed = scheduler.plan_refresh([_HOURLY], last_refreshed, NOW)
+    assert fixed.due_names == []
+    assert fixed.fresh[0].due_in_seconds == 2400
+
+    adaptive = scheduler.plan_refresh([_HOURLY], last_refreshed, NOW, {_HOURLY.name: 900.0})
+    assert adaptive.due_names == [_HOURLY.name]
+    assert adaptive.due_intervals == {_HOURLY.name: 900.0}
+    assert adaptive.due[0].overdue_ratio == pytest.approx(1200 / 900)
+
+    # The under-lock re-check honours the same interval.
+    assert scheduler.is_fresh(_HOURLY, last_refreshed[_HOURLY.name], NOW)
+    assert not scheduler.is_fresh(_HOURLY, last_refreshed[_HOURLY.name], NOW, 900.0)
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_refresh_attempts_are_recorded_in_history():
+    async with engine.begin() as conn:
+        before = await conn.scalar(text("SELECT COALESCE(max(id), 0) FROM matview_refresh_history"))
+
+    result = executor.refresh_single("mv_daily_revenue_summary", None, "telemetry-test")
+    assert result.outcome == executor.RefreshOutcome.SUCCESS
+    assert result.rows_changed is not None
+
+    async with engine.begin() as conn:
+        row = (
+            await conn.execute(
+                text(
+                    """
+                    SELECT outcome, duration_ms, rows_inserted, rows_deleted, correlation_id
+                    FROM matview_refresh_history
+                    WHERE id > :before AND view_name = 'mv_daily_revenue_summary'
+                    ORDER BY id DESC
+                    LIMIT 1
+                    """
+                ),
+                {"before": before},
+            )
+        ).one()
+    assert row.outcome == "SUCCESS"
+    assert row.duration_ms == result.duration_ms
+    assert (row.rows_inserted, row.rows_deleted) == (result.rows_inserted, result.rows_deleted)
+    assert row.correlation_id == "telemetry-test"
+
+    with executor.sync_connection() as sync_conn:
+        stats = scheduler.load_refresh_stats_sync(sync_conn.cursor(), window=5)["mv_daily_revenue_summary"]
+    assert 1 <= stats.samples <= 5
+    assert 0.0 <= stats.change_rate <= 1.0
@@ -0,0 +1,138 @@
+"""
+Per-tenant incremental summary table tests.
+
+With dirty tracking on, allocation writes mark (tenant, bucket) groups dirty;
+the refresh recomputes only those groups and the consistency checker agrees
+with a full recompute. Enabling tracking marks pre-existing rows dirty.
+"""
+
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import text
+
+from app.core.db import engine
+from app.db.session import set_tenant_guc
+from app.matviews import registry, summaries
+from app.tasks.attribution import recompute_window
+from tests.builders.core_builders import build_revenue_ledger
+from tests.conftest import _insert_tenant
+
+
+def test_summary_specs_cover_tenant_scoped_registry_views():
+    assert summaries.SUMMARY_BACKEND_VIEW_NAMES <= set(registry.list_names())
+    assert "mv_reconciliation_status" not in summaries.SUMMARY_BACKEND_VIEW_NAMES
+    for spec in summaries.SUMMARY_SPECS:
+        assert spec.columns[0] == "tenant_id"
+
+
+def test_allocation_bucket_params_split_orphaned_allocations():
+    spec = next(spec for spec in summaries.SUMMARY_SPECS if spec.name == "allocation_totals")
+    event_id = str(uuid4())
+
+    assert spec.bucket_params([event_id, "null"]) == {"event_ids": [event_id], "include_orphans": True}
+    assert spec.bucket_params([event_id]) == {"event_ids": [event_id], "include_orphans": False}
+
+
+async def _summary_rows(tenant_id, table: str) -> int:
+    async with engine.begin() as conn:
+        await set_tenant_guc(conn, tenant_id, local=True)
+        return await conn.scalar(
+            text(f"SELECT count(*) FROM {table} WHERE tenant_id = :tenant_id"),
+            {"tenant_id": tenant_id},
+        )
+
+
+@pytest.fixture
+def summary_dirty_tracking():
+    summaries.set_summary_dirty_tracking(True)
+    yield
+    summaries.set_summary_dirty_tracking(False)
+
+
+async def _allocate_tenant_events(tenant_id, monkeypatch) -> None:
+    from app.celery_app import celery_app
+
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+
+    async with engine.begin() as conn:
+        await _insert_tenant(conn, tenant_id, api_key_hash=f"test_hash_{tenant_id}")
+        await set_tenant_guc(conn, tenant_id, local=True)
+        await conn.execute(text("SELECT set_config('app.execution_context', 'ingestion', true)"))
+        await conn.execute(
+            text(
+                # RAW_SQL_ALLOWLIST: bulk generate_series seed spanning fixed hourly buckets
+                """
+                INSERT INTO attribution_events (
+                    tenant_id, session_id, occurred_at, event_timestamp,
+                    idempotency_key, event_type, channel, revenue_cents, raw_payload
+                )
+                SELECT
+                    :tenant_id, gen_random_uuid(),
+                    '2025-05-01T01:00:00Z'::timestamptz + (n * interval '1 hour'),
+                    '2025-05-01T01:00:00Z'::timestamptz + (n * interval '1 hour'),
+                    CAST(:key_prefix AS text) || n, 'conversion', 'direct', 1200, '{}'::jsonb
+                FROM generate_series(0, 4) AS n
+                """
+            ),
+            {"tenant_id": tenant_id, "key_prefix": f"summary:{tenant_id}:"},
+        )
+
+    recompute_window.delay(
+        tenant_id=tenant_id,
+        window_start="2025-05-01T00:00:00Z",
+        window_end="2025-05-02T00:00:00Z",
+        model_version="1.0.0",
+    ).get()
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_incremental_refresh_matches_full_recompute_and_checker_repairs(monkeypatch, summary_dirty_tracking):
+    tenant_id = uuid4()
+    await _allocate_tenant_events(tenant_id, monkeypatch)
+
+    refreshed = {result.summary_name: result.bucket_count for result in summaries.refresh_tenant_summaries(tenant_id)}
+    assert refreshed["allocation_totals"] == 5
+    assert refreshed["channel_performance"] >= 1
+    assert await _summary_rows(tenant_id, "summary_allocation_totals") == 5
+
+    # Nothing changed since: a second refresh claims no buckets.
+    assert summaries.refresh_tenant_summaries(tenant_id) == []
+    assert all(result.consistent for result in summaries.check_tenant_summary_consistency(tenant_id))
+
+    async with engine.begin() as conn:
+        await set_tenant_guc(conn, tenant_id, local=True)
+        await conn.execute(
+            text("DELETE FROM summary_channel_performance WHERE tenant_id = :tenant_id"),
+            {"tenant_id": tenant_id},
+        )
+
+    checked = {result.summary_name: result for result in summaries.check_tenant_summary_consistency(tenant_id, repair=True)}
+    assert checked["channel_performance"].missing_rows >= 1
+    assert checked["channel_performance"].repaired is True
+    assert all(result.consistent for result in summaries.check_tenant_summary_consistency(tenant_id))
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_enabling_tracking_backfills_pre_existing_rows(monkeypatch):
+    summaries.set_summary_dirty_tracking(False)
+    tenant_id = uuid4()
+    await _allocate_tenant_events(tenant_id, monkeypatch)
+    await build_revenue_ledger(tenant_id=tenant_id)
+    # Written while tracking was off: nothing is dirty, so nothing is refreshed.
+    assert summaries.refresh_tenant_summaries(tenant_id) == []
+
+    try:
+        assert summaries.set_summary_dirty_tracking(True) is True
+        assert summaries.set_summary_dirty_tracking(True) is False
+
+        refreshed = {result.summary_name for result in summaries.refresh_tenant_summaries(tenant_id)}
+    finally:
+        summaries.set_summary_dirty_tracking(False)
+
+    assert refreshed == {spec.name for spec in summaries.SUMMARY_SPECS}
+    assert await _summary_rows(tenant_id, "summary_allocation_totals") >= 5
+    assert await _summary_rows(tenant_id, "summary_realtime_revenue") == 1
+    assert all(result.consistent for result in summaries.check_tenant_summary_consistency(tenant_id))
@@ -0,0 +1,56 @@
+"""
+Observability middleware tests (raw ASGI).
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from httpx import ASGITransport, AsyncClient
+
+from app.middleware.observability import ObservabilityMiddleware
+from app.observability.context import get_request_correlation_id
+
+
+def _build_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(ObservabilityMiddleware)
+
+    @app.get("/ping")
+    async def ping():
+        return {"correlation_id": get_request_correlation_id()}
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                yield f"chunk-{i};".encode()
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    return app
+
+
+@pytest.mark.asyncio
+async def test_inbound_correlation_id_is_propagated_and_echoed():
+    async with AsyncClient(transport=ASGITransport(app=_build_app()), base_url="http://test") as client:
+        resp = await client.get("/ping", headers={"X-Correlation-ID": "abc-123"})
+
+    assert resp.headers["X-Correlation-ID"] == "abc-123"
+    assert resp.json()["correlation_id"] == "abc-123"
+
+
+@pytest.mark.asyncio
+async def test_correlation_id_generated_when_absent():
+    async with AsyncClient(transport=ASGITransport(app=_build_app()), base_url="http://test") as client:
+        resp = await client.get("/ping")
+
+    assert resp.headers["X-Correlation-ID"] == resp.json()["correlation_id"]
+
+
+@pytest.mark.asyncio
+async def test_streaming_response_passes_through_with_header():
+    async with AsyncClient(transport=ASGITransport(app=_build_app()), base_url="http://test") as client:
+        resp = await client.get("/stream")
+
+    assert resp.text == "chunk-0;chunk-1;chunk-2;"
+    assert resp.headers.get("X-Correlation-ID")
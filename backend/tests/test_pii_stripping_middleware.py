@@ -0,0 +1,137 @@
+"""
+PII stripping middleware tests (ASGI, single parse).
+"""
+
+import json
+
+import pytest
+from fastapi import FastAPI, Request
+from httpx import ASGITransport, AsyncClient
+
+from app.middleware.pii_stripping import (
+    PIIStrippingMiddleware,
+    strip_pii_keys_in_place,
+    strip_pii_keys_recursive,
+)
+
+
+def _build_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(PIIStrippingMiddleware)
+
+    async def _echo(request: Request):
+        body = await request.body()
+        return {
+            "body": body.decode(),
+            "original_body": (getattr(request.state, "original_body", b"") or b"").decode(),
+            "parsed_body": getattr(request.state, "parsed_body", None),
+            "paths": getattr(request.state, "pii_redacted_paths", None),
+        }
+
+    app.add_api_route("/api/webhooks/echo", _echo, methods=["POST"])
+    app.add_api_route("/api/auth/echo", _echo, methods=["POST"])
+    return app
+
+
+async def _post(path: str, content: bytes):
+    async with AsyncClient(transport=ASGITransport(app=_build_app()), base_url="http://test") as client:
+        return await client.post(path, content=content, headers={"Content-Type": "application/json"})
+
+
+def test_strip_in_place_reports_only_removed_paths():
+    payload = {
+        "id": 1,
+        "Email": "a@b.c",
+        "customer": {"phone": "1", "id": 2},
+        "line_items": [{"title": "x"}, {"shipping_address": {"zip": "1"}}],
+    }
+    removed = strip_pii_keys_in_place(payload)
+
+    assert removed == ["root.Email", "root.customer.phone", "root.line_items[1].shipping_address"]
+    assert payload == {"id": 1, "customer": {"id": 2}, "line_items": [{"title": "x"}, {}]}
+
+
+def test_strip_recursive_does_not_mutate_input():
+    payload = {"email": "a@b.c", "nested": {"ip": "1.2.3.4"}}
+    sanitized, removed = strip_pii_keys_recursive(payload)
+
+    assert sanitized == {"nested": {}}
+    assert removed == ["root.email", "root.nested.ip"]
+    assert "email" in payload
+
+
+@pytest.mark.asyncio
+async def test_pii_removed_and_original_body_preserved():
+    raw = json.dumps({"id": 7, "customer": {"email": "a@b.c"}}).encode()
+    resp = await _post("/api/webhooks/echo", raw)
+    data = resp.json()
+
+    assert json.loads(data["body"]) == {"id": 7, "customer": {}}
+    assert data["original_body"] == raw.decode()
+    assert data["parsed_body"] == {"id": 7, "customer": {}}
+    assert data["paths"] == ["root.customer.email"]
+
+
+@pytest.mark.asyncio
+async def test_clean_body_is_replayed_byte_for_byte():
+    raw = b'{"id":  7, "total_price": "1.00"}'
+    resp = await _post("/api/webhooks/echo", raw)
+    data = resp.json()
+
+    assert data["body"] == raw.decode()
+    assert data["paths"] == []
+
+
+@pytest.mark.asyncio
+async def test_non_ingestion_paths_are_untouched():
+    raw = json.dumps({"email": "user@example.com"}).encode()
+    resp = await _post("/api/auth/echo", raw)
+    data = resp.json()
+
+    assert json.loads(data["body"]) == {"email": "user@example.com"}
+    assert data["paths"] is None
+
+
+@pytest.mark.asyncio
+async def test_invalid_json_passes_through():
+    resp = await _post("/api/webhooks/echo", b"{not json")
+    data = resp.json()
+
+    assert data["body"] == "{not json"
+    assert data["paths"] is None
+
+
+@pytest.mark.asyncio
+async def test_parsed_body_route_validates_without_second_decode(monkeypatch):
+    from fastapi import APIRouter, Body
+
+    from app.middleware.pii_stripping import ParsedBodyRoute
+
+    router = APIRouter(route_class=ParsedBodyRoute)
+
+    @router.post("/api/webhooks/parsed")
+    async def _parsed(payload: dict = Body(...)):
+        return payload
+
+    app = FastAPI()
+    app.add_middleware(PIIStrippingMiddleware)
+    app.include_router(router)
+
+    decodes = []
+    real_loads = json.loads
+
+    def _counting_loads(*args, **kwargs):
+        decodes.append(args[0])
+        return real_loads(*args, **kwargs)
+
+    monkeypatch.setattr(json, "loads", _counting_loads)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        resp = await client.post(
+            "/api/webhooks/parsed",
+            content=b'{"id": 7, "email": "a@b.c"}',
+            headers={"Content-Type": "application/json"},
+        )
+    monkeypatch.setattr(json, "loads", real_loads)
+
+    assert resp.json() == {"id": 7}
+    assert len(decodes) == 1
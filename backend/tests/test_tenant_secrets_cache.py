@@ -0,0 +1,115 @@
+"""
+Webhook tenant secret cache tests.
+
+The cache sits in front of `security.resolve_tenant_webhook_secrets`; these tests
+stub the DB resolver and validate hit/miss, negative caching, LRU bounds and
+invalidation semantics.
+"""
+
+import hashlib
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from app.core import tenant_context
+from app.core.config import settings
+
+
+def _hash(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+
+@pytest.fixture
+def resolver(monkeypatch):
+    calls: list[str] = []
+    known: dict[str, dict] = {}
+
+    async def _fake_resolve(api_key_hash: str):
+        calls.append(api_key_hash)
+        return known.get(api_key_hash)
+
+    monkeypatch.setattr(tenant_context, "_resolve_webhook_secrets", _fake_resolve)
+    monkeypatch.setattr(tenant_context, "_ensure_secrets_invalidation_listener", lambda: None)
+    monkeypatch.setattr(tenant_context, "_secrets_cache", tenant_context._WebhookSecretsCache())
+    return calls, known
+
+
+@pytest.mark.asyncio
+async def test_positive_lookup_is_cached(resolver):
+    calls, known = resolver
+    known[_hash("key-a")] = {"tenant_id": uuid4(), "shopify_webhook_secret": "s1"}
+
+    first = await tenant_context.get_tenant_with_webhook_secrets("key-a")
+    second = await tenant_context.get_tenant_with_webhook_secrets("key-a")
+
+    assert first == second
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_unknown_key_is_negatively_cached(resolver):
+    calls, _ = resolver
+
+    for _ in range(3):
+        with pytest.raises(HTTPException) as exc:
+            await tenant_context.get_tenant_with_webhook_secrets("unknown")
+        assert exc.value.status_code == 401
+
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_invalidation_forces_reload_after_rotation(resolver):
+    calls, known = resolver
+    tenant_id = uuid4()
+    known[_hash("key-b")] = {"tenant_id": tenant_id, "shopify_webhook_secret": "old"}
+    await tenant_context.get_tenant_with_webhook_secrets("key-b")
+
+    known[_hash("key-b")] = {"tenant_id": tenant_id, "shopify_webhook_secret": "new"}
+    tenant_context._on_secrets_changed_notify(None, 0, "tenant_webhook_secrets_changed", _hash("key-b"))
+
+    refreshed = await tenant_context.get_tenant_with_webhook_secrets("key-b")
+    assert refreshed["shopify_webhook_secret"] == "new"
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_lookup_racing_invalidation_is_not_cached(resolver, monkeypatch):
+    calls, known = resolver
+    known[_hash("key-c")] = {"tenant_id": uuid4(), "shopify_webhook_secret": "s"}
+    original = tenant_context._resolve_webhook_secrets
+
+    async def _resolve_then_rotate(api_key_hash: str):
+        result = await original(api_key_hash)
+        tenant_context.invalidate_webhook_secrets_cache(api_key_hash, reason="notify")
+        return result
+
+    monkeypatch.setattr(tenant_context, "_resolve_webhook_secrets", _resolve_then_rotate)
+    await tenant_context.get_tenant_with_webhook_secrets("key-c")
+
+    assert len(tenant_context._secrets_cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_cache_is_bounded(resolver, monkeypatch):
+    _, known = resolver
+    monkeypatch.setattr(settings, "TENANT_SECRETS_CACHE_MAX_ENTRIES", 2)
+    for name in ("k1", "k2", "k3"):
+        known[_hash(name)] = {"tenant_id": uuid4()}
+        await tenant_context.get_tenant_with_webhook_secrets(name)
+
+    assert len(tenant_context._secrets_cache) == 2
+    assert tenant_context._secrets_cache.get(_hash("k1")) is tenant_context._WebhookSecretsCache._MISSING
+
+
+@pytest.mark.asyncio
+async def test_zero_ttl_disables_cache(resolver, monkeypatch):
+    calls, known = resolver
+    monkeypatch.setattr(settings, "TENANT_SECRETS_CACHE_TTL_SECONDS", 0)
+    known[_hash("key-d")] = {"tenant_id": uuid4()}
+
+    await tenant_context.get_tenant_with_webhook_secrets("key-d")
+    await tenant_context.get_tenant_with_webhook_secrets("key-d")
+
+    assert len(calls) == 2
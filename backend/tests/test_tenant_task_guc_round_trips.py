@@ -0,0 +1,85 @@
+"""
+Tenant GUC propagation for @tenant_task.
+
+The decorator performs no DB round trips of its own (it used to run a
+throwaway 7-round-trip transaction per task); get_session() applies tenant,
+user and execution context in a single statement on the body's session.
+"""
+
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import event, text
+
+from app.db.session import engine, get_execution_context, get_session
+from app.tasks.context import run_in_worker_loop, tenant_task
+
+
+def _task_self():
+    return SimpleNamespace(
+        request=SimpleNamespace(id="guc-round-trips"),
+        app=SimpleNamespace(conf=SimpleNamespace(task_always_eager=False)),
+        name="tests.guc_round_trips",
+    )
+
+
+class _StatementCounter:
+    def __init__(self):
+        self.statements = []
+
+    def __enter__(self):
+        event.listen(engine.sync_engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine.sync_engine, "before_cursor_execute", self._record)
+        return False
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+def test_decorator_issues_no_statements_and_propagates_worker_context():
+    async def _loop_context():
+        return get_execution_context()
+
+    @tenant_task
+    def body(self, tenant_id, user_id=None, correlation_id=None):
+        return get_execution_context(), run_in_worker_loop(_loop_context())
+
+    with _StatementCounter() as counter:
+        in_body, in_loop = body(_task_self(), tenant_id=str(uuid4()))
+
+    assert counter.statements == []
+    assert (in_body, in_loop) == ("worker", "worker")
+    assert get_execution_context() is None
+
+
+@pytest.mark.integration
+def test_task_session_gets_all_gucs_in_one_round_trip():
+    tenant_id, user_id = uuid4(), uuid4()
+
+    async def _probe(counter):
+        async with get_session(tenant_id=tenant_id, user_id=user_id) as session:
+            setup_statements = len(counter.statements)
+            row = (
+                await session.execute(
+                    text(
+                        "SELECT current_setting('app.current_tenant_id', true) AS tenant,"
+                        " current_setting('app.current_user_id', true) AS user_id,"
+                        " current_setting('app.execution_context', true) AS execution_context"
+                    )
+                )
+            ).one()
+        return setup_statements, row
+
+    @tenant_task
+    def body(self, tenant_id, user_id=None, correlation_id=None):
+        with _StatementCounter() as counter:
+            return run_in_worker_loop(_probe(counter))
+
+    setup_statements, row = body(_task_self(), tenant_id=tenant_id, user_id=user_id)
+
+    assert setup_statements == 1
+    assert (row.tenant, row.user_id, row.execution_context) == (str(tenant_id), str(user_id), "worker")
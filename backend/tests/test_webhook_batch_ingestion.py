@@ -0,0 +1,140 @@
+"""
+Batch webhook ingestion tests.
+
+Validates the set-based ingestion path: one transaction per batch, per-item
+outcomes (inserted / duplicate / dlq_routed) and the batch size guard on the
+Shopify batch route.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import func, select
+
+from app.api import webhooks
+from app.core.config import settings
+from app.db.session import get_session
+from app.ingestion.event_service import (
+    EventIngestionService,
+    ingest_batch_with_transaction,
+)
+from app.models import AttributionEvent, DeadEvent
+
+
+def _event(**overrides) -> dict:
+    data = {
+        "event_type": "purchase",
+        "event_timestamp": datetime.now(timezone.utc).isoformat(),
+        "revenue_amount": "12.34",
+        "session_id": str(uuid4()),
+        "vendor": "shopify",
+        "utm_source": "shopify",
+    }
+    data.update(overrides)
+    return data
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_batch_reports_inserted_duplicate_and_dlq_outcomes(test_tenant):
+    tenant_id = test_tenant
+    existing_key = f"batch_existing_{uuid4()}"
+    new_key = f"batch_new_{uuid4()}"
+
+    async with get_session(tenant_id=tenant_id) as session:
+        await EventIngestionService().ingest_event(
+            session=session,
+            tenant_id=tenant_id,
+            event_data=_event(),
+            idempotency_key=existing_key,
+            source="shopify",
+        )
+
+    items = [
+        {"event_data": _event(), "idempotency_key": new_key},
+        {"event_data": _event(), "idempotency_key": existing_key},
+        {"event_data": _event(), "idempotency_key": new_key},
+        {"event_data": _event(session_id="not-a-uuid"), "idempotency_key": f"batch_bad_{uuid4()}"},
+        {"event_data": _event(), "idempotency_key": None},
+    ]
+    result = await ingest_batch_with_transaction(tenant_id=tenant_id, items=items, source="shopify")
+
+    statuses = [item["status"] for item in result["items"]]
+    assert statuses == ["inserted", "duplicate", "duplicate", "dlq_routed", "dlq_routed"]
+    assert (result["inserted"], result["duplicates"], result["dlq_routed"]) == (1, 2, 2)
+    assert result["items"][0]["event_id"] == result["items"][2]["event_id"]
+    assert result["items"][0]["channel"]
+    assert all(item["dead_event_id"] for item in result["items"][3:])
+
+    async with get_session(tenant_id=tenant_id) as session:
+        inserted_count = await session.scalar(
+            select(func.count())
+            .select_from(AttributionEvent)
+            .where(
+                AttributionEvent.tenant_id == tenant_id,
+                AttributionEvent.idempotency_key == new_key,
+            )
+        )
+        dead_count = await session.scalar(
+            select(func.count()).select_from(DeadEvent).where(DeadEvent.tenant_id == tenant_id)
+        )
+    assert inserted_count == 1
+    assert dead_count == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_batch_replay_is_idempotent(test_tenant):
+    tenant_id = test_tenant
+    items = [
+        {"event_data": _event(), "idempotency_key": f"batch_replay_{uuid4()}"}
+        for _ in range(25)
+    ]
+
+    first = await ingest_batch_with_transaction(tenant_id=tenant_id, items=items, source="shopify")
+    second = await ingest_batch_with_transaction(tenant_id=tenant_id, items=items, source="shopify")
+
+    assert first["inserted"] == 25
+    assert second["inserted"] == 0
+    assert second["duplicates"] == 25
+    assert [i["event_id"] for i in first["items"]] == [i["event_id"] for i in second["items"]]
+
+
+@pytest.mark.asyncio
+async def test_shopify_batch_rejects_oversized_batch(monkeypatch):
+    secret = "shopify_batch_secret"
+
+    async def _tenant_secrets():
+        return {"tenant_id": uuid4(), "shopify_webhook_secret": secret}
+
+    monkeypatch.setattr(settings, "INGESTION_BATCH_MAX_EVENTS", 2)
+    body = json.dumps(
+        {
+            "orders": [
+                {"id": i, "total_price": "1.00", "currency": "USD"}
+                for i in range(1, 4)
+            ]
+        }
+    ).encode()
+    signature = base64.b64encode(hmac.new(secret.encode(), body, hashlib.sha256).digest()).decode()
+
+    from app.main import app
+
+    app.dependency_overrides[webhooks.tenant_secrets] = _tenant_secrets
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            resp = await client.post(
+                "/api/webhooks/shopify/order_create/batch",
+                content=body,
+                headers={"X-Shopify-Hmac-Sha256": signature, "Content-Type": "application/json"},
+            )
+    finally:
+        app.dependency_overrides.pop(webhooks.tenant_secrets, None)
+
+    assert resp.status_code == 413
@@ -0,0 +1,72 @@
+"""
+DLQ-routed webhook responses.
+
+The ingestion service returns the id of the dead event it routed a rejected
+webhook to, so the response is built without re-reading dead_events.
+"""
+
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import select
+
+from app.api import webhooks
+from app.db.session import get_session
+from app.ingestion.event_service import ingest_with_transaction
+from app.models import DeadEvent
+
+
+@pytest.mark.asyncio
+async def test_handle_ingestion_reports_routed_dead_event_without_lookup(monkeypatch):
+    dead_event_id = str(uuid4())
+    calls = []
+
+    async def _ingest(**kwargs):
+        calls.append(kwargs)
+        return {
+            "status": "error",
+            "error_type": "validation_error",
+            "error": "Missing required field: session_id",
+            "dlq_event_id": dead_event_id,
+        }
+
+    def _no_session(*args, **kwargs):
+        raise AssertionError("DLQ response must not re-query dead_events")
+
+    monkeypatch.setattr(webhooks, "ingest_with_transaction", _ingest)
+    monkeypatch.setattr("app.db.session.get_session", _no_session)
+
+    response = await webhooks._handle_ingestion(uuid4(), {"vendor": "shopify"}, "key-1", "shopify")
+
+    assert len(calls) == 1
+    assert response == {
+        "status": "dlq_routed",
+        "dead_event_id": dead_event_id,
+        "error": "Missing required field: session_id",
+    }
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_ingest_with_transaction_returns_committed_dead_event_id(test_tenant):
+    idempotency_key = f"dlq_response_{uuid4()}"
+    result = await ingest_with_transaction(
+        tenant_id=test_tenant,
+        event_data={
+            "event_type": "purchase",
+            "event_timestamp": datetime.now(timezone.utc).isoformat(),
+            "revenue_amount": "10.00",
+            "vendor": "shopify",
+            "idempotency_key": idempotency_key,
+        },
+        idempotency_key=idempotency_key,
+        source="shopify",
+    )
+
+    async with get_session(tenant_id=test_tenant) as session:
+        dead_event = await session.scalar(select(DeadEvent).where(DeadEvent.id == result["dlq_event_id"]))
+
+    assert result["status"] == "error"
+    assert dead_event is not None
+    assert dead_event.raw_payload["idempotency_key"] == idempotency_key
@@ -0,0 +1,114 @@
+"""
+Buffered worker_failed_jobs writer.
+
+Task failures are written in multi-row batches over one persistent connection
+per process, so failure storms do not turn into connection storms; failures
+beyond the buffer bound are counted and dropped.
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from app.celery_dlq import FailedJobRow, WorkerDLQWriter
+from app.observability import metrics
+
+
+class _FakeCursor:
+    def __init__(self, conn):
+        self.connection = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def mogrify(self, template, args):
+        self.connection.rows += 1
+        return b"(row)"
+
+    def execute(self, sql, params=None):
+        self.connection.statements.append(sql.decode() if isinstance(sql, bytes) else sql)
+
+
+class _FakeConnection:
+    encoding = "UTF8"
+
+    def __init__(self):
+        self.closed = 0
+        self.rows = 0
+        self.statements = []
+
+    def cursor(self):
+        return _FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = 1
+
+
+class _Connector:
+    def __init__(self):
+        self.connections = []
+
+    def __call__(self):
+        self.connections.append(_FakeConnection())
+        return self.connections[-1]
+
+
+def _row(n, tenant_id=None):
+    return FailedJobRow(
+        id=f"00000000-0000-0000-0000-{n:012d}",
+        task_id=f"task-{n}",
+        task_name="app.tasks.housekeeping.ping",
+        queue="housekeeping",
+        worker="worker@test",
+        task_args=[],
+        task_kwargs={"n": n},
+        tenant_id=tenant_id,
+        error_type="validation_error",
+        exception_class="ValueError",
+        error_message="boom",
+        traceback=None,
+        retry_count=0,
+        correlation_id=None,
+        failed_at=datetime.now(timezone.utc),
+    )
+
+
+@pytest.mark.parametrize("failures", [10, 1000])
+def test_connections_opened_stay_constant_as_failures_grow(failures):
+    connect = _Connector()
+    writer = WorkerDLQWriter(connect, buffer_size=5000, batch_size=100, flush_interval_s=60)
+    tenants = [None, "11111111-1111-1111-1111-111111111111"]
+
+    for n in range(failures):
+        assert writer.submit(_row(n, tenant_id=tenants[n % 2]))
+    writer.close()
+
+    assert len(connect.connections) == 1
+    [conn] = connect.connections
+    inserts = [sql for sql in conn.statements if "INSERT INTO worker_failed_jobs" in sql]
+    assert conn.rows == failures
+    assert len(inserts) <= 2 * -(-failures // 100)
+    assert all("ON CONFLICT (id) DO NOTHING" in sql for sql in inserts)
+    assert conn.closed
+
+
+def test_overflow_is_counted_and_buffered_rows_flush_on_close():
+    connect = _Connector()
+    writer = WorkerDLQWriter(connect, buffer_size=3, batch_size=10, flush_interval_s=60)
+    overflowed_before = metrics.worker_dlq_rows_overflowed_total._value.get()
+
+    accepted = [writer.submit(_row(n)) for n in range(5)]
+    writer.close()
+
+    assert accepted == [True, True, True, False, False]
+    assert metrics.worker_dlq_rows_overflowed_total._value.get() - overflowed_before == 2
+    assert connect.connections[0].rows == 3
@@ -0,0 +1,57 @@
+"""
+Worker event loop pool.
+
+Task threads are pinned to one of WORKER_EVENT_LOOPS loops; each extra loop
+has its own engine so asyncpg connections never cross loops, and a task that
+blocks its loop does not stall tasks pinned to another one.
+"""
+
+import threading
+import time
+
+from app.db import session as db_session
+from app.observability import metrics
+from app.tasks.context import WorkerLoopPool
+
+
+def _on_new_thread(fn):
+    result = {}
+    thread = threading.Thread(target=lambda: result.setdefault("value", fn()))
+    thread.start()
+    thread.join()
+    return result["value"]
+
+
+def test_threads_pin_to_distinct_loops_with_per_loop_engines():
+    pool = WorkerLoopPool(2)
+
+    async def _engine():
+        return db_session.current_engine()
+
+    first = _on_new_thread(lambda: (pool.loop_for_current_thread(), pool.run(_engine(), timeout=5)))
+    second = _on_new_thread(lambda: (pool.loop_for_current_thread(), pool.run(_engine(), timeout=5)))
+
+    assert first[0] is not second[0]
+    assert first[1] is db_session.engine
+    assert second[1] is not db_session.engine
+    assert pool.loop_for_current_thread() is first[0]
+    assert pool.loop_for_current_thread() is pool.loop_for_current_thread()
+
+
+def test_blocking_work_on_one_loop_does_not_stall_another():
+    pool = WorkerLoopPool(2)
+    calls_before = metrics.worker_loop_calls_total._value.get()
+
+    async def _block():
+        time.sleep(0.5)
+        return time.perf_counter()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=pool.run, args=(_block(), 5)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert time.perf_counter() - started < 0.9
+    assert metrics.worker_loop_calls_total._value.get() - calls_before == 2